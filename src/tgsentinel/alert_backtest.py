@@ -0,0 +1,389 @@
+"""Column-oriented alert-profile backtests over the stored message history.
+
+An alert score is additive: the non-keyword detections (VIP sender, code,
+links, direct questions in private chats, ...) plus a fixed weight for every
+keyword category with a match (``KEYWORD_CATEGORY_WEIGHTS``). A sweep therefore
+computes, per message and only once:
+
+- the non-keyword score and reasons, with ``run_heuristics`` and no keywords
+- which keywords of *all* candidate keyword sets occur, in one matcher pass
+
+and then scores every candidate keyword set as a few array operations over the
+chunk, comparing the scores against every ``min_score`` at once. Sweeping 20
+thresholds costs about the same as evaluating one.
+
+Messages flagged for the alerts feed when they were processed are the ground
+truth, as in the single-profile backtest. Media and forwards are not stored
+with messages, so those detections never fire in a backtest.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from .heuristics import (
+    KEYWORD_CATEGORY_WEIGHTS,
+    PRIVATE_ACTION_WEIGHT,
+    compile_keyword_matcher,
+    run_heuristics,
+)
+from .timestamp_utils import db_cutoff
+
+log = logging.getLogger(__name__)
+
+# Alert profile fields merged into each keyword category (legacy names included)
+ALERT_KEYWORD_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "action": ("action_keywords",),
+    "decision": ("decision_keywords",),
+    "urgency": ("urgency_keywords", "critical_keywords"),
+    "importance": ("importance_keywords", "project_keywords"),
+    "release": ("release_keywords",),
+    "security": ("security_keywords",),
+    "risk": ("risk_keywords",),
+    "opportunity": ("opportunity_keywords", "financial_keywords"),
+    "keywords": (
+        "keywords",
+        "general_keywords",
+        "technical_keywords",
+        "community_keywords",
+    ),
+}
+
+DEFAULT_MIN_SCORES = tuple(round(0.5 * i, 1) for i in range(1, 21))  # 0.5 .. 10.0
+
+# Score histogram: HISTOGRAM_BINS bins of HISTOGRAM_BIN_WIDTH, the last one open
+HISTOGRAM_BIN_WIDTH = 0.5
+HISTOGRAM_BINS = 30
+
+_NO_KEYWORDS = compile_keyword_matcher({})
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(item) for item in value if isinstance(item, str)]
+    if isinstance(value, str):
+        value = value.strip()
+        return [value] if value else []
+    return []
+
+
+def keyword_categories(profile: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Category -> deduplicated keywords of an alert profile definition."""
+    categories: Dict[str, List[str]] = {}
+    for category, fields in ALERT_KEYWORD_FIELDS.items():
+        combined: List[str] = []
+        for field in fields:
+            combined.extend(_as_list(profile.get(field, [])))
+        categories[category] = list(dict.fromkeys(combined))
+    return categories
+
+
+def _percent(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator * 100, 1) if denominator else 0.0
+
+
+@dataclass(frozen=True)
+class AlertCandidate:
+    """A keyword set to evaluate (category -> keywords, see KEYWORD_CATEGORY_FIELDS)."""
+
+    name: str
+    categories: Dict[str, List[str]]
+
+
+class _CandidateTally:
+    """Per-threshold counts and the score histogram of one candidate."""
+
+    def __init__(self, candidate: AlertCandidate, vocabulary: Dict[str, int], n: int):
+        self.candidate = candidate
+        self.columns = {
+            category: np.asarray(
+                sorted({vocabulary[k.lower()] for k in keywords if k}),
+                dtype=np.intp,
+            )
+            for category, keywords in candidate.categories.items()
+            if category in KEYWORD_CATEGORY_WEIGHTS and keywords
+        }
+        self.alerts = np.zeros(n, dtype=np.int64)
+        self.true_positives = np.zeros(n, dtype=np.int64)
+        self.histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        self.flagged_histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+
+
+class AlertBacktest:
+    """Evaluate alert keyword sets and ``min_score`` values in one pass.
+
+    Args:
+        engine: SQLAlchemy engine of the sentinel database
+        profile: Alert profile definition; supplies the VIP senders, excluded
+            users, detection flags and, without ``candidates``, the keywords
+        candidates: Keyword sets to compare (default: the profile's own)
+        min_scores: Alert thresholds evaluated for every candidate
+        hours_back: Only messages newer than this (None: the entire history)
+        max_messages: Only the most recent messages
+        channel_filter: Only messages of this chat
+        chunk_size: Rows fetched and evaluated per step
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        profile: Dict[str, Any],
+        candidates: Optional[Sequence[AlertCandidate]] = None,
+        min_scores: Sequence[float] = DEFAULT_MIN_SCORES,
+        hours_back: Optional[float] = None,
+        max_messages: Optional[int] = None,
+        channel_filter: Optional[int] = None,
+        chunk_size: int = 2000,
+    ):
+        self.engine = engine
+        self.profile = profile
+        self.candidates = (
+            list(candidates)
+            if candidates
+            else [
+                AlertCandidate(
+                    str(profile.get("name") or "profile"), keyword_categories(profile)
+                )
+            ]
+        )
+        self.min_scores = np.asarray(sorted(set(min_scores)), dtype=np.float64)
+        self.hours_back = hours_back
+        self.max_messages = max_messages
+        self.channel_filter = channel_filter
+        self.chunk_size = max(1, chunk_size)
+
+        self.vip_senders: Set[int] = self._ids(profile.get("vip_senders", []))
+        self.excluded_users: Set[int] = self._ids(profile.get("excluded_users", []))
+        self.flags = {
+            flag: bool(profile.get(flag, False))
+            for flag in (
+                "detect_codes",
+                "detect_documents",
+                "detect_links",
+                "prioritize_pinned",
+                "prioritize_admin",
+                "prioritize_private",
+                "detect_polls",
+            )
+        }
+
+        # Every keyword of every candidate, lowered -> column of the hit matrix
+        vocabulary: Dict[str, int] = {}
+        for candidate in self.candidates:
+            for keywords in candidate.categories.values():
+                for keyword in keywords:
+                    if keyword:
+                        vocabulary.setdefault(keyword.lower(), len(vocabulary))
+        self._vocabulary = vocabulary
+        self._matcher = compile_keyword_matcher({"vocabulary": list(vocabulary)})
+        self._tallies = [
+            _CandidateTally(candidate, vocabulary, len(self.min_scores))
+            for candidate in self.candidates
+        ]
+
+        self.processed = 0
+        self.evaluated = 0
+        self.excluded = 0
+        self.flagged = 0
+
+    @staticmethod
+    def _ids(raw: Any) -> Set[int]:
+        ids = set()
+        for value in raw if isinstance(raw, (list, set, tuple)) else [raw]:
+            try:
+                number = int(value)
+            except (TypeError, ValueError):
+                continue
+            if number > 0:
+                ids.add(number)
+        return ids
+
+    def run(self) -> Dict[str, Any]:
+        """Evaluate every candidate over the history and return the report."""
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=self.chunk_size
+            ).execute(*self._query())
+            for rows in result.partitions(self.chunk_size):
+                self._evaluate_chunk(rows)
+
+        report = self.report()
+        report["duration_seconds"] = round(time.perf_counter() - started, 3)
+        log.info(
+            "[BACKTEST] Alert sweep: %d messages, %d candidates x %d thresholds "
+            "in %.2fs",
+            self.processed,
+            len(self.candidates),
+            len(self.min_scores),
+            report["duration_seconds"],
+        )
+        return report
+
+    def _query(self) -> Tuple[Any, Dict[str, Any]]:
+        sql = (
+            "SELECT chat_id, message_text, flagged_for_alerts_feed, sender_id "
+            "FROM messages"
+        )
+        where = []
+        params: Dict[str, Any] = {}
+        if self.hours_back is not None:
+            where.append("created_at >= :cutoff")
+            params["cutoff"] = db_cutoff(self.hours_back)
+        if self.channel_filter is not None:
+            where.append("chat_id = :channel_id")
+            params["channel_id"] = self.channel_filter
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC"
+        if self.max_messages is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = self.max_messages
+        return text(sql), params
+
+    def _evaluate_chunk(self, rows: List[Any]) -> None:
+        self.processed += len(rows)
+        kept = [row for row in rows if (row.sender_id or 0) not in self.excluded_users]
+        self.excluded += len(rows) - len(kept)
+        n = len(kept)
+        if not n:
+            return
+
+        base_score = np.empty(n, dtype=np.float64)
+        base_important = np.empty(n, dtype=bool)
+        private = np.empty(n, dtype=bool)
+        flagged = np.empty(n, dtype=bool)
+        hits = np.zeros((n, max(len(self._vocabulary), 1)), dtype=bool)
+        for i, row in enumerate(kept):
+            message_text = row.message_text or ""
+            chat_id = row.chat_id or 0
+            base = run_heuristics(
+                text=message_text,
+                sender_id=int(row.sender_id or 0),
+                mentioned=False,
+                reactions=0,
+                replies=0,
+                vip=self.vip_senders,
+                keywords=[],
+                react_thr=0,
+                reply_thr=0,
+                is_private=chat_id > 0,
+                keyword_matcher=_NO_KEYWORDS,
+                **self.flags,
+            )
+            base_score[i] = base.pre_score
+            base_important[i] = base.important
+            private[i] = chat_id > 0
+            flagged[i] = bool(row.flagged_for_alerts_feed)
+            for keyword in self._matcher.match(message_text).get("vocabulary", ()):
+                hits[i, self._vocabulary[keyword]] = True
+
+        self.evaluated += n
+        self.flagged += int(flagged.sum())
+        for tally in self._tallies:
+            self._tally_chunk(tally, base_score, base_important, private, flagged, hits)
+
+    def _tally_chunk(
+        self,
+        tally: _CandidateTally,
+        base_score: np.ndarray,
+        base_important: np.ndarray,
+        private: np.ndarray,
+        flagged: np.ndarray,
+        hits: np.ndarray,
+    ) -> None:
+        score = base_score.copy()
+        important = base_important.copy()
+        for category, columns in tally.columns.items():
+            matched = hits[:, columns].any(axis=1)
+            weight = KEYWORD_CATEGORY_WEIGHTS[category]
+            if category == "action":
+                weight = np.where(private, PRIVATE_ACTION_WEIGHT, weight)
+            score += matched * weight
+            important |= matched
+
+        bins = np.minimum(
+            (score / HISTOGRAM_BIN_WIDTH).astype(np.intp), HISTOGRAM_BINS - 1
+        )
+        tally.histogram += np.bincount(bins, minlength=HISTOGRAM_BINS)
+        tally.flagged_histogram += np.bincount(bins[flagged], minlength=HISTOGRAM_BINS)
+        if not tally.columns:
+            return  # a profile without keywords never alerts
+
+        # (messages, thresholds): would this message alert at this min_score
+        alerts = (score[:, None] >= self.min_scores[None, :]) & important[:, None]
+        tally.alerts += alerts.sum(axis=0)
+        tally.true_positives += alerts[flagged].sum(axis=0)
+
+    def _candidate_report(self, tally: _CandidateTally) -> Dict[str, Any]:
+        curve = []
+        for t, min_score in enumerate(self.min_scores):
+            alerts = int(tally.alerts[t])
+            tp = int(tally.true_positives[t])
+            curve.append(
+                {
+                    "min_score": float(min_score),
+                    "alerts": alerts,
+                    "match_rate": _percent(alerts, self.evaluated),
+                    "true_positives": tp,
+                    "false_positives": alerts - tp,
+                    "false_negatives": self.flagged - tp,
+                    "precision": _percent(tp, alerts),
+                    "recall": _percent(tp, self.flagged),
+                }
+            )
+        return {
+            "name": tally.candidate.name,
+            "keyword_count": sum(
+                len(keywords) for keywords in tally.candidate.categories.values()
+            ),
+            "histogram": {
+                "bin_width": HISTOGRAM_BIN_WIDTH,
+                "all": tally.histogram.tolist(),
+                "flagged": tally.flagged_histogram.tolist(),
+            },
+            "precision_curve": curve,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "profile_id": self.profile.get("id"),
+            "profile_name": self.profile.get("name"),
+            "test_date": datetime.now(timezone.utc).isoformat(),
+            "parameters": {
+                "hours_back": self.hours_back,
+                "max_messages": self.max_messages,
+                "channel_filter": self.channel_filter,
+                "min_scores": self.min_scores.tolist(),
+            },
+            "stats": {
+                "total_messages": self.processed,
+                "evaluated_messages": self.evaluated,
+                "excluded_count": self.excluded,
+                "flagged_messages": self.flagged,
+            },
+            "candidates": [self._candidate_report(t) for t in self._tallies],
+        }
+
+
+def parse_candidates(raw: Any) -> List[AlertCandidate]:
+    """Candidates from a request body: a list of alert-profile-like keyword dicts.
+
+    Raises:
+        ValueError: if ``raw`` is not a list of objects
+    """
+    if not isinstance(raw, list):
+        raise ValueError("candidates must be a list")
+    candidates = []
+    for index, entry in enumerate(raw):
+        if not isinstance(entry, dict):
+            raise ValueError("every candidate must be an object")
+        name = str(entry.get("name") or f"candidate-{index + 1}")
+        candidates.append(AlertCandidate(name, keyword_categories(entry)))
+    return candidates
@@ -31,12 +31,19 @@ from flask_cors import CORS
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy import text
 
+from tgsentinel.alert_backtest import (
+    DEFAULT_MIN_SCORES,
+    AlertBacktest,
+    keyword_categories,
+    parse_candidates,
+)
 from tgsentinel.alert_feedback_aggregator import get_alert_feedback_aggregator
 from tgsentinel.config import DigestSchedule
 from tgsentinel.feedback_aggregator import get_feedback_aggregator
-from tgsentinel.heuristics import run_heuristics
+from tgsentinel.heuristics import compile_keyword_matcher, run_heuristics
 from tgsentinel.profile_tuner import ProfileTuner
-from tgsentinel.timestamp_utils import format_db_timestamp
+from tgsentinel.stream_lanes import BULK_LANE, LANES, lane_streams
+from tgsentinel.timestamp_utils import db_cutoff, format_db_timestamp
 
 logger = logging.getLogger("tgsentinel.api")
 
@@ -61,6 +68,15 @@ _main_loop: Any = None  # Main asyncio event loop for scheduling coroutines
 _vacuum_jobs: Dict[str, Dict[str, Any]] = {}
 _vacuum_jobs_lock = threading.Lock()
 
+# Track interest backtest jobs (job_id -> status, progress and result)
+_backtest_jobs: Dict[str, Dict[str, Any]] = {}
+_backtest_jobs_lock = threading.Lock()
+MAX_BACKTEST_JOBS = 20
+
+# Batch similarity request limits
+MAX_BATCH_TEXTS = 5000
+MAX_BATCH_PROFILES = 100
+
 
 def require_admin_auth(f):
     """Decorator to require admin/operator authentication for sensitive endpoints.
@@ -264,7 +280,10 @@ def create_api_app() -> Flask:
         # Update Redis stream depth if client available
         if _redis_client:
             try:
-                depth = _redis_client.xlen("tgsentinel:messages")
+                depth = sum(
+                    _redis_client.xlen(name)
+                    for name in lane_streams("tgsentinel:messages").values()
+                )
                 metrics_module.redis_stream_depth.set(depth)
             except Exception as e:
                 logger.debug(f"Could not update redis_stream_depth metric: {e}")
@@ -1170,7 +1189,8 @@ def create_api_app() -> Flask:
             if limit < 1:
                 limit = 100
 
-            # Phase 1: Dual-read (new column with fallback to legacy)
+            # init_db keeps feed_*_flag in sync with the legacy flags; filtering
+            # on the bare column lets idx_messages_feed_*_created serve the page
             query = """
                 SELECT
                     chat_id,
@@ -1189,7 +1209,7 @@ def create_api_app() -> Flask:
                     delivery_mode_used,
                     delivery_target_used
                 FROM messages
-                WHERE COALESCE(feed_alert_flag, flagged_for_alerts_feed) = 1
+                WHERE feed_alert_flag = 1
                 ORDER BY created_at DESC
                 LIMIT :limit OFFSET :offset
             """
@@ -1197,7 +1217,7 @@ def create_api_app() -> Flask:
             count_query = """
                 SELECT COUNT(*) as total
                 FROM messages
-                WHERE COALESCE(feed_alert_flag, flagged_for_alerts_feed) = 1
+                WHERE feed_alert_flag = 1
             """
 
             if not _engine:
@@ -1320,7 +1340,8 @@ def create_api_app() -> Flask:
             if limit < 1:
                 limit = 100
 
-            # Phase 1: Dual-read (new column with fallback to legacy)
+            # init_db keeps feed_*_flag in sync with the legacy flags; filtering
+            # on the bare column lets idx_messages_feed_*_created serve the page
             query = """
                 SELECT
                     chat_id,
@@ -1338,7 +1359,7 @@ def create_api_app() -> Flask:
                     delivery_mode_used,
                     delivery_target_used
                 FROM messages
-                WHERE COALESCE(feed_interest_flag, flagged_for_interest_feed) = 1
+                WHERE feed_interest_flag = 1
                 ORDER BY created_at DESC
                 LIMIT :limit OFFSET :offset
             """
@@ -1346,7 +1367,7 @@ def create_api_app() -> Flask:
             count_query = """
                 SELECT COUNT(*) as total
                 FROM messages
-                WHERE COALESCE(feed_interest_flag, flagged_for_interest_feed) = 1
+                WHERE feed_interest_flag = 1
             """
 
             if not _engine:
@@ -2063,6 +2084,258 @@ def create_api_app() -> Flask:
                 500,
             )
 
+    def _message_stream_names(lane: str = BULK_LANE) -> tuple[str, str]:
+        """Return (stream, consumer group) of a lane of the message stream."""
+        redis_cfg = getattr(getattr(_config, "system", None), "redis", None)
+        stream = getattr(redis_cfg, "stream", "tgsentinel:messages")
+        return lane_streams(stream)[lane], getattr(redis_cfg, "group", "workers")
+
+    def _unknown_lane_response(lane: str):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "data": None,
+                    "error": f"Unknown lane: {lane}",
+                }
+            ),
+            400,
+        )
+
+    @app.route("/api/stream/dead-letters", methods=["GET"])
+    def get_dead_letters():
+        """List messages that were moved to the dead-letter stream.
+
+        Query Parameters:
+            lane: Stream lane, "priority" or "bulk" (default: bulk)
+            limit: Maximum number of entries (default: 50, max: 500)
+            before: Only return entries older than this dead-letter id
+
+        Returns:
+            JSON with the newest dead letters and the consumer group's
+            pending-entry count
+        """
+        if not _redis_client:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": "Redis not available",
+                    }
+                ),
+                503,
+            )
+
+        try:
+            from .stream_reclaim import list_dead_letters
+
+            lane = request.args.get("lane", BULK_LANE)
+            if lane not in LANES:
+                return _unknown_lane_response(lane)
+            stream, group = _message_stream_names(lane)
+            limit = max(1, min(int(request.args.get("limit", 50)), 500))
+            data = list_dead_letters(
+                _redis_client, stream, count=limit, before=request.args.get("before")
+            )
+            try:
+                summary = _redis_client.xpending(stream, group)
+                data["pending"] = int(summary.get("pending", 0))
+            except Exception:
+                data["pending"] = None
+            return jsonify({"status": "ok", "data": data, "error": None})
+
+        except Exception as e:
+            logger.error(f"[API] Failed to list dead letters: {e}", exc_info=True)
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": f"Failed to list dead letters: {str(e)}",
+                    }
+                ),
+                500,
+            )
+
+    @app.route("/api/stream/dead-letters/<entry_id>/replay", methods=["POST"])
+    @require_admin_auth
+    def replay_dead_letter_entry(entry_id: str):
+        """Publish a dead letter to its lane's stream again and remove it.
+
+        Query Parameters:
+            lane: Stream lane, "priority" or "bulk" (default: bulk)
+        """
+        if not _redis_client:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": "Redis not available",
+                    }
+                ),
+                503,
+            )
+
+        try:
+            from .stream_reclaim import replay_dead_letter
+
+            lane = request.args.get("lane", BULK_LANE)
+            if lane not in LANES:
+                return _unknown_lane_response(lane)
+            stream, _ = _message_stream_names(lane)
+            new_id = replay_dead_letter(_redis_client, stream, entry_id)
+            if new_id is None:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "data": None,
+                            "error": f"Dead letter {entry_id} not found",
+                        }
+                    ),
+                    404,
+                )
+            return jsonify(
+                {
+                    "status": "ok",
+                    "data": {"id": entry_id, "stream_id": new_id},
+                    "error": None,
+                }
+            )
+
+        except Exception as e:
+            logger.error(
+                f"[API] Failed to replay dead letter {entry_id}: {e}", exc_info=True
+            )
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": f"Failed to replay dead letter: {str(e)}",
+                    }
+                ),
+                500,
+            )
+
+    @app.route("/api/stream/dead-letters/<entry_id>", methods=["DELETE"])
+    @require_admin_auth
+    def delete_dead_letter_entry(entry_id: str):
+        """Discard a dead letter without replaying it.
+
+        Query Parameters:
+            lane: Stream lane, "priority" or "bulk" (default: bulk)
+        """
+        if not _redis_client:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": "Redis not available",
+                    }
+                ),
+                503,
+            )
+
+        try:
+            from .stream_reclaim import delete_dead_letter
+
+            lane = request.args.get("lane", BULK_LANE)
+            if lane not in LANES:
+                return _unknown_lane_response(lane)
+            stream, _ = _message_stream_names(lane)
+            if not delete_dead_letter(_redis_client, stream, entry_id):
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "data": None,
+                            "error": f"Dead letter {entry_id} not found",
+                        }
+                    ),
+                    404,
+                )
+            return jsonify({"status": "ok", "data": {"id": entry_id}, "error": None})
+
+        except Exception as e:
+            logger.error(
+                f"[API] Failed to delete dead letter {entry_id}: {e}", exc_info=True
+            )
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": f"Failed to delete dead letter: {str(e)}",
+                    }
+                ),
+                500,
+            )
+
+    @app.route("/api/traces/slowest", methods=["GET"])
+    def get_slowest_traces():
+        """List the slowest recently processed messages with their stage times.
+
+        Query Parameters:
+            limit: Maximum number of traces (default: 20, max: 200)
+            stage: Rank by this stage's time instead of the total time
+
+        Returns:
+            JSON with the traces, slowest first
+        """
+        if not _redis_client:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": "Redis not available",
+                    }
+                ),
+                503,
+            )
+
+        try:
+            from .tracing import STAGES, slowest_traces
+
+            stage = request.args.get("stage") or None
+            if stage is not None and stage not in STAGES:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "data": None,
+                            "error": f"Unknown stage: {stage}",
+                        }
+                    ),
+                    400,
+                )
+            limit = max(1, min(int(request.args.get("limit", 20)), 200))
+            traces = slowest_traces(_redis_client, limit=limit, stage=stage)
+            return jsonify(
+                {
+                    "status": "ok",
+                    "data": {"traces": traces, "stages": list(STAGES)},
+                    "error": None,
+                }
+            )
+
+        except Exception as e:
+            logger.error(f"[API] Failed to list traces: {e}", exc_info=True)
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "data": None,
+                        "error": f"Failed to list traces: {str(e)}",
+                    }
+                ),
+                500,
+            )
+
     @app.route("/api/digest/schedules/<profile_id>", methods=["GET"])
     def get_profile_digest_config(profile_id: str):
         """Get digest configuration for a specific profile.
@@ -2989,9 +3262,7 @@ def create_api_app() -> Flask:
                 hours = 24
 
             # Calculate cutoff timestamp
-            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
+            cutoff = db_cutoff(hours)
 
             with _engine.begin() as con:
                 # Messages ingested in the last N hours
@@ -3000,7 +3271,7 @@ def create_api_app() -> Flask:
                         """
                         SELECT COUNT(*) as count
                         FROM messages
-                        WHERE datetime(created_at) >= datetime(:cutoff)
+                        WHERE created_at >= :cutoff
                     """
                     ),
                     {"cutoff": cutoff},
@@ -3014,7 +3285,7 @@ def create_api_app() -> Flask:
                         SELECT COUNT(*) as count
                         FROM messages
                         WHERE (flagged_for_alerts_feed = 1 OR flagged_for_interest_feed = 1)
-                          AND datetime(created_at) >= datetime(:cutoff)
+                          AND created_at >= :cutoff
                     """
                     ),
                     {"cutoff": cutoff},
@@ -3027,7 +3298,7 @@ def create_api_app() -> Flask:
                         """
                         SELECT AVG(score) as avg_score
                         FROM messages
-                        WHERE datetime(created_at) >= datetime(:cutoff)
+                        WHERE created_at >= :cutoff
                     """
                     ),
                     {"cutoff": cutoff},
@@ -3043,7 +3314,7 @@ def create_api_app() -> Flask:
                                 SUM(CASE WHEN label = 1 THEN 1 ELSE 0 END) as positive,
                                 COUNT(*) as total
                             FROM feedback
-                            WHERE datetime(created_at) >= datetime(:cutoff)
+                            WHERE created_at >= :cutoff
                         """
                         ),
                         {"cutoff": cutoff},
@@ -3060,7 +3331,7 @@ def create_api_app() -> Flask:
                                 FROM messages
                                 WHERE (flagged_for_alerts_feed = 1 OR flagged_for_interest_feed = 1)
                                   AND score >= 0.7
-                                  AND datetime(created_at) >= datetime(:cutoff)
+                                  AND created_at >= :cutoff
                             """
                             ),
                             {"cutoff": cutoff},
@@ -3080,7 +3351,7 @@ def create_api_app() -> Flask:
                             FROM messages
                             WHERE (flagged_for_alerts_feed = 1 OR flagged_for_interest_feed = 1)
                               AND score >= 0.7
-                              AND datetime(created_at) >= datetime(:cutoff)
+                              AND created_at >= :cutoff
                         """
                         ),
                         {"cutoff": cutoff},
@@ -3376,9 +3647,7 @@ def create_api_app() -> Flask:
             if hours < 1 or hours > 168:  # Max 1 week
                 hours = 24
 
-            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
+            cutoff = db_cutoff(hours)
 
             with _engine.begin() as con:
                 # Fetch all triggers and aggregate in Python for accurate counts
@@ -3390,7 +3659,7 @@ def create_api_app() -> Flask:
                         WHERE flagged_for_alerts_feed = 1
                           AND triggers IS NOT NULL
                           AND triggers != ''
-                          AND datetime(created_at) >= datetime(:cutoff)
+                          AND created_at >= :cutoff
                     """
                     ),
                     {"cutoff": cutoff},
@@ -3472,9 +3741,7 @@ def create_api_app() -> Flask:
             if hours < 1 or hours > 168:  # Max 1 week
                 hours = 24
 
-            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
+            cutoff = db_cutoff(hours)
 
             with _engine.begin() as con:
                 result = con.execute(
@@ -3484,7 +3751,7 @@ def create_api_app() -> Flask:
                         FROM messages
                         WHERE (flagged_for_alerts_feed = 1 OR flagged_for_interest_feed = 1)
                           AND chat_title IS NOT NULL
-                          AND datetime(created_at) >= datetime(:cutoff)
+                          AND created_at >= :cutoff
                         GROUP BY chat_title
                         ORDER BY alert_count DESC
                         LIMIT 20
@@ -3550,9 +3817,7 @@ def create_api_app() -> Flask:
             if interval_minutes < 1 or interval_minutes > 60:
                 interval_minutes = 2
 
-            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
+            cutoff = db_cutoff(hours)
             interval_seconds = interval_minutes * 60
 
             with _engine.begin() as con:
@@ -3570,7 +3835,7 @@ def create_api_app() -> Flask:
                             AVG(score) as avg_score
                         FROM messages
                         WHERE (flagged_for_alerts_feed = 1 OR flagged_for_interest_feed = 1)
-                          AND datetime(created_at) >= datetime(:cutoff)
+                          AND created_at >= :cutoff
                         GROUP BY time_bucket
                         ORDER BY time_bucket ASC
                     """
@@ -5877,22 +6142,133 @@ def create_api_app() -> Flask:
                 500,
             )
 
+    def _interest_backtest_from_request():
+        """Build an InterestBacktest from the request body.
+
+        Returns (backtest, None) or (None, error response tuple).
+        """
+        if not request.is_json:
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Content-Type must be application/json",
+                    }
+                ),
+                400,
+            )
+
+        data = request.get_json() or {}
+        profile = dict(data.get("profile") or {})
+        profile.setdefault("name", data.get("profile_name", "unnamed"))
+        if data.get("profile_id") is not None:
+            profile.setdefault("id", str(data["profile_id"]))
+        try:
+            hours_back = data.get("hours_back", 24)
+            hours_back = float(hours_back) if hours_back is not None else None
+            max_messages = data.get("max_messages", 500)
+            max_messages = int(max_messages) if max_messages is not None else None
+        except (TypeError, ValueError):
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "hours_back and max_messages must be numbers",
+                    }
+                ),
+                400,
+            )
+
+        # None scans the entire history
+        if hours_back is not None and hours_back < 0:
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "hours_back must be >= 0 (or null for all history)",
+                    }
+                ),
+                400,
+            )
+        if max_messages is not None and max_messages < 1:
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "max_messages must be >= 1 (or null for no limit)",
+                    }
+                ),
+                400,
+            )
+
+        # Semantic module is only usable in the Sentinel container
+        try:
+            from tgsentinel.interest_backtest import create_interest_backtest
+            from tgsentinel.semantic import _model
+        except ImportError as ie:
+            logger.error(f"[API] Semantic module import failed: {ie}")
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Semantic module not available in Sentinel container",
+                    }
+                ),
+                500,
+            )
+
+        if _model is None:
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Semantic model not loaded in Sentinel container",
+                    }
+                ),
+                500,
+            )
+        if not profile.get("positive_samples"):
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Profile must have positive_samples for semantic scoring",
+                    }
+                ),
+                400,
+            )
+        if not _engine:
+            return None, (
+                jsonify({"status": "error", "message": "Database not initialized"}),
+                500,
+            )
+
+        return (
+            create_interest_backtest(_engine, profile, hours_back, max_messages),
+            None,
+        )
+
     @app.route("/api/profiles/interest/backtest", methods=["POST"])
     def backtest_interest_profile():
         """Backtest an interest profile using semantic scoring.
 
         This endpoint runs in the Sentinel container where the embeddings model is loaded.
         The UI should call this endpoint instead of loading the model itself.
+        Messages are streamed from the database in chunks and scored in batches
+        with isolated profile vectors (the live profiles are never touched).
+        For long windows prefer POST /api/profiles/interest/backtest/jobs, which
+        reports progress while it runs.
 
         Request body:
             {
                 "profile_name": "my_profile",
                 "profile": {
+                    "id": "3001",
                     "threshold": 0.42,
                     ...
                 },
-                "hours_back": 24,
-                "max_messages": 500
+                "hours_back": 24,       # null = entire history
+                "max_messages": 500     # null = no limit
             }
 
         Returns:
@@ -5901,376 +6277,223 @@ def create_api_app() -> Flask:
                 "profile_name": "...",
                 "test_date": "...",
                 "parameters": {...},
-                "matches": [...],
+                "matches": [...],       # 20 most recent messages
                 "stats": {
                     "total_messages": N,
                     "matched_messages": M,
                     "match_rate": X.X,
-                    "avg_score": X.XXX,
-                    "threshold": X.XX
-                }
+                    "avg_matched_score": X.XXX,
+                    "threshold": X.XX,
+                    ...
+                },
+                "evaluation": {"precision": ..., "recall": ..., ...},
+                "threshold_sweep": [...],
+                "recommendations": [...]
             }
         """
         try:
-            if not request.is_json:
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "Content-Type must be application/json",
-                        }
-                    ),
-                    400,
-                )
-
-            data = request.get_json()
-            profile_name = data.get("profile_name", "unnamed")
-            profile = data.get("profile", {})
-            hours_back = int(data.get("hours_back", 24))
-            max_messages = int(data.get("max_messages", 500))
+            backtest, error = _interest_backtest_from_request()
+            if error is not None:
+                return error
 
-            # Validate parameters
-            if not (0 <= hours_back <= 168):  # Max 7 days
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "hours_back must be between 0 and 168",
-                        }
-                    ),
-                    400,
-                )
+            result_data = backtest.run()
+            logger.info(
+                f"[API] Backtest completed for interest profile "
+                f"{result_data['profile_name']}: {result_data['stats']}"
+            )
+            return jsonify(result_data)
 
-            if not (1 <= max_messages <= 1000):
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "max_messages must be between 1 and 1000",
-                        }
-                    ),
-                    400,
-                )
+        except Exception as exc:
+            logger.error(
+                f"[API] Error backtesting interest profile: {exc}", exc_info=True
+            )
+            return (
+                jsonify({"status": "error", "message": str(exc)}),
+                500,
+            )
 
-            # Import semantic module (only available in Sentinel container)
-            try:
-                from tgsentinel.semantic import (
-                    _model,
-                    load_profile_embeddings,
-                    score_text_for_profile,
-                )
+    @app.route("/api/profiles/interest/backtest/jobs", methods=["POST"])
+    def start_interest_backtest_job():
+        """Start an interest backtest in the background.
 
-                logger.info(
-                    f"[API] Backtest: _model is {'loaded' if _model else 'None'}"
-                )
+        Takes the same body as POST /api/profiles/interest/backtest and returns
+        202 with a job_id. Poll GET /api/profiles/interest/backtest/jobs/{job_id}
+        for progress and interim precision/recall; DELETE cancels the job.
+        """
+        try:
+            backtest, error = _interest_backtest_from_request()
+            if error is not None:
+                return error
+        except Exception as exc:
+            logger.error(
+                f"[API] Error starting interest backtest: {exc}", exc_info=True
+            )
+            return jsonify({"status": "error", "message": str(exc)}), 500
 
-                if _model is None:
-                    return (
-                        jsonify(
-                            {
-                                "status": "error",
-                                "message": "Semantic model not loaded in Sentinel container",
-                            }
-                        ),
-                        500,
-                    )
+        job_id = str(uuid.uuid4())
+        cancel = threading.Event()
+        with _backtest_jobs_lock:
+            _cleanup_backtest_jobs()
+            _backtest_jobs[job_id] = {
+                "job_id": job_id,
+                "status": "running",
+                "profile_name": backtest.profile.get("name"),
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "progress": backtest.progress_snapshot(),
+                "result": None,
+                "error": None,
+                "_cancel": cancel,
+            }
 
-                # Validate profile has positive samples
-                positive_samples = profile.get("positive_samples", [])
-                if not positive_samples:
-                    return (
-                        jsonify(
-                            {
-                                "status": "error",
-                                "message": "Profile must have positive_samples for semantic scoring",
-                            }
-                        ),
-                        400,
-                    )
+        def _update(**fields):
+            with _backtest_jobs_lock:
+                job = _backtest_jobs.get(job_id)
+                if job is not None:
+                    job.update(fields)
 
-            except ImportError as ie:
-                logger.error(f"[API] Semantic module import failed: {ie}")
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "Semantic module not available in Sentinel container",
-                        }
-                    ),
-                    500,
+        def _run():
+            try:
+                result = backtest.run(
+                    progress=lambda snapshot: _update(progress=snapshot),
+                    cancelled=cancel.is_set,
                 )
-
-            # Query messages from database
-            if not _engine:
-                return (
-                    jsonify({"status": "error", "message": "Database not initialized"}),
-                    500,
+                _update(
+                    status="cancelled" if result["cancelled"] else "completed",
+                    progress=backtest.progress_snapshot(),
+                    result=result,
+                    finished_at=datetime.now(timezone.utc).isoformat(),
                 )
-
-            cutoff = datetime.now(timezone.utc) - timedelta(hours=hours_back)
-            cutoff_str = format_db_timestamp(cutoff)  # Format for SQLite comparison
-            query = text(
-                """
-                SELECT msg_id, chat_id, chat_title, sender_name, message_text,
-                       score, created_at, sender_id
-                FROM messages
-                WHERE created_at >= :cutoff
-                ORDER BY created_at DESC
-                LIMIT :limit
-                """
-            )
-
-            with _engine.connect() as conn:
-                result = conn.execute(
-                    query, {"cutoff": cutoff_str, "limit": max_messages}
+            except Exception as exc:
+                logger.error(
+                    f"[BACKTEST-JOB-{job_id}] Interest backtest failed: {exc}",
+                    exc_info=True,
+                )
+                _update(
+                    status="failed",
+                    error=str(exc),
+                    finished_at=datetime.now(timezone.utc).isoformat(),
                 )
-                messages = [
-                    {
-                        "msg_id": row[0],
-                        "chat_id": row[1],
-                        "chat_title": row[2],
-                        "sender_name": row[3],
-                        "message_text": row[4],
-                        "score": row[5],
-                        "created_at": row[6],
-                        "sender_id": row[7],
-                    }
-                    for row in result
-                ]
-
-            # Get VIP and excluded users from profile
-            vip_senders = set(profile.get("vip_senders", []))
-            excluded_users = set(profile.get("excluded_users", []))
 
-            # Get coefficients from profile
-            positive_weight = profile.get("positive_weight", 1.0)
-            negative_weight = profile.get("negative_weight", 0.15)
+        threading.Thread(
+            target=_run, name=f"BACKTEST-{job_id[:8]}", daemon=True
+        ).start()
 
-            # Load profile embeddings temporarily for backtest
-            profile_id_temp = f"backtest_{profile_name}"
-            load_profile_embeddings(
-                profile_id_temp,
-                profile.get("positive_samples", []),
-                profile.get("negative_samples", []),
-                profile.get("threshold", 0.42),
-                positive_weight,
-                negative_weight,
-            )
+        return (
+            jsonify(
+                {
+                    "status": "accepted",
+                    "data": {
+                        "job_id": job_id,
+                        "status_url": f"/api/profiles/interest/backtest/jobs/{job_id}",
+                    },
+                    "error": None,
+                }
+            ),
+            202,
+        )
 
-            # Score messages using semantic model - SHOW ALL MESSAGES with reasons
-            all_results = []
-            threshold = profile.get("threshold", 0.42)
+    @app.route(
+        "/api/profiles/interest/backtest/jobs/<job_id>", methods=["GET", "DELETE"]
+    )
+    def interest_backtest_job(job_id):
+        """Progress of a backtest job, and its result once finished.
 
-            logger.info(
-                f"[API] Backtest: scoring {len(messages)} messages with threshold {threshold}, "
-                f"pos_weight={positive_weight}, neg_weight={negative_weight}, "
-                f"VIP senders: {len(vip_senders)}, excluded users: {len(excluded_users)}"
+        DELETE cancels the job after the chunk it is scoring.
+        """
+        with _backtest_jobs_lock:
+            job = _backtest_jobs.get(job_id)
+            if job is not None and request.method == "DELETE":
+                job["_cancel"].set()
+            data = (
+                {k: v for k, v in job.items() if not k.startswith("_")}
+                if job is not None
+                else None
             )
 
-            for msg in messages:
-                sender_id = msg.get("sender_id", 0)
-                message_text = msg.get("message_text", "")
-
-                # Initialize result for this message
-                result = {
-                    "message_id": msg["msg_id"],
-                    "chat_id": msg["chat_id"],
-                    "chat_title": msg["chat_title"],
-                    "sender_name": msg["sender_name"],
-                    "sender_id": sender_id,
-                    "text_preview": message_text[:100]
-                    + ("..." if len(message_text) > 100 else ""),
-                    "timestamp": msg["created_at"],
-                    "is_vip": sender_id in vip_senders,
-                    "matched": False,
-                    "reason": None,
-                    "semantic_score": None,
-                    "threshold": threshold,
-                    "positive_weight": positive_weight,
-                    "negative_weight": negative_weight,
-                }
+        if data is None:
+            return (
+                jsonify({"status": "error", "data": None, "error": "Job not found"}),
+                404,
+            )
+        return jsonify({"status": "ok", "data": data, "error": None}), 200
 
-                # Check exclusions first
-                if sender_id in excluded_users:
-                    result["reason"] = f"Excluded user (ID: {sender_id})"
-                    result["matched"] = False
-                    all_results.append(result)
-                    logger.debug(
-                        f"[API] Backtest: skipping message {msg.get('msg_id')} from excluded user {sender_id}"
-                    )
-                    continue
+    def _cleanup_backtest_jobs():
+        """Drop finished backtest jobs beyond the most recent MAX_BACKTEST_JOBS.
 
-                if not message_text:
-                    result["reason"] = "No text content"
-                    result["matched"] = False
-                    all_results.append(result)
-                    logger.debug(
-                        f"[API] Backtest: skipping message {msg.get('msg_id')} - no text"
-                    )
-                    continue
+        **MUST be called while holding _backtest_jobs_lock**
+        """
+        finished = sorted(
+            (job for job in _backtest_jobs.values() if job.get("finished_at")),
+            key=lambda job: job["finished_at"],
+            reverse=True,
+        )
+        for job in finished[MAX_BACKTEST_JOBS:]:
+            del _backtest_jobs[job["job_id"]]
 
-                # Score text with profile-specific semantic model
-                score = score_text_for_profile(message_text, profile_id_temp)
-                result["semantic_score"] = (
-                    round(score, 3) if score is not None else None
-                )
+    def _load_alert_profile(payload: Dict[str, Any], profile_id: str):
+        """The alert profile to backtest: the request's ``profile`` or the stored one.
 
-                logger.debug(
-                    f"[API] Backtest: msg {msg.get('msg_id')} scored {score} (text: {message_text[:50]}...)"
-                )
+        Returns (profile_data, None) or (None, error response tuple).
+        """
+        profile_payload = payload.get("profile")
+        if profile_payload is not None and not isinstance(profile_payload, dict):
+            return None, (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "profile must be an object when provided",
+                    }
+                ),
+                400,
+            )
 
-                if score is None:
-                    result["reason"] = "Scoring failed (model error)"
-                    result["matched"] = False
-                    all_results.append(result)
-                    logger.debug(
-                        f"[API] Backtest: score is None for message {msg.get('msg_id')}"
-                    )
-                    continue
+        profile_data: Dict[str, Any] = {}
+        if profile_payload is None:
+            config_dir = Path(os.getenv("CONFIG_DIR", "/app/config"))
+            profiles_path = config_dir / "profiles_alert.yml"
 
-                # VIP senders: lower the threshold for matching
-                effective_threshold = (
-                    threshold * 0.7 if sender_id in vip_senders else threshold
+            if not profiles_path.exists():
+                return None, (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Alert profiles file not found",
+                        }
+                    ),
+                    404,
                 )
 
-                # Check if message matches
-                if score >= effective_threshold:
-                    result["matched"] = True
-                    result["reason"] = (
-                        f"Semantic score {round(score, 3)} >= threshold {round(effective_threshold, 3)}"
-                    )
-                    if sender_id in vip_senders:
-                        result["reason"] += " (VIP threshold 0.7x)"
-                else:
-                    result["matched"] = False
-                    result["reason"] = (
-                        f"Semantic score {round(score, 3)} < threshold {round(effective_threshold, 3)}"
-                    )
-                    if sender_id in vip_senders:
-                        result["reason"] += " (VIP threshold 0.7x)"
-                    # Add coefficient info to help tuning
-                    result[
-                        "reason"
-                    ] += f" | Coefficients: pos_weight={positive_weight}, neg_weight={negative_weight}"
-
-                all_results.append(result)
+            with open(profiles_path, "r", encoding="utf-8") as fp:
+                loaded_profiles = yaml.safe_load(fp) or {}
 
-            # Separate matched and unmatched for statistics
-            matches = [r for r in all_results if r["matched"]]
-            unmatched = [r for r in all_results if not r["matched"]]
+            base_profiles: Dict[str, Any] = {}
+            if isinstance(loaded_profiles, dict):
+                nested_profiles = loaded_profiles.get("profiles")
+                if isinstance(nested_profiles, dict):
+                    base_profiles = dict(nested_profiles)
+                else:
+                    base_profiles = dict(loaded_profiles)
 
-            # Calculate statistics
-            vip_matches = sum(1 for m in matches if m.get("is_vip", False))
-            avg_matched_score = (
-                round(
-                    sum(m["semantic_score"] for m in matches if m["semantic_score"])
-                    / len(matches),
-                    3,
-                )
-                if len(matches) > 0
-                else 0
-            )
-            avg_unmatched_score = (
-                round(
-                    sum(m["semantic_score"] for m in unmatched if m["semantic_score"])
-                    / len(unmatched),
-                    3,
-                )
-                if len(unmatched) > 0
-                else 0
+            candidate_profile = base_profiles.get(profile_id) or base_profiles.get(
+                str(profile_id)
             )
 
-            stats = {
-                "total_messages": len(all_results),
-                "matched_messages": len(matches),
-                "unmatched_messages": len(unmatched),
-                "vip_matches": vip_matches,
-                "excluded_count": len(
-                    [
-                        r
-                        for r in all_results
-                        if "Excluded user" in (r.get("reason") or "")
-                    ]
-                ),
-                "match_rate": (
-                    round(len(matches) / len(all_results) * 100, 1)
-                    if len(all_results) > 0
-                    else 0
-                ),
-                "avg_matched_score": avg_matched_score,
-                "avg_unmatched_score": avg_unmatched_score,
-                "threshold": threshold,
-                "positive_weight": positive_weight,
-                "negative_weight": negative_weight,
-            }
-
-            # Generate recommendations based on results
-            recommendations = []
-            if stats["match_rate"] < 5:
-                recommendations.append("⚠️ Very low match rate (<5%). Consider:")
-                recommendations.append(
-                    f"  • Lowering threshold (current: {threshold:.2f})"
-                )
-                recommendations.append(
-                    f"  • Lowering negative_weight (current: {negative_weight:.2f} → "
-                    f"try {max(0.05, negative_weight * 0.5):.2f})"
-                )
-                recommendations.append("  • Adding more diverse positive samples")
-            elif stats["match_rate"] > 50:
-                recommendations.append("⚠️ Very high match rate (>50%). Consider:")
-                recommendations.append(
-                    f"  • Raising threshold (current: {threshold:.2f})"
-                )
-                recommendations.append(
-                    f"  • Raising negative_weight (current: {negative_weight:.2f} → "
-                    f"try {min(0.5, negative_weight * 1.5):.2f})"
-                )
-                recommendations.append(
-                    "  • Adding more negative samples to filter noise"
+            if not isinstance(candidate_profile, dict):
+                return None, (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": f"Profile {profile_id} not found",
+                        }
+                    ),
+                    404,
                 )
-            else:
-                recommendations.append(
-                    f"✅ Match rate looks good ({stats['match_rate']}%)"
-                )
-                if avg_matched_score and avg_unmatched_score:
-                    score_gap = avg_matched_score - avg_unmatched_score
-                    if score_gap < 0.1:
-                        recommendations.append(
-                            f"  ⚠️ Small score gap ({score_gap:.3f}). "
-                            "Consider increasing negative_weight for better discrimination."
-                        )
 
-            result_data = {
-                "status": "ok",
-                "profile_name": profile_name,
-                "profile_id": profile.get("id"),
-                "test_date": datetime.now(timezone.utc).isoformat(),
-                "parameters": {
-                    "hours_back": hours_back,
-                    "max_messages": max_messages,
-                    "positive_weight": positive_weight,
-                    "negative_weight": negative_weight,
-                },
-                "matches": all_results[
-                    :20
-                ],  # Limit to 20 most recent messages for better UX
-                "stats": stats,
-                "recommendations": recommendations,
-            }
+            profile_data = dict(candidate_profile)
+        else:
+            profile_data = dict(profile_payload)
 
-            logger.info(
-                f"[API] Backtest completed for interest profile {profile_name}: {stats}"
-            )
-            return jsonify(result_data)
-
-        except Exception as exc:
-            logger.error(
-                f"[API] Error backtesting interest profile: {exc}", exc_info=True
-            )
-            return (
-                jsonify({"status": "error", "message": str(exc)}),
-                500,
-            )
+        return profile_data, None
 
     @app.route("/api/profiles/alert/backtest", methods=["POST"])
     def backtest_alert_profile():
@@ -6376,63 +6599,9 @@ def create_api_app() -> Flask:
                         400,
                     )
 
-            profile_payload = payload.get("profile")
-            if profile_payload is not None and not isinstance(profile_payload, dict):
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "profile must be an object when provided",
-                        }
-                    ),
-                    400,
-                )
-
-            profile_data: Dict[str, Any] = {}
-            if profile_payload is None:
-                config_dir = Path(os.getenv("CONFIG_DIR", "/app/config"))
-                profiles_path = config_dir / "profiles_alert.yml"
-
-                if not profiles_path.exists():
-                    return (
-                        jsonify(
-                            {
-                                "status": "error",
-                                "message": "Alert profiles file not found",
-                            }
-                        ),
-                        404,
-                    )
-
-                with open(profiles_path, "r", encoding="utf-8") as fp:
-                    loaded_profiles = yaml.safe_load(fp) or {}
-
-                base_profiles: Dict[str, Any] = {}
-                if isinstance(loaded_profiles, dict):
-                    nested_profiles = loaded_profiles.get("profiles")
-                    if isinstance(nested_profiles, dict):
-                        base_profiles = dict(nested_profiles)
-                    else:
-                        base_profiles = dict(loaded_profiles)
-
-                candidate_profile = base_profiles.get(profile_id) or base_profiles.get(
-                    str(profile_id)
-                )
-
-                if not isinstance(candidate_profile, dict):
-                    return (
-                        jsonify(
-                            {
-                                "status": "error",
-                                "message": f"Profile {profile_id} not found",
-                            }
-                        ),
-                        404,
-                    )
-
-                profile_data = dict(candidate_profile)
-            else:
-                profile_data = dict(profile_payload)
+            profile_data, error = _load_alert_profile(payload, profile_id)
+            if error is not None:
+                return error
 
             profile_name = str(profile_data.get("name", profile_id))
 
@@ -6444,36 +6613,16 @@ def create_api_app() -> Flask:
                     return [value] if value else []
                 return []
 
-            def _collect(keys: list[str]) -> list[str]:
-                combined: list[str] = []
-                for key in keys:
-                    combined.extend(_as_list(profile_data.get(key, [])))
-                dedup: list[str] = []
-                seen: set[str] = set()
-                for keyword in combined:
-                    if keyword not in seen:
-                        seen.add(keyword)
-                        dedup.append(keyword)
-                return dedup
-
-            keywords = _collect(
-                [
-                    "keywords",
-                    "general_keywords",
-                    "technical_keywords",
-                    "community_keywords",
-                ]
-            )
-            urgency_keywords = _collect(["urgency_keywords", "critical_keywords"])
-            importance_keywords = _collect(["importance_keywords", "project_keywords"])
-            opportunity_keywords = _collect(
-                ["opportunity_keywords", "financial_keywords"]
-            )
-            security_keywords = _collect(["security_keywords"])
-            risk_keywords = _collect(["risk_keywords"])
-            release_keywords = _collect(["release_keywords"])
-            action_keywords = _collect(["action_keywords"])
-            decision_keywords = _collect(["decision_keywords"])
+            categories = keyword_categories(profile_data)
+            keywords = categories["keywords"]
+            urgency_keywords = categories["urgency"]
+            importance_keywords = categories["importance"]
+            opportunity_keywords = categories["opportunity"]
+            security_keywords = categories["security"]
+            risk_keywords = categories["risk"]
+            release_keywords = categories["release"]
+            action_keywords = categories["action"]
+            decision_keywords = categories["decision"]
 
             has_profile_keywords = any(
                 [
@@ -6637,6 +6786,21 @@ def create_api_app() -> Flask:
             false_positives = 0
             false_negatives = 0
 
+            # Compile the profile's keywords once for the whole replay
+            keyword_matcher = compile_keyword_matcher(
+                {
+                    "action": action_keywords,
+                    "decision": decision_keywords,
+                    "urgency": urgency_keywords,
+                    "importance": importance_keywords,
+                    "release": release_keywords,
+                    "security": security_keywords,
+                    "risk": risk_keywords,
+                    "opportunity": opportunity_keywords,
+                    "keywords": keywords,
+                }
+            )
+
             for msg in messages:
                 sender_id = int(msg.get("sender_id", 0) or 0)
 
@@ -6677,6 +6841,7 @@ def create_api_app() -> Flask:
                     prioritize_pinned=prioritize_pinned,
                     prioritize_admin=prioritize_admin,
                     detect_polls=detect_polls,
+                    keyword_matcher=keyword_matcher,
                 )
 
                 score = heuristics.pre_score
@@ -6802,6 +6967,151 @@ def create_api_app() -> Flask:
                 500,
             )
 
+    @app.route("/api/profiles/alert/backtest/sweep", methods=["POST"])
+    def sweep_alert_profile():
+        """Evaluate candidate keyword sets and min_score values in one pass.
+
+        Request body:
+            {
+                "profile_id": "1001",
+                "profile": {...},            # optional, else the stored profile
+                "candidates": [              # optional, else the profile's keywords
+                    {"name": "strict", "urgency_keywords": [...], ...}
+                ],
+                "min_scores": [1.0, 1.5, ...],   # default 0.5 .. 10.0
+                "hours_back": null,          # null = entire history
+                "max_messages": null,
+                "channel_filter": null
+            }
+
+        Returns one score histogram and one precision curve (precision and
+        recall against messages flagged for the alerts feed) per candidate.
+        """
+        try:
+            if not request.is_json:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Content-Type must be application/json",
+                        }
+                    ),
+                    400,
+                )
+
+            payload = request.get_json() or {}
+            profile_id_raw = payload.get("profile_id", payload.get("id"))
+            if profile_id_raw is None or str(profile_id_raw).strip() == "":
+                return (
+                    jsonify({"status": "error", "message": "Profile ID is required"}),
+                    400,
+                )
+            profile_id = str(profile_id_raw).strip()
+
+            try:
+                hours_back = payload.get("hours_back")
+                hours_back = float(hours_back) if hours_back is not None else None
+                max_messages = payload.get("max_messages")
+                max_messages = int(max_messages) if max_messages is not None else None
+                channel_filter = payload.get("channel_filter")
+                channel_filter = (
+                    int(channel_filter) if channel_filter not in (None, "") else None
+                )
+                min_scores = [
+                    float(value)
+                    for value in payload.get("min_scores") or DEFAULT_MIN_SCORES
+                ]
+                candidates = (
+                    parse_candidates(payload["candidates"])
+                    if payload.get("candidates")
+                    else None
+                )
+            except (TypeError, ValueError) as exc:
+                return (
+                    jsonify({"status": "error", "message": f"Invalid request: {exc}"}),
+                    400,
+                )
+
+            if (hours_back is not None and hours_back < 0) or (
+                max_messages is not None and max_messages < 1
+            ):
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "hours_back must be >= 0 and max_messages >= 1",
+                        }
+                    ),
+                    400,
+                )
+            if len(min_scores) > 100 or len(candidates or []) > 50:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "At most 100 min_scores and 50 candidates",
+                        }
+                    ),
+                    400,
+                )
+
+            profile_data, error = _load_alert_profile(payload, profile_id)
+            if error is not None:
+                return error
+            profile_data.setdefault("id", profile_id)
+
+            if not _engine:
+                return (
+                    jsonify({"status": "error", "message": "Database not initialized"}),
+                    500,
+                )
+
+            result = AlertBacktest(
+                _engine,
+                profile_data,
+                candidates=candidates,
+                min_scores=min_scores,
+                hours_back=hours_back,
+                max_messages=max_messages,
+                channel_filter=channel_filter,
+            ).run()
+            logger.info(
+                f"[API] Alert sweep completed for profile {profile_id}: "
+                f"{result['stats']}"
+            )
+            return jsonify(result)
+
+        except Exception as exc:
+            logger.error(f"[API] Error sweeping alert profile: {exc}", exc_info=True)
+            return (
+                jsonify({"status": "error", "message": str(exc)}),
+                500,
+            )
+
+    def _find_interest_profile(profile_id: str) -> Any:
+        """Interest profile by ID: a loaded ProfileDefinition or the YAML dict."""
+        profiles_dict = _config.global_profiles
+        if profile_id in profiles_dict:
+            return profiles_dict[profile_id]
+
+        # Try loading from YAML files directly as fallback
+        config_dir = _config.get_config_dir()
+        interest_path = os.path.join(config_dir, "profiles_interest.yml")
+        if os.path.exists(interest_path):
+            with open(interest_path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+                profiles_data = (
+                    data.get("profiles", data) if "profiles" in data else data
+                )
+                return profiles_data.get(profile_id)
+        return None
+
+    def _profile_field(profile: Any, name: str, default: Any) -> Any:
+        """Field of a profile dict or ProfileDefinition."""
+        if isinstance(profile, dict):
+            return profile.get(name, default)
+        return getattr(profile, name, default)
+
     @app.route("/api/profiles/interest/test_similarity", methods=["POST"])
     def test_similarity():
         """Test semantic similarity of a text sample against an interest profile.
@@ -6891,27 +7201,7 @@ def create_api_app() -> Flask:
                     500,
                 )
 
-            # Try to find profile in loaded profiles using public attribute
-            profile = None
-            profiles_dict = _config.global_profiles
-
-            if profile_id in profiles_dict:
-                profile = profiles_dict[profile_id]
-            else:
-                # Try loading from YAML files directly as fallback
-                config_dir = _config.get_config_dir()
-
-                interest_path = os.path.join(config_dir, "profiles_interest.yml")
-                if os.path.exists(interest_path):
-                    import yaml
-
-                    with open(interest_path, "r", encoding="utf-8") as f:
-                        data = yaml.safe_load(f) or {}
-                        profiles_data = (
-                            data.get("profiles", data) if "profiles" in data else data
-                        )
-                        if profile_id in profiles_data:
-                            profile = profiles_data[profile_id]
+            profile = _find_interest_profile(profile_id)
 
             if not profile:
                 return (
@@ -6969,6 +7259,8 @@ def create_api_app() -> Flask:
                 threshold=threshold,
                 positive_weight=positive_weight,
                 negative_weight=negative_weight,
+                scoring_mode=_profile_field(profile, "scoring_mode", "centroid"),
+                knn_k=_profile_field(profile, "knn_k", 3),
             )
 
             # Use the same scoring method as the worker (averaged embeddings + negative penalty)
@@ -7034,6 +7326,193 @@ def create_api_app() -> Flask:
                 500,
             )
 
+    @app.route("/api/profiles/interest/similarity/batch", methods=["POST"])
+    def batch_similarity():
+        """Score many texts against many interest profiles in one call.
+
+        Texts are encoded in batches once and every profile is scored with the
+        same formula as the worker: through its centroids, or by the mean
+        similarity to its ``knn_k`` nearest samples for ``scoring_mode: knn``
+        profiles. Profiles are not loaded into the live profile state.
+
+        Request body:
+            {
+                "texts": ["...", ...],              # up to MAX_BATCH_TEXTS
+                "profile_ids": ["3000", ...],       # up to MAX_BATCH_PROFILES
+                "include_nearest_sample": false
+            }
+
+        Returns:
+            {
+                "status": "ok",
+                "profile_ids": [...],               # columns of "scores"
+                "scores": [[0.XXX, ...], ...],      # one row per text
+                "thresholds": {"3000": 0.42, ...},
+                "nearest_samples": [[{"index": i, "sample": "...",
+                                      "similarity": 0.XXX}, ...], ...],
+                "missing_profiles": [...],
+                "model": "..."
+            }
+        """
+        try:
+            if not request.is_json:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Content-Type must be application/json",
+                        }
+                    ),
+                    400,
+                )
+
+            data = request.get_json() or {}
+            texts = data.get("texts")
+            profile_ids = data.get("profile_ids")
+            include_nearest = bool(data.get("include_nearest_sample", False))
+            if not isinstance(texts, list) or not all(
+                isinstance(t, str) for t in texts
+            ):
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "texts must be a list of strings",
+                        }
+                    ),
+                    400,
+                )
+            if not isinstance(profile_ids, list) or not profile_ids:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "profile_ids must be a non-empty list",
+                        }
+                    ),
+                    400,
+                )
+            if len(texts) > MAX_BATCH_TEXTS or len(profile_ids) > MAX_BATCH_PROFILES:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": (
+                                f"At most {MAX_BATCH_TEXTS} texts and "
+                                f"{MAX_BATCH_PROFILES} profiles per call"
+                            ),
+                        }
+                    ),
+                    400,
+                )
+
+            try:
+                from tgsentinel.semantic import _model, score_text_matrix
+            except ImportError as ie:
+                logger.error(f"[API] Semantic module import failed: {ie}")
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Semantic module not available in Sentinel container",
+                        }
+                    ),
+                    500,
+                )
+            if _model is None:
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": (
+                                "Semantic model not loaded. Ensure EMBEDDINGS_MODEL "
+                                "environment variable is set."
+                            ),
+                        }
+                    ),
+                    500,
+                )
+            if not _config:
+                return (
+                    jsonify(
+                        {"status": "error", "message": "Configuration not initialized"}
+                    ),
+                    500,
+                )
+
+            found_ids: list[str] = []
+            missing: list[str] = []
+            profiles = []
+            thresholds: Dict[str, float] = {}
+            for raw_id in dict.fromkeys(str(pid).strip() for pid in profile_ids):
+                profile = _find_interest_profile(raw_id) if raw_id else None
+                positive = _profile_field(profile, "positive_samples", []) or []
+                if not profile or not positive:
+                    missing.append(raw_id)
+                    continue
+                found_ids.append(raw_id)
+                thresholds[raw_id] = _profile_field(profile, "threshold", 0.4)
+                profiles.append(
+                    (
+                        list(positive),
+                        list(_profile_field(profile, "negative_samples", []) or []),
+                        _profile_field(profile, "positive_weight", 1.0),
+                        _profile_field(profile, "negative_weight", 0.15),
+                        _profile_field(profile, "scoring_mode", "centroid"),
+                        int(_profile_field(profile, "knn_k", 3)),
+                    )
+                )
+
+            # Empty texts score 0 without reaching the model
+            rows = [i for i, t in enumerate(texts) if t.strip()]
+            scores = [[0.0] * len(found_ids) for _ in texts]
+            nearest: Optional[list] = (
+                [[None] * len(found_ids) for _ in texts] if include_nearest else None
+            )
+            matrix = score_text_matrix(
+                [texts[i] for i in rows],
+                profiles,
+                nearest_samples=include_nearest,
+                batch_size=_config.system.worker.encode_batch_size,
+            )
+            if matrix is not None:
+                for r, i in enumerate(rows):
+                    scores[i] = [round(float(v), 3) for v in matrix.scores[r]]
+                    if nearest is None:
+                        continue
+                    for column, (positive, *_rest) in enumerate(profiles):
+                        index = int(matrix.nearest_index[r, column])
+                        nearest[i][column] = {
+                            "index": index,
+                            "sample": positive[index],
+                            "similarity": round(
+                                float(matrix.nearest_similarity[r, column]), 3
+                            ),
+                        }
+
+            logger.info(
+                f"[API] Batch similarity: {len(texts)} texts x "
+                f"{len(found_ids)} profiles ({len(missing)} missing)"
+            )
+            result: Dict[str, Any] = {
+                "status": "ok",
+                "profile_ids": found_ids,
+                "scores": scores,
+                "thresholds": thresholds,
+                "missing_profiles": missing,
+                "model": os.getenv("EMBEDDINGS_MODEL", "all-MiniLM-L6-v2"),
+            }
+            if nearest is not None:
+                result["nearest_samples"] = nearest
+            return jsonify(result)
+
+        except Exception as exc:
+            logger.error(f"[API] Error in batch similarity: {exc}", exc_info=True)
+            return (
+                jsonify({"status": "error", "message": str(exc)}),
+                500,
+            )
+
     # ==================== UNIFIED PROFILE CRUD ENDPOINTS ====================
     @app.route("/api/profiles/<profile_type>", methods=["GET"])
     def get_profiles(profile_type):
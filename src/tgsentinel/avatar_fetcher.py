@@ -0,0 +1,211 @@
+"""Background avatar fetcher shared by ingestion and the cache refresher.
+
+Message ingestion must never wait for a profile photo download. Callers only
+``enqueue`` an (entity_id, photo_id) pair and get the deterministic avatar URL
+back; a small pool of worker tasks downloads the photo into Redis later.
+
+- Deduplication: a pair already queued, or already fetched in this process,
+  is not queued again.
+- Change detection: the photo id of each stored avatar is kept in the Redis
+  hash ``tgsentinel:avatar_photo_ids``; an avatar whose photo id has not
+  changed is never downloaded again (also across restarts).
+- Shared budget: downloads are spaced by a minimum interval across all
+  workers, and a FloodWaitError pauses every worker for the requested time
+  before the entry is retried (``RequestBudget``).
+"""
+
+import asyncio
+import base64
+import io
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .rate_budget import RequestBudget, flood_wait_seconds
+from .redis_operations import AnyRedis, maybe_await
+
+log = logging.getLogger(__name__)
+
+AVATAR_PHOTO_IDS_KEY = "tgsentinel:avatar_photo_ids"
+
+
+def avatar_cache_key(entity_id: int) -> str:
+    """Redis key holding the base64 avatar (format expected by the UI)."""
+    prefix = "chat" if entity_id < 0 else "user"
+    return f"tgsentinel:{prefix}_avatar:{entity_id}"
+
+
+def avatar_url(entity_id: int) -> str:
+    prefix = "chat" if entity_id < 0 else "user"
+    return f"/api/avatar/{prefix}/{abs(entity_id)}"
+
+
+def photo_id_of(photo: Any) -> Optional[int]:
+    """Return the Telethon ``photo_id`` of a profile photo object, if any."""
+    photo_id = getattr(photo, "photo_id", None)
+    return photo_id if isinstance(photo_id, int) else None
+
+
+class AvatarFetcher:
+    """Deduplicating, rate-limited avatar download queue."""
+
+    def __init__(
+        self,
+        concurrency: int = 3,
+        min_interval: float = 0.2,
+        max_queue: int = 10000,
+    ):
+        self.concurrency = max(1, int(concurrency))
+        self.min_interval = max(0.0, float(min_interval))
+        self.max_queue = max(1, int(max_queue))
+
+        self._client: Any = None
+        self._redis: Optional[AnyRedis] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._pending: Set[Tuple[int, Optional[int]]] = set()
+        # entity_id -> photo_id stored in Redis (seen by this process)
+        self._known: Dict[int, Optional[int]] = {}
+
+        # Shared download budget
+        self._budget = RequestBudget(self.min_interval)
+
+        self.stats = {"fetched": 0, "skipped": 0, "errors": 0, "flood_waits": 0}
+
+    @property
+    def bound(self) -> bool:
+        return self._client is not None and self._redis is not None
+
+    def bind(self, client: Any, r: AnyRedis) -> None:
+        """Point the fetcher at the current Telegram client and Redis."""
+        self._client = client
+        self._redis = r
+
+    def enqueue(self, entity_id: int, photo_id: Optional[int] = None) -> str:
+        """Schedule a download (if needed) and return the avatar URL at once.
+
+        ``photo_id=None`` means the photo id is unknown; the avatar is then
+        only fetched if none is stored yet.
+        """
+        url = avatar_url(entity_id)
+        if not self.bound:
+            return url
+        if entity_id in self._known and self._known[entity_id] == photo_id:
+            return url
+        key = (entity_id, photo_id)
+        if key in self._pending:
+            return url
+
+        queue = self._ensure_workers()
+        if queue.qsize() >= self.max_queue:
+            log.debug("[AVATAR-FETCHER] Queue full, dropping avatar %s", entity_id)
+            return url
+        self._pending.add(key)
+        queue.put_nowait(key)
+        return url
+
+    def idle(self) -> bool:
+        """True when nothing is queued or downloading."""
+        return not self._pending
+
+    async def join(self) -> None:
+        """Wait until every queued avatar has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+        return self._queue
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            key = await self._queue.get()
+            retry = False
+            try:
+                retry = await self._fetch(*key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.debug("[AVATAR-FETCHER] Avatar %s failed: %s", key[0], e)
+            finally:
+                if retry:
+                    self._queue.put_nowait(key)
+                else:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    async def _fetch(self, entity_id: int, photo_id: Optional[int]) -> bool:
+        """Download one avatar; returns True if it must be retried."""
+        client, r = self._client, self._redis
+        if client is None or r is None:
+            return False
+        cache_key = avatar_cache_key(entity_id)
+
+        # Skip when the stored avatar is for the same photo
+        if await maybe_await(r.exists(cache_key)):
+            stored = await maybe_await(r.hget(AVATAR_PHOTO_IDS_KEY, str(entity_id)))
+            if isinstance(stored, bytes):
+                stored = stored.decode()
+            if photo_id is None or str(stored) == str(photo_id):
+                self._known[entity_id] = photo_id
+                self.stats["skipped"] += 1
+                return False
+
+        await self._budget.acquire()
+        buffer = io.BytesIO()
+        try:
+            await client.download_profile_photo(entity_id, file=buffer)
+        except Exception as e:
+            seconds = flood_wait_seconds(e)
+            if seconds is None:
+                raise
+            self._budget.pause(seconds)
+            self.stats["flood_waits"] += 1
+            log.warning(
+                "[AVATAR-FETCHER] Flood wait of %ds, pausing avatar downloads", seconds
+            )
+            return True
+
+        data = buffer.getvalue()
+        self._known[entity_id] = photo_id
+        if not data:
+            log.debug("[AVATAR-FETCHER] Empty profile photo for %s", entity_id)
+            return False
+
+        await maybe_await(r.set(cache_key, base64.b64encode(data).decode("utf-8")))
+        if photo_id is not None:
+            await maybe_await(r.hset(AVATAR_PHOTO_IDS_KEY, str(entity_id), photo_id))
+        self.stats["fetched"] += 1
+        log.info("✓ Cached avatar in Redis for %s (%d bytes)", cache_key, len(data))
+        return False
+
+
+# Global singleton instance
+_fetcher: Optional[AvatarFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_avatar_fetcher() -> AvatarFetcher:
+    """Get or create the process-wide fetcher, sized by AVATAR_FETCH_* env vars."""
+    global _fetcher
+
+    if _fetcher is not None:
+        return _fetcher
+
+    with _fetcher_lock:
+        if _fetcher is None:
+            try:
+                concurrency = int(os.getenv("AVATAR_FETCH_CONCURRENCY", "3"))
+                interval_ms = int(os.getenv("AVATAR_FETCH_INTERVAL_MS", "200"))
+            except ValueError as e:
+                log.warning("[AVATAR-FETCHER] Invalid setting, using defaults: %s", e)
+                concurrency, interval_ms = 3, 200
+            _fetcher = AvatarFetcher(concurrency, interval_ms / 1000.0)
+        return _fetcher
@@ -0,0 +1,314 @@
+"""Consumer-lag monitoring and graded load shedding for the message stream.
+
+Ingestion appends to the stream without MAXLEN, so nothing is trimmed behind
+the worker's back. ``BackpressureMonitor`` reads the consumer group's lag
+(XINFO GROUPS) every few seconds and moves between load levels:
+
+- NORMAL: full processing
+- ELEVATED (lag >= ``elevated_lag``): per-message logging is reduced to
+  warnings
+- HIGH (lag >= ``high_lag``): additionally, low-priority messages skip the
+  semantic (interest) stage and near-identical low-priority messages are
+  coalesced (acknowledged without processing)
+- CRITICAL (lag >= ``maxlen``): the stream is over its hard limit
+
+A level is left again once the lag drops 20% below its threshold.
+
+Trimming is explicit and counted. Entries the group has already processed
+are trimmed down to ``maxlen`` at any level ("retention"); only if the stream
+still exceeds ``maxlen`` are the oldest unprocessed entries trimmed
+("overload"), which is the last resort.
+
+Each stream lane has its own monitor (``lane_monitors``); the bulk lane's
+level drives shedding and log verbosity.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from enum import IntEnum
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .config import ChannelRule, RedisCfg, WorkerCfg
+from .metrics import (
+    load_level,
+    messages_shed_total,
+    stream_consumer_lag,
+    stream_pending_entries,
+    stream_trimmed_total,
+)
+from .redis_operations import AnyRedis, maybe_await
+from .stream_lanes import BULK_LANE, is_priority_message, lane_streams
+
+log = logging.getLogger(__name__)
+
+# Modules logging once or more per message; quieted from ELEVATED on
+_HOT_PATH_LOGGERS = (
+    "tgsentinel.worker",
+    "tgsentinel.client",
+    "tgsentinel.dm_poller",
+    "tgsentinel.heuristics",
+    "tgsentinel.alerts_evaluator",
+    "tgsentinel.interests_evaluator",
+    "tgsentinel.profile_resolver",
+)
+
+# Fraction of a level's threshold the lag must fall below to leave the level
+_HYSTERESIS = 0.8
+
+# Texts shorter than this (after normalization) are never coalesced
+_COALESCE_MIN_CHARS = 24
+_COALESCE_WINDOW_SECONDS = 300.0
+_COALESCE_MAX_KEYS = 4096
+
+_NON_WORD = re.compile(r"\W+", re.UNICODE)
+_URL = re.compile(r"https?://\S+")
+
+
+class LoadLevel(IntEnum):
+    NORMAL = 0
+    ELEVATED = 1
+    HIGH = 2
+    CRITICAL = 3
+
+
+def _coalesce_key(text: str) -> Optional[str]:
+    normalized = _NON_WORD.sub(" ", _URL.sub(" ", text.lower())).strip()
+    if len(normalized) < _COALESCE_MIN_CHARS:
+        return None
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class BackpressureMonitor:
+    """Tracks consumer-group lag and decides how much work to shed."""
+
+    def __init__(
+        self,
+        r: AnyRedis,
+        stream: str,
+        group: str,
+        elevated_lag: int = 1000,
+        high_lag: int = 5000,
+        maxlen: int = 100000,
+        trim: bool = True,
+        lane: str = BULK_LANE,
+        manage_load: bool = True,
+    ):
+        self.r = r
+        self.stream = stream
+        self.group = group
+        self.elevated_lag = elevated_lag
+        self.high_lag = high_lag
+        self.maxlen = maxlen
+        self.trim = trim
+        self.lane = lane
+        # Only the monitor managing load changes log levels and the level gauge
+        self.manage_load = manage_load
+
+        self.level = LoadLevel.NORMAL
+        self.lag = 0
+        self.pending = 0
+        self.length = 0
+
+        # Coalescing key -> (last seen, (chat_id, msg_id) of that message)
+        self._recent: "OrderedDict[str, Tuple[float, Tuple[Any, Any]]]" = OrderedDict()
+        self._saved_log_levels: Dict[str, int] = {}
+
+    # -- measurement ---------------------------------------------------------
+
+    async def refresh(self) -> LoadLevel:
+        """Measure lag, update the level and trim the stream if needed."""
+        groups = await maybe_await(self.r.xinfo_groups(self.stream))
+        info = next((g for g in groups or [] if g.get("name") == self.group), None)
+        self.length = int(await maybe_await(self.r.xlen(self.stream)) or 0)
+        if info is None:
+            return self.level
+
+        self.pending = int(info.get("pending") or 0)
+        last_delivered = info.get("last-delivered-id") or "0-0"
+        lag = info.get("lag")
+        if lag is None:
+            # Redis < 7, or lag unknown after deletions: count what is left
+            # after the group's last delivered id, up to the HIGH threshold
+            newer = await maybe_await(
+                self.r.xrange(
+                    self.stream, min=f"({last_delivered}", max="+", count=self.high_lag
+                )
+            )
+            lag = len(newer or [])
+        self.lag = int(lag)
+
+        if self.trim and self.length > self.maxlen:
+            await self._trim(last_delivered)
+
+        self._set_level(self._level_for(self.lag))
+        stream_consumer_lag.labels(lane=self.lane).set(self.lag)
+        stream_pending_entries.labels(lane=self.lane).set(self.pending)
+        return self.level
+
+    async def run(self, interval: float) -> None:
+        """Refresh forever (for processes that do not run ``process_loop``)."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.debug("[BACKPRESSURE] Could not measure stream lag: %s", e)
+            await asyncio.sleep(interval)
+
+    def _level_for(self, lag: int) -> LoadLevel:
+        thresholds = (
+            (LoadLevel.CRITICAL, self.maxlen),
+            (LoadLevel.HIGH, self.high_lag),
+            (LoadLevel.ELEVATED, self.elevated_lag),
+        )
+        for level, threshold in thresholds:
+            # Stay at a level until the lag is clearly below its threshold
+            if lag >= threshold or (
+                level <= self.level and lag >= threshold * _HYSTERESIS
+            ):
+                return level
+        return LoadLevel.NORMAL
+
+    def _set_level(self, level: LoadLevel) -> None:
+        if level == self.level:
+            return
+        log_fn = log.warning if level > self.level else log.info
+        log_fn(
+            "[BACKPRESSURE] %s lane level %s -> %s (lag=%d, pending=%d, length=%d)",
+            self.lane,
+            self.level.name,
+            level.name,
+            self.lag,
+            self.pending,
+            self.length,
+        )
+        self.level = level
+        if self.manage_load:
+            load_level.set(int(level))
+            self._apply_log_verbosity(level >= LoadLevel.ELEVATED)
+
+    def _apply_log_verbosity(self, quiet: bool) -> None:
+        if quiet and not self._saved_log_levels:
+            for name in _HOT_PATH_LOGGERS:
+                logger = logging.getLogger(name)
+                if logger.getEffectiveLevel() < logging.WARNING:
+                    self._saved_log_levels[name] = logger.level
+                    logger.setLevel(logging.WARNING)
+        elif not quiet:
+            for name, level in self._saved_log_levels.items():
+                logging.getLogger(name).setLevel(level)
+            self._saved_log_levels.clear()
+
+    # -- trimming ------------------------------------------------------------
+
+    async def _trim(self, last_delivered: str) -> None:
+        excess = self.length - self.maxlen
+
+        # Retention: everything older than the oldest unacknowledged entry
+        # (or than the last delivered one) has been processed
+        boundary = last_delivered
+        if self.pending:
+            summary = await maybe_await(self.r.xpending(self.stream, self.group))
+            if summary and summary.get("min"):
+                boundary = summary["min"]
+        removed = int(
+            await maybe_await(
+                self.r.xtrim(
+                    self.stream, minid=boundary, approximate=True, limit=excess
+                )
+            )
+            or 0
+        )
+        if removed:
+            stream_trimmed_total.labels(reason="retention").inc(removed)
+            self.length -= removed
+            log.debug("[BACKPRESSURE] Trimmed %d processed entries", removed)
+
+        if self.length <= self.maxlen:
+            return
+
+        # Last resort: drop the oldest entries nobody has processed yet
+        dropped = int(
+            await maybe_await(
+                self.r.xtrim(self.stream, maxlen=self.maxlen, approximate=False)
+            )
+            or 0
+        )
+        if dropped:
+            stream_trimmed_total.labels(reason="overload").inc(dropped)
+            self.length -= dropped
+            log.error(
+                "[BACKPRESSURE] Stream over its limit of %d entries: dropped %d "
+                "unprocessed entries (lag=%d)",
+                self.maxlen,
+                dropped,
+                self.lag,
+            )
+
+    # -- shedding decisions --------------------------------------------------
+
+    @property
+    def shedding(self) -> bool:
+        return self.level >= LoadLevel.HIGH
+
+    def skip_semantic(
+        self, payload: Mapping[str, Any], rules: Mapping[int, ChannelRule]
+    ) -> bool:
+        """Whether to score this message without the semantic stage."""
+        if not self.shedding or is_priority_message(payload, rules):
+            return False
+        messages_shed_total.labels(action="semantic_skipped").inc()
+        return True
+
+    def coalesce(
+        self, payload: Mapping[str, Any], rules: Mapping[int, ChannelRule]
+    ) -> bool:
+        """Whether this message repeats a recent one and can be dropped.
+
+        Every low-priority text is remembered for a few minutes; repeats are
+        only dropped while shedding.
+        """
+        if is_priority_message(payload, rules):
+            return False
+        key = _coalesce_key(str(payload.get("text") or ""))
+        if key is None:
+            return False
+
+        # A retried entry carries the same message identity: not a repeat
+        identity = (payload.get("chat_id"), payload.get("msg_id"))
+        now = time.monotonic()
+        seen = self._recent.get(key)
+        self._recent[key] = (now, identity)
+        self._recent.move_to_end(key)
+        while len(self._recent) > _COALESCE_MAX_KEYS:
+            self._recent.popitem(last=False)
+
+        if not self.shedding or seen is None or seen[1] == identity:
+            return False
+        if now - seen[0] > _COALESCE_WINDOW_SECONDS:
+            return False
+        messages_shed_total.labels(action="coalesced").inc()
+        return True
+
+
+def lane_monitors(
+    r: AnyRedis, redis_cfg: RedisCfg, worker_cfg: WorkerCfg, trim: bool = True
+) -> Dict[str, BackpressureMonitor]:
+    """One monitor per stream lane; the bulk lane's level drives shedding."""
+    return {
+        lane: BackpressureMonitor(
+            r,
+            stream,
+            redis_cfg.group,
+            elevated_lag=worker_cfg.lag_elevated,
+            high_lag=worker_cfg.lag_high,
+            maxlen=worker_cfg.stream_maxlen,
+            trim=trim,
+            lane=lane,
+            manage_load=lane == BULK_LANE,
+        )
+        for lane, stream in lane_streams(redis_cfg.stream).items()
+    }
@@ -16,6 +16,9 @@ from telethon.tl.types import Channel
 from telethon.tl.types import Chat as TgChat
 from telethon.tl.types import User
 
+from .avatar_fetcher import get_avatar_fetcher, photo_id_of
+from .entity_directory import get_entity_directory
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,14 +49,16 @@ async def _precache_handler_responses(redis_client: Redis, generation: int) -> N
             "offset_peer": None,
         }
 
-        redis_client.setex(dialogs_request_key, 60, json.dumps(request_data))
+        await asyncio.to_thread(
+            redis_client.setex, dialogs_request_key, 60, json.dumps(request_data)
+        )
         logger.debug(
             f"[CACHE-REFRESHER] Triggered dialogs pre-cache request {dialogs_request_id}"
         )
 
         # Wait for response (timeout 10s)
         for _ in range(20):  # 20 * 0.5s = 10s timeout
-            if redis_client.exists(dialogs_response_key):
+            if await asyncio.to_thread(redis_client.exists, dialogs_response_key):
                 logger.info("[CACHE-REFRESHER] ✓ Dialogs pre-cached successfully")
                 break
             await asyncio.sleep(0.5)
@@ -64,14 +69,16 @@ async def _precache_handler_responses(redis_client: Redis, generation: int) -> N
         users_response_key = f"tgsentinel:response:get_users:{users_request_id}"
 
         users_request_data = {"request_id": users_request_id}
-        redis_client.setex(users_request_key, 60, json.dumps(users_request_data))
+        await asyncio.to_thread(
+            redis_client.setex, users_request_key, 60, json.dumps(users_request_data)
+        )
         logger.debug(
             f"[CACHE-REFRESHER] Triggered users pre-cache request {users_request_id}"
         )
 
         # Wait for response (timeout 10s)
         for _ in range(20):
-            if redis_client.exists(users_response_key):
+            if await asyncio.to_thread(redis_client.exists, users_response_key):
                 logger.info("[CACHE-REFRESHER] ✓ Users pre-cached successfully")
                 break
             await asyncio.sleep(0.5)
@@ -93,103 +100,50 @@ async def cache_avatars_parallel(
     get_session_generation_func: Optional[Callable[[], int]] = None,
     my_generation: Optional[int] = None,
 ) -> bool:
-    """Cache avatars for entities in parallel batches to respect rate limits.
+    """Queue avatars on the shared background fetcher and wait for it to drain.
+
+    The fetcher deduplicates against ingestion, skips avatars whose photo id
+    has not changed and applies one flood-wait-aware download budget.
 
     Args:
         entities_with_photos: List of tuples (entity_id, photo, display_name)
-        client: Telethon client
-        redis_client: Redis client
+        client: Telethon client (used only if ingestion has not bound one yet)
+        redis_client: Redis client (used only if ingestion has not bound one yet)
         get_session_generation_func: Function to get current session generation
         my_generation: The generation this caching started with
 
     Returns:
         True if completed normally, False if generation changed (early exit)
     """
-    from .client import _cache_avatar
-
-    BATCH_SIZE = 10  # Download 10 avatars concurrently
-    BATCH_DELAY = 1  # Wait 1 second between batches to respect rate limits
-    YIELD_EVERY = (
-        3  # Yield to event loop every N avatars to allow message handlers to run
-    )
-
-    avatar_tasks = []
-    total_cached = 0
-    total_skipped = 0
-    total_errors = 0
-    processed_count = 0
-
-    for entity_id, photo, display_name in entities_with_photos:
-        # Yield to event loop periodically to allow message handlers to run
-        # This prevents avatar caching from monopolizing the Telethon client
-        if processed_count > 0 and processed_count % YIELD_EVERY == 0:
-            await asyncio.sleep(0)  # Yield to event loop immediately
-
-        # Create task for avatar caching
-        task = _cache_avatar(client, entity_id, photo, redis_client)
-        avatar_tasks.append((task, entity_id, display_name))
-        processed_count += 1
-
-        # Process batch when full
-        if len(avatar_tasks) >= BATCH_SIZE:
-            tasks_only = [t[0] for t in avatar_tasks]
-            results = await asyncio.gather(*tasks_only, return_exceptions=True)
-
-            # Count results
-            for idx, result in enumerate(results):
-                entity_id_item = avatar_tasks[idx][1]
-                if isinstance(result, Exception):
-                    total_errors += 1
-                    logger.debug(
-                        f"[CACHE-REFRESHER] Avatar error for {entity_id_item}: {result}"
-                    )
-                elif result:  # Avatar URL returned = cached
-                    total_cached += 1
-                else:  # None returned = already cached or no photo
-                    total_skipped += 1
-
-            if total_cached > 0 or total_errors > 0:
-                logger.info(
-                    f"[CACHE-REFRESHER] Cached batch: {total_cached} new, "
-                    f"{total_skipped} skipped, {total_errors} errors"
-                )
-
-            avatar_tasks = []
-
-            # Check for generation change between batches (user switch detection)
-            if (
-                get_session_generation_func is not None
-                and my_generation is not None
-                and get_session_generation_func() != my_generation
-            ):
-                logger.info(
-                    "[CACHE-REFRESHER] Generation changed during avatar caching (%d -> %d), aborting avatar cache",
-                    my_generation,
-                    get_session_generation_func(),
-                )
-                return False
-
-            await asyncio.sleep(BATCH_DELAY)
-
-    # Process remaining tasks
-    if avatar_tasks:
-        tasks_only = [t[0] for t in avatar_tasks]
-        results = await asyncio.gather(*tasks_only, return_exceptions=True)
-        for idx, result in enumerate(results):
-            entity_id_item = avatar_tasks[idx][1]
-            if isinstance(result, Exception):
-                total_errors += 1
-                logger.debug(
-                    f"[CACHE-REFRESHER] Avatar error for {entity_id_item}: {result}"
-                )
-            elif result:
-                total_cached += 1
-            else:
-                total_skipped += 1
+    POLL_INTERVAL = 1  # Seconds between generation checks while downloads run
+
+    fetcher = get_avatar_fetcher()
+    if not fetcher.bound:
+        fetcher.bind(client, redis_client)
+    before = dict(fetcher.stats)
+
+    for entity_id, photo, _display_name in entities_with_photos:
+        fetcher.enqueue(entity_id, photo_id_of(photo))
+
+    while not fetcher.idle():
+        # Check for generation change while downloading (user switch detection)
+        if (
+            get_session_generation_func is not None
+            and my_generation is not None
+            and get_session_generation_func() != my_generation
+        ):
+            logger.info(
+                "[CACHE-REFRESHER] Generation changed during avatar caching (%d -> %d), aborting avatar cache",
+                my_generation,
+                get_session_generation_func(),
+            )
+            return False
+        await asyncio.sleep(POLL_INTERVAL)
 
+    delta = {key: fetcher.stats[key] - before.get(key, 0) for key in fetcher.stats}
     logger.info(
-        f"[CACHE-REFRESHER] ✓ Avatar caching complete: {total_cached} cached, "
-        f"{total_skipped} skipped, {total_errors} errors"
+        f"[CACHE-REFRESHER] ✓ Avatar caching complete: {delta['fetched']} cached, "
+        f"{delta['skipped']} skipped, {delta['errors']} errors"
     )
 
     return True  # Completed normally
@@ -289,6 +243,10 @@ async def channels_users_cache_refresher(
                     )
                     # Note: get_cached_dialogs_func() already logs "Fetched X dialogs"
 
+                    # Feed the shared entity directory (persisted by the next
+                    # ingestion flush) so message handlers need no lookups
+                    get_entity_directory().record_dialogs(dialogs)
+
                     # Process channels/groups metadata (fast - in-memory only)
                     channels_list = []
                     users_list = []
@@ -0,0 +1,408 @@
+"""Catch-up of messages posted while ingestion was not listening.
+
+Ingestion only sees live ``NewMessage`` updates, so messages posted while the
+sentinel was down, reconnecting after a config reload, or waiting for a
+re-login never reach the stream. Two pieces close that gap:
+
+- ``LastSeenIndex`` remembers the highest message id ingested per chat
+  (persisted to the Redis hash ``tgsentinel:last_seen_msg_ids``). Each time
+  ingestion (re)starts, ``mark_restart`` snapshots those ids as the start of
+  a gap; the first live id seen afterwards in a chat is the end of its gap.
+- ``CatchUpEngine`` fetches every monitored chat's gap with
+  ``get_messages(min_id=..., reverse=True)``, oldest first, and appends the
+  messages to the stream exactly like live ingestion. One ``get_dialogs``
+  call first tells which chats have anything newer, so chats without a gap
+  cost no request, and where each gap ends (newer messages arrive live;
+  the live handler skips ids catch-up already ingested). Chats are fetched concurrently; all history requests share
+  one ``RequestBudget``, so a FloodWaitError pauses the whole catch-up.
+
+Chats never seen before have no gap start and are left to live ingestion.
+Private chats of monitored users are left to the DM poller, which fills their
+gaps from the same index (``gap``/``close_gap``).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .avatar_fetcher import get_avatar_fetcher
+from .config import AppCfg
+from .entity_directory import get_entity_directory
+from .metrics import messages_recovered_total
+from .rate_budget import RequestBudget, flood_wait_seconds
+from .redis_operations import AnyRedis, maybe_await
+from .stream_codec import build_message_payload, encode_payload
+from .stream_lanes import LaneClassifier
+from .tracing import stamp_ingest
+
+log = logging.getLogger(__name__)
+
+LAST_SEEN_KEY = "tgsentinel:last_seen_msg_ids"
+
+# Messages per history request (Telegram's maximum)
+_PAGE_SIZE = 100
+
+
+class LastSeenIndex:
+    """Highest ingested message id per chat, with write-behind persistence."""
+
+    def __init__(self):
+        self._last: Dict[int, int] = {}
+        self._dirty: Dict[int, int] = {}
+        # Gap of each chat: last id before the restart, first live id after
+        self._gap_start: Dict[int, int] = {}
+        self._first_live: Dict[int, int] = {}
+        # Monotonic time of the latest live message per chat
+        self._live_at: Dict[int, float] = {}
+        self._pending = False
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> bool:
+        """Whether ingestion restarted and the gaps have not been taken yet."""
+        return self._pending
+
+    def mark_restart(self) -> None:
+        """Record that ingestion is (re)starting; call before it listens again."""
+        with self._lock:
+            self._gap_start = dict(self._last)
+            self._first_live.clear()
+            self._pending = True
+
+    def observe(self, chat_id: int, msg_id: int, live: bool = True) -> None:
+        """Record an ingested message (``live=False`` for caught-up ones)."""
+        with self._lock:
+            if live:
+                self._first_live.setdefault(chat_id, msg_id)
+                self._live_at[chat_id] = time.monotonic()
+            if msg_id > self._last.get(chat_id, 0):
+                self._last[chat_id] = msg_id
+                self._dirty[chat_id] = msg_id
+
+    def last(self, chat_id: int) -> Optional[int]:
+        """Highest id ingested in ``chat_id`` (live or not), if any."""
+        return self._last.get(chat_id)
+
+    def live_at(self, chat_id: int) -> Optional[float]:
+        """``time.monotonic()`` of the latest live message in ``chat_id``."""
+        return self._live_at.get(chat_id)
+
+    def first_live(self, chat_id: int) -> Optional[int]:
+        """First id ingested live in ``chat_id`` since the last restart."""
+        return self._first_live.get(chat_id)
+
+    def gap(self, chat_id: int) -> Optional[Tuple[int, int]]:
+        """Missing ``(after, before)`` id range of ``chat_id``, if not fetched yet."""
+        with self._lock:
+            after = self._gap_start.get(chat_id)
+            before = self._first_live.get(chat_id)
+        if after is None or before is None or before <= after + 1:
+            return None
+        return after, before
+
+    def close_gap(self, chat_id: int, upto: Optional[int] = None) -> None:
+        """Mark the gap of ``chat_id`` as fetched (only up to ``upto`` if given)."""
+        with self._lock:
+            if upto is None:
+                self._gap_start.pop(chat_id, None)
+            elif upto > self._gap_start.get(chat_id, upto):
+                self._gap_start[chat_id] = upto
+
+    def take_gaps(self) -> Dict[int, int]:
+        """Return ``chat_id -> last id before the restart`` and clear ``pending``."""
+        with self._lock:
+            self._pending = False
+            return dict(self._gap_start)
+
+    async def load(self, r: AnyRedis) -> None:
+        """Read the persisted ids once per process (they start the first gap)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            raw = await maybe_await(r.hgetall(LAST_SEEN_KEY))
+        except Exception as e:
+            log.debug("[CATCH-UP] Could not load last seen ids: %s", e)
+            return
+        if not isinstance(raw, dict):
+            return
+        with self._lock:
+            for key, value in raw.items():
+                try:
+                    chat_id, msg_id = int(key), int(value)
+                except (TypeError, ValueError):
+                    continue
+                self._gap_start.setdefault(chat_id, msg_id)
+                if msg_id > self._last.get(chat_id, 0):
+                    self._last[chat_id] = msg_id
+        log.info("[CATCH-UP] Loaded last seen ids of %d chats", len(raw))
+
+    async def flush(self, r: AnyRedis) -> int:
+        """Persist advanced ids to Redis; returns the number written."""
+        if not self._dirty:
+            return 0
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        try:
+            await maybe_await(
+                r.hset(LAST_SEEN_KEY, mapping={str(k): v for k, v in dirty.items()})
+            )
+        except Exception as e:
+            log.debug(
+                "[CATCH-UP] Could not persist %d last seen ids: %s", len(dirty), e
+            )
+            with self._lock:
+                for chat_id, msg_id in dirty.items():
+                    if msg_id >= self._dirty.get(chat_id, 0):
+                        self._dirty[chat_id] = msg_id
+            return 0
+        return len(dirty)
+
+    def clear(self) -> None:
+        """Forget everything (e.g. when the logged-in account changes)."""
+        with self._lock:
+            self._last.clear()
+            self._dirty.clear()
+            self._gap_start.clear()
+            self._first_live.clear()
+            self._live_at.clear()
+
+
+class CatchUpEngine:
+    """Fetches the gaps recorded by a ``LastSeenIndex`` into the stream."""
+
+    def __init__(
+        self,
+        cfg: AppCfg,
+        client: Any,
+        r: AnyRedis,
+        index: Optional[LastSeenIndex] = None,
+        concurrency: int = 4,
+        min_interval: float = 0.25,
+        max_messages: int = 500,
+    ):
+        self.cfg = cfg
+        self.client = client
+        self.r = r
+        self.index = index or get_last_seen_index()
+        self.concurrency = max(1, int(concurrency))
+        self.budget = RequestBudget(min_interval)
+        self.max_messages = max(1, int(max_messages))
+        self.lanes = LaneClassifier(cfg)
+        self.directory = get_entity_directory()
+        self.stats = {"chats": 0, "messages": 0, "truncated": 0, "flood_waits": 0}
+
+    def monitored_chats(self) -> List[int]:
+        # Monitored users' DMs, gaps included, are fetched by the DM poller,
+        # so only channels and groups are caught up here
+        return [c.id for c in self.cfg.channels]
+
+    async def run(self) -> Dict[str, int]:
+        """Catch up every monitored chat with a gap; returns the stats."""
+        await self.index.load(self.r)
+        gap_starts = self.index.take_gaps()
+        gaps = [
+            (chat_id, gap_starts[chat_id])
+            for chat_id in self.monitored_chats()
+            if chat_id in gap_starts
+        ]
+        # Each chat is fetched up to its newest id at this point; later
+        # messages arrive live
+        latest = await self._latest_ids()
+        if latest is not None:
+            bounded = [(c, after, latest.get(c, 0)) for c, after in gaps]
+            gaps = [(c, after, top) for c, after, top in bounded if top > after]
+        else:
+            gaps = [(c, after, None) for c, after in gaps]
+        if not gaps:
+            log.info("[CATCH-UP] No monitored chat has missed messages")
+            return self.stats
+
+        log.info("[CATCH-UP] Catching up %d chats", len(gaps))
+        queue: "asyncio.Queue[Tuple[int, int, Optional[int]]]" = asyncio.Queue()
+        for gap in gaps:
+            queue.put_nowait(gap)
+        workers = min(self.concurrency, len(gaps))
+        await asyncio.gather(*(self._worker(queue) for _ in range(workers)))
+        await self.index.flush(self.r)
+        log.info(
+            "[CATCH-UP] Recovered %d messages in %d chats (%d truncated, %d flood waits)",
+            self.stats["messages"],
+            self.stats["chats"],
+            self.stats["truncated"],
+            self.stats["flood_waits"],
+        )
+        return self.stats
+
+    async def _latest_ids(self) -> Optional[Dict[int, int]]:
+        """Newest message id per dialog, or None if dialogs are unavailable."""
+        await self.budget.acquire()
+        try:
+            dialogs = await self.client.get_dialogs(limit=None)
+        except Exception as e:
+            log.debug("[CATCH-UP] Could not list dialogs, fetching every chat: %s", e)
+            return None
+        self.directory.record_dialogs(dialogs)
+        latest: Dict[int, int] = {}
+        for dialog in dialogs or ():
+            dialog_id = getattr(dialog, "id", None)
+            msg_id = getattr(getattr(dialog, "message", None), "id", None)
+            if isinstance(dialog_id, int) and isinstance(msg_id, int):
+                latest[dialog_id] = msg_id
+        return latest
+
+    async def _worker(
+        self, queue: "asyncio.Queue[Tuple[int, int, Optional[int]]]"
+    ) -> None:
+        while not queue.empty():
+            chat_id, after, latest = queue.get_nowait()
+            try:
+                await self.catch_up_chat(chat_id, after, latest)
+            except Exception as e:
+                log.warning("[CATCH-UP] Chat %s failed: %s", chat_id, e)
+
+    async def catch_up_chat(
+        self, chat_id: int, after: int, latest: Optional[int] = None
+    ) -> int:
+        """Ingest the messages of ``chat_id`` newer than ``after``, in order.
+
+        The gap ends at the first live message or, before one arrived, at
+        ``latest`` (the chat's newest id when the catch-up started).
+        """
+        recovered = 0
+        min_id = after
+        while recovered < self.max_messages:
+            before = self._gap_end(chat_id, latest)
+            limit = min(_PAGE_SIZE, self.max_messages - recovered)
+            page = await self._fetch_page(chat_id, min_id, before, limit)
+            if page is None:
+                continue  # flood wait; retry the same page
+            messages = sorted(
+                (m for m in page if isinstance(getattr(m, "id", None), int)),
+                key=lambda m: m.id,
+            )
+            for message in messages:
+                if message.id <= min_id:
+                    continue
+                if await self._ingest(chat_id, message):
+                    recovered += 1
+                min_id = message.id
+            if len(page) < limit:
+                break
+        else:
+            self.stats["truncated"] += 1
+            log.warning(
+                "[CATCH-UP] Chat %s: stopped after %d messages (CATCH_UP_MAX_MESSAGES)",
+                chat_id,
+                recovered,
+            )
+
+        self.stats["chats"] += 1
+        if recovered:
+            log.info("[CATCH-UP] Chat %s: recovered %d messages", chat_id, recovered)
+        return recovered
+
+    def _gap_end(self, chat_id: int, latest: Optional[int]) -> Optional[int]:
+        """Exclusive upper id of the gap of ``chat_id`` (None: unbounded)."""
+        before = self.index.first_live(chat_id)
+        if latest is not None and (before is None or before > latest + 1):
+            return latest + 1
+        return before
+
+    async def _fetch_page(
+        self, chat_id: int, min_id: int, before: Optional[int], limit: int
+    ) -> Optional[Iterable[Any]]:
+        await self.budget.acquire()
+        try:
+            page = await self.client.get_messages(
+                chat_id, limit=limit, min_id=min_id, max_id=before or 0, reverse=True
+            )
+        except Exception as e:
+            seconds = flood_wait_seconds(e)
+            if seconds is None:
+                raise
+            self.budget.pause(seconds)
+            self.stats["flood_waits"] += 1
+            log.warning("[CATCH-UP] Flood wait of %ds, pausing catch-up", seconds)
+            return None
+        if page is None:
+            return []
+        return page if isinstance(page, list) else list(page)
+
+    async def _ingest(self, chat_id: int, message: Any) -> bool:
+        """Append one caught-up message to the stream; False if skipped."""
+        before = self.index.first_live(chat_id)
+        if getattr(message, "out", False) or (before and message.id >= before):
+            return False
+
+        chat = self.directory.get(chat_id)
+        sender_id = getattr(message, "sender_id", None)
+        sender = self.directory.record(getattr(message, "sender", None), sender_id)
+        sender = sender or self.directory.get(sender_id)
+        sender_avatar_url = chat_avatar_url = None
+        if sender is not None and sender.photo_id:
+            sender_avatar_url = get_avatar_fetcher().enqueue(sender.id, sender.photo_id)
+        if chat is not None and chat.photo_id:
+            chat_avatar_url = get_avatar_fetcher().enqueue(chat.id, chat.photo_id)
+
+        payload = build_message_payload(
+            message,
+            chat_id=chat_id,
+            chat_title=(chat.name if chat else "") or (sender.name if sender else ""),
+            sender_name=sender.name if sender else "",
+            sender_avatar_url=sender_avatar_url,
+            chat_avatar_url=chat_avatar_url,
+        )
+        stamp_ingest(payload)
+        await maybe_await(
+            self.r.xadd(self.lanes.stream_for(payload), encode_payload(payload))
+        )
+        self.index.observe(chat_id, message.id, live=False)
+        self.stats["messages"] += 1
+        messages_recovered_total.inc()
+        return True
+
+
+def catch_up_enabled() -> bool:
+    return os.getenv("CATCH_UP_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def create_catch_up_engine(cfg: AppCfg, client: Any, r: AnyRedis) -> CatchUpEngine:
+    """Build an engine sized by the CATCH_UP_* environment variables."""
+    try:
+        concurrency = int(os.getenv("CATCH_UP_CONCURRENCY", "4"))
+        interval_ms = int(os.getenv("CATCH_UP_INTERVAL_MS", "250"))
+        max_messages = int(os.getenv("CATCH_UP_MAX_MESSAGES", "500"))
+    except ValueError as e:
+        log.warning("[CATCH-UP] Invalid setting, using defaults: %s", e)
+        concurrency, interval_ms, max_messages = 4, 250, 500
+    return CatchUpEngine(
+        cfg,
+        client,
+        r,
+        concurrency=concurrency,
+        min_interval=interval_ms / 1000.0,
+        max_messages=max_messages,
+    )
+
+
+# Global singleton instance
+_index: Optional[LastSeenIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_last_seen_index() -> LastSeenIndex:
+    """Get or create the process-wide last seen index (thread-safe)."""
+    global _index
+
+    if _index is not None:
+        return _index
+
+    with _index_lock:
+        if _index is None:
+            _index = LastSeenIndex()
+        return _index
@@ -4,10 +4,17 @@ import logging
 import os
 from pathlib import Path
 
-from redis import Redis
 from telethon import TelegramClient, events
 
+from .avatar_fetcher import get_avatar_fetcher
+from .catch_up import get_last_seen_index
 from .config import AppCfg
+from .entity_directory import get_entity_directory
+from .own_messages import get_own_message_index
+from .redis_operations import AnyRedis, maybe_await
+from .stream_codec import build_message_payload, encode_payload
+from .stream_lanes import LaneClassifier
+from .tracing import now_us, stamp_ingest
 
 log = logging.getLogger(__name__)
 
@@ -201,15 +208,8 @@ def make_client(cfg: AppCfg) -> TelegramClient:
     return client
 
 
-def _reaction_count(msg) -> int:
-    rs = getattr(msg, "reactions", None)
-    if not rs or not rs.results:
-        return 0
-    return sum([r.count for r in rs.results])
-
-
 async def _cache_avatar(
-    client: TelegramClient, entity_id: int, photo, r: Redis
+    client: TelegramClient, entity_id: int, photo, r: AnyRedis
 ) -> str | None:
     """Cache avatar for user or chat entity.
 
@@ -217,7 +217,7 @@ async def _cache_avatar(
         client: Telegram client
         entity_id: User ID or Chat ID
         photo: Photo object from entity
-        r: Redis client
+        r: Redis client (sync or asyncio)
 
     Returns:
         Avatar URL if successfully cached, None otherwise
@@ -237,7 +237,7 @@ async def _cache_avatar(
         avatar_url = f"/api/avatar/{prefix}/{abs(entity_id)}"
 
         # Check if avatar is already cached in Redis
-        redis_cached = r.exists(cache_key)
+        redis_cached = await maybe_await(r.exists(cache_key))
 
         # Download if not in Redis
         if not redis_cached:
@@ -255,7 +255,7 @@ async def _cache_avatar(
 
                 # Encode as base64 and store in Redis
                 avatar_b64 = base64.b64encode(avatar_data).decode("utf-8")
-                r.set(cache_key, avatar_b64)  # No TTL
+                await maybe_await(r.set(cache_key, avatar_b64))  # No TTL
                 log.info(
                     "✓ Cached avatar in Redis for %s %s (%d bytes)",
                     prefix,
@@ -279,53 +279,9 @@ async def _cache_avatar(
         return None
 
 
-def _safe_get_reply_to_id(message):
-    """Safely extract reply_to_msg_id, handling None and mock objects."""
-    try:
-        reply_to = getattr(message, "reply_to", None)
-        if reply_to is None:
-            return None
-        # Check if it's a mock object (has _mock_name attribute)
-        if hasattr(reply_to, "_mock_name"):
-            return None
-        reply_to_id = getattr(reply_to, "reply_to_msg_id", None)
-        return int(reply_to_id) if reply_to_id is not None else None
-    except (AttributeError, TypeError, ValueError):
-        return None
-
-
-def _safe_get_media_type(message):
-    """Safely extract media type, handling None and mock objects."""
-    try:
-        media = getattr(message, "media", None)
-        if media is None:
-            return None
-        # Check if it's a mock object
-        if hasattr(media, "_mock_name"):
-            return None
-        return media.__class__.__name__ if hasattr(media, "__class__") else None
-    except (AttributeError, TypeError):
-        return None
-
-
-def _safe_get_forward_from(message):
-    """Safely extract forward from user ID, handling None and mock objects."""
-    try:
-        forward = getattr(message, "forward", None)
-        if forward is None:
-            return None
-        # Check if it's a mock object
-        if hasattr(forward, "_mock_name"):
-            return None
-        if hasattr(forward, "from_id") and hasattr(forward.from_id, "user_id"):
-            return int(forward.from_id.user_id)
-        return None
-    except (AttributeError, TypeError, ValueError):
-        return None
-
-
-def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
+def start_ingestion(cfg: AppCfg, client, r: AnyRedis) -> None:
     stream = cfg.system.redis.stream
+    lanes = LaneClassifier(cfg)
     log.info("Starting message ingestion handler (stream=%s)", stream)
     log.info(
         "[HANDLER-DEBUG] Configuring NewMessage listener: incoming=True, outgoing=False"
@@ -350,48 +306,74 @@ def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
         listener,
     )
 
+    # Index of our own outgoing message IDs (lets the worker detect replies to
+    # us without an RPC). A (re)registration may follow a login to another
+    # account, so start from an empty index.
+    own_messages = get_own_message_index()
+    own_messages.clear()
+    directory = get_entity_directory()
+    avatar_fetcher = get_avatar_fetcher()
+    avatar_fetcher.bind(client, r)
+    # Messages posted until now are fetched by the catch-up worker
+    last_seen = get_last_seen_index()
+    last_seen.mark_restart()
+
+    async def _resolve_event_entity(event, kind: str, entity_id):
+        """Resolve the event's sender or chat ("sender"/"chat") via the directory.
+
+        Entities attached to the update are recorded without an RPC; otherwise
+        the directory answers, and only unknown peers fall back to
+        ``event.get_sender()``/``event.get_chat()``.
+        """
+        if entity_id is None:
+            return None
+        entity = getattr(event, kind, None)
+        if entity is not None:
+            return directory.record(entity, entity_id)
+        known = directory.get(entity_id)
+        if known is not None:
+            return known
+        getter = getattr(event, f"get_{kind}", None)
+        if not callable(getter):
+            return None
+        try:
+            entity = getter()
+            if asyncio.iscoroutine(entity):
+                entity = await entity
+        except Exception as get_err:
+            log.debug("Could not fetch %s for %s: %s", kind, entity_id, get_err)
+            return None
+        return directory.record(entity, entity_id)
+
+    async def _fetch_entity(entity_id):
+        """Last-resort ``client.get_entity`` lookup, recorded in the directory."""
+        try:
+            return directory.record(await client.get_entity(entity_id), entity_id)
+        except Exception as entity_err:
+            log.debug("Could not fetch entity by ID %s: %s", entity_id, entity_err)
+            return None
+
     async def handler(event):
+        received_us = now_us()
+        chat_info = None
         # CRITICAL DEBUG: Log handler invocation IMMEDIATELY to detect if handler fires at all
         try:
             m = event.message
             chat_id = getattr(event, "chat_id", None)
             msg_id = getattr(m, "id", None)
             sender_id = getattr(m, "sender_id", None)
+            if isinstance(chat_id, int) and isinstance(msg_id, int):
+                own_messages.observe(chat_id, msg_id)
 
             # Determine if this is a private chat (user ID > 0, not a channel/group)
             is_private = isinstance(chat_id, int) and chat_id > 0
 
-            # Get chat object to determine exact type
-            chat = None
-            chat_type_str = "unknown"
-            try:
-                get_chat = getattr(event, "get_chat", None)
-                if callable(get_chat):
-                    if asyncio.iscoroutinefunction(get_chat):
-                        chat = await get_chat()
-                    else:
-                        chat = get_chat()
-
-                if chat:
-                    from telethon.tl.types import Channel
-                    from telethon.tl.types import Chat as TgChat
-                    from telethon.tl.types import User
-
-                    if isinstance(chat, User):
-                        chat_type_str = "private_dm"
-                    elif isinstance(chat, Channel):
-                        if getattr(chat, "broadcast", False):
-                            chat_type_str = "channel"
-                        elif getattr(chat, "megagroup", False):
-                            chat_type_str = "supergroup"
-                        else:
-                            chat_type_str = "group"
-                    elif isinstance(chat, TgChat):
-                        chat_type_str = "group"
-            except Exception as chat_type_err:
-                log.debug(
-                    "[HANDLER-DEBUG] Could not determine chat type: %s", chat_type_err
-                )
+            # Chat type from the directory (entity attached to the update or
+            # recorded earlier; no RPC in the common case)
+            chat_info = await _resolve_event_entity(event, "chat", chat_id)
+            chat_type_str = chat_info.type if chat_info else "unknown"
+            if chat_type_str in ("user", "bot"):
+                chat_type_str = "private_dm"
 
             log.info(
                 "[HANDLER-DEBUG] ⚡ Handler invoked: chat_id=%s, sender_id=%s, msg_id=%s, is_private=%s, chat_type=%s",
@@ -423,71 +405,26 @@ def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
 
         # Best-effort enrichment; failures must not prevent ingestion.
         try:
-            # Fetch sender entity
-            get_sender = getattr(event, "get_sender", None)
-            sender = None
-            if callable(get_sender):
-                # Support both async and sync implementations
-                if asyncio.iscoroutinefunction(get_sender):
-                    sender = await get_sender()
-                else:
-                    sender = get_sender()
-
-            if sender:
-                if hasattr(sender, "first_name"):
-                    name_parts: list[str] = []
-                    if getattr(sender, "first_name", None):
-                        name_parts.append(sender.first_name)  # type: ignore[attr-defined]
-                    if getattr(sender, "last_name", None):
-                        name_parts.append(sender.last_name)  # type: ignore[attr-defined]
-                    sender_name = " ".join(name_parts)
-                elif hasattr(sender, "title"):
-                    sender_name = getattr(sender, "title", "") or ""
-                elif hasattr(sender, "username"):
-                    username = getattr(sender, "username", "") or ""
-                    sender_name = f"@{username}" if username else ""
-
-                # Try to cache avatar URL if user has a profile photo
-                if (
-                    sender_id is not None
-                    and hasattr(sender, "photo")
-                    and getattr(sender, "photo")
-                ):
-                    try:
-                        avatar_url = await _cache_avatar(
-                            client, sender_id, sender.photo, r  # type: ignore[arg-type]
-                        )
-                        sender_avatar_url = avatar_url or sender_avatar_url
-                    except Exception as avatar_err:
-                        log.debug("Could not cache avatar: %s", avatar_err)
-
-            # Fallback: if sender_name is still empty and we have sender_id, try getting entity directly
-            if not sender_name and sender_id:
-                try:
-                    entity = await client.get_entity(sender_id)
-                    if entity:
-                        if hasattr(entity, "first_name"):
-                            name_parts: list[str] = []
-                            if getattr(entity, "first_name", None):
-                                name_parts.append(entity.first_name)  # type: ignore[attr-defined]
-                            if getattr(entity, "last_name", None):
-                                name_parts.append(entity.last_name)  # type: ignore[attr-defined]
-                            sender_name = " ".join(name_parts)
-                        elif hasattr(entity, "title"):
-                            sender_name = getattr(entity, "title", "") or ""
-                        elif hasattr(entity, "username"):
-                            username = getattr(entity, "username", "") or ""
-                            sender_name = f"@{username}" if username else ""
-                except Exception as entity_err:
-                    log.debug(
-                        "Could not fetch entity by ID %s: %s", sender_id, entity_err
+            await directory.load(r)
+
+            # Sender: update entity -> directory -> get_sender() -> get_entity()
+            sender_info = await _resolve_event_entity(event, "sender", sender_id)
+            if (sender_info is None or not sender_info.name) and sender_id:
+                sender_info = await _fetch_entity(sender_id) or sender_info
+            if sender_info:
+                sender_name = sender_info.name
+
+                # Avatar is downloaded in the background, never inline
+                if sender_info.photo_id:
+                    sender_avatar_url = avatar_fetcher.enqueue(
+                        sender_info.id, sender_info.photo_id
                     )
 
             # Last resort: check Redis participant cache
             if not sender_name and sender_id and getattr(event, "chat_id", None):
                 try:
                     cache_key = f"tgsentinel:participant:{event.chat_id}:{sender_id}"
-                    cached = r.get(cache_key)
+                    cached = await maybe_await(r.get(cache_key))
                     if cached:
                         if isinstance(cached, bytes):
                             cached_str = cached.decode("utf-8")
@@ -500,84 +437,18 @@ def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
                 except Exception as cache_err:
                     log.debug("Could not get sender name from cache: %s", cache_err)
 
-            # Fetch chat entity to get proper chat title and cache chat type
-            get_chat = getattr(event, "get_chat", None)
-            chat = None
-            if callable(get_chat):
-                try:
-                    if asyncio.iscoroutinefunction(get_chat):
-                        chat = await get_chat()
-                    else:
-                        chat = get_chat()
-                except Exception as chat_err:
-                    log.debug("Could not fetch chat: %s", chat_err)
-
-            if chat:
-                if getattr(chat, "title", None):
-                    chat_title = chat.title  # type: ignore[attr-defined]
-                elif getattr(chat, "first_name", None):
-                    chat_title = chat.first_name  # type: ignore[attr-defined]
-                    if getattr(chat, "last_name", None):
-                        chat_title += f" {chat.last_name}"  # type: ignore[attr-defined]
-                elif getattr(chat, "username", None):
-                    chat_title = f"@{chat.username}"  # type: ignore[attr-defined]
-
-                # Try to cache chat avatar if chat has a profile photo
-                if (
-                    getattr(event, "chat_id", None) is not None
-                    and hasattr(chat, "photo")
-                    and getattr(chat, "photo")
-                ):
-                    try:
-                        chat_avatar_url = await _cache_avatar(
-                            client, event.chat_id, chat.photo, r  # type: ignore[arg-type]
-                        )
-                    except Exception as chat_avatar_err:
-                        log.debug("Could not cache chat avatar: %s", chat_avatar_err)
-
-                # Cache chat type for better UI display
-                try:
-                    from telethon.tl.types import Channel
-                    from telethon.tl.types import Chat as TgChat
-
-                    chat_type = "unknown"
-                    if isinstance(chat, Channel):
-                        if getattr(chat, "broadcast", False):
-                            chat_type = "channel"
-                        elif getattr(chat, "megagroup", False):
-                            chat_type = "supergroup"
-                        elif getattr(chat, "gigagroup", False):
-                            chat_type = "gigagroup"
-                        else:
-                            chat_type = "channel"
-                    elif isinstance(chat, TgChat):
-                        chat_type = "group"
-
-                    cache_key = f"tgsentinel:chat_type:{event.chat_id}"
-                    r.setex(cache_key, 86400, chat_type)
-                    log.debug("Cached chat type for %s: %s", event.chat_id, chat_type)
-                except Exception as type_err:
-                    log.debug("Could not cache chat type: %s", type_err)
-
-            # Fallback: if chat_title is still empty, try getting entity directly
-            if not chat_title and getattr(event, "chat_id", None):
-                try:
-                    entity = await client.get_entity(event.chat_id)
-                    if entity:
-                        if getattr(entity, "title", None):
-                            chat_title = entity.title  # type: ignore[attr-defined]
-                        elif getattr(entity, "first_name", None):
-                            chat_title = entity.first_name  # type: ignore[attr-defined]
-                            if getattr(entity, "last_name", None):
-                                chat_title += f" {entity.last_name}"  # type: ignore[attr-defined]
-                        elif hasattr(entity, "username"):
-                            username = getattr(entity, "username", "") or ""
-                            chat_title = f"@{username}" if username else chat_title
-                except Exception as entity_err:
-                    log.debug(
-                        "Could not fetch chat entity by ID %s: %s",
-                        event.chat_id,
-                        entity_err,
+            # Chat: same lookup order as the sender
+            event_chat_id = getattr(event, "chat_id", None)
+            if chat_info is None:
+                chat_info = await _resolve_event_entity(event, "chat", event_chat_id)
+            if (chat_info is None or not chat_info.name) and event_chat_id:
+                chat_info = await _fetch_entity(event_chat_id) or chat_info
+            if chat_info:
+                chat_title = chat_info.name
+
+                if chat_info.photo_id:
+                    chat_avatar_url = avatar_fetcher.enqueue(
+                        chat_info.id, chat_info.photo_id
                     )
 
             # For private chats, if chat_title is still empty, use sender_name as fallback
@@ -587,42 +458,26 @@ def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
             # Never let enrichment errors break ingestion
             log.debug("Ingestion enrichment failed: %s", enrich_err)
 
+        # Persist entities that are new or changed (no-op in the common case)
+        await directory.flush(r)
+
         # Build minimal, JSON-serializable payload using safe defaults
         try:
-            # Extract timestamp safely
-            msg_date = getattr(m, "date", None)
-            timestamp = msg_date.isoformat() if msg_date is not None else None
-
-            payload = {
-                "chat_id": getattr(event, "chat_id", None),
-                "chat_title": chat_title,
-                "msg_id": getattr(m, "id", None),
-                "sender_id": getattr(m, "sender_id", None),
-                "sender_name": sender_name,
-                "mentioned": bool(getattr(m, "mentioned", False)),
-                "text": getattr(m, "message", "") or "",
-                "replies": int(getattr(getattr(m, "replies", None), "replies", 0) or 0),
-                "reactions": _reaction_count(m),
-                "timestamp": timestamp,
-                "avatar_url": sender_avatar_url or chat_avatar_url,
-                "chat_avatar_url": chat_avatar_url,
-                "is_reply": bool(getattr(m, "is_reply", False)),
-                "reply_to_msg_id": _safe_get_reply_to_id(m),
-                "has_media": bool(getattr(m, "media", None))
-                and not hasattr(getattr(m, "media", None), "_mock_name"),
-                "media_type": _safe_get_media_type(m),
-                "is_pinned": bool(getattr(m, "pinned", False)),
-                "has_forward": bool(getattr(m, "forward", None))
-                and not hasattr(getattr(m, "forward", None), "_mock_name"),
-                "forward_from": _safe_get_forward_from(m),
-            }
+            payload = build_message_payload(
+                m,
+                chat_id=getattr(event, "chat_id", None),
+                chat_title=chat_title,
+                sender_name=sender_name,
+                sender_avatar_url=sender_avatar_url,
+                chat_avatar_url=chat_avatar_url,
+            )
         except Exception as payload_err:
             log.exception("ingest_error: could not build payload: %s", payload_err)
             return
 
         # Filter out messages from the current user (don't track own messages)
         try:
-            current_user_str = r.get("tgsentinel:user_info")
+            current_user_str = await maybe_await(r.get("tgsentinel:user_info"))
             if current_user_str:
                 if isinstance(current_user_str, bytes):
                     current_user_str = current_user_str.decode()
@@ -655,11 +510,30 @@ def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
         except Exception as private_err:
             log.debug("Private chat filter failed: %s", private_err)
 
-        # Finally, push to Redis stream
+        # Finally, push to the message's lane of the Redis stream (no MAXLEN:
+        # the worker's backpressure monitor trims explicitly, processed
+        # entries first)
         try:
-            r.xadd(
-                stream, {"json": json.dumps(payload)}, maxlen=100000, approximate=True
+            indexed = isinstance(payload["chat_id"], int) and isinstance(
+                payload["msg_id"], int
             )
+            if indexed:
+                await last_seen.load(r)
+                # Catch-up or the DM poller may have fetched it before its
+                # update was handled
+                if payload["msg_id"] <= (last_seen.last(payload["chat_id"]) or 0):
+                    log.debug(
+                        "Skipping already ingested message %s in chat %s",
+                        payload["msg_id"],
+                        payload["chat_id"],
+                    )
+                    return
+            lane_stream = lanes.stream_for(payload)
+            stamp_ingest(payload, received_us)
+            await maybe_await(r.xadd(lane_stream, encode_payload(payload)))
+            if indexed:
+                last_seen.observe(payload["chat_id"], payload["msg_id"])
+                await last_seen.flush(r)
             log.info(
                 "Message ingested: chat=%s, sender=%s (%s)",
                 payload["chat_title"] or payload["chat_id"],
@@ -692,6 +566,21 @@ def start_ingestion(cfg: AppCfg, client, r: Redis) -> None:
 
     log.info("Message ingestion handler registered successfully")
 
+    async def outgoing_handler(event):
+        chat_id = getattr(event, "chat_id", None)
+        msg_id = getattr(getattr(event, "message", None), "id", None)
+        if isinstance(chat_id, int) and isinstance(msg_id, int):
+            own_messages.add(chat_id, msg_id)
+
+    add_handler = getattr(client, "add_event_handler", None)
+    if callable(add_handler):
+        maybe_coro = add_handler(
+            outgoing_handler, events.NewMessage(incoming=False, outgoing=True)
+        )
+        if asyncio.iscoroutine(maybe_coro):
+            maybe_coro.close()
+        log.info("Outgoing message tracker registered (reply-to-us detection)")
+
     # DEBUG: Add a catch-all handler to test if client receives NewMessage events from monitored entities
     async def debug_catch_all_handler(event):
         try:
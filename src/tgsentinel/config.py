@@ -40,6 +40,10 @@ class DeliveryMode(str, Enum):
 VALID_DELIVERY_MODES = {"none", "dm", "digest", "both"}
 VALID_DELIVERY_MODE_MESSAGE = "none|dm|digest|both"
 
+# Semantic scoring modes of interest profiles: similarity to the weighted
+# centroids, or mean similarity to the k nearest samples
+VALID_SCORING_MODES = {"centroid", "knn"}
+
 
 def normalize_delivery_mode(mode: str | None) -> str | None:
     """Normalize and validate delivery mode.
@@ -201,6 +205,8 @@ class ProfileDefinition:
     negative_weight: float = (
         0.15  # Penalty multiplier for negative similarity (0.0-0.5)
     )
+    scoring_mode: str = "centroid"  # Semantic scoring: "centroid" or "knn"
+    knn_k: int = 3  # Nearest samples averaged per message in "knn" mode
     min_score: float = 1.0  # Minimum score threshold for alert profiles (keyword-based)
 
     # Engagement thresholds (trigger +0.5 each when met)
@@ -220,6 +226,16 @@ class ProfileDefinition:
         else:
             self.tags = [str(tag).strip() for tag in self.tags if str(tag).strip()]
 
+        self.scoring_mode = str(self.scoring_mode or "centroid").lower().strip()
+        if self.scoring_mode not in VALID_SCORING_MODES:
+            raise ValueError(
+                f"Invalid scoring_mode: '{self.scoring_mode}'. "
+                f"Must be one of: {'|'.join(sorted(VALID_SCORING_MODES))}"
+            )
+        if int(self.knn_k) < 1:
+            raise ValueError(f"knn_k must be at least 1, got {self.knn_k}")
+        self.knn_k = int(self.knn_k)
+
         if not self.scoring_weights:
             self.scoring_weights = {
                 "keywords": 0.8,
@@ -357,6 +373,8 @@ class RedisCfg:
     stream: str = "tgsentinel:messages"
     group: str = "workers"
     consumer: str = "worker-1"
+    max_connections: int = 32  # Pool size of the shared asyncio client
+    pool_timeout: float = 20.0  # Seconds a command waits for a free connection
 
 
 @dataclass
@@ -377,6 +395,95 @@ class DatabaseCfg:
     vacuum_hour: int = 3  # Preferred hour for VACUUM (0-23, default 3 AM)
 
 
+@dataclass
+class WorkerCfg:
+    """Stream consumer tuning for the message processing worker."""
+
+    read_count: int = 50  # Max stream entries per XREADGROUP call
+    read_block_ms: int = 5000  # XREADGROUP block timeout when the stream is idle
+    batch_window_ms: int = 0  # Extra time to fill a partial batch (0 = disabled)
+    encode_batch_size: int = 32  # SentenceTransformer.encode batch_size
+    concurrency: int = 8  # Messages processed in parallel (ordered within a chat)
+    max_inflight: int = 200  # Unacked messages held before reads pause
+    write_batch_size: int = 100  # Buffered DB writes that trigger a flush
+    write_flush_ms: int = 50  # Max age of a buffered DB write (0 = flush at once)
+    reclaim_interval_ms: int = 30000  # Pending-entry reclaim period (0 = disabled)
+    reclaim_min_idle_ms: int = 60000  # Idle time before a pending entry is reclaimed
+    max_deliveries: int = 5  # Deliveries before an entry is dead-lettered
+    processes: int = 1  # Scoring processes (1 = in-process)
+    backpressure_interval_ms: int = 2000  # Consumer lag measurement period
+    lag_elevated: int = 1000  # Lag that reduces per-message logging
+    lag_high: int = 5000  # Lag that sheds semantic scoring and duplicates
+    stream_maxlen: int = 100000  # Stream length above which entries are trimmed
+    priority_weight: int = 4  # Priority-lane shares per bulk-lane share
+
+    def __post_init__(self):
+        """Validate worker configuration constraints."""
+        if self.read_count <= 0:
+            raise ValueError(
+                f"WorkerCfg.read_count must be positive, got {self.read_count}"
+            )
+        if self.read_block_ms < 0:
+            raise ValueError(
+                f"WorkerCfg.read_block_ms must be non-negative, got {self.read_block_ms}"
+            )
+        if self.batch_window_ms < 0:
+            raise ValueError(
+                f"WorkerCfg.batch_window_ms must be non-negative, got {self.batch_window_ms}"
+            )
+        if self.encode_batch_size <= 0:
+            raise ValueError(
+                f"WorkerCfg.encode_batch_size must be positive, got {self.encode_batch_size}"
+            )
+        if self.concurrency <= 0:
+            raise ValueError(
+                f"WorkerCfg.concurrency must be positive, got {self.concurrency}"
+            )
+        if self.max_inflight < self.concurrency:
+            raise ValueError(
+                f"WorkerCfg.max_inflight ({self.max_inflight}) must be >= "
+                f"concurrency ({self.concurrency})"
+            )
+        if self.write_batch_size <= 0:
+            raise ValueError(
+                f"WorkerCfg.write_batch_size must be positive, got {self.write_batch_size}"
+            )
+        if self.write_flush_ms < 0:
+            raise ValueError(
+                f"WorkerCfg.write_flush_ms must be non-negative, got {self.write_flush_ms}"
+            )
+        if self.reclaim_interval_ms < 0:
+            raise ValueError(
+                f"WorkerCfg.reclaim_interval_ms must be non-negative, got {self.reclaim_interval_ms}"
+            )
+        if self.reclaim_min_idle_ms < 0:
+            raise ValueError(
+                f"WorkerCfg.reclaim_min_idle_ms must be non-negative, got {self.reclaim_min_idle_ms}"
+            )
+        if self.max_deliveries <= 0:
+            raise ValueError(
+                f"WorkerCfg.max_deliveries must be positive, got {self.max_deliveries}"
+            )
+        if self.processes <= 0:
+            raise ValueError(
+                f"WorkerCfg.processes must be positive, got {self.processes}"
+            )
+        if self.backpressure_interval_ms <= 0:
+            raise ValueError(
+                "WorkerCfg.backpressure_interval_ms must be positive, "
+                f"got {self.backpressure_interval_ms}"
+            )
+        if not 0 < self.lag_elevated <= self.lag_high <= self.stream_maxlen:
+            raise ValueError(
+                "WorkerCfg requires 0 < lag_elevated <= lag_high <= stream_maxlen, got "
+                f"{self.lag_elevated}, {self.lag_high}, {self.stream_maxlen}"
+            )
+        if self.priority_weight <= 0:
+            raise ValueError(
+                f"WorkerCfg.priority_weight must be positive, got {self.priority_weight}"
+            )
+
+
 @dataclass
 class FeedbackLearningConfig:
     """Feedback learning configuration (Phase 1: Stability Foundation)."""
@@ -489,6 +596,7 @@ class SystemCfg:
     database_uri: str = "sqlite:////app/data/sentinel.db"
     database: DatabaseCfg = field(default_factory=DatabaseCfg)
     logging: LoggingCfg = field(default_factory=LoggingCfg)
+    worker: WorkerCfg = field(default_factory=WorkerCfg)
     metrics_endpoint: str = ""  # Optional Prometheus/metrics endpoint URL
     auto_restart: bool = True
 
@@ -810,6 +918,8 @@ def _load_global_profiles(profiles_path: str) -> Dict[str, ProfileDefinition]:
                         "threshold",  # Similarity threshold for semantic profiles (0.0-1.0)
                         "positive_weight",  # Multiplier for positive similarity (0.1-2.0)
                         "negative_weight",  # Penalty multiplier for negative similarity (0.0-0.5)
+                        "scoring_mode",  # "centroid" or "knn" (top-k sample similarity)
+                        "knn_k",  # Nearest samples averaged in "knn" mode
                         "min_score",  # Minimum score threshold for alert profiles
                     }
 
@@ -947,6 +1057,12 @@ logging:
         ),
         group=redis_config.get("group", os.getenv("REDIS_GROUP", "workers")),
         consumer=redis_config.get("consumer", os.getenv("REDIS_CONSUMER", "worker-1")),
+        max_connections=redis_config.get(
+            "max_connections", _env_int("REDIS_MAX_CONNECTIONS", 32)
+        ),
+        pool_timeout=redis_config.get(
+            "pool_timeout", _env_float("REDIS_POOL_TIMEOUT", 20.0)
+        ),
     )
 
     # Database configuration
@@ -984,6 +1100,55 @@ logging:
         vacuum_hour=database_config.get("vacuum_hour", _env_int("DB_VACUUM_HOUR", 3)),
     )
 
+    # Worker stream consumer configuration
+    worker_config = system_config.get("worker", {})
+    worker_cfg = WorkerCfg(
+        read_count=worker_config.get("read_count", _env_int("WORKER_READ_COUNT", 50)),
+        read_block_ms=worker_config.get(
+            "read_block_ms", _env_int("WORKER_READ_BLOCK_MS", 5000)
+        ),
+        batch_window_ms=worker_config.get(
+            "batch_window_ms", _env_int("WORKER_BATCH_WINDOW_MS", 0)
+        ),
+        encode_batch_size=worker_config.get(
+            "encode_batch_size", _env_int("EMBEDDINGS_BATCH_SIZE", 32)
+        ),
+        concurrency=worker_config.get("concurrency", _env_int("WORKER_CONCURRENCY", 8)),
+        max_inflight=worker_config.get(
+            "max_inflight", _env_int("WORKER_MAX_INFLIGHT", 200)
+        ),
+        write_batch_size=worker_config.get(
+            "write_batch_size", _env_int("WORKER_WRITE_BATCH_SIZE", 100)
+        ),
+        write_flush_ms=worker_config.get(
+            "write_flush_ms", _env_int("WORKER_WRITE_FLUSH_MS", 50)
+        ),
+        reclaim_interval_ms=worker_config.get(
+            "reclaim_interval_ms", _env_int("WORKER_RECLAIM_INTERVAL_MS", 30000)
+        ),
+        reclaim_min_idle_ms=worker_config.get(
+            "reclaim_min_idle_ms", _env_int("WORKER_RECLAIM_MIN_IDLE_MS", 60000)
+        ),
+        max_deliveries=worker_config.get(
+            "max_deliveries", _env_int("WORKER_MAX_DELIVERIES", 5)
+        ),
+        processes=worker_config.get("processes", _env_int("WORKER_PROCESSES", 1)),
+        backpressure_interval_ms=worker_config.get(
+            "backpressure_interval_ms",
+            _env_int("WORKER_BACKPRESSURE_INTERVAL_MS", 2000),
+        ),
+        lag_elevated=worker_config.get(
+            "lag_elevated", _env_int("WORKER_LAG_ELEVATED", 1000)
+        ),
+        lag_high=worker_config.get("lag_high", _env_int("WORKER_LAG_HIGH", 5000)),
+        stream_maxlen=worker_config.get(
+            "stream_maxlen", _env_int("WORKER_STREAM_MAXLEN", 100000)
+        ),
+        priority_weight=worker_config.get(
+            "priority_weight", _env_int("WORKER_PRIORITY_WEIGHT", 4)
+        ),
+    )
+
     # Auto-restart configuration
     auto_restart = system_config.get("auto_restart", _env_bool("AUTO_RESTART", True))
 
@@ -998,6 +1163,7 @@ logging:
         database_uri=database_uri,
         database=database_cfg,
         logging=logging_cfg,
+        worker=worker_cfg,
         metrics_endpoint=metrics_endpoint,
         auto_restart=auto_restart,
     )
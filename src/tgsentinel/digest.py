@@ -10,6 +10,7 @@ from telethon import TelegramClient
 from telethon.tl.types import PeerChannel, PeerChat, PeerUser
 
 from tgsentinel.config import ProfileDefinition
+from tgsentinel.entity_directory import get_entity_directory
 
 # Import message formats module for template rendering
 from tgsentinel.message_formats import (
@@ -140,8 +141,9 @@ async def _hydrate_entity_cache(client: TelegramClient, chat_id: int) -> bool:
     else:
         peer = PeerUser(numeric_id)
 
+    directory = get_entity_directory()
     try:
-        await client.get_entity(peer)
+        directory.record(await client.get_entity(peer), numeric_id)
         return True
     except Exception as exc:
         log.warning("Entity hydration failed for %s: %s", chat_id, exc)
@@ -149,7 +151,7 @@ async def _hydrate_entity_cache(client: TelegramClient, chat_id: int) -> bool:
         # Attempt to refresh dialog cache once before giving up.
         if await _refresh_dialog_cache(client):
             try:
-                await client.get_entity(peer)
+                directory.record(await client.get_entity(peer), numeric_id)
                 return True
             except Exception as retry_exc:
                 log.warning(
@@ -174,7 +176,8 @@ async def _refresh_dialog_cache(client: TelegramClient) -> bool:
         return False
 
     try:
-        await client.get_dialogs(limit=200)
+        dialogs = await client.get_dialogs(limit=200)
+        get_entity_directory().record_dialogs(dialogs)
         _last_dialog_refresh_ts = now
         log.debug("Refreshed dialog cache for entity hydration")
         return True
@@ -75,7 +75,8 @@ class DigestCollector:
         since = datetime.now(timezone.utc) - timedelta(hours=self.since_hours)
         since_str = since.strftime("%Y-%m-%d %H:%M:%S")
 
-        # Phase 1: Dual-read - query both new (feed_interest_flag) and legacy (flagged_for_interest_feed)
+        # init_db keeps feed_interest_flag in sync with the legacy flag, so the bare
+        # column is filtered and idx_messages_digest_queue covers the whole WHERE
         # Use semantic_scores_json for ranking if available, fallback to score
         query = """
         SELECT
@@ -88,7 +89,7 @@ class DigestCollector:
             chat_title, sender_name,
             message_text, trigger_annotations, created_at, matched_profiles
         FROM messages
-        WHERE COALESCE(feed_interest_flag, flagged_for_interest_feed) = 1
+        WHERE feed_interest_flag = 1
           AND digest_schedule = :schedule
           AND digest_processed = 0
           AND created_at >= :since
@@ -401,20 +402,18 @@ class DigestCollector:
 
         message_keys = [(msg.chat_id, msg.msg_id) for msg in self.messages.values()]
 
-        # Build update query for all messages
-        # Use CASE to update multiple rows efficiently
+        # One primary-key lookup per message via executemany; a row-value IN
+        # (VALUES ...) list is not matched against the key and scans the table
         update_query = """
         UPDATE messages
         SET digest_processed = 1
-        WHERE (chat_id, msg_id) IN (
-            VALUES {placeholders}
-        )
-        """.format(
-            placeholders=", ".join([f"({key[0]}, {key[1]})" for key in message_keys])
-        )
+        WHERE chat_id = :c AND msg_id = :m
+        """
 
         with self.engine.begin() as con:
-            result = con.execute(text(update_query))
+            result = con.execute(
+                text(update_query), [{"c": c, "m": m} for c, m in message_keys]
+            )
 
         log.info(
             f"[DIGEST-COLLECTOR] Marked {len(message_keys)} messages as processed",
@@ -4,21 +4,41 @@ DM (Direct Message) polling handler for TG Sentinel.
 Polls monitored users' conversations periodically to ingest private messages.
 This runs independently from the NewMessage event handler which only reliably
 works for channels/groups, not private DMs.
+
+Each user is fetched with ``min_id`` = the highest message id ingested from
+that chat (the last seen index shared with live ingestion and catch-up, so it
+survives restarts), which returns exactly the new messages however many
+arrived. Messages missed while ingestion restarted are fetched first, up to
+the first one that arrived live afterwards. Users are polled concurrently;
+each one's interval adapts to its activity, and users whose messages
+currently arrive through the live handler (and have no gap left) are not
+polled at all.
 """
 
 import asyncio
 import json
 import logging
-from typing import Any, Callable
+import os
+import time
+from typing import Any, Callable, Dict, Optional
 
-from redis import Redis
 from telethon import TelegramClient
 from telethon.tl.types import User
 
+from .catch_up import get_last_seen_index
 from .config import AppCfg
+from .entity_directory import get_entity_directory
+from .rate_budget import RequestBudget, flood_wait_seconds
+from .redis_operations import AnyRedis, maybe_await
+from .stream_codec import build_message_payload, encode_payload
+from .stream_lanes import PRIORITY_LANE, lane_streams
+from .tracing import now_us, stamp_ingest
 
 log = logging.getLogger(__name__)
 
+# Messages per history request (Telegram's maximum)
+_PAGE_SIZE = 100
+
 
 class DMPoller:
     """
@@ -26,19 +46,27 @@ class DMPoller:
 
     Architecture:
     - Runs as independent async task
-    - Polls each monitored user's conversation every N seconds
-    - Tracks last seen message ID per user to avoid duplicates
+    - Polls due users concurrently (at most ``concurrency`` requests at once,
+      paused together on FloodWaitError)
+    - Fetches only messages newer than the last ingested one (``min_id``)
+    - Per-user interval: ``min_interval`` after activity, doubling while
+      quiet up to ``max_interval``
+    - Fills the gap a restart left before a user's first live message
+    - Skips users whose messages arrived live within ``max_interval``
     - Pushes messages to same Redis stream as event handler
-    - Generation-aware: stops/restarts on session changes
+    - Generation-aware: resets schedules on session changes
     """
 
     def __init__(
         self,
         cfg: AppCfg,
         client_ref: Callable[[], TelegramClient],
-        redis_client: Redis,
+        redis_client: AnyRedis,
         authorized_check: Callable[[], bool],
         poll_interval: int = 30,  # seconds between polls
+        concurrency: int = 8,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
     ):
         """
         Initialize DM poller.
@@ -48,18 +76,33 @@ class DMPoller:
             client_ref: Callable returning current Telegram client
             redis_client: Redis client for stream publishing
             authorized_check: Function returning current authorization status
-            poll_interval: Seconds between polling cycles (default: 30)
+            poll_interval: Initial seconds between polls of a user (default: 30)
+            concurrency: Users polled at the same time (default: 8)
+            min_interval: Interval of active users (default: poll_interval / 3)
+            max_interval: Interval of quiet users (default: poll_interval * 10)
         """
         self.cfg = cfg
         self.client_ref = client_ref
         self.redis = redis_client
         self.authorized_check = authorized_check
         self.poll_interval = poll_interval
-        self.stream = cfg.system.redis.stream
+        self.min_interval = (
+            min_interval if min_interval is not None else poll_interval / 3
+        )
+        self.max_interval = (
+            max_interval if max_interval is not None else poll_interval * 10
+        )
+        # Private chats always go to the priority lane
+        self.stream = lane_streams(cfg.system.redis.stream)[PRIORITY_LANE]
 
-        # Track last seen message ID per user to avoid duplicates
-        # Key: user_id (int), Value: last_msg_id (int)
-        self._last_seen: dict[int, int] = {}
+        # Highest ingested message id per chat (persisted in Redis)
+        self._last_seen = get_last_seen_index()
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._budget = RequestBudget()
+
+        # Adaptive schedule: user_id -> interval / next poll (event-loop time)
+        self._intervals: Dict[int, float] = {}
+        self._next_poll: Dict[int, float] = {}
 
         # Generation tracking (reset on session change)
         self._current_generation: int | None = None
@@ -92,17 +135,18 @@ class DMPoller:
                     continue
 
                 # Check for generation change (session import)
-                current_gen = self._get_current_generation()
+                current_gen = await self._get_current_generation()
                 if current_gen != self._current_generation:
                     log.info(
-                        "[DM-POLLER] Generation change detected: %s -> %s (clearing state)",
+                        "[DM-POLLER] Generation change detected: %s -> %s (resetting schedules)",
                         self._current_generation,
                         current_gen,
                     )
-                    self._last_seen.clear()
+                    self._intervals.clear()
+                    self._next_poll.clear()
                     self._current_generation = current_gen
 
-                # Poll each monitored user
+                # Poll the users that are due
                 await self._poll_all_users()
 
             except asyncio.CancelledError:
@@ -111,108 +155,192 @@ class DMPoller:
             except Exception as e:
                 log.exception("[DM-POLLER] Error in polling loop: %s", e)
 
-            # Wait before next poll cycle
-            await asyncio.sleep(self.poll_interval)
+            # Wait until the next user is due
+            await asyncio.sleep(self._seconds_until_due())
+
+    def _seconds_until_due(self) -> float:
+        if not self._next_poll:
+            return self.poll_interval
+        now = asyncio.get_running_loop().time()
+        wait = min(self._next_poll.values()) - now
+        return min(max(wait, 1.0), self.poll_interval)
 
     async def _poll_all_users(self) -> None:
-        """Poll all monitored users for new DM messages."""
+        """Poll every enabled monitored user that is due, concurrently."""
         client = self.client_ref()
+        await self._last_seen.load(self.redis)
+        now = asyncio.get_running_loop().time()
 
+        due = []
         for user_config in self.cfg.monitored_users:
             if not user_config.enabled:
                 log.debug("[DM-POLLER] Skipping disabled user: %s", user_config.id)
                 continue
-
+            if self._next_poll.get(user_config.id, 0.0) <= now:
+                due.append(user_config.id)
+
+        if due:
+            await asyncio.gather(*(self._poll_scheduled(client, u) for u in due))
+            await self._last_seen.flush(self.redis)
+
+    async def _poll_scheduled(self, client: TelegramClient, user_id: int) -> None:
+        """Poll one user (unless live updates cover it) and reschedule it."""
+        interval = self._intervals.get(user_id, float(self.poll_interval))
+        live_at = self._last_seen.live_at(user_id)
+        if (
+            live_at is not None
+            and time.monotonic() - live_at < self.max_interval
+            and self._last_seen.gap(user_id) is None
+        ):
+            log.debug("[DM-POLLER] User %s arrives live, not polling", user_id)
+            interval = self.max_interval
+        else:
             try:
-                await self._poll_user(client, user_config.id)
+                async with self._semaphore:
+                    new_count = await self._poll_user(client, user_id)
             except Exception as e:
                 log.error(
                     "[DM-POLLER] Error polling user %s: %s",
-                    user_config.id,
+                    user_id,
                     e,
                     exc_info=True,
                 )
+                new_count = 0
+            if new_count:
+                interval = self.min_interval
+            else:
+                interval = min(interval * 2, self.max_interval)
+        self._intervals[user_id] = interval
+        self._next_poll[user_id] = asyncio.get_running_loop().time() + interval
+
+    async def _fetch(self, client: TelegramClient, user_id: int, **kwargs) -> list:
+        """``get_messages`` under the shared budget (retried after flood waits)."""
+        while True:
+            await self._budget.acquire()
+            try:
+                messages = await client.get_messages(user_id, **kwargs)
+            except Exception as e:
+                seconds = flood_wait_seconds(e)
+                if seconds is None:
+                    raise
+                self._budget.pause(seconds)
+                log.warning("[DM-POLLER] Flood wait of %ds, pausing polls", seconds)
+                continue
+            if not messages:
+                return []
+            # get_messages can return a single Message or a list
+            return messages if isinstance(messages, list) else [messages]
 
-    async def _poll_user(self, client: TelegramClient, user_id: int) -> None:
+    async def _poll_user(self, client: TelegramClient, user_id: int) -> int:
         """
-        Poll a specific user's conversation for new messages.
+        Ingest the messages of a user's conversation newer than the last one seen.
 
         Args:
             client: Telegram client
             user_id: User ID to poll
+
+        Returns:
+            Number of messages ingested
         """
-        try:
-            # Get the last N messages from this user's conversation
-            # limit=10 means we check last 10 messages, should be enough for poll_interval=30s
-            messages = await client.get_messages(user_id, limit=10)
+        # Messages missed before a live one after a restart come first: live
+        # ingestion has already moved the last seen id past them
+        gap = self._last_seen.gap(user_id)
+        if gap is not None:
+            return await self._fill_gap(client, user_id, *gap)
+        if self._last_seen.first_live(user_id) is None:
+            # Nothing live since the restart: fetching from the last seen id
+            # covers the gap
+            self._last_seen.close_gap(user_id)
+
+        last_seen_id = self._last_seen.last(user_id)
+
+        # First-time initialization: start from the most recent message to
+        # avoid ingesting history
+        if last_seen_id is None:
+            latest = await self._fetch(client, user_id, limit=1)
+            most_recent_id = max((getattr(m, "id", 0) for m in latest), default=0)
+            self._last_seen.observe(user_id, most_recent_id, live=False)
+            log.info(
+                "[DM-POLLER] First poll for user %s: initialized last_seen to %s",
+                user_id,
+                most_recent_id,
+            )
+            return 0
 
-            if not messages:
-                log.debug("[DM-POLLER] No messages from user %s", user_id)
-                return
+        # Oldest first, only what is newer than the last ingested message
+        messages = await self._fetch(
+            client, user_id, min_id=last_seen_id, limit=_PAGE_SIZE, reverse=True
+        )
 
-            # Ensure messages is a list (get_messages can return a single Message or a list)
-            messages_list = messages if isinstance(messages, list) else [messages]
+        new_count = 0
+        for msg in sorted(messages, key=lambda m: m.id):
+            # Skip if we've already seen this message (e.g. ingested live)
+            if msg.id <= (self._last_seen.last(user_id) or 0):
+                continue
 
-            # First-time initialization: mark the most recent message as seen to avoid ingesting history
-            if user_id not in self._last_seen:
-                most_recent_id = max(
-                    (getattr(m, "id", 0) for m in messages_list), default=0
-                )
-                self._last_seen[user_id] = most_recent_id
-                log.info(
-                    "[DM-POLLER] First poll for user %s: initialized last_seen to %s (skipping %d historical messages)",
-                    user_id,
-                    most_recent_id,
-                    len(messages_list),
-                )
-                return
+            # Skip messages we sent (outgoing); still mark them seen
+            if not msg.out:
+                await self._ingest_message(client, user_id, msg)
+                new_count += 1
+            self._last_seen.observe(user_id, msg.id, live=False)
 
-            # Process messages in chronological order (oldest first)
-            messages_reversed = list(reversed(messages_list))
+        if new_count > 0:
+            log.info(
+                "[DM-POLLER] Ingested %d new messages from user %s (last_seen_id=%s)",
+                new_count,
+                user_id,
+                self._last_seen.last(user_id),
+            )
+        if len(messages) >= _PAGE_SIZE:
+            # More are waiting: report activity so the next page comes soon
+            new_count = max(new_count, 1)
+        return new_count
+
+    async def _fill_gap(
+        self, client: TelegramClient, user_id: int, after: int, before: int
+    ) -> int:
+        """
+        Ingest the messages of a user's conversation between two ids.
 
-            new_count = 0
-            for msg in messages_reversed:
-                # Skip if we've already seen this message
-                last_seen_id = self._last_seen.get(user_id, 0)
-                if msg.id <= last_seen_id:
-                    continue
+        Args:
+            client: Telegram client
+            user_id: User ID to poll
+            after: Last id ingested before the restart
+            before: First id ingested live after the restart
 
-                # Check if message is FROM the monitored user (incoming to us)
-                # Skip messages we sent (outgoing)
-                if msg.out:
-                    log.debug(
-                        "[DM-POLLER] Skipping outgoing message: user=%s, msg_id=%s",
-                        user_id,
-                        msg.id,
-                    )
-                    # Still update last_seen to avoid re-checking
-                    self._last_seen[user_id] = max(
-                        self._last_seen.get(user_id, 0), msg.id
-                    )
-                    continue
+        Returns:
+            Number of messages ingested
+        """
+        messages = await self._fetch(
+            client,
+            user_id,
+            min_id=after,
+            max_id=before,
+            limit=_PAGE_SIZE,
+            reverse=True,
+        )
 
-                # Ingest this message
+        new_count = 0
+        for msg in sorted(messages, key=lambda m: m.id):
+            if not after < msg.id < before:
+                continue
+            if not msg.out:
                 await self._ingest_message(client, user_id, msg)
                 new_count += 1
+            after = msg.id
 
-                # Update last seen message ID
-                self._last_seen[user_id] = max(self._last_seen.get(user_id, 0), msg.id)
-
-            if new_count > 0:
-                log.info(
-                    "[DM-POLLER] Ingested %d new messages from user %s (last_seen_id=%s)",
-                    new_count,
-                    user_id,
-                    self._last_seen.get(user_id),
-                )
-
-        except Exception as e:
-            log.error(
-                "[DM-POLLER] Error fetching messages from user %s: %s",
+        if new_count > 0:
+            log.info(
+                "[DM-POLLER] Recovered %d missed messages from user %s",
+                new_count,
                 user_id,
-                e,
-                exc_info=True,
             )
+        if len(messages) >= _PAGE_SIZE:
+            # More are missing: continue from here on the next poll, soon
+            self._last_seen.close_gap(user_id, upto=after)
+            return max(new_count, 1)
+        self._last_seen.close_gap(user_id)
+        return new_count
 
     async def _ingest_message(
         self, client: TelegramClient, user_id: int, msg: Any
@@ -225,6 +353,7 @@ class DMPoller:
             user_id: User ID (chat ID for private conversation)
             msg: Telethon Message object
         """
+        received_us = now_us()
         try:
             # Build minimal payload (similar to event handler in client.py)
             # Get sender info
@@ -232,56 +361,32 @@ class DMPoller:
             sender_id = getattr(msg, "sender_id", None)
 
             try:
-                sender = await msg.get_sender()
-                if sender and isinstance(sender, User):
-                    name_parts = []
-                    if getattr(sender, "first_name", None):
-                        name_parts.append(sender.first_name)
-                    if getattr(sender, "last_name", None):
-                        name_parts.append(sender.last_name)
-                    sender_name = " ".join(name_parts)
+                # Entity returned with the messages -> directory -> get_sender()
+                directory = get_entity_directory()
+                sender = getattr(msg, "sender", None)
+                sender_info = directory.get(sender_id) if sender is None else None
+                if sender_info is None:
+                    if sender is None:
+                        sender = await msg.get_sender()
+                    if sender and isinstance(sender, User) and sender_id is not None:
+                        sender_info = directory.record(sender, sender_id)
+                if sender_info:
+                    sender_name = sender_info.name
+                await directory.flush(self.redis)
             except Exception as e:
                 log.debug("[DM-POLLER] Could not get sender info: %s", e)
 
-            # Build payload
-            msg_date = getattr(msg, "date", None)
-            timestamp = msg_date.isoformat() if msg_date else None
-            msg_id = getattr(msg, "id", None)
-            is_reply = bool(getattr(msg, "is_reply", False))
-            media = getattr(msg, "media", None)
-            forward = getattr(msg, "forward", None)
-
-            payload = {
-                "chat_id": user_id,
-                "chat_title": sender_name or f"User {user_id}",
-                "msg_id": msg_id,
-                "sender_id": sender_id,
-                "sender_name": sender_name,
-                "mentioned": bool(getattr(msg, "mentioned", False)),
-                "text": getattr(msg, "message", "") or "",
-                "replies": 0,  # DMs don't have public reply counts
-                "reactions": 0,  # DMs don't have public reactions
-                "timestamp": timestamp,
-                "avatar_url": None,  # Will be enriched later if needed
-                "chat_avatar_url": None,
-                "is_reply": is_reply,
-                "reply_to_msg_id": (
-                    getattr(msg, "reply_to_msg_id", None) if is_reply else None
-                ),
-                "has_media": bool(media),
-                "media_type": media.__class__.__name__ if media else None,
-                "is_pinned": False,  # DMs don't have pinned messages
-                "has_forward": bool(forward),
-                "forward_from": None,  # Could be enriched if needed
-            }
-
-            # Push to Redis stream (same stream as event handler)
-            self.redis.xadd(
-                self.stream,
-                {"json": json.dumps(payload)},
-                maxlen=100000,
-                approximate=True,
+            payload = build_message_payload(
+                msg,
+                chat_id=user_id,
+                chat_title=sender_name or f"User {user_id}",
+                sender_name=sender_name,
             )
+            msg_id = payload["msg_id"]
+
+            # Push to Redis stream (same lane as the event handler uses for DMs)
+            stamp_ingest(payload, received_us)
+            await maybe_await(self.redis.xadd(self.stream, encode_payload(payload)))
 
             log.info(
                 "[DM-POLLER] Message ingested: chat_id=%s, sender=%s (%s), msg_id=%s",
@@ -294,7 +399,7 @@ class DMPoller:
         except Exception as e:
             log.exception("[DM-POLLER] Error ingesting message: %s", e)
 
-    def _get_current_generation(self) -> int:
+    async def _get_current_generation(self) -> int:
         """
         Get current session generation from Redis.
 
@@ -303,7 +408,7 @@ class DMPoller:
         """
         try:
             worker_status_key = "tgsentinel:worker_status"
-            status_json = self.redis.get(worker_status_key)
+            status_json = await maybe_await(self.redis.get(worker_status_key))
 
             if not status_json:
                 return 0
@@ -326,7 +431,7 @@ class DMPoller:
 async def start_dm_poller(
     cfg: AppCfg,
     client_ref: Callable[[], TelegramClient],
-    redis_client: Redis,
+    redis_client: AnyRedis,
     authorized_check: Callable[[], bool],
     poll_interval: int = 30,
 ) -> None:
@@ -340,7 +445,19 @@ async def start_dm_poller(
         client_ref: Callable returning current Telegram client
         redis_client: Redis client
         authorized_check: Function returning authorization status
-        poll_interval: Seconds between polls (default: 30)
+        poll_interval: Initial seconds between polls of a user (default: 30)
     """
-    poller = DMPoller(cfg, client_ref, redis_client, authorized_check, poll_interval)
+    try:
+        concurrency = int(os.getenv("DM_POLL_CONCURRENCY", "8"))
+    except ValueError as e:
+        log.warning("[DM-POLLER] Invalid DM_POLL_CONCURRENCY, using 8: %s", e)
+        concurrency = 8
+    poller = DMPoller(
+        cfg,
+        client_ref,
+        redis_client,
+        authorized_check,
+        poll_interval,
+        concurrency=concurrency,
+    )
     await poller.start()
@@ -0,0 +1,382 @@
+"""Two-tier cache of sentence embeddings keyed by (model name, content hash).
+
+Forwarded and cross-posted messages share the same text and therefore the same
+``heuristics.content_hash``. Caching their embeddings lets the worker, the
+interest backtest and the similarity tester skip the model for text that was
+already encoded once.
+
+Tiers:
+- Memory: bounded LRU of float32 vectors (per process)
+- Disk: SQLite table of float16 blobs, evicted least-recently-used once the
+  stored vector bytes exceed a configured budget
+
+The same store keeps each interest profile's centroids, keyed by a hash of
+the profile's samples and weights, so a restart or a cache clear rebuilds
+unchanged profiles without reading a single sample vector.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  model TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  dim INTEGER NOT NULL,
+  vec BLOB NOT NULL,
+  last_used INTEGER NOT NULL,
+  PRIMARY KEY (model, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used
+  ON embedding_cache(last_used);
+CREATE TABLE IF NOT EXISTS profile_centroids (
+  model TEXT NOT NULL,
+  sample_key TEXT NOT NULL,
+  profile_id TEXT NOT NULL,
+  dim INTEGER NOT NULL,
+  positive BLOB NOT NULL,
+  negative BLOB,
+  updated_at INTEGER NOT NULL,
+  PRIMARY KEY (model, sample_key)
+);
+CREATE INDEX IF NOT EXISTS idx_profile_centroids_profile
+  ON profile_centroids(model, profile_id);
+"""
+
+# (positive, negative) centroid of a profile; negative is None without samples
+Centroids = Tuple[np.ndarray, Optional[np.ndarray]]
+
+# Rows removed per eviction pass once the disk budget is exceeded, as a
+# fraction of the stored rows (evicting in chunks avoids a DELETE per insert)
+_EVICT_FRACTION = 0.1
+
+# Sample sets whose centroids are kept in memory
+_MEMORY_CENTROIDS = 256
+
+
+class EmbeddingCache:
+    """Thread-safe embedding cache bound to a single model.
+
+    Vectors are returned as float32. Disk-tier vectors are stored as float16,
+    which halves the footprint at a cosine error well below scoring noise.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        path: Optional[str] = None,
+        memory_items: int = 4096,
+        max_disk_mb: float = 256.0,
+    ):
+        self.model_name = model_name
+        self.memory_items = max(0, int(memory_items))
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._centroids: "OrderedDict[str, Centroids]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+
+        if path:
+            try:
+                self._conn = self._open(path)
+            except Exception as e:
+                log.warning(
+                    "[EMBED-CACHE] Disk tier disabled, could not open %s: %s", path, e
+                )
+                self._conn = None
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        row = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vec)), 0) FROM embedding_cache"
+        ).fetchone()
+        self._disk_bytes = int(row[0])
+        log.info(
+            "[EMBED-CACHE] Disk tier ready at %s (%.1f MB stored)",
+            path,
+            self._disk_bytes / (1024 * 1024),
+        )
+        return conn
+
+    @property
+    def has_disk_tier(self) -> bool:
+        return self._conn is not None
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given content hashes (misses omitted)."""
+        found: Dict[str, np.ndarray] = {}
+        pending = []
+        with self._lock:
+            for h in dict.fromkeys(hashes):
+                vec = self._memory.get(h)
+                if vec is not None:
+                    self._memory.move_to_end(h)
+                    found[h] = vec
+                else:
+                    pending.append(h)
+
+            self._hits["memory"] += len(found)
+            if not pending:
+                return found
+
+            from_disk = self._disk_get(pending) if self._conn is not None else {}
+            for h, vec in from_disk.items():
+                self._memory_put(h, vec)
+                found[h] = vec
+            self._hits["disk"] += len(from_disk)
+            self._misses += len(pending) - len(from_disk)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Store freshly encoded vectors in both tiers."""
+        if not items:
+            return
+        with self._lock:
+            for h, vec in items.items():
+                self._memory_put(h, np.asarray(vec, dtype=np.float32))
+            if self._conn is not None:
+                self._disk_put(items)
+
+    def get_centroids(self, sample_key: str) -> Optional[Centroids]:
+        """Stored (positive, negative) centroids of a sample set, if any."""
+        with self._lock:
+            found = self._centroids.get(sample_key)
+            if found is not None:
+                self._centroids.move_to_end(sample_key)
+                return found
+            if self._conn is None:
+                return None
+            try:
+                row = self._conn.execute(
+                    "SELECT dim, positive, negative FROM profile_centroids "
+                    "WHERE model = ? AND sample_key = ?",
+                    (self.model_name, sample_key),
+                ).fetchone()
+            except sqlite3.Error as e:
+                log.warning("[EMBED-CACHE] Centroid lookup failed: %s", e)
+                return None
+            if row is None:
+                return None
+            dim, positive_blob, negative_blob = row
+            positive = np.frombuffer(positive_blob, dtype=np.float32)
+            negative = (
+                np.frombuffer(negative_blob, dtype=np.float32)
+                if negative_blob is not None
+                else None
+            )
+            if positive.shape[0] != dim or (
+                negative is not None and negative.shape[0] != dim
+            ):
+                return None
+            found = (positive, negative)
+            self._centroids_put(sample_key, found)
+            return found
+
+    def put_centroids(
+        self,
+        profile_id: str,
+        sample_key: str,
+        positive: np.ndarray,
+        negative: Optional[np.ndarray],
+    ) -> None:
+        """Store a profile's centroids, replacing those of its older sample sets."""
+        positive = np.asarray(positive, dtype=np.float32).ravel()
+        if negative is not None:
+            negative = np.asarray(negative, dtype=np.float32).ravel()
+        with self._lock:
+            self._centroids_put(sample_key, (positive, negative))
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "DELETE FROM profile_centroids WHERE model = ? AND profile_id = ?",
+                    (self.model_name, profile_id),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO profile_centroids (model, sample_key, "
+                    "profile_id, dim, positive, negative, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.model_name,
+                        sample_key,
+                        profile_id,
+                        int(positive.shape[0]),
+                        positive.tobytes(),
+                        negative.tobytes() if negative is not None else None,
+                        int(time.time()),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                log.warning("[EMBED-CACHE] Centroid write failed: %s", e)
+
+    def clear(self) -> None:
+        """Drop every cached vector and centroid for this model from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._centroids.clear()
+            if self._conn is not None:
+                self._conn.execute(
+                    "DELETE FROM embedding_cache WHERE model = ?", (self.model_name,)
+                )
+                self._conn.execute(
+                    "DELETE FROM profile_centroids WHERE model = ?", (self.model_name,)
+                )
+                row = self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(vec)), 0) FROM embedding_cache"
+                ).fetchone()
+                self._disk_bytes = int(row[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "memory_items": len(self._memory),
+                "memory_capacity": self.memory_items,
+                "disk_enabled": self._conn is not None,
+                "disk_mb": round(self._disk_bytes / (1024 * 1024), 2),
+                "disk_max_mb": round(self.max_disk_bytes / (1024 * 1024), 2),
+                "memory_hits": self._hits["memory"],
+                "disk_hits": self._hits["disk"],
+                "misses": self._misses,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # -- internals (caller holds self._lock) ---------------------------------
+
+    def _memory_put(self, h: str, vec: np.ndarray) -> None:
+        if self.memory_items == 0:
+            return
+        self._memory[h] = vec
+        self._memory.move_to_end(h)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _centroids_put(self, sample_key: str, centroids: Centroids) -> None:
+        self._centroids[sample_key] = centroids
+        self._centroids.move_to_end(sample_key)
+        while len(self._centroids) > _MEMORY_CENTROIDS:
+            self._centroids.popitem(last=False)
+
+    def _disk_get(self, hashes: list) -> Dict[str, np.ndarray]:
+        assert self._conn is not None
+        found: Dict[str, np.ndarray] = {}
+        # Stay well below SQLITE_MAX_VARIABLE_NUMBER
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            try:
+                rows = self._conn.execute(
+                    f"SELECT content_hash, dim, vec FROM embedding_cache "
+                    f"WHERE model = ? AND content_hash IN ({placeholders})",
+                    (self.model_name, *chunk),
+                ).fetchall()
+            except sqlite3.Error as e:
+                log.warning("[EMBED-CACHE] Disk lookup failed: %s", e)
+                return found
+            for h, dim, blob in rows:
+                vec = np.frombuffer(blob, dtype=np.float16)
+                if vec.shape[0] == dim:
+                    found[h] = vec.astype(np.float32)
+
+        if found:
+            try:
+                now = int(time.time())
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET last_used = ? "
+                    "WHERE model = ? AND content_hash = ?",
+                    [(now, self.model_name, h) for h in found],
+                )
+            except sqlite3.Error as e:
+                log.debug("[EMBED-CACHE] Could not touch last_used: %s", e)
+        return found
+
+    def _disk_put(self, items: Dict[str, np.ndarray]) -> None:
+        assert self._conn is not None
+        now = int(time.time())
+        rows: list[Tuple[str, str, int, bytes, int]] = []
+        for h, vec in items.items():
+            blob = np.asarray(vec, dtype=np.float16).tobytes()
+            rows.append((self.model_name, h, int(np.asarray(vec).shape[-1]), blob, now))
+        try:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache "
+                "(model, content_hash, dim, vec, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._conn.execute("ROLLBACK")
+            log.warning("[EMBED-CACHE] Disk write failed: %s", e)
+            return
+
+        self._disk_bytes += sum(len(row[3]) for row in rows)
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        assert self._conn is not None
+        total = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        target = max(1, int(total * _EVICT_FRACTION))
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN ("
+            "SELECT rowid FROM embedding_cache ORDER BY last_used ASC LIMIT ?)",
+            (target,),
+        )
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vec)), 0) FROM embedding_cache"
+        ).fetchone()
+        self._disk_bytes = int(row[0])
+        log.info(
+            "[EMBED-CACHE] Evicted %d vectors, %.1f MB stored",
+            target,
+            self._disk_bytes / (1024 * 1024),
+        )
+
+
+def cache_from_env(model_name: str) -> Optional[EmbeddingCache]:
+    """Build the cache for ``model_name`` from EMBEDDING_CACHE_* env vars.
+
+    Returns None when EMBEDDING_CACHE_ENABLED is false.
+    """
+    enabled = os.getenv("EMBEDDING_CACHE_ENABLED", "true").strip().lower()
+    if enabled in {"0", "false", "no", "off"}:
+        return None
+    path = os.getenv("EMBEDDING_CACHE_PATH", "/app/data/embeddings.db").strip()
+    try:
+        memory_items = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "4096"))
+        max_disk_mb = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "256"))
+    except ValueError as e:
+        log.warning("[EMBED-CACHE] Invalid cache setting, using defaults: %s", e)
+        memory_items, max_disk_mb = 4096, 256.0
+    return EmbeddingCache(
+        model_name,
+        path=path or None,
+        memory_items=memory_items,
+        max_disk_mb=max_disk_mb,
+    )
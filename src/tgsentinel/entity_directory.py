@@ -0,0 +1,224 @@
+"""Process-wide directory of Telegram entities (users, chats, channels).
+
+Ingestion used to resolve the sender and chat of every message through
+``event.get_sender()``/``event.get_chat()`` and ``client.get_entity`` fallbacks.
+The directory keeps ``peer id -> display name, type, username, photo id`` in
+memory, filled from entities that Telethon updates already carry and from
+dialog refreshes, so the common case needs no RPC.
+
+Entries are keyed by the *marked* peer id (``event.chat_id`` / ``sender_id``
+form, e.g. ``-100...`` for channels). Changed entries are persisted to the
+Redis hash ``tgsentinel:entities`` (JSON per id) on the next ``flush``, which is
+also what the UI reads; chat types are mirrored to the existing
+``tgsentinel:chat_type:{id}`` keys.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from .redis_operations import AnyRedis, maybe_await
+
+log = logging.getLogger(__name__)
+
+ENTITY_DIRECTORY_KEY = "tgsentinel:entities"
+
+_CHAT_TYPES = {"channel", "supergroup", "gigagroup", "group"}
+
+
+@dataclass(frozen=True)
+class EntityInfo:
+    """Display metadata for one Telegram peer."""
+
+    id: int
+    name: str = ""
+    type: str = "unknown"  # user, bot, channel, supergroup, gigagroup, group
+    username: Optional[str] = None
+    photo_id: Optional[int] = None
+
+
+def _str_attr(obj: Any, name: str) -> str:
+    value = getattr(obj, name, None)
+    return value if isinstance(value, str) else ""
+
+
+def _entity_type(entity: Any) -> str:
+    try:
+        from telethon.tl.types import Channel
+        from telethon.tl.types import Chat as TgChat
+        from telethon.tl.types import User
+    except ImportError:  # pragma: no cover - telethon is a runtime dependency
+        return "unknown"
+
+    if isinstance(entity, User):
+        return "bot" if getattr(entity, "bot", False) else "user"
+    if isinstance(entity, Channel):
+        if getattr(entity, "megagroup", False):
+            return "supergroup"
+        if getattr(entity, "gigagroup", False):
+            return "gigagroup"
+        return "channel"
+    if isinstance(entity, TgChat):
+        return "group"
+    return "unknown"
+
+
+def entity_info_from_telethon(entity: Any, entity_id: int) -> EntityInfo:
+    """Build an EntityInfo from a Telethon User/Chat/Channel.
+
+    Name precedence: title, then "first last", then @username.
+    """
+    username = _str_attr(entity, "username") or None
+    name = _str_attr(entity, "title")
+    if not name:
+        name = " ".join(
+            part
+            for part in (
+                _str_attr(entity, "first_name"),
+                _str_attr(entity, "last_name"),
+            )
+            if part
+        )
+    if not name and username:
+        name = f"@{username}"
+
+    photo_id = getattr(getattr(entity, "photo", None), "photo_id", None)
+    return EntityInfo(
+        id=int(entity_id),
+        name=name,
+        type=_entity_type(entity),
+        username=username,
+        photo_id=photo_id if isinstance(photo_id, int) else None,
+    )
+
+
+class EntityDirectory:
+    """In-memory entity directory with write-behind persistence to Redis."""
+
+    def __init__(self):
+        self._entries: Dict[int, EntityInfo] = {}
+        self._dirty: Dict[int, EntityInfo] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self, entity_id: Optional[int]) -> Optional[EntityInfo]:
+        """Return the known entry for ``entity_id`` (never does I/O)."""
+        if entity_id is None:
+            return None
+        return self._entries.get(entity_id)
+
+    def put(self, info: EntityInfo) -> EntityInfo:
+        """Store ``info``; it is persisted on the next flush if it changed."""
+        with self._lock:
+            if self._entries.get(info.id) != info:
+                self._entries[info.id] = info
+                self._dirty[info.id] = info
+        return info
+
+    def record(
+        self, entity: Any, entity_id: Optional[int] = None
+    ) -> Optional[EntityInfo]:
+        """Record a Telethon entity under ``entity_id`` (defaults to ``entity.id``).
+
+        Pass the marked peer id when recording chats: Telethon entities carry
+        the bare channel id.
+        """
+        if entity is None:
+            return None
+        if entity_id is None:
+            entity_id = getattr(entity, "id", None)
+            if not isinstance(entity_id, int):
+                return None
+        return self.put(entity_info_from_telethon(entity, entity_id))
+
+    def record_dialogs(self, dialogs: Iterable[Any]) -> int:
+        """Record the entities of ``client.get_dialogs()`` results."""
+        count = 0
+        for dialog in dialogs or ():
+            dialog_id = getattr(dialog, "id", None)
+            entity = getattr(dialog, "entity", None)
+            if isinstance(dialog_id, int) and entity is not None:
+                self.record(entity, dialog_id)
+                count += 1
+        return count
+
+    async def load(self, r: AnyRedis) -> None:
+        """Warm the directory from Redis once per process."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            raw = await maybe_await(r.hgetall(ENTITY_DIRECTORY_KEY))
+        except Exception as e:
+            log.debug("[ENTITY-DIR] Could not load entity directory: %s", e)
+            return
+        if not isinstance(raw, dict):
+            return
+
+        loaded = 0
+        with self._lock:
+            for value in raw.values():
+                try:
+                    if isinstance(value, bytes):
+                        value = value.decode("utf-8")
+                    info = EntityInfo(**json.loads(value))
+                except Exception:
+                    continue
+                # Entries recorded since startup are fresher than stored ones
+                if info.id not in self._entries:
+                    self._entries[info.id] = info
+                    loaded += 1
+        log.info("[ENTITY-DIR] Loaded %d entities from Redis", loaded)
+
+    async def flush(self, r: AnyRedis) -> int:
+        """Persist changed entries to Redis; returns the number written."""
+        if not self._dirty:
+            return 0
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+
+        try:
+            await maybe_await(
+                r.hset(
+                    ENTITY_DIRECTORY_KEY,
+                    mapping={
+                        str(entity_id): json.dumps(asdict(info))
+                        for entity_id, info in dirty.items()
+                    },
+                )
+            )
+            for entity_id, info in dirty.items():
+                if info.type in _CHAT_TYPES:
+                    await maybe_await(
+                        r.set(f"tgsentinel:chat_type:{entity_id}", info.type)
+                    )
+        except Exception as e:
+            log.debug("[ENTITY-DIR] Could not persist %d entities: %s", len(dirty), e)
+            with self._lock:
+                for entity_id, info in dirty.items():
+                    self._dirty.setdefault(entity_id, info)
+            return 0
+        return len(dirty)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global singleton instance
+_directory: Optional[EntityDirectory] = None
+_directory_lock = threading.Lock()
+
+
+def get_entity_directory() -> EntityDirectory:
+    """Get or create the process-wide entity directory (thread-safe)."""
+    global _directory
+
+    if _directory is not None:
+        return _directory
+
+    with _directory_lock:
+        if _directory is None:
+            _directory = EntityDirectory()
+        return _directory
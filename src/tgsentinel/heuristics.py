@@ -23,56 +23,140 @@ def content_hash(text: str) -> str:
 # or directly on channel/user rules in config/tgsentinel.yml
 
 
-@functools.lru_cache(maxsize=128)
-def _compile_keywords_pattern(keywords_tuple: tuple[str, ...]) -> re.Pattern:
-    """Compile and cache regex pattern for keywords tuple.
-
-    Args:
-        keywords_tuple: Immutable tuple of keywords to match
-
-    Returns:
-        Compiled regex pattern with case-insensitive flag
+# Trigger-annotation category -> keyword list field on ProfileDefinition /
+# ResolvedProfile (and run_heuristics argument of the same name)
+KEYWORD_CATEGORY_FIELDS = {
+    "action": "action_keywords",
+    "decision": "decision_keywords",
+    "urgency": "urgency_keywords",
+    "importance": "importance_keywords",
+    "release": "release_keywords",
+    "security": "security_keywords",
+    "risk": "risk_keywords",
+    "opportunity": "opportunity_keywords",
+    "keywords": "keywords",
+}
+
+# Score added by a keyword category with at least one match. Action keywords
+# weigh PRIVATE_ACTION_WEIGHT in private chats.
+KEYWORD_CATEGORY_WEIGHTS = {
+    "action": 0.8,
+    "decision": 1.1,
+    "urgency": 1.5,
+    "importance": 0.9,
+    "release": 0.8,
+    "security": 1.2,
+    "risk": 1.0,
+    "opportunity": 0.6,
+    "keywords": 0.8,
+}
+PRIVATE_ACTION_WEIGHT = 1.0
+
+
+def _trie_pattern(words: list[str]) -> str:
+    """Build a regex alternation for ``words`` factored by common prefixes.
+
+    At each text position the engine branches on one character per trie level
+    instead of trying every keyword, and greedy optional groups make the
+    longest keyword starting there win.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def _render(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + _render(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return _render(trie)
+
+
+class KeywordMatcher:
+    """Match every keyword category of a profile in one pass over the text.
+
+    Matching is case-insensitive substring containment, identical to testing
+    ``kw.lower() in text.lower()`` for each keyword. All keywords share one
+    compiled prefix-trie regex wrapped in a lookahead, so ``finditer`` reports
+    the longest keyword starting at every position; shorter keywords that are
+    prefixes of it occur there too and come from a precomputed table.
     """
-    pattern = r"|".join(map(re.escape, keywords_tuple))
-    return re.compile(pattern, re.I)
 
+    def __init__(self, categories: dict[str, list[str]]):
+        # lowered keyword -> [(category, index in category list, original)]
+        self._entries: dict[str, list[tuple[str, int, str]]] = {}
+        for category, keywords in categories.items():
+            for index, keyword in enumerate(keywords or ()):
+                lowered = keyword.lower()
+                if lowered:
+                    self._entries.setdefault(lowered, []).append(
+                        (category, index, keyword)
+                    )
+
+        words = sorted(self._entries)
+        # lowered keyword -> every keyword that is a prefix of it (itself included)
+        self._implied: dict[str, tuple[str, ...]] = {
+            word: tuple(other for other in words if word.startswith(other))
+            for word in words
+        }
+        self._pattern: Optional[re.Pattern] = (
+            re.compile("(?=(" + _trie_pattern(words) + "))", re.S) if words else None
+        )
 
-def _check_keywords(text: str, keywords: list[str]) -> bool:
-    """Check if any keywords match in text (case-insensitive).
+    def __bool__(self) -> bool:
+        return self._pattern is not None
 
-    Uses cached compiled patterns for performance.
+    def match(self, text: str) -> dict[str, list[str]]:
+        """Return category -> matched keywords, in configured order.
 
-    Args:
-        text: Text to search in
-        keywords: List of keywords to search for
+        Categories without a match are omitted.
+        """
+        if self._pattern is None or not text:
+            return {}
 
-    Returns:
-        True if any keyword matches, False otherwise
-    """
-    if not keywords or not text:
-        return False
+        found: set[str] = set()
+        for m in self._pattern.finditer(text.lower()):
+            found.update(self._implied[m.group(1)])
+        if not found:
+            return {}
 
-    # Convert to tuple for caching (immutable key)
-    keywords_tuple = tuple(keywords)
-    pattern = _compile_keywords_pattern(keywords_tuple)
-    return bool(pattern.search(text))
+        hits: dict[str, list[tuple[int, str]]] = {}
+        for lowered in found:
+            for category, index, keyword in self._entries[lowered]:
+                hits.setdefault(category, []).append((index, keyword))
+        return {
+            category: [keyword for _, keyword in sorted(pairs)]
+            for category, pairs in hits.items()
+        }
 
 
-def _find_matched_keywords(text: str, keywords: list[str]) -> list[str]:
-    """Find which keywords matched in text (for trigger annotations).
+@functools.lru_cache(maxsize=256)
+def _compile_keyword_matcher(
+    categories: tuple[tuple[str, tuple[str, ...]], ...],
+) -> KeywordMatcher:
+    return KeywordMatcher({category: list(words) for category, words in categories})
 
-    Args:
-        text: Text to search in
-        keywords: List of keywords to search for
 
-    Returns:
-        List of matched keywords (original case from keyword list)
-    """
-    if not keywords or not text:
-        return []
+def compile_keyword_matcher(categories: dict[str, list[str]]) -> KeywordMatcher:
+    """Get the matcher for ``categories`` (category -> keywords), built once.
 
-    text_lower = text.lower()
-    return [kw for kw in keywords if kw.lower() in text_lower]
+    Matchers are cached by keyword content, so profiles resolving to the same
+    keyword sets share one compiled automaton.
+    """
+    key = tuple(
+        (category, tuple(keywords))
+        for category, keywords in categories.items()
+        if keywords
+    )
+    return _compile_keyword_matcher(key)
 
 
 def _detect_code_patterns(text: str) -> bool:
@@ -202,6 +286,8 @@ def run_heuristics(
     prioritize_admin: bool = False,
     prioritize_private: bool = False,
     detect_polls: bool = False,
+    # Precompiled matcher for the keyword lists above (e.g. ResolvedProfile's)
+    keyword_matcher: Optional[KeywordMatcher] = None,
 ) -> HeuristicResult:
     """
     Comprehensive heuristic analysis based on 10 categories of important messages:
@@ -231,6 +317,23 @@ def run_heuristics(
             trigger_annotations={},
         )
 
+    # Every keyword category is matched in one pass over the text
+    if keyword_matcher is None:
+        keyword_matcher = compile_keyword_matcher(
+            {
+                "action": action_keywords or [],
+                "decision": decision_keywords or [],
+                "urgency": urgency_keywords or [],
+                "importance": importance_keywords or [],
+                "release": release_keywords or [],
+                "security": security_keywords or [],
+                "risk": risk_keywords or [],
+                "opportunity": opportunity_keywords or [],
+                "keywords": keywords or [],
+            }
+        )
+    keyword_hits = keyword_matcher.match(text)
+
     # === CATEGORY 3: Direct Mentions and Replies (HIGHEST PRIORITY) ===
     if mentioned:
         reasons.append("mention")
@@ -265,49 +368,45 @@ def run_heuristics(
             score += 1.2
 
     # Action keywords detection (only if keywords are configured)
-    action_kw = action_keywords if action_keywords else []
-    matched = _find_matched_keywords(text, action_kw)
+    matched = keyword_hits.get("action")
     if matched:
         reasons.append("action-required")
-        score += 1.0 if is_private else 0.8
+        score += (
+            PRIVATE_ACTION_WEIGHT if is_private else KEYWORD_CATEGORY_WEIGHTS["action"]
+        )
         trigger_annotations["action"] = matched
 
     # === CATEGORY 2: Decisions, Voting, and Direction Changes ===
-    decision_kw = decision_keywords if decision_keywords else []
-    matched = _find_matched_keywords(text, decision_kw)
+    matched = keyword_hits.get("decision")
     if matched:
         reasons.append("decision")
-        score += 1.1
+        score += KEYWORD_CATEGORY_WEIGHTS["decision"]
         trigger_annotations["decision"] = matched
 
     # === CATEGORY 4: Urgency & Importance Indicators ===
-    urgency_kw = urgency_keywords if urgency_keywords else []
-    matched = _find_matched_keywords(text, urgency_kw)
+    matched = keyword_hits.get("urgency")
     if matched:
         reasons.append("urgent")
-        score += 1.5  # High priority
+        score += KEYWORD_CATEGORY_WEIGHTS["urgency"]  # High priority
         trigger_annotations["urgency"] = matched
 
-    importance_kw = importance_keywords if importance_keywords else []
-    matched = _find_matched_keywords(text, importance_kw)
+    matched = keyword_hits.get("importance")
     if matched:
         reasons.append("important")
-        score += 0.9
+        score += KEYWORD_CATEGORY_WEIGHTS["importance"]
         trigger_annotations["importance"] = matched
 
     # === CATEGORY 5: Project & Interest Updates ===
-    release_kw = release_keywords if release_keywords else []
-    matched = _find_matched_keywords(text, release_kw)
+    matched = keyword_hits.get("release")
     if matched:
         reasons.append("release")
-        score += 0.8
+        score += KEYWORD_CATEGORY_WEIGHTS["release"]
         trigger_annotations["release"] = matched
 
-    security_kw = security_keywords if security_keywords else []
-    matched = _find_matched_keywords(text, security_kw)
+    matched = keyword_hits.get("security")
     if matched:
         reasons.append("security")
-        score += 1.2  # Security is high priority
+        score += KEYWORD_CATEGORY_WEIGHTS["security"]  # Security is high priority
         trigger_annotations["security"] = matched
 
     # === CATEGORY 6: Structured or Sensitive Data ===
@@ -327,19 +426,17 @@ def run_heuristics(
         score += 0.5
 
     # === CATEGORY 8: Risk or Incident Messages ===
-    risk_kw = risk_keywords if risk_keywords else []
-    matched = _find_matched_keywords(text, risk_kw)
+    matched = keyword_hits.get("risk")
     if matched:
         reasons.append("risk")
-        score += 1.0
+        score += KEYWORD_CATEGORY_WEIGHTS["risk"]
         trigger_annotations["risk"] = matched
 
     # === CATEGORY 9: Opportunity Messages ===
-    opportunity_kw = opportunity_keywords if opportunity_keywords else []
-    matched = _find_matched_keywords(text, opportunity_kw)
+    matched = keyword_hits.get("opportunity")
     if matched:
         reasons.append("opportunity")
-        score += 0.6
+        score += KEYWORD_CATEGORY_WEIGHTS["opportunity"]
         trigger_annotations["opportunity"] = matched
 
     # === VIP Senders ===
@@ -357,10 +454,10 @@ def run_heuristics(
         score += 0.5
 
     # === Custom Keywords ===
-    matched = _find_matched_keywords(text, keywords) if keywords else []
+    matched = keyword_hits.get("keywords")
     if matched:
         reasons.append("keywords")
-        score += 0.8
+        score += KEYWORD_CATEGORY_WEIGHTS["keywords"]
         trigger_annotations["keywords"] = matched
 
     # === Personal Context (Rare Senders) ===
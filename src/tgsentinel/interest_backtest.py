@@ -0,0 +1,500 @@
+"""Streaming interest-profile backtests over the stored message history.
+
+A backtest scores a candidate profile against the ``messages`` table without
+loading it into the live profile state the worker scores with. Messages are
+streamed newest first in chunks, encoded in batches (the embedding cache
+answers for text that was scored before) and scored with one matrix-vector
+product per chunk, so a month of history takes seconds instead of a minute per
+thousand messages.
+
+Thumbs up/down feedback recorded for the profile (``feedback`` joined with
+``feedback_profiles``) is the ground truth for precision and recall. Score
+histograms are kept alongside, so the result also reports a threshold sweep
+without scoring the history again.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from .semantic import encode_texts, profile_vector_scorer
+from .timestamp_utils import db_cutoff
+
+log = logging.getLogger(__name__)
+
+# VIP senders match at 70% of the profile threshold
+VIP_THRESHOLD_FACTOR = 0.7
+
+# Most recent per-message results returned with the statistics
+SAMPLE_LIMIT = 20
+
+# Resolution of the score histograms behind the threshold sweep
+SWEEP_BINS = 100
+SWEEP_THRESHOLDS = tuple(round(0.05 * i, 2) for i in range(4, 19))  # 0.20 .. 0.90
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+class InterestBacktest:
+    """Score one interest profile against the stored message history.
+
+    Args:
+        engine: SQLAlchemy engine of the sentinel database
+        profile: Interest profile as stored in the config (samples, threshold,
+            weights, ``vip_senders``, ``excluded_users``, optional ``id``)
+        hours_back: Only messages newer than this (None: the entire history)
+        max_messages: Stop after this many of the most recent messages
+        chunk_size: Rows fetched and scored per step
+        batch_size: Texts per model forward pass
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        profile: Dict[str, Any],
+        hours_back: Optional[float] = None,
+        max_messages: Optional[int] = None,
+        chunk_size: int = 2000,
+        batch_size: int = 64,
+    ):
+        self.engine = engine
+        self.profile = profile
+        self.profile_id = profile.get("id")
+        self.hours_back = hours_back
+        self.max_messages = max_messages
+        self.chunk_size = max(1, chunk_size)
+        self.batch_size = max(1, batch_size)
+
+        self.threshold = float(profile.get("threshold", 0.42))
+        self.positive_weight = float(profile.get("positive_weight", 1.0))
+        self.negative_weight = float(profile.get("negative_weight", 0.15))
+        self.vip_senders: Set[int] = set(profile.get("vip_senders", []))
+        self.excluded_users: Set[int] = set(profile.get("excluded_users", []))
+
+        self.total = 0
+        self.processed = 0
+        self.scored = 0
+        self.matched = 0
+        self.vip_matches = 0
+        self.excluded = 0
+        self.no_text = 0
+        self.matched_score_sum = 0.0
+        self.unmatched_score_sum = 0.0
+        self.true_positives = 0
+        self.false_positives = 0
+        self.false_negatives = 0
+        self.true_negatives = 0
+        self.samples: List[Dict[str, Any]] = []
+        # Scores normalized by the sender's threshold factor, so "matched at
+        # threshold t" is "normalized score >= t" for every message
+        self._histogram = np.zeros(SWEEP_BINS, dtype=np.int64)
+        self._positive_histogram = np.zeros(SWEEP_BINS, dtype=np.int64)
+        self._negative_histogram = np.zeros(SWEEP_BINS, dtype=np.int64)
+        self._started = time.perf_counter()
+
+    def run(
+        self,
+        progress: Optional[ProgressCallback] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """Stream the history through the profile and return the report.
+
+        ``progress`` receives a snapshot (see ``progress_snapshot``) after
+        every chunk; when ``cancelled`` returns True the run stops after the
+        current chunk and the report covers what was scored so far.
+
+        Raises:
+            RuntimeError: if the semantic model is not loaded
+        """
+        # Same samples as the worker loads, so stored live centroids are reused
+        scorer = profile_vector_scorer(
+            self.profile.get("positive_samples", []),
+            self.profile.get("negative_samples", []),
+            self.positive_weight,
+            self.negative_weight,
+            self.profile.get("scoring_mode", "centroid"),
+            int(self.profile.get("knn_k", 3)),
+        )
+        if scorer is None:
+            raise RuntimeError("Semantic model not loaded or no positive samples")
+
+        self._started = time.perf_counter()
+        cutoff = db_cutoff(self.hours_back) if self.hours_back is not None else None
+        was_cancelled = False
+        with self.engine.connect() as conn:
+            labels = self._load_labels(conn)
+            self.total = self._count(conn, cutoff)
+            result = conn.execution_options(
+                stream_results=True, yield_per=self.chunk_size
+            ).execute(*self._query(cutoff))
+            for rows in result.partitions(self.chunk_size):
+                self._score_chunk(rows, scorer, labels)
+                if progress is not None:
+                    progress(self.progress_snapshot())
+                if cancelled is not None and cancelled():
+                    was_cancelled = True
+                    result.close()
+                    break
+
+        report = self.report()
+        report["cancelled"] = was_cancelled
+        log.info(
+            "[BACKTEST] Interest profile %s: %d messages in %.2fs, %d matched",
+            self.profile.get("name") or self.profile_id,
+            self.processed,
+            report["duration_seconds"],
+            self.matched,
+        )
+        return report
+
+    def _count(self, conn: Any, cutoff: Optional[str]) -> int:
+        if cutoff is None:
+            total = conn.execute(text("SELECT COUNT(*) FROM messages")).scalar()
+        else:
+            total = conn.execute(
+                text("SELECT COUNT(*) FROM messages WHERE created_at >= :cutoff"),
+                {"cutoff": cutoff},
+            ).scalar()
+        total = int(total or 0)
+        if self.max_messages is not None:
+            total = min(total, self.max_messages)
+        return total
+
+    def _query(self, cutoff: Optional[str]) -> Tuple[Any, Dict[str, Any]]:
+        sql = (
+            "SELECT msg_id, chat_id, chat_title, sender_name, message_text, "
+            "created_at, sender_id FROM messages"
+        )
+        params: Dict[str, Any] = {}
+        if cutoff is not None:
+            sql += " WHERE created_at >= :cutoff"
+            params["cutoff"] = cutoff
+        sql += " ORDER BY created_at DESC"
+        if self.max_messages is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = self.max_messages
+        return text(sql), params
+
+    def _load_labels(self, conn: Any) -> Dict[Tuple[int, int], bool]:
+        """Thumbs up/down feedback given to messages for this profile."""
+        if not self.profile_id:
+            return {}
+        rows = conn.execute(
+            text("""
+                SELECT f.chat_id, f.msg_id, f.label
+                FROM feedback f
+                JOIN feedback_profiles fp
+                  ON fp.chat_id = f.chat_id AND fp.msg_id = f.msg_id
+                WHERE fp.profile_id = :pid
+                """),
+            {"pid": str(self.profile_id)},
+        )
+        return {(row[0], row[1]): bool(row[2]) for row in rows}
+
+    def _score_chunk(
+        self,
+        rows: List[Any],
+        scorer: Callable[[np.ndarray], np.ndarray],
+        labels: Dict[Tuple[int, int], bool],
+    ) -> None:
+        kept: List[Any] = []
+        reasons: Dict[int, str] = {}
+        for position, row in enumerate(rows):
+            sender_id = row.sender_id or 0
+            if sender_id in self.excluded_users:
+                self.excluded += 1
+                reasons[position] = f"Excluded user (ID: {sender_id})"
+            elif not row.message_text:
+                self.no_text += 1
+                reasons[position] = "No text content"
+            else:
+                kept.append(row)
+        self.processed += len(rows)
+
+        scores = np.zeros(0, dtype=np.float32)
+        matched = np.zeros(0, dtype=bool)
+        vip = np.zeros(0, dtype=bool)
+        if kept:
+            vectors = encode_texts(
+                [row.message_text for row in kept], batch_size=self.batch_size
+            )
+            if vectors is None:
+                raise RuntimeError("Semantic model not loaded")
+            scores = scorer(vectors)
+            vip = np.fromiter(
+                ((row.sender_id or 0) in self.vip_senders for row in kept),
+                dtype=bool,
+                count=len(kept),
+            )
+            factor = np.where(vip, VIP_THRESHOLD_FACTOR, 1.0)
+            matched = scores >= self.threshold * factor
+            self._accumulate(kept, scores, matched, vip, factor, labels)
+
+        if len(self.samples) < SAMPLE_LIMIT:
+            self._collect_samples(rows, reasons, kept, scores, matched, vip)
+
+    def _accumulate(
+        self,
+        kept: List[Any],
+        scores: np.ndarray,
+        matched: np.ndarray,
+        vip: np.ndarray,
+        factor: np.ndarray,
+        labels: Dict[Tuple[int, int], bool],
+    ) -> None:
+        self.scored += len(kept)
+        self.matched += int(matched.sum())
+        self.vip_matches += int((matched & vip).sum())
+        self.matched_score_sum += float(scores[matched].sum())
+        self.unmatched_score_sum += float(scores[~matched].sum())
+
+        bins = np.minimum(
+            (np.clip(scores / factor, 0.0, 1.0) * SWEEP_BINS).astype(np.intp),
+            SWEEP_BINS - 1,
+        )
+        self._histogram += np.bincount(bins, minlength=SWEEP_BINS)
+        if not labels:
+            return
+        for i, row in enumerate(kept):
+            label = labels.get((row.chat_id, row.msg_id))
+            if label is None:
+                continue
+            hit = bool(matched[i])
+            if label:
+                self._positive_histogram[bins[i]] += 1
+                if hit:
+                    self.true_positives += 1
+                else:
+                    self.false_negatives += 1
+            else:
+                self._negative_histogram[bins[i]] += 1
+                if hit:
+                    self.false_positives += 1
+                else:
+                    self.true_negatives += 1
+
+    def _collect_samples(
+        self,
+        rows: List[Any],
+        reasons: Dict[int, str],
+        kept: List[Any],
+        scores: np.ndarray,
+        matched: np.ndarray,
+        vip: np.ndarray,
+    ) -> None:
+        scored = iter(range(len(kept)))
+        for position, row in enumerate(rows):
+            if len(self.samples) >= SAMPLE_LIMIT:
+                return
+            sender_id = row.sender_id or 0
+            message_text = row.message_text or ""
+            sample = {
+                "message_id": row.msg_id,
+                "chat_id": row.chat_id,
+                "chat_title": row.chat_title,
+                "sender_name": row.sender_name,
+                "sender_id": sender_id,
+                "text_preview": message_text[:100]
+                + ("..." if len(message_text) > 100 else ""),
+                "timestamp": row.created_at,
+                "is_vip": sender_id in self.vip_senders,
+                "matched": False,
+                "reason": reasons.get(position),
+                "semantic_score": None,
+                "threshold": self.threshold,
+                "positive_weight": self.positive_weight,
+                "negative_weight": self.negative_weight,
+            }
+            if position not in reasons:
+                i = next(scored)
+                score = round(float(scores[i]), 3)
+                effective = self.threshold * (VIP_THRESHOLD_FACTOR if vip[i] else 1.0)
+                sample["semantic_score"] = score
+                sample["matched"] = bool(matched[i])
+                sample["reason"] = (
+                    f"Semantic score {score} "
+                    f"{'>=' if matched[i] else '<'} threshold {round(effective, 3)}"
+                )
+                if vip[i]:
+                    sample["reason"] += " (VIP threshold 0.7x)"
+            self.samples.append(sample)
+
+    def _evaluation(self) -> Dict[str, Any]:
+        tp, fp, fn = self.true_positives, self.false_positives, self.false_negatives
+        precision = _ratio(tp, tp + fp)
+        recall = _ratio(tp, tp + fn)
+        f1 = (
+            round(2 * precision * recall / (precision + recall), 4)
+            if precision and recall
+            else None
+        )
+        return {
+            "labeled": tp + fp + fn + self.true_negatives,
+            "true_positives": tp,
+            "false_positives": fp,
+            "false_negatives": fn,
+            "true_negatives": self.true_negatives,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+        }
+
+    def threshold_sweep(self) -> List[Dict[str, Any]]:
+        """Match rate, precision and recall at other thresholds (0.01 resolution)."""
+        # Messages at or above bin b, for every b
+        at_least = np.cumsum(self._histogram[::-1])[::-1]
+        positives = np.cumsum(self._positive_histogram[::-1])[::-1]
+        negatives = np.cumsum(self._negative_histogram[::-1])[::-1]
+        total_positive = int(self._positive_histogram.sum())
+        sweep = []
+        for threshold in SWEEP_THRESHOLDS:
+            b = min(int(round(threshold * SWEEP_BINS)), SWEEP_BINS - 1)
+            tp, fp = int(positives[b]), int(negatives[b])
+            sweep.append(
+                {
+                    "threshold": threshold,
+                    "matched": int(at_least[b]),
+                    "match_rate": (
+                        round(int(at_least[b]) / self.scored * 100, 1)
+                        if self.scored
+                        else 0
+                    ),
+                    "precision": _ratio(tp, tp + fp),
+                    "recall": _ratio(tp, total_positive),
+                }
+            )
+        return sweep
+
+    def progress_snapshot(self) -> Dict[str, Any]:
+        """Progress and interim figures of a running backtest."""
+        elapsed = time.perf_counter() - self._started
+        evaluation = self._evaluation()
+        return {
+            "processed": self.processed,
+            "total": self.total,
+            "percent": (
+                round(self.processed / self.total * 100, 1) if self.total else 100.0
+            ),
+            "matched": self.matched,
+            "match_rate": (
+                round(self.matched / self.scored * 100, 1) if self.scored else 0
+            ),
+            "labeled": evaluation["labeled"],
+            "precision": evaluation["precision"],
+            "recall": evaluation["recall"],
+            "elapsed_seconds": round(elapsed, 3),
+            "messages_per_second": round(self.processed / elapsed, 1) if elapsed else 0,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """The backtest result, in the shape of the interest backtest endpoint."""
+        unmatched = self.processed - self.matched
+        scored_unmatched = self.scored - self.matched
+        stats = {
+            "total_messages": self.processed,
+            "scored_messages": self.scored,
+            "matched_messages": self.matched,
+            "unmatched_messages": unmatched,
+            "vip_matches": self.vip_matches,
+            "excluded_count": self.excluded,
+            "no_text_count": self.no_text,
+            "match_rate": (
+                round(self.matched / self.processed * 100, 1) if self.processed else 0
+            ),
+            "avg_matched_score": (
+                round(self.matched_score_sum / self.matched, 3) if self.matched else 0
+            ),
+            "avg_unmatched_score": (
+                round(self.unmatched_score_sum / scored_unmatched, 3)
+                if scored_unmatched
+                else 0
+            ),
+            "threshold": self.threshold,
+            "positive_weight": self.positive_weight,
+            "negative_weight": self.negative_weight,
+        }
+        return {
+            "status": "ok",
+            "profile_name": self.profile.get("name"),
+            "profile_id": self.profile_id,
+            "test_date": datetime.now(timezone.utc).isoformat(),
+            "parameters": {
+                "hours_back": self.hours_back,
+                "max_messages": self.max_messages,
+                "positive_weight": self.positive_weight,
+                "negative_weight": self.negative_weight,
+            },
+            "matches": self.samples,
+            "stats": stats,
+            "evaluation": self._evaluation(),
+            "threshold_sweep": self.threshold_sweep(),
+            "recommendations": recommendations(stats),
+            "duration_seconds": round(time.perf_counter() - self._started, 3),
+        }
+
+
+def create_interest_backtest(
+    engine: Any,
+    profile: Dict[str, Any],
+    hours_back: Optional[float] = None,
+    max_messages: Optional[int] = None,
+) -> InterestBacktest:
+    """Build a backtest sized by BACKTEST_CHUNK_SIZE and BACKTEST_BATCH_SIZE."""
+    sizes = {"BACKTEST_CHUNK_SIZE": 2000, "BACKTEST_BATCH_SIZE": 64}
+    for name, default in sizes.items():
+        try:
+            sizes[name] = int(os.getenv(name, str(default)))
+        except ValueError as e:
+            log.warning("[BACKTEST] Invalid %s, using %d: %s", name, default, e)
+    return InterestBacktest(
+        engine,
+        profile,
+        hours_back=hours_back,
+        max_messages=max_messages,
+        chunk_size=sizes["BACKTEST_CHUNK_SIZE"],
+        batch_size=sizes["BACKTEST_BATCH_SIZE"],
+    )
+
+
+def recommendations(stats: Dict[str, Any]) -> List[str]:
+    """Tuning hints from the match rate and the matched/unmatched score gap."""
+    threshold = stats["threshold"]
+    negative_weight = stats["negative_weight"]
+    hints: List[str] = []
+    if stats["match_rate"] < 5:
+        hints.append("⚠️ Very low match rate (<5%). Consider:")
+        hints.append(f"  • Lowering threshold (current: {threshold:.2f})")
+        hints.append(
+            f"  • Lowering negative_weight (current: {negative_weight:.2f} → "
+            f"try {max(0.05, negative_weight * 0.5):.2f})"
+        )
+        hints.append("  • Adding more diverse positive samples")
+    elif stats["match_rate"] > 50:
+        hints.append("⚠️ Very high match rate (>50%). Consider:")
+        hints.append(f"  • Raising threshold (current: {threshold:.2f})")
+        hints.append(
+            f"  • Raising negative_weight (current: {negative_weight:.2f} → "
+            f"try {min(0.5, negative_weight * 1.5):.2f})"
+        )
+        hints.append("  • Adding more negative samples to filter noise")
+    else:
+        hints.append(f"✅ Match rate looks good ({stats['match_rate']}%)")
+        matched_avg = stats["avg_matched_score"]
+        unmatched_avg = stats["avg_unmatched_score"]
+        if matched_avg and unmatched_avg:
+            score_gap = matched_avg - unmatched_avg
+            if score_gap < 0.1:
+                hints.append(
+                    f"  ⚠️ Small score gap ({score_gap:.3f}). "
+                    "Consider increasing negative_weight for better discrimination."
+                )
+    return hints
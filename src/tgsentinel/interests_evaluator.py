@@ -16,10 +16,12 @@ Related architectural constraints:
 import json
 import logging
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from .config import AppCfg, ProfileDefinition
-from .semantic import score_text_for_profile
+from .semantic import score_text_for_profiles, score_vector_for_profiles
 
 log = logging.getLogger(__name__)
 
@@ -54,6 +56,7 @@ def evaluate_interest_profiles(
     resolved_profile: Any,  # ResolvedProfile
     cfg: AppCfg,
     request_id: Optional[str] = None,
+    message_vector: Optional[np.ndarray] = None,
 ) -> Optional[InterestEvaluationResult]:
     """Evaluate message against interest profiles using semantic scoring.
 
@@ -68,6 +71,8 @@ def evaluate_interest_profiles(
         resolved_profile: Profile resolution result with matched_profile_ids
         cfg: Application configuration with global_profiles
         request_id: Optional correlation ID for logging
+        message_vector: Pre-computed normalized embedding of message_text (e.g. from
+            the worker's batched encode); skips the model call when provided
 
     Returns:
         InterestEvaluationResult with semantic scores and recommendations, or None if no
@@ -114,6 +119,7 @@ def evaluate_interest_profiles(
         )
         return None
 
+    semantic_profiles: List[Tuple[str, ProfileDefinition]] = []
     for pid in resolved_profile.matched_profile_ids:
         profile_def = cfg.global_profiles.get(pid)
         if not profile_def:
@@ -146,14 +152,25 @@ def evaluate_interest_profiles(
             )
             continue
 
-        # This is an interest profile (semantic-based)
-        # Calculate semantic similarity score
+        semantic_profiles.append((pid, profile_def))
+
+    # Encode the message once and score it against every interest profile
+    # in a single vectorized pass (instead of one forward pass per profile)
+    all_scores: Dict[str, float] = {}
+    if semantic_profiles:
         log.debug(
-            "[INTERESTS-EVALUATOR] Calculating semantic score for profile %s",
-            pid,
+            "[INTERESTS-EVALUATOR] Calculating semantic scores for %d profiles",
+            len(semantic_profiles),
             extra=extra,
         )
-        semantic_score = score_text_for_profile(message_text, pid)
+        semantic_pids = [pid for pid, _ in semantic_profiles]
+        if message_vector is not None:
+            all_scores = score_vector_for_profiles(message_vector, semantic_pids)
+        else:
+            all_scores = score_text_for_profiles(message_text, semantic_pids)
+
+    for pid, profile_def in semantic_profiles:
+        semantic_score = all_scores.get(pid)
         if semantic_score is None:
             log.warning(
                 "[INTERESTS-EVALUATOR] Profile %s semantic scoring failed (embeddings unavailable?)",
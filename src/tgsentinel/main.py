@@ -33,12 +33,13 @@ from .config import load_config
 from .digest import send_digest
 from .logging_setup import setup_logging
 from .metrics import initialize_build_info
-from .redis_operations import RedisManager
+from .redis_operations import RedisManager, create_async_redis
 from .session_helpers import SessionHelpers
 from .session_lifecycle import SessionLifecycleManager
 from .session_manager import relogin_coordinator, session_persistence_handler
 from .shutdown_coordinator import ShutdownCoordinator
 from .store import init_db
+from .stream_lanes import lane_streams
 from .telegram_request_handlers import (
     ParticipantInfoHandler,
     TelegramChatsHandler,
@@ -47,9 +48,10 @@ from .telegram_request_handlers import (
     TelegramUsersHandler,
 )
 from .worker_orchestrator import WorkerOrchestrator
+from .worker_pool import prefork_worker_pool
 
 
-async def _run():
+async def _run(worker_pool=None):
     setup_logging()
     log = logging.getLogger("tgsentinel")
 
@@ -60,18 +62,18 @@ async def _run():
     # This ensures we see the model loading logs
     try:
         embeddings_model = os.getenv("EMBEDDINGS_MODEL")
-        if embeddings_model:
-            log.info(f"[STARTUP] Loading semantic embeddings model: {embeddings_model}")
-            from .semantic import _try_import_model
-
-            _try_import_model()  # Trigger model load with logging now configured
-            # Check result
-            from .semantic import _model
+        if embeddings_model and worker_pool is not None:
+            log.info("[STARTUP] Semantic model preloaded for the worker pool")
+        elif embeddings_model:
+            log.info(
+                f"[STARTUP] Loading semantic embeddings model in the background: "
+                f"{embeddings_model}"
+            )
+            from .semantic import start_model_load
 
-            if _model is not None:
-                log.info("[STARTUP] ✓ Semantic embeddings model loaded and ready")
-            else:
-                log.warning("[STARTUP] ⚠ Semantic model configured but failed to load")
+            # Loads while Redis, the database and Telegram are set up; the
+            # worker waits for it before scoring the first message
+            start_model_load()
         else:
             log.info("[STARTUP] Semantic scoring disabled (EMBEDDINGS_MODEL not set)")
     except Exception as e:
@@ -109,7 +111,15 @@ async def _run():
         port=cfg.system.redis.port,
         decode_responses=True,
     )
-    redis_mgr = RedisManager(r)
+    # Pooled asyncio client for event-loop hot paths (stream reads/writes,
+    # ingestion, DM polling, request handlers); r stays for sync helpers/API
+    async_r = create_async_redis(
+        cfg.system.redis.host,
+        cfg.system.redis.port,
+        max_connections=cfg.system.redis.max_connections,
+        pool_timeout=cfg.system.redis.pool_timeout,
+    )
+    redis_mgr = RedisManager(r, async_client=async_r)
 
     # Create client lock to prevent concurrent session file access
     client_lock = asyncio.Lock()
@@ -385,31 +395,32 @@ async def _run():
     # Initialize Redis Stream and consumer group for message processing
     # This must happen before any workers start to prevent NOGROUP errors
     try:
-        stream_name = cfg.system.redis.stream
         group_name = cfg.system.redis.group
 
-        # Create consumer group with mkstream=True to auto-create stream
-        try:
-            r.xgroup_create(stream_name, group_name, id="$", mkstream=True)
-            log.info(
-                "[STARTUP] Created Redis Stream consumer group '%s' for stream '%s'",
-                group_name,
-                stream_name,
-            )
-        except Exception as group_exc:
-            error_msg = str(group_exc)
-            if "BUSYGROUP" in error_msg or "already exists" in error_msg.lower():
-                log.debug(
-                    "[STARTUP] Consumer group '%s' already exists (expected on restart)",
+        # Create the consumer group on every lane (mkstream=True auto-creates
+        # the streams)
+        for stream_name in lane_streams(cfg.system.redis.stream).values():
+            try:
+                r.xgroup_create(stream_name, group_name, id="$", mkstream=True)
+                log.info(
+                    "[STARTUP] Created Redis Stream consumer group '%s' for stream '%s'",
                     group_name,
+                    stream_name,
                 )
-            else:
-                log.error(
-                    "[STARTUP] Failed to create consumer group: %s",
-                    group_exc,
-                    exc_info=True,
-                )
-                raise
+            except Exception as group_exc:
+                error_msg = str(group_exc)
+                if "BUSYGROUP" in error_msg or "already exists" in error_msg.lower():
+                    log.debug(
+                        "[STARTUP] Consumer group '%s' already exists (expected on restart)",
+                        group_name,
+                    )
+                else:
+                    log.error(
+                        "[STARTUP] Failed to create consumer group: %s",
+                        group_exc,
+                        exc_info=True,
+                    )
+                    raise
     except Exception as stream_exc:
         log.error(
             "[STARTUP] Failed to initialize Redis Stream: %s",
@@ -690,7 +701,7 @@ async def _run():
         log.info("Test digest sent!")
 
     # Start ingestion once authorized
-    start_ingestion(cfg, client, r)
+    start_ingestion(cfg, client, async_r)
 
     # Check if profiles/keywords are configured before sending digests
     # Without profiles, system should be in monitoring-only mode
@@ -812,6 +823,7 @@ async def _run():
         dialogs_handler=dialogs_handler,
         users_handler=users_handler,
         test_message_handler=test_message_handler,
+        worker_pool=worker_pool,
     )
 
     set_unified_digest_worker(worker_orchestrator.unified_digest)
@@ -891,6 +903,12 @@ async def _run():
     # Perform graceful shutdown of Telegram client
     await shutdown_coordinator.graceful_shutdown(client)
 
+    try:
+        await async_r.aclose()
+    except Exception as close_err:
+        log.debug(f"[SHUTDOWN] Error closing async Redis pool: {close_err}")
+
 
 if __name__ == "__main__":
-    asyncio.run(_run())
+    # Fork the scoring processes (WORKER_PROCESSES > 1) before the event loop
+    asyncio.run(_run(prefork_worker_pool()))
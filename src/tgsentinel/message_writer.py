@@ -0,0 +1,176 @@
+"""Write-behind buffer for worker message persistence.
+
+The worker used to open one transaction per upsert and one per feed flag,
+so SQLite paid a commit for every statement. The buffer collects those writes
+from concurrent message tasks and persists them with a single executemany per
+statement inside one transaction, once ``max_batch`` writes are pending or
+``flush_interval_ms`` has passed since the first one.
+
+Callers that must not acknowledge a stream entry before its rows are durable
+await ``barrier()``, which returns once every write queued before the call has
+been committed (or raises if that flush failed).
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+from sqlalchemy.engine import Engine
+
+from .store import message_params, write_message_batch
+
+log = logging.getLogger(__name__)
+
+
+class MessageWriteBuffer:
+    """Batch message upserts and feed flags into periodic transactions.
+
+    Flushes run one at a time in a worker thread, in submission order, so a
+    feed flag is never committed before the upsert it refers to.
+    """
+
+    def __init__(
+        self, engine: Engine, max_batch: int = 100, flush_interval_ms: int = 50
+    ):
+        self.engine = engine
+        self.max_batch = max(1, int(max_batch))
+        self.flush_interval = max(0, int(flush_interval_ms)) / 1000.0
+        self._upserts: list[dict[str, Any]] = []
+        self._alerts_feed: list[tuple[int, int]] = []
+        self._interest_feed: list[tuple[int, int]] = []
+        self._pending_done: Optional[asyncio.Future] = None
+        self._inflight: list[asyncio.Future] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.flushes = 0
+        self.rows_written = 0
+        # In-memory SQLite keeps one database per thread, so flushes must stay
+        # on the event loop thread to reach the same tables
+        database = engine.url.database
+        self._inline = engine.dialect.name == "sqlite" and (
+            not database or database == ":memory:"
+        )
+
+    def __len__(self) -> int:
+        return len(self._upserts) + len(self._alerts_feed) + len(self._interest_feed)
+
+    # -- producers ------------------------------------------------------------
+
+    def upsert_message(self, *args: Any, **kwargs: Any) -> None:
+        """Queue a message upsert; arguments are those of store.upsert_message
+        without the engine."""
+        self._upserts.append(message_params(*args, **kwargs))
+        self._queued()
+
+    def mark_for_alerts_feed(self, chat_id: int, msg_id: int) -> None:
+        self._alerts_feed.append((chat_id, msg_id))
+        self._queued()
+
+    def mark_for_interest_feed(self, chat_id: int, msg_id: int) -> None:
+        self._interest_feed.append((chat_id, msg_id))
+        self._queued()
+
+    # -- barrier --------------------------------------------------------------
+
+    async def barrier(self) -> None:
+        """Wait until every write queued so far has been committed.
+
+        Raises the flush error if the transaction holding those writes failed.
+        """
+        outstanding = list(self._inflight)
+        if self._pending_done is not None:
+            outstanding.append(self._pending_done)
+        if not outstanding:
+            return
+        await asyncio.wait(outstanding)
+        for done in outstanding:
+            if done.exception() is not None:
+                raise done.exception()
+
+    async def flush(self) -> None:
+        """Commit pending writes now instead of waiting for the timer."""
+        if len(self):
+            self._spawn_flush()
+        await self.barrier()
+
+    async def close(self) -> None:
+        """Flush remaining writes; errors are logged, not raised."""
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error("[WRITE-BEHIND] Final flush failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+    # -- internals ------------------------------------------------------------
+
+    def _queued(self) -> None:
+        if self._pending_done is None:
+            self._pending_done = asyncio.get_running_loop().create_future()
+        if len(self) >= self.max_batch or self.flush_interval == 0:
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._spawn_flush
+            )
+
+    def _spawn_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending_done is None:
+            return
+
+        batch = (self._upserts, self._alerts_feed, self._interest_feed)
+        done = self._pending_done
+        self._upserts, self._alerts_feed, self._interest_feed = [], [], []
+        self._pending_done = None
+        self._inflight.append(done)
+
+        task = asyncio.create_task(self._flush_batch(batch, done))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_batch(self, batch, done: asyncio.Future) -> None:
+        upserts, alerts_feed, interest_feed = batch
+        async with self._flush_lock:
+            try:
+                if self._inline:
+                    write_message_batch(
+                        self.engine, upserts, alerts_feed, interest_feed
+                    )
+                else:
+                    await asyncio.to_thread(
+                        write_message_batch,
+                        self.engine,
+                        upserts,
+                        alerts_feed,
+                        interest_feed,
+                    )
+            except Exception as e:
+                log.error(
+                    "[WRITE-BEHIND] Flush of %d writes failed: %s",
+                    len(upserts) + len(alerts_feed) + len(interest_feed),
+                    e,
+                )
+                done.set_exception(e)
+                # Mark retrieved so an unawaited failure is not reported twice
+                done.exception()
+            else:
+                self.flushes += 1
+                self.rows_written += len(upserts)
+                done.set_result(None)
+                log.debug(
+                    "[WRITE-BEHIND] Flushed %d upserts, %d alert flags, %d interest flags",
+                    len(upserts),
+                    len(alerts_feed),
+                    len(interest_feed),
+                )
+            finally:
+                self._inflight.remove(done)
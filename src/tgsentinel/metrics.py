@@ -122,6 +122,46 @@ messages_processed_total = Counter(
     ["status"],  # success, error, filtered
 )
 
+stream_reclaimed_total = Counter(
+    "tgsentinel_stream_reclaimed_total",
+    "Pending stream entries reclaimed from the consumer group",
+    ["outcome"],  # retried, dead_lettered, dropped
+)
+
+stream_consumer_lag = Gauge(
+    "tgsentinel_stream_consumer_lag",
+    "Stream entries not yet delivered to the consumer group",
+    ["lane"],  # priority, bulk
+)
+
+stream_pending_entries = Gauge(
+    "tgsentinel_stream_pending_entries",
+    "Stream entries delivered to the consumer group but not acknowledged",
+    ["lane"],  # priority, bulk
+)
+
+load_level = Gauge(
+    "tgsentinel_load_level",
+    "Backpressure level (0=normal, 1=elevated, 2=high, 3=critical)",
+)
+
+messages_shed_total = Counter(
+    "tgsentinel_messages_shed_total",
+    "Messages whose processing was reduced under backpressure",
+    ["action"],  # semantic_skipped, coalesced
+)
+
+stream_trimmed_total = Counter(
+    "tgsentinel_stream_trimmed_total",
+    "Entries explicitly trimmed from the message stream",
+    ["reason"],  # retention (already processed), overload (never processed)
+)
+
+messages_recovered_total = Counter(
+    "tgsentinel_messages_recovered_total",
+    "Messages missed while ingestion was down and fetched by catch-up",
+)
+
 # Alert metrics
 alerts_generated_total = Counter(
     "tgsentinel_alerts_generated_total",
@@ -145,6 +185,13 @@ message_score_histogram = Histogram(
     buckets=[0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0],
 )
 
+pipeline_stage_seconds = Histogram(
+    "tgsentinel_pipeline_stage_seconds",
+    "Time a message spent in each stage of the pipeline",
+    ["stage"],  # enrichment, stream_wait, semantic, queue, resolution, ...
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
 semantic_inference_duration = Histogram(
     "tgsentinel_semantic_inference_seconds",
     "Time spent on semantic model inference",
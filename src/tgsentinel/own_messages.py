@@ -0,0 +1,101 @@
+"""Local index of our own outgoing message IDs per chat.
+
+The worker needs to know whether a reply targets one of our messages. Asking
+Telegram (``client.get_messages``) costs a round-trip per reply and counts
+against flood-wait limits, so the ingestion side records every outgoing message
+it sees and the worker answers from memory.
+
+Besides the IDs themselves the index keeps a per-chat *floor*: the first
+message ID observed live in that chat since tracking started. Every outgoing
+message at or above the floor has been recorded, so a miss above the floor is
+a definite "not ours". Below the floor (history from before startup, or IDs
+evicted by the size bound) the answer is unknown and callers fall back to the
+RPC.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class OwnMessageIndex:
+    """Bounded (chat_id, msg_id) set of messages sent by the current account.
+
+    Entries are evicted oldest-first; evicting an ID raises the chat's floor
+    past it so lookups stay exact instead of reporting false negatives.
+    """
+
+    def __init__(self, max_items: int = 50000):
+        self.max_items = max(1, int(max_items))
+        self._ids: "OrderedDict[Tuple[int, int], None]" = OrderedDict()
+        self._floors: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, chat_id: int, msg_id: int) -> None:
+        """Record that live tracking has seen ``msg_id`` in ``chat_id``."""
+        with self._lock:
+            self._floors.setdefault(chat_id, msg_id)
+
+    def add(self, chat_id: int, msg_id: int, live: bool = True) -> None:
+        """Record an outgoing message.
+
+        Pass ``live=False`` for messages learned some other way (e.g. from an
+        RPC); they are remembered but do not move the chat's floor.
+        """
+        key = (chat_id, msg_id)
+        with self._lock:
+            if live:
+                self._floors.setdefault(chat_id, msg_id)
+            self._ids[key] = None
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.max_items:
+                (old_chat, old_msg), _ = self._ids.popitem(last=False)
+                floor = self._floors.get(old_chat)
+                if floor is not None and floor <= old_msg:
+                    self._floors[old_chat] = old_msg + 1
+
+    def is_ours(self, chat_id: int, msg_id: int) -> Optional[bool]:
+        """Return True/False if known locally, None if the caller must ask Telegram."""
+        with self._lock:
+            if (chat_id, msg_id) in self._ids:
+                return True
+            floor = self._floors.get(chat_id)
+            if floor is not None and msg_id >= floor:
+                return False
+            return None
+
+    def clear(self) -> None:
+        """Forget everything (e.g. when the logged-in account changes)."""
+        with self._lock:
+            self._ids.clear()
+            self._floors.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# Global singleton instance
+_index: Optional[OwnMessageIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_own_message_index() -> OwnMessageIndex:
+    """Get or create the process-wide index, sized by OWN_MESSAGE_INDEX_SIZE."""
+    global _index
+
+    if _index is not None:
+        return _index
+
+    with _index_lock:
+        if _index is None:
+            try:
+                max_items = int(os.getenv("OWN_MESSAGE_INDEX_SIZE", "50000"))
+            except ValueError as e:
+                log.warning("[OWN-MESSAGES] Invalid index size, using default: %s", e)
+                max_items = 50000
+            _index = OwnMessageIndex(max_items)
+        return _index
@@ -7,8 +7,7 @@ keyword set and scoring configuration.
 
 import logging
 from dataclasses import dataclass, field
-from functools import lru_cache
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from .config import (
     ChannelOverrides,
@@ -17,13 +16,17 @@ from .config import (
     ProfileDefinition,
     ProfileDigestConfig,
 )
+from .heuristics import KEYWORD_CATEGORY_FIELDS, KeywordMatcher, compile_keyword_matcher
 
 log = logging.getLogger(__name__)
 
 
 @dataclass
 class ResolvedProfile:
-    """Result of profile resolution for a specific entity."""
+    """Result of profile resolution for a specific entity.
+
+    Instances are cached and shared by ProfileResolver; treat them as read-only.
+    """
 
     # Merged keyword lists
     keywords: List[str] = field(default_factory=list)
@@ -75,18 +78,83 @@ class ResolvedProfile:
     name: str = ""  # Primary profile name (first bound)
     webhooks: List[str] = field(default_factory=list)
 
+    # Single-pass matcher over all keyword lists above, compiled at resolution
+    keyword_matcher: Optional[KeywordMatcher] = field(
+        default=None, repr=False, compare=False
+    )
+
 
 class ProfileResolver:
     """Resolves and merges global profiles with entity-specific overrides."""
 
-    def __init__(self, global_profiles: Dict[str, ProfileDefinition]):
+    def __init__(
+        self,
+        global_profiles: Dict[str, ProfileDefinition],
+        channels: Optional[List[ChannelRule]] = None,
+    ):
         """Initialize resolver with global profile definitions.
 
+        Builds the entity -> applicable profile index up front so per-message
+        lookups never scan every global profile. A config reload constructs a
+        new resolver, which swaps the index and resolution cache in one step.
+
         Args:
             global_profiles: Dict mapping profile_id -> ProfileDefinition
+            channels: Optional channel rules, enabling resolve_for_channel_cached()
         """
         self.global_profiles = global_profiles
 
+        # Enabled profiles with empty bindings apply to every entity
+        self._apply_to_all: List[str] = []
+        self._channel_index: Dict[int, List[str]] = {}
+        self._user_index: Dict[int, List[str]] = {}
+        for profile_id, profile in global_profiles.items():
+            if not getattr(profile, "enabled", True):
+                continue
+            if not profile.channels and not profile.users:
+                self._apply_to_all.append(profile_id)
+                continue
+            for channel_id in profile.channels:
+                self._channel_index.setdefault(channel_id, []).append(profile_id)
+            for user_id in profile.users:
+                self._user_index.setdefault(user_id, []).append(profile_id)
+
+        self._channels_by_id: Dict[int, ChannelRule] = {
+            channel.id: channel for channel in channels or []
+        }
+        # entity id -> (rule it was resolved from, resolution)
+        self._channel_cache: Dict[int, Tuple[ChannelRule, ResolvedProfile]] = {}
+        self._user_cache: Dict[int, Tuple[MonitoredUser, ResolvedProfile]] = {}
+
+    def _applicable_profile_ids(self, entity_type: str, entity_id: int) -> List[str]:
+        """Enabled global profiles auto-bound to an entity, in definition order."""
+        index = self._channel_index if entity_type == "channel" else self._user_index
+        bound = index.get(entity_id)
+        if not bound:
+            return self._apply_to_all
+        if not self._apply_to_all:
+            return bound
+        applicable = set(bound).union(self._apply_to_all)
+        return [pid for pid in self.global_profiles if pid in applicable]
+
+    def _auto_bind(
+        self, entity_type: str, entity_id: int, explicit_profiles: List[str]
+    ) -> List[str]:
+        """Append applicable global profiles to an entity's explicit bindings."""
+        effective_profiles = list(explicit_profiles)
+        for profile_id in self._applicable_profile_ids(entity_type, entity_id):
+            if profile_id in effective_profiles:
+                continue
+            effective_profiles.append(profile_id)
+            profile = self.global_profiles[profile_id]
+            both_empty = not profile.channels and not profile.users
+            reason = "both lists empty" if both_empty else f"{entity_type} ID in list"
+            log.info(
+                f"[PROFILE-RESOLVER] Auto-binding global profile '{profile_id}' to {entity_type} {entity_id} "
+                f"({reason}) - channels={profile.channels}, users={profile.users}"
+            )
+        return effective_profiles
+
     def has_applicable_profiles(self, entity_type: str, entity_id: int) -> bool:
         """Check if any global profile applies to this entity.
 
@@ -100,22 +168,9 @@ class ProfileResolver:
         Returns:
             True if at least one enabled profile applies to this entity
         """
-        for profile in self.global_profiles.values():
-            # Skip disabled profiles
-            if not getattr(profile, "enabled", True):
-                continue
-
-            if entity_type == "channel":
-                # Profile applies if BOTH lists empty OR channels contains this ID
-                both_empty = not profile.channels and not profile.users
-                if both_empty or entity_id in profile.channels:
-                    return True
-            elif entity_type == "user":
-                # Profile applies if BOTH lists empty OR users contains this ID
-                both_empty = not profile.channels and not profile.users
-                if both_empty or entity_id in profile.users:
-                    return True
-        return False
+        if entity_type not in ("channel", "user"):
+            return False
+        return bool(self._applicable_profile_ids(entity_type, entity_id))
 
     def resolve_for_channel(self, channel: ChannelRule) -> ResolvedProfile:
         """Resolve profiles for a specific channel.
@@ -126,35 +181,15 @@ class ProfileResolver:
         Returns:
             ResolvedProfile with merged keywords and scoring weights
         """
-        # Start with explicitly bound profiles
-        effective_profiles = list(channel.profiles)
+        cached = self._channel_cache.get(channel.id)
+        if cached and cached[0] is channel:
+            return cached[1]
 
-        # Add global profiles that apply to this channel (empty channels list OR explicitly listed)
-        for profile_id, profile in self.global_profiles.items():
-            # Skip disabled profiles
-            if not getattr(profile, "enabled", True):
-                log.debug(
-                    f"Skipping disabled profile '{profile_id}' for channel {channel.id}"
-                )
-                continue
+        # Explicitly bound profiles first, then global profiles that apply
+        # to this channel (empty bindings OR channel ID listed)
+        effective_profiles = self._auto_bind("channel", channel.id, channel.profiles)
 
-            if profile_id not in effective_profiles:
-                # Auto-bind if:
-                # 1. BOTH channels and users are empty (applies to all), OR
-                # 2. channels list contains this channel ID
-                both_empty = not profile.channels and not profile.users
-                channel_matches = channel.id in profile.channels
-
-                if both_empty or channel_matches:
-                    effective_profiles.append(profile_id)
-                    reason = "both lists empty" if both_empty else "channel ID in list"
-                    log.info(
-                        f"[PROFILE-RESOLVER] Auto-binding global profile '{profile_id}' to channel {channel.id} "
-                        f"({reason}) - channels={profile.channels}, users={profile.users}"
-                    )
-                # Removed log for non-matching profiles to reduce N×M log spam
-
-        return self._resolve(
+        resolved = self._resolve(
             entity_type="channel",
             entity_id=channel.id,
             bound_profiles=effective_profiles,
@@ -162,6 +197,8 @@ class ProfileResolver:
             entity_digest=channel.digest,  # Direct digest override
             entity_excluded_users=channel.excluded_users,  # Entity-level excluded users
         )
+        self._channel_cache[channel.id] = (channel, resolved)
+        return resolved
 
     def resolve_for_user(self, user: MonitoredUser) -> ResolvedProfile:
         """Resolve profiles for a specific monitored user.
@@ -172,35 +209,15 @@ class ProfileResolver:
         Returns:
             ResolvedProfile with merged keywords and scoring weights
         """
-        # Start with explicitly bound profiles
-        effective_profiles = list(user.profiles)
+        cached = self._user_cache.get(user.id)
+        if cached and cached[0] is user:
+            return cached[1]
 
-        # Add global profiles that apply to this user (empty users list OR explicitly listed)
-        for profile_id, profile in self.global_profiles.items():
-            # Skip disabled profiles
-            if not getattr(profile, "enabled", True):
-                log.debug(
-                    f"Skipping disabled profile '{profile_id}' for user {user.id}"
-                )
-                continue
+        # Explicitly bound profiles first, then global profiles that apply
+        # to this user (empty bindings OR user ID listed)
+        effective_profiles = self._auto_bind("user", user.id, user.profiles)
 
-            if profile_id not in effective_profiles:
-                # Auto-bind if:
-                # 1. BOTH channels and users are empty (applies to all), OR
-                # 2. users list contains this user ID
-                both_empty = not profile.channels and not profile.users
-                user_matches = user.id in profile.users
-
-                if both_empty or user_matches:
-                    effective_profiles.append(profile_id)
-                    reason = "both lists empty" if both_empty else "user ID in list"
-                    log.info(
-                        f"[PROFILE-RESOLVER] Auto-binding global profile '{profile_id}' to user {user.id} "
-                        f"({reason}) - channels={profile.channels}, users={profile.users}"
-                    )
-                # Removed log for non-matching profiles to reduce log spam and avoid exposing user IDs
-
-        return self._resolve(
+        resolved = self._resolve(
             entity_type="user",
             entity_id=user.id,
             bound_profiles=effective_profiles,
@@ -210,6 +227,8 @@ class ProfileResolver:
                 user, "excluded_users", []
             ),  # Entity-level excluded users
         )
+        self._user_cache[user.id] = (user, resolved)
+        return resolved
 
     def _resolve(
         self,
@@ -355,6 +374,12 @@ class ProfileResolver:
             setattr(resolved, key, sorted(keyword_set))
 
         resolved.tags = sorted(merged_tags)
+        resolved.keyword_matcher = compile_keyword_matcher(
+            {
+                category: getattr(resolved, field_name)
+                for category, field_name in KEYWORD_CATEGORY_FIELDS.items()
+            }
+        )
 
         # Finalize excluded_users (preserve order, duplicates already removed)
         resolved.excluded_users = excluded_users_ordered
@@ -460,12 +485,13 @@ class ProfileResolver:
         log.debug("No digest config found in hierarchy")
         return None
 
-    @lru_cache(maxsize=256)
     def resolve_for_channel_cached(self, channel_id: int) -> ResolvedProfile:
-        """Cached version for hot paths (requires channel lookup by ID)."""
-        # NOTE: This requires maintaining a channel_id -> ChannelRule lookup
-        # For now, use non-cached version in worker. Add caching layer later.
-        raise NotImplementedError("Use resolve_for_channel() directly for now")
+        """Resolve a configured channel by ID (cached like resolve_for_channel).
+
+        Raises:
+            KeyError: If the resolver was not given a rule for ``channel_id``
+        """
+        return self.resolve_for_channel(self._channels_by_id[channel_id])
 
 
 def validate_profiles(
@@ -0,0 +1,44 @@
+"""Request budget for background Telegram calls.
+
+Background jobs (avatar downloads, gap catch-up) share one pattern: calls are
+spaced by a minimum interval across all of a job's tasks, and a FloodWaitError
+pauses every task for the time Telegram asks for.
+"""
+
+import asyncio
+from typing import Optional
+
+
+def flood_wait_seconds(exc: Exception) -> Optional[int]:
+    """Seconds to wait if ``exc`` is a Telethon flood wait, else None."""
+    if "FloodWait" not in type(exc).__name__:
+        return None
+    seconds = getattr(exc, "seconds", None)
+    return seconds if isinstance(seconds, int) else None
+
+
+class RequestBudget:
+    """Spaces calls by ``min_interval`` seconds and honours flood waits."""
+
+    def __init__(self, min_interval: float = 0.0):
+        self.min_interval = max(0.0, float(min_interval))
+        # Event-loop time
+        self._paused_until = 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        """Wait for the next call's turn."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._paused_until, self._next_slot)
+        self._next_slot = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+        # A flood wait may have been reported while we slept
+        while loop.time() < self._paused_until:
+            await asyncio.sleep(self._paused_until - loop.time())
+
+    def pause(self, seconds: float) -> None:
+        """Hold every call for ``seconds`` (from now)."""
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
@@ -4,12 +4,15 @@ This module centralizes all Redis operations to provide a clean interface
 for caching, status updates, and inter-service communication.
 """
 
+import inspect
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from redis import Redis
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
 
 # Redis key constants
 WORKER_STATUS_KEY = "tgsentinel:worker_status"
@@ -25,17 +28,53 @@ CACHE_READY_KEY = "tgsentinel:cache_ready"
 CACHED_CHANNELS_KEY = "tgsentinel:cached_channels"
 CACHED_USERS_KEY = "tgsentinel:cached_users"
 
+# Either client flavour; hot paths accept both and resolve results via maybe_await()
+AnyRedis = Union[Redis, AsyncRedis]
+
+
+async def maybe_await(value: Any) -> Any:
+    """Return a Redis command result from either a sync or an asyncio client."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def create_async_redis(
+    host: str, port: int, max_connections: int = 32, pool_timeout: float = 20.0
+) -> AsyncRedis:
+    """Create an asyncio Redis client backed by its own bounded connection pool.
+
+    Share the returned client across coroutines: each command borrows a pooled
+    connection, so a blocking XREADGROUP in the worker never delays XADDs from
+    the ingestion handler or the DM poller. When every connection is in use a
+    command waits up to ``pool_timeout`` seconds for one to be released
+    instead of failing, so bursts cannot drop ingested messages.
+    """
+    pool = BlockingConnectionPool(
+        host=host,
+        port=port,
+        decode_responses=True,
+        max_connections=max_connections,
+        timeout=pool_timeout,
+    )
+    return AsyncRedis(connection_pool=pool)
+
 
 class RedisManager:
     """Manager for all Redis operations in TG Sentinel."""
 
-    def __init__(self, redis_client: Redis):
+    def __init__(self, redis_client: Redis, async_client: Optional[AsyncRedis] = None):
         """Initialize Redis manager.
 
         Args:
             redis_client: Connected Redis client instance
+            async_client: Pooled asyncio client for event-loop hot paths
+                (falls back to redis_client when not provided)
         """
         self.redis = redis_client
+        self.async_redis: AnyRedis = (
+            async_client if async_client is not None else redis_client
+        )
         self.log = logging.getLogger(__name__)
 
         # Lua script for atomic TTL refresh without value change
@@ -591,6 +630,36 @@ class RedisManager:
 
         return results
 
+    async def scan_and_get_requests_async(
+        self, pattern: str
+    ) -> List[tuple[str, Dict[str, Any]]]:
+        """Async variant of scan_and_get_requests for polling loops.
+
+        Uses the asyncio client and fetches all matched keys with one MGET
+        instead of a GET per key.
+        """
+        if not isinstance(self.async_redis, AsyncRedis):
+            return self.scan_and_get_requests(pattern)
+
+        results = []
+        try:
+            keys = [key async for key in self.async_redis.scan_iter(match=pattern)]
+            if not keys:
+                return results
+            values = await self.async_redis.mget(keys)
+        except Exception as exc:
+            self.log.warning("Failed to scan for pattern %s: %s", pattern, exc)
+            return results
+
+        for key, request_data in zip(keys, values):
+            if not request_data:
+                continue
+            try:
+                results.append((key, json.loads(str(request_data))))
+            except Exception as exc:
+                self.log.debug("Failed to parse request key %s: %s", key, exc)
+        return results
+
     def set_response_with_ttl(
         self, response_key: str, response_data: Dict[str, Any], ttl: int = 60
     ) -> None:
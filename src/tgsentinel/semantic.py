@@ -1,10 +1,17 @@
+import hashlib
+import json
 import logging
 import os
 import threading
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 
+from .embedding_cache import EmbeddingCache, cache_from_env
+from .heuristics import content_hash
+
 log = logging.getLogger(__name__)
 
 try:
@@ -22,11 +29,99 @@ _profile_vectors_lock = (
     threading.RLock()
 )  # Protect _profile_vectors from concurrent access
 
+# Sample matrices of "knn" profiles: profile_id -> (positive rows, negative rows,
+# k), feedback rows scaled by their weight (guarded by _profile_vectors_lock)
+_profile_samples: Dict[str, Tuple[np.ndarray, Optional[np.ndarray], int]] = {}
+
+# Bumped on every write to _profile_vectors so the stacked matrices used by
+# score_text_for_profiles() can be rebuilt lazily (guarded by _profile_vectors_lock)
+_profile_vectors_generation = 0
+_profile_matrices: Optional["_ProfileMatrices"] = None
+
+# Embeddings keyed by (model, content_hash); set up alongside the model
+_embedding_cache: Optional[EmbeddingCache] = None
+
+# Background model load started by start_model_load()
+_model_loader: Optional[threading.Thread] = None
+
+# Encoded sample lists (sample_matrix), most recently used last
+_SAMPLE_MATRICES = 128
+_sample_matrices: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_sample_matrices_lock = threading.Lock()
+
 # Negative similarity margin: only penalize if negative_sim exceeds this threshold
 # This prevents small incidental similarities from over-penalizing good matches
 NEGATIVE_MARGIN = 0.3
 
 
+@dataclass(frozen=True)
+class _SampleSegments:
+    """Sample matrices of several profiles concatenated row-wise.
+
+    Rows ``offsets[i]:offsets[i + 1]`` of ``matrix`` belong to the i-th
+    profile; ``gather`` lists them per profile, padded with ``len(matrix)``.
+    """
+
+    matrix: np.ndarray  # (S, D) float32, C-contiguous
+    offsets: np.ndarray  # (K + 1,) intp
+    gather: np.ndarray  # (K, M) intp
+
+    @classmethod
+    def stack(
+        cls, matrices: Sequence[Optional[np.ndarray]], dim: int
+    ) -> "_SampleSegments":
+        counts = [0 if m is None else len(m) for m in matrices]
+        offsets = np.zeros(len(counts) + 1, dtype=np.intp)
+        offsets[1:] = np.cumsum(counts)
+        rows = [m for m in matrices if m is not None and len(m)]
+        matrix = (
+            np.ascontiguousarray(np.vstack(rows), dtype=np.float32)
+            if rows
+            else np.zeros((0, dim), dtype=np.float32)
+        )
+        gather = np.full((len(counts), max(counts + [1])), offsets[-1], np.intp)
+        for i, count in enumerate(counts):
+            gather[i, :count] = np.arange(offsets[i], offsets[i + 1])
+        return cls(matrix, offsets, gather)
+
+    def top_k_mean(self, vec: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """Mean of each profile's k highest similarities to ``vec``.
+
+        One matrix-vector product covers every profile; profiles without
+        samples get 0.
+        """
+        similarities = np.append(self.matrix @ vec, np.float32(-np.inf))
+        ranked = -np.sort(-similarities[self.gather], axis=1)
+        counts = np.diff(self.offsets)
+        take = np.maximum(np.minimum(k, counts), 1)
+        sums = np.cumsum(ranked, axis=1)[np.arange(len(take)), take - 1]
+        return np.where(counts > 0, sums / take, 0.0)
+
+
+@dataclass(frozen=True)
+class _ProfileMatrices:
+    """All loaded profile centroids stacked row-wise for vectorized scoring.
+
+    Row i of every array belongs to profile_ids[i]. Profiles without negative
+    samples get a zero row in ``negative`` and ``has_negative[i] = False``.
+    "knn" profiles have ``knn_position[i] = j``: their samples are segment j of
+    ``knn_positive``/``knn_negative`` and replace the centroid similarities.
+    """
+
+    generation: int
+    profile_ids: Tuple[str, ...]
+    index: Dict[str, int]
+    positive: np.ndarray  # (P, D) float32, C-contiguous
+    negative: np.ndarray  # (P, D) float32, C-contiguous
+    has_negative: np.ndarray  # (P,) bool
+    positive_weight: np.ndarray  # (P,) float32
+    negative_weight: np.ndarray  # (P,) float32
+    knn_position: np.ndarray  # (P,) intp, -1 for centroid profiles
+    knn_k: np.ndarray  # (K,) intp
+    knn_positive: _SampleSegments
+    knn_negative: _SampleSegments
+
+
 def _build_normalized_centroid(vectors: np.ndarray) -> np.ndarray:
     """Build a normalized centroid from a set of vectors.
 
@@ -53,13 +148,19 @@ def _try_import_model():
     Returns None if embeddings are disabled or model loading fails.
     This is called automatically during module initialization if EMBEDDINGS_MODEL is set.
     """
-    global _model
+    global _model, _embedding_cache
     try:
         if SentenceTransformer is None:
             raise ImportError("sentence-transformers not available")
         name = os.getenv("EMBEDDINGS_MODEL")
         if not name:
             return None
+        if _embedding_cache is None:
+            try:
+                _embedding_cache = cache_from_env(name)
+            except Exception as e:
+                log.warning(f"[SEMANTIC] Embedding cache disabled: {e}")
+                _embedding_cache = None
         log.info(
             "[SEMANTIC] Loading embeddings model: %s (this happens once at boot)", name
         )
@@ -71,6 +172,81 @@ def _try_import_model():
         return None
 
 
+def start_model_load() -> None:
+    """Load the model in a background thread (see ``wait_for_model``).
+
+    Lets startup (Redis, database, Telegram connect) proceed while the model
+    loads; the worker waits for it before scoring the first message.
+    """
+    global _model_loader
+    if _model is not None or _model_loader is not None:
+        return
+    _model_loader = threading.Thread(
+        target=_try_import_model, name="semantic-model-load", daemon=True
+    )
+    _model_loader.start()
+
+
+def wait_for_model(timeout: Optional[float] = None) -> bool:
+    """Wait for a background model load; True if the model is available."""
+    loader = _model_loader
+    if loader is not None:
+        loader.join(timeout)
+    return _model is not None
+
+
+def reopen_embedding_cache(enabled: bool = True) -> None:
+    """Close the embedding cache and, if ``enabled``, open a fresh one.
+
+    SQLite connections must not be shared across ``fork()``: the worker pool
+    closes the cache before forking and every process reopens its own.
+    """
+    global _embedding_cache
+    if _embedding_cache is not None:
+        _embedding_cache.close()
+        _embedding_cache = None
+    name = os.getenv("EMBEDDINGS_MODEL")
+    if not enabled or _model is None or not name:
+        return
+    try:
+        _embedding_cache = cache_from_env(name)
+    except Exception as e:
+        log.warning(f"[SEMANTIC] Embedding cache disabled: {e}")
+
+
+def _encode(
+    texts: List[str], model=None, batch_size: Optional[int] = None
+) -> np.ndarray:
+    """Encode texts to normalized float32 vectors, reusing cached embeddings.
+
+    Texts are looked up in the embedding cache by content hash; only misses
+    reach the model, in a single call. The cache only applies to the loaded
+    module model, so an explicitly passed ``model`` is always called directly.
+    """
+    if model is None:
+        model = _model
+    kwargs: dict = {"normalize_embeddings": True}
+    if batch_size is not None:
+        kwargs["batch_size"] = batch_size
+
+    cache = _embedding_cache if model is _model else None
+    if cache is None:
+        return np.asarray(model.encode(texts, **kwargs), dtype=np.float32)
+
+    hashes = [content_hash(t) for t in texts]
+    cached = cache.get_many(hashes)
+    missing = list(dict.fromkeys(h for h in hashes if h not in cached))
+    if missing:
+        by_hash = dict(zip(hashes, texts))
+        encoded = np.asarray(
+            model.encode([by_hash[h] for h in missing], **kwargs), dtype=np.float32
+        )
+        fresh = dict(zip(missing, encoded))
+        cache.put_many(fresh)
+        cached.update(fresh)
+    return np.stack([cached[h] for h in hashes])
+
+
 # NOTE: Model loading is deferred until explicitly called from main.py
 # This ensures logging is configured before model loading messages appear
 # The _try_import_model() function should be called after setup_logging()
@@ -86,6 +262,8 @@ def load_profile_embeddings(
     feedback_positive_samples: Optional[List[str]] = None,
     feedback_negative_samples: Optional[List[str]] = None,
     feedback_sample_weight: float = 0.4,
+    scoring_mode: str = "centroid",
+    knn_k: int = 3,
 ):
     """Load and encode positive/negative samples for a semantic profile with weighted centroids.
 
@@ -99,6 +277,9 @@ def load_profile_embeddings(
         feedback_positive_samples: User feedback samples to add (downweighted)
         feedback_negative_samples: User feedback samples to add (downweighted)
         feedback_sample_weight: Weight for feedback samples (default 0.4 vs 1.0 for curated)
+        scoring_mode: "centroid" (weighted centroids) or "knn" (mean similarity
+            to the knn_k nearest samples)
+        knn_k: Nearest samples averaged per message in "knn" mode
     """
     if _model is None:
         log.debug("[SEMANTIC] Model not available, skipping profile %s", profile_id)
@@ -111,6 +292,43 @@ def load_profile_embeddings(
     feedback_pos = feedback_positive_samples or []
     feedback_neg = feedback_negative_samples or []
 
+    if scoring_mode == "knn":
+        _load_profile_samples(
+            profile_id,
+            positive_samples,
+            negative_samples,
+            threshold,
+            positive_weight,
+            negative_weight,
+            feedback_pos,
+            feedback_neg,
+            feedback_sample_weight,
+            knn_k,
+        )
+        return
+
+    # Centroids stored for exactly this sample set need no encoding at all
+    sample_key = _sample_set_key(
+        positive_samples,
+        negative_samples,
+        feedback_pos,
+        feedback_neg,
+        feedback_sample_weight,
+    )
+    cache = _embedding_cache
+    stored = cache.get_centroids(sample_key) if cache is not None else None
+    if stored is not None:
+        _store_profile_vectors(
+            profile_id,
+            stored[0],
+            stored[1],
+            threshold,
+            positive_weight,
+            negative_weight,
+        )
+        log.debug("[SEMANTIC] Profile %s centroids loaded from store", profile_id)
+        return
+
     log.info(
         "[SEMANTIC] Encoding profile %s: %d+%d positive, %d+%d negative samples (feedback weighted at %.2f)",
         profile_id,
@@ -121,27 +339,246 @@ def load_profile_embeddings(
         feedback_sample_weight,
     )
 
+    positive_vec, negative_vec = _compute_centroids(
+        positive_samples,
+        negative_samples,
+        feedback_pos,
+        feedback_neg,
+        feedback_sample_weight,
+    )
+    if cache is not None:
+        cache.put_centroids(profile_id, sample_key, positive_vec, negative_vec)
+    _store_profile_vectors(
+        profile_id,
+        positive_vec,
+        negative_vec,
+        threshold,
+        positive_weight,
+        negative_weight,
+    )
+
+    log.info(
+        "[SEMANTIC] ✓ Profile %s vectors computed (threshold=%.2f, pos_weight=%.2f, neg_weight=%.2f)",
+        profile_id,
+        threshold,
+        positive_weight,
+        negative_weight,
+    )
+
+
+def _load_profile_samples(
+    profile_id: str,
+    positive_samples: List[str],
+    negative_samples: List[str],
+    threshold: float,
+    positive_weight: float,
+    negative_weight: float,
+    feedback_positive_samples: List[str],
+    feedback_negative_samples: List[str],
+    feedback_sample_weight: float,
+    knn_k: int,
+) -> None:
+    """Load a "knn" profile: its sample matrices plus centroids derived from them.
+
+    Centroid scoring blurs profiles that cover several topics; in "knn" mode
+    a message is scored by its mean similarity to the k nearest samples. The
+    centroids are kept for status and diagnostics only.
+    """
+    positive_rows, negative_rows = _sample_matrices_for(
+        positive_samples,
+        negative_samples,
+        feedback_positive_samples,
+        feedback_negative_samples,
+        feedback_sample_weight,
+    )
+    # Feedback rows are pre-scaled, so their sum is the weighted centroid
+    positive_vec = _build_normalized_centroid(positive_rows)
+    negative_vec = (
+        _build_normalized_centroid(negative_rows) if negative_rows is not None else None
+    )
+    _store_profile_vectors(
+        profile_id,
+        positive_vec,
+        negative_vec,
+        threshold,
+        positive_weight,
+        negative_weight,
+        samples=(positive_rows, negative_rows, max(1, int(knn_k))),
+    )
+    log.info(
+        "[SEMANTIC] ✓ Profile %s sample matrices loaded (%d positive, %d negative, k=%d)",
+        profile_id,
+        len(positive_rows),
+        0 if negative_rows is None else len(negative_rows),
+        knn_k,
+    )
+
+
+def compute_profile_sample_matrices(
+    positive_samples: List[str],
+    negative_samples: List[str],
+    feedback_positive_samples: Optional[List[str]] = None,
+    feedback_negative_samples: Optional[List[str]] = None,
+    feedback_sample_weight: float = 0.4,
+) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """Per-sample vectors of a sample set, without loading it as a live profile.
+
+    Feedback rows are scaled by ``feedback_sample_weight``, so they count less
+    among the nearest samples just as they do in the centroids.
+
+    Returns:
+        (positive, negative) float32 row matrices, or None if the model is
+        unavailable or there are no positive samples
+    """
+    if _model is None or not positive_samples:
+        return None
+    return _sample_matrices_for(
+        positive_samples,
+        negative_samples,
+        feedback_positive_samples or [],
+        feedback_negative_samples or [],
+        feedback_sample_weight,
+    )
+
+
+def _sample_matrices_for(
+    positive_samples: List[str],
+    negative_samples: List[str],
+    feedback_positive_samples: List[str],
+    feedback_negative_samples: List[str],
+    feedback_sample_weight: float,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    def rows(curated: List[str], feedback: List[str]) -> Optional[np.ndarray]:
+        if not curated and not feedback:
+            return None
+        weights = np.array(
+            [1.0] * len(curated) + [feedback_sample_weight] * len(feedback),
+            dtype=np.float32,
+        )
+        vectors = _encode(list(curated) + list(feedback))
+        return np.ascontiguousarray(vectors * weights[:, None])
+
+    positive_rows = rows(positive_samples, feedback_positive_samples)
+    # Guaranteed non-None since positive_samples is non-empty (checked by callers)
+    assert positive_rows is not None, "positive_rows should never be None here"
+    return positive_rows, rows(negative_samples, feedback_negative_samples)
+
+
+def compute_profile_centroids(
+    positive_samples: List[str],
+    negative_samples: List[str],
+    feedback_positive_samples: Optional[List[str]] = None,
+    feedback_negative_samples: Optional[List[str]] = None,
+    feedback_sample_weight: float = 0.4,
+) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """Centroids of a sample set, without loading it as a live profile.
+
+    Reuses the centroids stored for the same sample set, otherwise encodes the
+    samples through the embedding cache. Neither the loaded profiles nor the
+    centroid store are modified, so backtests can score candidate profiles
+    while the worker keeps using the live ones.
+
+    Returns:
+        (positive, negative) float32 centroids, or None if the model is
+        unavailable or there are no positive samples
+    """
+    if _model is None or not positive_samples:
+        return None
+
+    feedback_pos = feedback_positive_samples or []
+    feedback_neg = feedback_negative_samples or []
+    cache = _embedding_cache
+    if cache is not None:
+        stored = cache.get_centroids(
+            _sample_set_key(
+                positive_samples,
+                negative_samples,
+                feedback_pos,
+                feedback_neg,
+                feedback_sample_weight,
+            )
+        )
+        if stored is not None:
+            return stored
+    return _compute_centroids(
+        positive_samples,
+        negative_samples,
+        feedback_pos,
+        feedback_neg,
+        feedback_sample_weight,
+    )
+
+
+def _compute_centroids(
+    positive_samples: List[str],
+    negative_samples: List[str],
+    feedback_positive_samples: List[str],
+    feedback_negative_samples: List[str],
+    feedback_sample_weight: float,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
     # Build weighted positive centroid
     positive_vec = _build_weighted_centroid(
         curated_samples=positive_samples,
-        feedback_samples=feedback_pos,
+        feedback_samples=feedback_positive_samples,
         feedback_weight=feedback_sample_weight,
         model=_model,
     )
 
-    # Guaranteed non-None since positive_samples is non-empty (checked above)
+    # Guaranteed non-None since positive_samples is non-empty (checked by callers)
     assert positive_vec is not None, "positive_vec should never be None here"
 
     # Build weighted negative centroid (optional)
     negative_vec = None
-    if negative_samples or feedback_neg:
+    if negative_samples or feedback_negative_samples:
         negative_vec = _build_weighted_centroid(
             curated_samples=negative_samples,
-            feedback_samples=feedback_neg,
+            feedback_samples=feedback_negative_samples,
             feedback_weight=feedback_sample_weight,
             model=_model,
         )
 
+    # float32 like the stored copy, so a restart scores exactly the same
+    positive_vec = np.asarray(positive_vec, dtype=np.float32)
+    if negative_vec is not None:
+        negative_vec = np.asarray(negative_vec, dtype=np.float32)
+    return positive_vec, negative_vec
+
+
+def _sample_set_key(
+    positive_samples: List[str],
+    negative_samples: List[str],
+    feedback_positive_samples: List[str],
+    feedback_negative_samples: List[str],
+    feedback_sample_weight: float,
+) -> str:
+    """Hash of everything a profile's centroids are computed from.
+
+    Thresholds and similarity weights are applied at scoring time and are not
+    part of the key; the model is (the cache is bound to one model).
+    """
+    material = json.dumps(
+        [
+            positive_samples,
+            negative_samples,
+            feedback_positive_samples,
+            feedback_negative_samples,
+            float(feedback_sample_weight),
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _store_profile_vectors(
+    profile_id: str,
+    positive_vec: np.ndarray,
+    negative_vec: Optional[np.ndarray],
+    threshold: float,
+    positive_weight: float,
+    negative_weight: float,
+    samples: Optional[Tuple[np.ndarray, Optional[np.ndarray], int]] = None,
+) -> None:
     # Acquire lock only for the dict write operation (minimal duration)
     with _profile_vectors_lock:
         _profile_vectors[profile_id] = (
@@ -151,14 +588,11 @@ def load_profile_embeddings(
             positive_weight,
             negative_weight,
         )
-
-    log.info(
-        "[SEMANTIC] ✓ Profile %s vectors computed (threshold=%.2f, pos_weight=%.2f, neg_weight=%.2f)",
-        profile_id,
-        threshold,
-        positive_weight,
-        negative_weight,
-    )
+        if samples is not None:
+            _profile_samples[profile_id] = samples
+        else:
+            _profile_samples.pop(profile_id, None)
+        _invalidate_profile_matrices()
 
 
 def _build_weighted_centroid(
@@ -199,8 +633,7 @@ def _build_weighted_centroid(
         weights.append(feedback_weight)
 
     # Encode all samples
-    encoded = model.encode(all_samples, normalize_embeddings=True)
-    vectors = np.asarray(encoded)
+    vectors = _encode(all_samples, model=model)
 
     # Compute weighted sum
     weights_array = np.array(weights).reshape(-1, 1)
@@ -227,6 +660,7 @@ def score_text_for_profile(text: str, profile_id: str) -> Optional[float]:
     Uses normalized centroids and proper cosine similarity mapping:
     1. Compute cosine similarity to positive centroid (in [-1, 1])
     2. Compute cosine similarity to negative centroid (in [-1, 1])
+       ("knn" profiles: mean similarity to the k nearest samples instead)
     3. Apply negative penalty only if similarity exceeds margin threshold
     4. Map final score from [-1, 1] to [0, 1] for consistent interpretation
 
@@ -250,6 +684,7 @@ def score_text_for_profile(text: str, profile_id: str) -> Optional[float]:
     # Acquire lock only for reading profile data (minimal duration)
     with _profile_vectors_lock:
         profile_data = _profile_vectors.get(profile_id)
+        samples = _profile_samples.get(profile_id)
 
     if profile_data is None:
         return None
@@ -259,10 +694,22 @@ def score_text_for_profile(text: str, profile_id: str) -> Optional[float]:
     )
 
     # Encode message (normalized for true cosine similarity)
-    msg_vec = _model.encode([text], normalize_embeddings=True)[0]
+    msg_vec = _encode([text])[0]
 
     # Calculate cosine similarity to positive centroid (both normalized → value in [-1, 1])
-    positive_sim = float(np.dot(msg_vec, positive_vec))
+    if samples is not None:
+        positive_rows, negative_rows, k = samples
+        positive_sim = float(_top_k_mean(positive_rows @ msg_vec, k))
+        negative_sim = (
+            float(_top_k_mean(negative_rows @ msg_vec, k))
+            if negative_rows is not None
+            else None
+        )
+    else:
+        positive_sim = float(np.dot(msg_vec, positive_vec))
+        negative_sim = (
+            float(np.dot(msg_vec, negative_vec)) if negative_vec is not None else None
+        )
 
     # Calculate raw score (start with positive similarity)
     raw_score = positive_sim * positive_weight
@@ -270,8 +717,7 @@ def score_text_for_profile(text: str, profile_id: str) -> Optional[float]:
     # If negative samples exist, apply penalty with margin
     # Only penalize if negative similarity exceeds the margin threshold
     # This prevents small incidental similarities from over-penalizing good matches
-    if negative_vec is not None:
-        negative_sim = float(np.dot(msg_vec, negative_vec))
+    if negative_sim is not None:
         # Apply penalty only if negative similarity exceeds margin
         if negative_sim > NEGATIVE_MARGIN:
             penalty = (negative_sim - NEGATIVE_MARGIN) * negative_weight
@@ -287,6 +733,337 @@ def score_text_for_profile(text: str, profile_id: str) -> Optional[float]:
     return score
 
 
+def _top_k_mean(similarities: np.ndarray, k: int) -> np.ndarray:
+    """Mean of the k highest similarities along the last axis."""
+    n = similarities.shape[-1]
+    k = min(k, n)
+    return np.partition(similarities, n - k, axis=-1)[..., n - k :].mean(axis=-1)
+
+
+def _invalidate_profile_matrices() -> None:
+    """Mark the stacked profile matrices stale (caller holds _profile_vectors_lock)."""
+    global _profile_vectors_generation, _profile_matrices
+    _profile_vectors_generation += 1
+    _profile_matrices = None
+
+
+def _get_profile_matrices() -> Optional[_ProfileMatrices]:
+    """Return stacked centroid matrices for every loaded profile.
+
+    The matrices are rebuilt only when _profile_vectors changed since the last
+    call, so the per-message cost is a single matrix-vector product.
+    """
+    global _profile_matrices
+    with _profile_vectors_lock:
+        cached = _profile_matrices
+        if cached is not None and cached.generation == _profile_vectors_generation:
+            return cached
+        if not _profile_vectors:
+            return None
+
+        profile_ids = tuple(_profile_vectors.keys())
+        positive_rows = []
+        negative_rows = []
+        has_negative = []
+        positive_weights = []
+        negative_weights = []
+        knn_position = np.full(len(profile_ids), -1, dtype=np.intp)
+        knn_k = []
+        knn_positive = []
+        knn_negative = []
+        for row, pid in enumerate(profile_ids):
+            pos_vec, neg_vec, _thr, pos_weight, neg_weight = _profile_vectors[pid]
+            pos_row = np.asarray(pos_vec, dtype=np.float32).ravel()
+            positive_rows.append(pos_row)
+            if neg_vec is not None:
+                negative_rows.append(np.asarray(neg_vec, dtype=np.float32).ravel())
+                has_negative.append(True)
+            else:
+                negative_rows.append(np.zeros_like(pos_row))
+                has_negative.append(False)
+            positive_weights.append(pos_weight)
+            negative_weights.append(neg_weight)
+            samples = _profile_samples.get(pid)
+            if samples is not None:
+                knn_position[row] = len(knn_k)
+                knn_positive.append(samples[0])
+                knn_negative.append(samples[1])
+                knn_k.append(samples[2])
+
+        dim = positive_rows[0].shape[0]
+        matrices = _ProfileMatrices(
+            generation=_profile_vectors_generation,
+            profile_ids=profile_ids,
+            index={pid: i for i, pid in enumerate(profile_ids)},
+            positive=np.ascontiguousarray(np.vstack(positive_rows)),
+            negative=np.ascontiguousarray(np.vstack(negative_rows)),
+            has_negative=np.asarray(has_negative, dtype=bool),
+            positive_weight=np.asarray(positive_weights, dtype=np.float32),
+            negative_weight=np.asarray(negative_weights, dtype=np.float32),
+            knn_position=knn_position,
+            knn_k=np.asarray(knn_k, dtype=np.intp),
+            knn_positive=_SampleSegments.stack(knn_positive, dim),
+            knn_negative=_SampleSegments.stack(knn_negative, dim),
+        )
+        _profile_matrices = matrices
+        return matrices
+
+
+def score_vector_for_profiles(
+    msg_vec: np.ndarray, profile_ids: Optional[Iterable[str]] = None
+) -> Dict[str, float]:
+    """Score an already-encoded (normalized) message vector against many profiles.
+
+    Applies exactly the same formula as score_text_for_profile(), but for all
+    requested profiles at once via one matrix-vector product per centroid set
+    (and per concatenated sample matrix of the "knn" profiles).
+
+    Args:
+        msg_vec: Normalized message embedding
+        profile_ids: Profiles to score (default: every loaded profile). Unknown
+            IDs are silently omitted from the result.
+
+    Returns:
+        Dict mapping profile_id -> score in [0, 1]
+    """
+    matrices = _get_profile_matrices()
+    if matrices is None:
+        return {}
+
+    if profile_ids is None:
+        rows = np.arange(len(matrices.profile_ids))
+    else:
+        rows = np.asarray(
+            [matrices.index[pid] for pid in profile_ids if pid in matrices.index],
+            dtype=np.intp,
+        )
+        if rows.size == 0:
+            return {}
+
+    vec = np.asarray(msg_vec, dtype=np.float32).ravel()
+    if rows.size == len(matrices.profile_ids):
+        positive, negative = matrices.positive, matrices.negative
+        has_negative = matrices.has_negative
+        pos_weight, neg_weight = matrices.positive_weight, matrices.negative_weight
+        knn_position = matrices.knn_position
+    else:
+        positive, negative = matrices.positive[rows], matrices.negative[rows]
+        has_negative = matrices.has_negative[rows]
+        pos_weight = matrices.positive_weight[rows]
+        neg_weight = matrices.negative_weight[rows]
+        knn_position = matrices.knn_position[rows]
+
+    positive_sim = positive @ vec
+    negative_sim = negative @ vec
+    knn = knn_position >= 0
+    if knn.any():
+        segments = knn_position[knn]
+        positive_sim[knn] = matrices.knn_positive.top_k_mean(vec, matrices.knn_k)[
+            segments
+        ]
+        negative_sim[knn] = matrices.knn_negative.top_k_mean(vec, matrices.knn_k)[
+            segments
+        ]
+    penalty = np.where(
+        has_negative & (negative_sim > NEGATIVE_MARGIN),
+        (negative_sim - NEGATIVE_MARGIN) * neg_weight,
+        0.0,
+    )
+    raw_score = positive_sim * pos_weight - penalty
+    scores = np.clip((raw_score + 1.0) / 2.0, 0.0, 1.0)
+
+    ids = matrices.profile_ids
+    return {ids[row]: float(score) for row, score in zip(rows, scores)}
+
+
+def score_vectors(
+    vectors: np.ndarray,
+    positive_vec: np.ndarray,
+    negative_vec: Optional[np.ndarray],
+    positive_weight: float = 1.0,
+    negative_weight: float = 0.15,
+) -> np.ndarray:
+    """Score many encoded (normalized) messages against one profile's centroids.
+
+    Applies exactly the same formula as score_text_for_profile() to an (N, D)
+    matrix of message vectors, without touching the loaded profiles.
+
+    Returns:
+        (N,) float32 array of scores in [0, 1]
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    positive_sim = matrix @ np.asarray(positive_vec, dtype=np.float32).ravel()
+    negative_sim = None
+    if negative_vec is not None:
+        negative_sim = matrix @ np.asarray(negative_vec, dtype=np.float32).ravel()
+    return _map_similarities(
+        positive_sim, negative_sim, positive_weight, negative_weight
+    )
+
+
+def score_vectors_knn(
+    vectors: np.ndarray,
+    positive_rows: np.ndarray,
+    negative_rows: Optional[np.ndarray],
+    k: int = 3,
+    positive_weight: float = 1.0,
+    negative_weight: float = 0.15,
+) -> np.ndarray:
+    """Score many encoded messages against one profile's sample matrices.
+
+    The "knn" counterpart of score_vectors(): similarities are the mean of
+    the k nearest samples (see compute_profile_sample_matrices).
+
+    Returns:
+        (N,) float32 array of scores in [0, 1]
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    positive_sim = _top_k_mean(matrix @ positive_rows.T, k)
+    negative_sim = None
+    if negative_rows is not None:
+        negative_sim = _top_k_mean(matrix @ negative_rows.T, k)
+    return _map_similarities(
+        positive_sim, negative_sim, positive_weight, negative_weight
+    )
+
+
+def _map_similarities(
+    positive_sim: np.ndarray,
+    negative_sim: Optional[np.ndarray],
+    positive_weight: float,
+    negative_weight: float,
+) -> np.ndarray:
+    raw_score = positive_sim * positive_weight
+    if negative_sim is not None:
+        raw_score = raw_score - np.where(
+            negative_sim > NEGATIVE_MARGIN,
+            (negative_sim - NEGATIVE_MARGIN) * negative_weight,
+            0.0,
+        )
+    return np.clip((raw_score + 1.0) / 2.0, 0.0, 1.0).astype(np.float32)
+
+
+def profile_vector_scorer(
+    positive_samples: List[str],
+    negative_samples: List[str],
+    positive_weight: float = 1.0,
+    negative_weight: float = 0.15,
+    scoring_mode: str = "centroid",
+    knn_k: int = 3,
+) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """Scoring function for (N, D) encoded messages, in the profile's mode.
+
+    Centroids or sample matrices are built once, without loading the profile,
+    so backtests and batch tools score exactly like the live worker.
+
+    Returns:
+        A function returning (N,) scores, or None if the model is unavailable
+        or there are no positive samples
+    """
+    if scoring_mode == "knn":
+        rows = compute_profile_sample_matrices(positive_samples, negative_samples)
+        if rows is None:
+            return None
+        return lambda vectors: score_vectors_knn(
+            vectors, rows[0], rows[1], knn_k, positive_weight, negative_weight
+        )
+
+    centroids = compute_profile_centroids(positive_samples, negative_samples)
+    if centroids is None:
+        return None
+    return lambda vectors: score_vectors(
+        vectors, centroids[0], centroids[1], positive_weight, negative_weight
+    )
+
+
+def score_text_for_profiles(
+    text: str, profile_ids: Optional[Iterable[str]] = None
+) -> Dict[str, float]:
+    """Score text against many semantic profiles with a single model forward pass.
+
+    The message is encoded once and compared against the stacked centroids of
+    every requested profile, so the cost no longer grows with the number of
+    interest profiles bound to a chat.
+
+    Args:
+        text: Message text to score
+        profile_ids: Profiles to score (default: every loaded profile)
+
+    Returns:
+        Dict mapping profile_id -> score in [0, 1]; empty if the model is
+        unavailable or none of the profiles are loaded
+    """
+    if not text or _model is None:
+        return {}
+
+    matrices = _get_profile_matrices()
+    if matrices is None:
+        return {}
+    if profile_ids is not None:
+        profile_ids = [pid for pid in profile_ids if pid in matrices.index]
+        if not profile_ids:
+            return {}
+
+    msg_vec = _encode([text])[0]
+    return score_vector_for_profiles(msg_vec, profile_ids)
+
+
+def has_profile_vectors() -> bool:
+    """Return True if at least one semantic profile is loaded."""
+    with _profile_vectors_lock:
+        return bool(_profile_vectors)
+
+
+def encode_texts(texts: List[str], batch_size: int = 32) -> Optional[np.ndarray]:
+    """Encode many texts with a single model call.
+
+    Batching amortizes tokenizer and forward-pass overhead, which is several
+    times cheaper per message than encoding texts one at a time on CPU.
+
+    Args:
+        texts: Texts to encode (callers should drop empty strings)
+        batch_size: Batch size passed through to SentenceTransformer.encode
+
+    Returns:
+        (N, D) float32 array of normalized embeddings, or None if the model
+        is unavailable or there is nothing to encode
+    """
+    if _model is None or not texts:
+        return None
+
+    return _encode(texts, batch_size=batch_size)
+
+
+def sample_matrix(samples: List[str]) -> Optional[np.ndarray]:
+    """Encoded (N, D) matrix of a sample list, kept for repeated use.
+
+    Curation tools compare many texts with the same sample lists; the stacked
+    matrix is cached by the list's content, so repeated calls skip even the
+    per-text embedding cache lookups.
+
+    Returns:
+        (N, D) float32 array, or None if the model is unavailable or
+        ``samples`` is empty
+    """
+    if _model is None or not samples:
+        return None
+    key = hashlib.sha256(
+        json.dumps([id(_model), samples], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    with _sample_matrices_lock:
+        found = _sample_matrices.get(key)
+        if found is not None:
+            _sample_matrices.move_to_end(key)
+            return found
+
+    matrix = _encode(list(samples))
+    with _sample_matrices_lock:
+        _sample_matrices[key] = matrix
+        while len(_sample_matrices) > _SAMPLE_MATRICES:
+            _sample_matrices.popitem(last=False)
+    return matrix
+
+
 def compute_max_sample_similarity(
     text: str, positive_samples: List[str]
 ) -> Optional[float]:
@@ -305,20 +1082,65 @@ def compute_max_sample_similarity(
     if not text or not positive_samples or _model is None:
         return None
 
-    # Encode the test text
-    text_vec = _model.encode([text], normalize_embeddings=True)[0]
+    text_vec = _encode([text])[0]
+    sample_vecs = sample_matrix(positive_samples)
+    return max(0.0, float((sample_vecs @ text_vec).max()))
+
+
+@dataclass(frozen=True)
+class SimilarityMatrix:
+    """Scores of texts (rows) against profiles (columns).
+
+    ``nearest_index[t, p]`` is the positive sample of profile p closest to text
+    t and ``nearest_similarity[t, p]`` its cosine similarity (only when asked).
+    """
+
+    scores: np.ndarray  # (T, P) float32
+    nearest_index: Optional[np.ndarray] = None  # (T, P) int
+    nearest_similarity: Optional[np.ndarray] = None  # (T, P) float32
+
+
+def score_text_matrix(
+    texts: List[str],
+    profiles: Sequence[Tuple],
+    nearest_samples: bool = False,
+    batch_size: int = 32,
+) -> Optional[SimilarityMatrix]:
+    """Score many texts against many profiles without loading them.
+
+    Texts are encoded in batches once; every profile is given as
+    ``(positive_samples, negative_samples, positive_weight, negative_weight)``,
+    optionally followed by ``scoring_mode`` and ``knn_k``, and scored with the
+    same formula as score_text_for_profile() (see profile_vector_scorer).
+    The live profiles are not touched.
+
+    Returns:
+        The score matrix, or None if the model is unavailable or there is
+        nothing to score
+    """
+    if _model is None or not texts or not profiles:
+        return None
 
-    # Encode all positive samples
-    sample_vecs = _model.encode(positive_samples, normalize_embeddings=True)
+    vectors = _encode(texts, batch_size=batch_size)
+    scores = np.zeros((len(texts), len(profiles)), dtype=np.float32)
+    nearest_index = nearest_similarity = None
+    if nearest_samples:
+        nearest_index = np.full((len(texts), len(profiles)), -1, dtype=np.int64)
+        nearest_similarity = np.zeros((len(texts), len(profiles)), dtype=np.float32)
 
-    # Calculate similarity to each sample and return the maximum
-    max_sim = 0.0
-    for sample_vec in sample_vecs:
-        sim = float(np.dot(text_vec, sample_vec))
-        if sim > max_sim:
-            max_sim = sim
+    for column, profile in enumerate(profiles):
+        positive = profile[0]
+        scorer = profile_vector_scorer(*profile)
+        if scorer is None:
+            continue
+        scores[:, column] = scorer(vectors)
+        if nearest_samples:
+            similarities = vectors @ sample_matrix(positive).T  # (T, N)
+            best = similarities.argmax(axis=1)
+            nearest_index[:, column] = best
+            nearest_similarity[:, column] = similarities[np.arange(len(texts)), best]
 
-    return max_sim
+    return SimilarityMatrix(scores, nearest_index, nearest_similarity)
 
 
 def get_model_status() -> dict:
@@ -332,6 +1154,9 @@ def get_model_status() -> dict:
         "model_name": os.getenv("EMBEDDINGS_MODEL", "not configured"),
         "profile_count": profile_count,
         "profiles": profiles,
+        "embedding_cache": (
+            _embedding_cache.stats() if _embedding_cache is not None else None
+        ),
     }
 
 
@@ -352,11 +1177,15 @@ def clear_profile_cache(profile_id: Optional[str] = None):
             # Clear all profiles
             count = len(_profile_vectors)
             _profile_vectors.clear()
+            _profile_samples.clear()
+            _invalidate_profile_matrices()
             log.info(f"[SEMANTIC] Cleared all profile caches ({count} profiles)")
         else:
             # Clear specific profile
             if profile_id in _profile_vectors:
                 del _profile_vectors[profile_id]
+                _profile_samples.pop(profile_id, None)
+                _invalidate_profile_matrices()
                 log.info(f"[SEMANTIC] Cleared cache for profile {profile_id}")
             else:
                 log.debug(f"[SEMANTIC] Profile {profile_id} not in cache")
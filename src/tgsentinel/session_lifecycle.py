@@ -19,9 +19,12 @@ from telethon import TelegramClient
 from telethon.tl.types import User as TgUser
 from telethon.tl.types import UserProfilePhoto
 
+from .catch_up import LAST_SEEN_KEY, get_last_seen_index
 from .config import AppCfg
-from .redis_operations import RedisManager
+from .redis_operations import AnyRedis, RedisManager
 from .session_helpers import SessionHelpers
+from .stream_lanes import lane_streams
+from .tracing import TRACE_KEY
 
 log = logging.getLogger(__name__)
 
@@ -37,7 +40,7 @@ class SessionLifecycleManager:
         session_helpers: SessionHelpers,
         session_file_path: Path,
         make_client_func: Callable[[AppCfg], TelegramClient],
-        start_ingestion_func: Callable[[AppCfg, TelegramClient, Redis], None],
+        start_ingestion_func: Callable[[AppCfg, TelegramClient, AnyRedis], None],
         mark_authorized_func: Optional[
             Union[Callable[[Any], None], Callable[[Any], Coroutine[Any, Any, None]]]
         ] = None,
@@ -320,7 +323,9 @@ class SessionLifecycleManager:
 
                 # Re-register message ingestion handler
                 try:
-                    self.start_ingestion(self.cfg, new_client, self.redis_client)
+                    self.start_ingestion(
+                        self.cfg, new_client, self.redis_mgr.async_redis
+                    )
                     log.info(
                         "[SESSION-MONITOR] ✓ Message ingestion handler re-registered"
                     )
@@ -685,17 +690,32 @@ class SessionLifecycleManager:
                         avatar_exc,
                     )
 
-                # Clear message ingestion stream
+                # Clear message ingestion streams (every lane)
                 try:
-                    stream_key = self.cfg.system.redis.stream
-                    self.redis_client.delete(stream_key)
-                    log.info("[SESSION-MONITOR] Cleared message stream: %s", stream_key)
+                    lanes = lane_streams(self.cfg.system.redis.stream)
+                    stream_keys = list(lanes.values())
+                    self.redis_client.delete(*stream_keys)
+                    log.info(
+                        "[SESSION-MONITOR] Cleared message streams: %s",
+                        ", ".join(stream_keys),
+                    )
                 except Exception as stream_exc:
                     log.debug(
                         "[SESSION-MONITOR] Failed to clear message stream: %s",
                         stream_exc,
                     )
 
+                # Forget the last seen message ids (no catch-up for the next account)
+                # and the traces of the previous account's messages
+                try:
+                    get_last_seen_index().clear()
+                    self.redis_client.delete(LAST_SEEN_KEY, TRACE_KEY)
+                except Exception as last_seen_exc:
+                    log.debug(
+                        "[SESSION-MONITOR] Failed to clear last seen ids: %s",
+                        last_seen_exc,
+                    )
+
                 log.info(
                     "[SESSION-MONITOR] Cleared user info, cache, and progress keys from Redis"
                 )
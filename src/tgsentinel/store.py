@@ -2,12 +2,26 @@ import contextlib
 import logging
 from typing import Any, Optional
 
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError, ProgrammingError
 
 log = logging.getLogger(__name__)
 
+# SQLite page cache for the messages database, in KiB (negative PRAGMA value)
+SQLITE_CACHE_KIB = 65536
+
+# Indexes replaced by composite (flag, created_at) / covering indexes in init_db
+_SUPERSEDED_INDEXES = (
+    "idx_messages_alerts_feed",
+    "idx_messages_interest_feed",
+    "idx_messages_feed_alert_flag",
+    "idx_messages_feed_interest_flag",
+    "idx_messages_created_at",
+    "idx_messages_chat_id",
+    "idx_messages_digest",
+)
+
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS messages(
   chat_id INTEGER,
@@ -89,8 +103,28 @@ def _add_column_if_missing(
         raise
 
 
+def _enable_sqlite_pragmas(engine: Engine) -> None:
+    """Apply WAL journaling and a larger page cache on every new connection.
+
+    WAL lets the UI read while the worker writes, and synchronous=NORMAL only
+    syncs at checkpoints, which is safe under WAL and far cheaper per commit.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+        finally:
+            cursor.close()
+
+
 def init_db(db_uri: str) -> Engine:
     engine = create_engine(db_uri, future=True)
+    if engine.dialect.name == "sqlite":
+        _enable_sqlite_pragmas(engine)
     with engine.begin() as con:
         # Execute each CREATE TABLE statement separately
         con.execute(
@@ -311,8 +345,9 @@ CREATE TABLE IF NOT EXISTS batch_history (
                 text(
                     """
                     UPDATE messages
-                    SET feed_alert_flag = flagged_for_alerts_feed
-                    WHERE feed_alert_flag = 0 AND flagged_for_alerts_feed = 1
+                    SET feed_alert_flag = COALESCE(flagged_for_alerts_feed, 0)
+                    WHERE feed_alert_flag IS NULL
+                       OR (feed_alert_flag = 0 AND flagged_for_alerts_feed = 1)
                     """
                 )
             )
@@ -320,8 +355,9 @@ CREATE TABLE IF NOT EXISTS batch_history (
                 text(
                     """
                     UPDATE messages
-                    SET feed_interest_flag = flagged_for_interest_feed
-                    WHERE feed_interest_flag = 0 AND flagged_for_interest_feed = 1
+                    SET feed_interest_flag = COALESCE(flagged_for_interest_feed, 0)
+                    WHERE feed_interest_flag IS NULL
+                       OR (feed_interest_flag = 0 AND flagged_for_interest_feed = 1)
                     """
                 )
             )
@@ -346,34 +382,59 @@ CREATE TABLE IF NOT EXISTS batch_history (
                 )
             )
 
+            # Canonical timestamps: time-range queries compare the bare column
+            # against 'YYYY-MM-DD HH:MM:SS' cutoffs, so rows written in ISO form
+            # ('T' separator, offsets, fractions) are rewritten once to UTC
+            for table in ("messages", "feedback"):
+                con.execute(
+                    text(
+                        f"""
+                        UPDATE {table}
+                        SET created_at = datetime(created_at)
+                        WHERE created_at IS NOT NULL
+                          AND datetime(created_at) IS NOT NULL
+                          AND created_at != datetime(created_at)
+                        """
+                    )
+                )
+
             log.info(
                 "Phase 0 backfill completed: keyword_score, feed flags, semantic_type"
             )
         except (OperationalError, ProgrammingError) as e:
             log.warning(f"Phase 0 backfill encountered non-critical error: {e}")
 
+        # Superseded by the composite indexes below (each was a prefix of one)
+        for index_name in _SUPERSEDED_INDEXES:
+            con.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
         # Create indexes for performance on common queries
         # These are idempotent - IF NOT EXISTS prevents errors on re-run
+        # Feed pages and digests filter on a flag and order/range on created_at
         con.execute(
             text(
-                "CREATE INDEX IF NOT EXISTS idx_messages_alerts_feed ON messages(flagged_for_alerts_feed)"
+                "CREATE INDEX IF NOT EXISTS idx_messages_alerts_feed_created "
+                "ON messages(flagged_for_alerts_feed, created_at)"
             )
         )
         con.execute(
             text(
-                "CREATE INDEX IF NOT EXISTS idx_messages_interest_feed ON messages(flagged_for_interest_feed)"
+                "CREATE INDEX IF NOT EXISTS idx_messages_interest_feed_created "
+                "ON messages(flagged_for_interest_feed, created_at)"
             )
         )
 
         # New taxonomy indexes for feed flags
         con.execute(
             text(
-                "CREATE INDEX IF NOT EXISTS idx_messages_feed_alert_flag ON messages(feed_alert_flag)"
+                "CREATE INDEX IF NOT EXISTS idx_messages_feed_alert_created "
+                "ON messages(feed_alert_flag, created_at)"
             )
         )
         con.execute(
             text(
-                "CREATE INDEX IF NOT EXISTS idx_messages_feed_interest_flag ON messages(feed_interest_flag)"
+                "CREATE INDEX IF NOT EXISTS idx_messages_feed_interest_created "
+                "ON messages(feed_interest_flag, created_at)"
             )
         )
         con.execute(
@@ -387,13 +448,26 @@ CREATE TABLE IF NOT EXISTS batch_history (
             )
         )
 
+        # Covering index for dashboard/analytics windows: counts and score
+        # averages over a created_at range never touch the table rows
+        con.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_messages_created_cover "
+                "ON messages(created_at, chat_id, flagged_for_alerts_feed, "
+                "flagged_for_interest_feed, score)"
+            )
+        )
         con.execute(
             text(
-                "CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at)"
+                "CREATE INDEX IF NOT EXISTS idx_messages_chat_created "
+                "ON messages(chat_id, created_at)"
             )
         )
         con.execute(
-            text("CREATE INDEX IF NOT EXISTS idx_messages_chat_id ON messages(chat_id)")
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_feedback_created_at "
+                "ON feedback(created_at, label)"
+            )
         )
         con.execute(
             text(
@@ -425,11 +499,13 @@ CREATE TABLE IF NOT EXISTS batch_history (
             )
         )
 
-        # Digest-related indexes (Phase 1)
+        # Digest-related indexes (Phase 1): every equality of the scheduled
+        # digest collection query, then its created_at range and ordering
         con.execute(
             text(
-                "CREATE INDEX IF NOT EXISTS idx_messages_digest "
-                "ON messages(digest_schedule, digest_processed, created_at)"
+                "CREATE INDEX IF NOT EXISTS idx_messages_digest_queue "
+                "ON messages(digest_schedule, digest_processed, feed_interest_flag, "
+                "created_at)"
             )
         )
 
@@ -470,6 +546,107 @@ CREATE TABLE IF NOT EXISTS batch_history (
     return engine
 
 
+_UPSERT_MESSAGE_SQL = text(
+    """
+  INSERT INTO messages(
+      chat_id, msg_id, content_hash,
+      score, keyword_score, semantic_scores_json, semantic_type,
+      flagged_for_alerts_feed, flagged_for_interest_feed,
+      feed_alert_flag, feed_interest_flag,
+      chat_title, sender_name, message_text, triggers, sender_id,
+      trigger_annotations, matched_profiles, digest_schedule, digest_processed,
+      delivery_mode_used, delivery_target_used
+  )
+  VALUES(
+      :c, :m, :h,
+      :s, :keyword_score, :semantic_scores_json, :semantic_type,
+      0, 0,
+      0, 0,
+      :title, :sender, :text, :triggers, :sender_id,
+      :annotations, :profiles, :schedule, 0,
+      :delivery_mode, :delivery_target
+  )
+  ON CONFLICT(chat_id, msg_id) DO UPDATE SET
+    score = excluded.score,
+    keyword_score = excluded.keyword_score,
+    semantic_scores_json = excluded.semantic_scores_json,
+    semantic_type = excluded.semantic_type,
+    content_hash = excluded.content_hash,
+    chat_title = excluded.chat_title,
+    sender_name = excluded.sender_name,
+    message_text = excluded.message_text,
+    triggers = excluded.triggers,
+    sender_id = excluded.sender_id,
+    trigger_annotations = excluded.trigger_annotations,
+    matched_profiles = excluded.matched_profiles,
+    digest_schedule = excluded.digest_schedule,
+    delivery_mode_used = excluded.delivery_mode_used,
+    delivery_target_used = excluded.delivery_target_used
+"""
+)
+
+_MARK_ALERTS_FEED_SQL = text(
+    """UPDATE messages
+       SET flagged_for_alerts_feed = 1,
+           feed_alert_flag = 1,
+           semantic_type = COALESCE(semantic_type, 'alert_keyword')
+       WHERE chat_id = :c AND msg_id = :m"""
+)
+
+_MARK_INTEREST_FEED_SQL = text(
+    """UPDATE messages
+       SET flagged_for_interest_feed = 1,
+           feed_interest_flag = 1,
+           semantic_type = COALESCE(semantic_type, 'interest_semantic')
+       WHERE chat_id = :c AND msg_id = :m"""
+)
+
+
+def message_params(
+    chat_id: int,
+    msg_id: int,
+    h: str,
+    score: float,
+    chat_title: str = "",
+    sender_name: str = "",
+    message_text: str = "",
+    triggers: str = "",
+    sender_id: int = 0,
+    trigger_annotations: str = "",  # JSON string
+    matched_profiles: str = "",  # JSON: ["security", "critical"]
+    digest_schedule: str = "",  # "hourly", "daily", etc.
+    keyword_score: Optional[float] = None,  # New: separate keyword score
+    semantic_scores_json: str = "",  # New: JSON {profile_id: score}
+    semantic_type: Optional[str] = None,  # New: 'alert_keyword' or 'interest_semantic'
+    delivery_mode_used: Optional[str] = None,  # New: actual delivery mode
+    delivery_target_used: Optional[str] = None,  # New: actual delivery target
+) -> dict[str, Any]:
+    """Build the bind parameters of one message upsert (see upsert_message)."""
+    # Phase 0: Dual-write - set keyword_score from score if not provided
+    if keyword_score is None:
+        keyword_score = score
+
+    return {
+        "c": chat_id,
+        "m": msg_id,
+        "h": h,
+        "s": score,
+        "keyword_score": keyword_score,
+        "semantic_scores_json": semantic_scores_json,
+        "semantic_type": semantic_type,
+        "title": chat_title,
+        "sender": sender_name,
+        "text": message_text,
+        "triggers": triggers,
+        "sender_id": sender_id,
+        "annotations": trigger_annotations,
+        "profiles": matched_profiles,
+        "schedule": digest_schedule,
+        "delivery_mode": delivery_mode_used,
+        "delivery_target": delivery_target_used,
+    }
+
+
 def upsert_message(
     engine: Engine,
     chat_id: int,
@@ -495,70 +672,27 @@ def upsert_message(
     During Phase 0 migration, writes to both legacy (score, flagged_for_*) and new
     (keyword_score, semantic_scores_json, feed_*_flag, semantic_type) columns.
     """
-    # Phase 0: Dual-write - set keyword_score from score if not provided
-    if keyword_score is None:
-        keyword_score = score
-
+    params = message_params(
+        chat_id,
+        msg_id,
+        h,
+        score,
+        chat_title=chat_title,
+        sender_name=sender_name,
+        message_text=message_text,
+        triggers=triggers,
+        sender_id=sender_id,
+        trigger_annotations=trigger_annotations,
+        matched_profiles=matched_profiles,
+        digest_schedule=digest_schedule,
+        keyword_score=keyword_score,
+        semantic_scores_json=semantic_scores_json,
+        semantic_type=semantic_type,
+        delivery_mode_used=delivery_mode_used,
+        delivery_target_used=delivery_target_used,
+    )
     with engine.begin() as con:
-        con.execute(
-            text(
-                """
-          INSERT INTO messages(
-              chat_id, msg_id, content_hash,
-              score, keyword_score, semantic_scores_json, semantic_type,
-              flagged_for_alerts_feed, flagged_for_interest_feed,
-              feed_alert_flag, feed_interest_flag,
-              chat_title, sender_name, message_text, triggers, sender_id,
-              trigger_annotations, matched_profiles, digest_schedule, digest_processed,
-              delivery_mode_used, delivery_target_used
-          )
-          VALUES(
-              :c, :m, :h,
-              :s, :keyword_score, :semantic_scores_json, :semantic_type,
-              0, 0,
-              0, 0,
-              :title, :sender, :text, :triggers, :sender_id,
-              :annotations, :profiles, :schedule, 0,
-              :delivery_mode, :delivery_target
-          )
-          ON CONFLICT(chat_id, msg_id) DO UPDATE SET
-            score = excluded.score,
-            keyword_score = excluded.keyword_score,
-            semantic_scores_json = excluded.semantic_scores_json,
-            semantic_type = excluded.semantic_type,
-            content_hash = excluded.content_hash,
-            chat_title = excluded.chat_title,
-            sender_name = excluded.sender_name,
-            message_text = excluded.message_text,
-            triggers = excluded.triggers,
-            sender_id = excluded.sender_id,
-            trigger_annotations = excluded.trigger_annotations,
-            matched_profiles = excluded.matched_profiles,
-            digest_schedule = excluded.digest_schedule,
-            delivery_mode_used = excluded.delivery_mode_used,
-            delivery_target_used = excluded.delivery_target_used
-        """
-            ),
-            {
-                "c": chat_id,
-                "m": msg_id,
-                "h": h,
-                "s": score,
-                "keyword_score": keyword_score,
-                "semantic_scores_json": semantic_scores_json,
-                "semantic_type": semantic_type,
-                "title": chat_title,
-                "sender": sender_name,
-                "text": message_text,
-                "triggers": triggers,
-                "sender_id": sender_id,
-                "annotations": trigger_annotations,
-                "profiles": matched_profiles,
-                "schedule": digest_schedule,
-                "delivery_mode": delivery_mode_used,
-                "delivery_target": delivery_target_used,
-            },
-        )
+        con.execute(_UPSERT_MESSAGE_SQL, params)
 
 
 def mark_for_alerts_feed(engine: Engine, chat_id: int, msg_id: int):
@@ -567,16 +701,7 @@ def mark_for_alerts_feed(engine: Engine, chat_id: int, msg_id: int):
     Phase 0: Dual-write to both legacy and new feed flags.
     """
     with engine.begin() as con:
-        con.execute(
-            text(
-                """UPDATE messages
-                   SET flagged_for_alerts_feed = 1,
-                       feed_alert_flag = 1,
-                       semantic_type = COALESCE(semantic_type, 'alert_keyword')
-                   WHERE chat_id = :c AND msg_id = :m"""
-            ),
-            {"c": chat_id, "m": msg_id},
-        )
+        con.execute(_MARK_ALERTS_FEED_SQL, {"c": chat_id, "m": msg_id})
 
 
 def mark_for_interest_feed(engine: Engine, chat_id: int, msg_id: int):
@@ -585,16 +710,36 @@ def mark_for_interest_feed(engine: Engine, chat_id: int, msg_id: int):
     Phase 0: Dual-write to both legacy and new feed flags.
     """
     with engine.begin() as con:
-        con.execute(
-            text(
-                """UPDATE messages
-                   SET flagged_for_interest_feed = 1,
-                       feed_interest_flag = 1,
-                       semantic_type = COALESCE(semantic_type, 'interest_semantic')
-                   WHERE chat_id = :c AND msg_id = :m"""
-            ),
-            {"c": chat_id, "m": msg_id},
-        )
+        con.execute(_MARK_INTEREST_FEED_SQL, {"c": chat_id, "m": msg_id})
+
+
+def write_message_batch(
+    engine: Engine,
+    upserts: list[dict[str, Any]],
+    alerts_feed: list[tuple[int, int]],
+    interest_feed: list[tuple[int, int]],
+) -> None:
+    """Persist buffered message writes in one transaction.
+
+    Each statement runs once via executemany. Upserts are applied before the
+    feed flags so a flag always finds the row it refers to.
+
+    Args:
+        upserts: Parameter dicts built by message_params()
+        alerts_feed: (chat_id, msg_id) pairs to mark for the Alerts Feed
+        interest_feed: (chat_id, msg_id) pairs to mark for the Interest Feed
+    """
+    with engine.begin() as con:
+        if upserts:
+            con.execute(_UPSERT_MESSAGE_SQL, upserts)
+        if alerts_feed:
+            con.execute(
+                _MARK_ALERTS_FEED_SQL, [{"c": c, "m": m} for c, m in alerts_feed]
+            )
+        if interest_feed:
+            con.execute(
+                _MARK_INTEREST_FEED_SQL, [{"c": c, "m": m} for c, m in interest_feed]
+            )
 
 
 def cleanup_old_messages(
@@ -632,9 +777,9 @@ def cleanup_old_messages(
             text(
                 """
                 DELETE FROM messages
-                WHERE datetime(created_at) < datetime('now', '-' || :retention_days || ' days')
+                WHERE created_at < datetime('now', '-' || :retention_days || ' days')
                   AND ((flagged_for_alerts_feed = 0 AND flagged_for_interest_feed = 0)
-                       OR datetime(created_at) < datetime('now', '-' || :flagged_retention_days || ' days'))
+                       OR created_at < datetime('now', '-' || :flagged_retention_days || ' days'))
             """
             ),
             {
@@ -0,0 +1,382 @@
+"""Encoding of ingested messages in the Redis stream.
+
+Both ingestion paths (the event handler in ``client.py`` and the DM poller)
+build the same message payload and push it to the stream; the worker, the UI
+live feed and the tools read it back. This module owns both halves.
+
+Wire format, version 1 (``STREAM_CODEC=compact``, the default)::
+
+    v   schema version ("1")
+    c   chat_id            m   msg_id          s   sender_id
+    r   reply_to_msg_id    ff  forward_from    rp  replies
+    rx  reactions          f   flag bits       ts  timestamp
+    t   text               ct  chat_title      sn  sender_name
+    mt  media_type         x   JSON of anything not covered above
+    tr  trace_id           tq  received_us     ti  ingested_us
+
+Every entry carries the same field names in the same order, so Redis stores
+them once per stream node instead of once per entry, and integer values are
+kept as packed integers. Values stay plain text because every Redis client in
+the project uses ``decode_responses=True``. Timestamps are stored as epoch
+microseconds when that round-trips exactly, and avatar URLs, which are derived
+from the peer id, become flag bits. The trace fields (see ``tracing.py``) are
+left empty for payloads without a trace.
+
+Entries written before the codec existed (a single ``json`` field), or by
+``STREAM_CODEC=json`` writers, are detected and decoded transparently.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional
+
+from .avatar_fetcher import avatar_url
+
+STREAM_CODEC_VERSION = 1
+VERSION_FIELD = "v"
+LEGACY_FIELD = "json"
+
+# Payload flags packed into the "f" field
+_FLAG_BITS = {
+    "mentioned": 1,
+    "is_reply": 2,
+    "has_media": 4,
+    "is_pinned": 8,
+    "has_forward": 16,
+}
+_SENDER_AVATAR = 32
+_CHAT_AVATAR = 64
+
+# (field id, payload key): optional integers, then text
+_INT_FIELDS = (
+    ("c", "chat_id"),
+    ("m", "msg_id"),
+    ("s", "sender_id"),
+    ("r", "reply_to_msg_id"),
+    ("ff", "forward_from"),
+    ("rp", "replies"),
+    ("rx", "reactions"),
+)
+_TEXT_FIELDS = (("t", "text"), ("ct", "chat_title"), ("sn", "sender_name"))
+_OPTIONAL_TEXT_FIELDS = (("mt", "media_type"),)
+# (field id, payload key, type): present only in traced payloads
+_TRACE_FIELDS = (
+    ("tr", "trace_id", str),
+    ("tq", "received_us", int),
+    ("ti", "ingested_us", int),
+)
+_TRACE_KEYS = frozenset(key for _, key, _ in _TRACE_FIELDS)
+
+_KNOWN_KEYS = frozenset(
+    [key for _, key in _INT_FIELDS + _TEXT_FIELDS]
+    + [key for _, key in _OPTIONAL_TEXT_FIELDS]
+    + list(_FLAG_BITS)
+    + ["timestamp", "avatar_url", "chat_avatar_url"]
+)
+
+# Extras entry listing known keys the original payload did not have
+_ABSENT_KEY = "-"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Payload construction (shared by both ingestion paths)
+# ---------------------------------------------------------------------------
+
+
+def _is_mock(value: Any) -> bool:
+    return hasattr(value, "_mock_name")
+
+
+def _reaction_count(msg) -> int:
+    rs = getattr(msg, "reactions", None)
+    if not rs or not rs.results:
+        return 0
+    return sum([r.count for r in rs.results])
+
+
+def _safe_get_reply_to_id(message):
+    """Safely extract reply_to_msg_id, handling None and mock objects."""
+    try:
+        reply_to = getattr(message, "reply_to", None)
+        if reply_to is None:
+            return None
+        # Check if it's a mock object (has _mock_name attribute)
+        if _is_mock(reply_to):
+            return None
+        reply_to_id = getattr(reply_to, "reply_to_msg_id", None)
+        return int(reply_to_id) if reply_to_id is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _safe_get_media_type(message):
+    """Safely extract media type, handling None and mock objects."""
+    try:
+        media = getattr(message, "media", None)
+        if media is None:
+            return None
+        # Check if it's a mock object
+        if _is_mock(media):
+            return None
+        return media.__class__.__name__ if hasattr(media, "__class__") else None
+    except (AttributeError, TypeError):
+        return None
+
+
+def _safe_get_forward_from(message):
+    """Safely extract forward from user ID, handling None and mock objects."""
+    try:
+        forward = getattr(message, "forward", None)
+        if forward is None:
+            return None
+        # Check if it's a mock object
+        if _is_mock(forward):
+            return None
+        if hasattr(forward, "from_id") and hasattr(forward.from_id, "user_id"):
+            return int(forward.from_id.user_id)
+        return None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def build_message_payload(
+    message: Any,
+    *,
+    chat_id: Optional[int],
+    chat_title: str = "",
+    sender_name: str = "",
+    sender_avatar_url: Optional[str] = None,
+    chat_avatar_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build the stream payload for a Telethon message.
+
+    Chat and sender display data come from the caller (resolved through the
+    entity directory); everything else is read defensively from ``message``.
+    """
+    msg_date = getattr(message, "date", None)
+    media = getattr(message, "media", None)
+    forward = getattr(message, "forward", None)
+
+    return {
+        "chat_id": chat_id,
+        "chat_title": chat_title,
+        "msg_id": getattr(message, "id", None),
+        "sender_id": getattr(message, "sender_id", None),
+        "sender_name": sender_name,
+        "mentioned": bool(getattr(message, "mentioned", False)),
+        "text": getattr(message, "message", "") or "",
+        "replies": int(getattr(getattr(message, "replies", None), "replies", 0) or 0),
+        "reactions": _reaction_count(message),
+        "timestamp": msg_date.isoformat() if msg_date is not None else None,
+        "avatar_url": sender_avatar_url or chat_avatar_url,
+        "chat_avatar_url": chat_avatar_url,
+        "is_reply": bool(getattr(message, "is_reply", False)),
+        "reply_to_msg_id": _safe_get_reply_to_id(message),
+        "has_media": bool(media) and not _is_mock(media),
+        "media_type": _safe_get_media_type(message),
+        "is_pinned": bool(getattr(message, "pinned", False)),
+        "has_forward": bool(forward) and not _is_mock(forward),
+        "forward_from": _safe_get_forward_from(message),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+
+def _encode_timestamp(value: Any) -> Optional[str]:
+    """Epoch microseconds if that reproduces ``value`` exactly, else None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.utcoffset() != timedelta(0):
+        return None
+    micros = (parsed - _EPOCH) // timedelta(microseconds=1)
+    return str(micros) if _decode_timestamp(micros) == value else None
+
+
+def _decode_timestamp(micros: int) -> str:
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def encode_compact(payload: Mapping[str, Any]) -> Dict[str, str]:
+    """Encode ``payload`` as version-1 stream fields.
+
+    Values the fixed fields cannot represent exactly (unknown keys, missing
+    keys, non-derived avatar URLs, odd types) go to the ``x`` JSON field, so
+    ``decode_fields(encode_compact(p)) == p`` for any JSON-serializable ``p``.
+    """
+    extras = {
+        key: value
+        for key, value in payload.items()
+        if key not in _KNOWN_KEYS and key not in _TRACE_KEYS
+    }
+    absent = sorted(_KNOWN_KEYS.difference(payload))
+    if absent:
+        extras[_ABSENT_KEY] = absent
+    fields: Dict[str, str] = {VERSION_FIELD: str(STREAM_CODEC_VERSION)}
+
+    for field, key in _INT_FIELDS:
+        value = payload.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            fields[field] = str(value)
+        else:
+            fields[field] = ""
+            if value is not None:
+                extras[key] = value
+
+    flags = 0
+    for key, bit in _FLAG_BITS.items():
+        value = payload.get(key, False)
+        if value is True:
+            flags |= bit
+        elif value is not False:
+            extras[key] = value
+
+    # Avatar URLs are derived from the peer id; only foreign values are kept
+    chat_id = payload.get("chat_id")
+    sender_id = payload.get("sender_id")
+    chat_avatar = payload.get("chat_avatar_url")
+    sender_avatar = payload.get("avatar_url")
+    # What the decoder rebuilds for chat_avatar_url, before extras apply
+    derived_chat_avatar = None
+    if isinstance(chat_id, int) and chat_avatar == avatar_url(chat_id):
+        flags |= _CHAT_AVATAR
+        derived_chat_avatar = chat_avatar
+    elif chat_avatar is not None:
+        extras["chat_avatar_url"] = chat_avatar
+    if isinstance(sender_id, int) and sender_avatar == avatar_url(sender_id):
+        flags |= _SENDER_AVATAR
+    elif sender_avatar != derived_chat_avatar:
+        # avatar_url falls back to the derived chat avatar when the sender has none
+        extras["avatar_url"] = sender_avatar
+    fields["f"] = str(flags)
+
+    timestamp = payload.get("timestamp")
+    encoded_ts = _encode_timestamp(timestamp)
+    if encoded_ts is None:
+        encoded_ts = ""
+        if timestamp is not None:
+            extras["timestamp"] = timestamp
+    fields["ts"] = encoded_ts
+
+    for field, key in _TEXT_FIELDS:
+        value = payload.get(key, "")
+        fields[field] = value if isinstance(value, str) else ""
+        if not isinstance(value, str):
+            extras[key] = value
+    for field, key in _OPTIONAL_TEXT_FIELDS:
+        value = payload.get(key)
+        fields[field] = value if isinstance(value, str) else ""
+        if value is not None and not (isinstance(value, str) and value):
+            extras[key] = value
+
+    for field, key, kind in _TRACE_FIELDS:
+        value = payload.get(key)
+        if isinstance(value, kind) and not isinstance(value, bool) and value != "":
+            fields[field] = str(value)
+        else:
+            fields[field] = ""
+            if key in payload:
+                extras[key] = value
+
+    fields["x"] = json.dumps(extras, separators=(",", ":")) if extras else ""
+    return fields
+
+
+def encode_payload(
+    payload: Mapping[str, Any], codec: Optional[str] = None
+) -> Dict[str, str]:
+    """Encode ``payload`` into stream fields using ``codec`` (or STREAM_CODEC).
+
+    ``json`` writes the legacy single-field format, useful while readers of an
+    older release still consume the stream.
+    """
+    codec = (codec or os.getenv("STREAM_CODEC", "compact")).strip().lower()
+    if codec == "json":
+        return {LEGACY_FIELD: json.dumps(payload)}
+    return encode_compact(payload)
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return "" if value is None else str(value)
+
+
+def _decode_compact(fields: Mapping[str, str]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {}
+
+    for field, key in _INT_FIELDS:
+        value = fields.get(field, "")
+        payload[key] = int(value) if value else None
+
+    for field, key in _TEXT_FIELDS:
+        payload[key] = fields.get(field, "")
+    for field, key in _OPTIONAL_TEXT_FIELDS:
+        payload[key] = fields.get(field) or None
+
+    flags = int(fields.get("f") or 0)
+    for key, bit in _FLAG_BITS.items():
+        payload[key] = bool(flags & bit)
+
+    ts = fields.get("ts", "")
+    payload["timestamp"] = _decode_timestamp(int(ts)) if ts else None
+
+    chat_id, sender_id = payload["chat_id"], payload["sender_id"]
+    chat_avatar = (
+        avatar_url(chat_id) if flags & _CHAT_AVATAR and chat_id is not None else None
+    )
+    payload["chat_avatar_url"] = chat_avatar
+    if flags & _SENDER_AVATAR and sender_id is not None:
+        payload["avatar_url"] = avatar_url(sender_id)
+    else:
+        payload["avatar_url"] = chat_avatar
+
+    for field, key, kind in _TRACE_FIELDS:
+        value = fields.get(field)
+        if value:
+            payload[key] = kind(value)
+
+    extras = fields.get("x")
+    if extras:
+        payload.update(json.loads(extras))
+        for key in payload.pop(_ABSENT_KEY, ()):
+            payload.pop(key, None)
+    return payload
+
+
+def decode_fields(fields: Mapping[Any, Any]) -> Dict[str, Any]:
+    """Decode one stream entry, whatever encoding it was written with.
+
+    Raises ``ValueError`` for entries that carry neither a known schema
+    version nor the legacy ``json`` field.
+    """
+    decoded = {_text(key): _text(value) for key, value in fields.items()}
+
+    version = decoded.get(VERSION_FIELD)
+    if version is None:
+        if LEGACY_FIELD in decoded:
+            return json.loads(decoded[LEGACY_FIELD])
+        raise ValueError("stream entry has no known encoding")
+    if version == "1":
+        return _decode_compact(decoded)
+    raise ValueError(f"unsupported stream codec version {version!r}")
+
+
+def is_encoded_entry(fields: Mapping[Any, Any]) -> bool:
+    """True if ``fields`` looks like a message written by this codec."""
+    keys = {_text(key) for key in fields}
+    return VERSION_FIELD in keys or LEGACY_FIELD in keys
@@ -0,0 +1,240 @@
+"""Pending-entry reclaim and dead-letter handling for the message stream.
+
+A stream entry whose processing fails is left unacknowledged, i.e. in the
+consumer group's pending entries list (PEL). ``PendingReclaimer`` periodically
+claims entries that have been idle for ``min_idle_ms`` with XAUTOCLAIM - from
+this consumer or from consumers that died - and hands them back to the worker
+for another attempt. Once an entry has been delivered more than
+``max_deliveries`` times it is copied to the dead-letter stream
+(``<stream>:dlq``) together with its last error, and acknowledged.
+
+Entries trimmed from the stream by MAXLEN while still pending are acknowledged
+and dropped.
+
+The module-level ``list_dead_letters``/``replay_dead_letter``/
+``delete_dead_letter`` helpers back the inspection API in ``api.py``.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Container, Dict, List, Optional, Tuple
+
+from .metrics import stream_reclaimed_total
+from .redis_operations import AnyRedis, maybe_await
+from .stream_codec import decode_fields
+
+log = logging.getLogger(__name__)
+
+StreamEntry = Tuple[str, Dict[str, str]]
+
+# Metadata fields added to dead-lettered entries (stripped again on replay)
+DLQ_SOURCE_ID = "dlq_source_id"
+DLQ_DELIVERIES = "dlq_deliveries"
+DLQ_ERROR = "dlq_error"
+DLQ_AT = "dlq_at"
+_DLQ_FIELDS = (DLQ_SOURCE_ID, DLQ_DELIVERIES, DLQ_ERROR, DLQ_AT)
+
+DEAD_LETTER_MAXLEN = 10000
+_MAX_TRACKED_ERRORS = 10000
+
+
+def dead_letter_stream(stream: str) -> str:
+    """Name of the dead-letter stream paired with ``stream``."""
+    return f"{stream}:dlq"
+
+
+class PendingReclaimer:
+    """Claims idle pending entries for retry and dead-letters poison ones."""
+
+    def __init__(
+        self,
+        r: AnyRedis,
+        stream: str,
+        group: str,
+        consumer: str,
+        min_idle_ms: int = 60000,
+        max_deliveries: int = 5,
+        count: int = 100,
+    ):
+        self.r = r
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.min_idle_ms = max(0, int(min_idle_ms))
+        self.max_deliveries = max(1, int(max_deliveries))
+        self.count = max(1, int(count))
+        self.dead_letter_stream = dead_letter_stream(stream)
+
+        # XAUTOCLAIM cursor; "0-0" again once a full PEL scan has completed
+        self._cursor = "0-0"
+        # Last processing error per entry id, copied into the dead letter
+        self._errors: "OrderedDict[str, str]" = OrderedDict()
+
+        self.stats = {"retried": 0, "dead_lettered": 0, "dropped": 0}
+
+    def record_failure(self, entry_id: str, error: BaseException) -> None:
+        """Remember why ``entry_id`` failed (shown on the dead letter)."""
+        self._errors[entry_id] = f"{type(error).__name__}: {error}"[:1000]
+        self._errors.move_to_end(entry_id)
+        while len(self._errors) > _MAX_TRACKED_ERRORS:
+            self._errors.popitem(last=False)
+
+    def forget(self, entry_id: str) -> None:
+        """Drop the recorded error of an entry that has been acknowledged."""
+        self._errors.pop(entry_id, None)
+
+    async def reclaim(self, skip: Container[str] = ()) -> List[StreamEntry]:
+        """Claim one batch of idle pending entries.
+
+        Returns the entries to retry. Entries in ``skip`` (still in flight in
+        this process) are claimed but neither returned nor dead-lettered.
+        """
+        resp = await maybe_await(
+            self.r.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=self.min_idle_ms,
+                start_id=self._cursor,
+                count=self.count,
+            )
+        )
+        if not resp:
+            return []
+        self._cursor = resp[0]
+        claimed = resp[1] or []
+        # Redis >= 7 reports entries deleted from the stream separately
+        gone = list(resp[2]) if len(resp) > 2 and resp[2] else []
+
+        live: List[StreamEntry] = []
+        for entry_id, fields in claimed:
+            if entry_id in skip:
+                continue
+            if fields:
+                live.append((entry_id, fields))
+            else:
+                gone.append(entry_id)
+
+        if gone:
+            await maybe_await(self.r.xack(self.stream, self.group, *gone))
+            for entry_id in gone:
+                self.forget(entry_id)
+            self.stats["dropped"] += len(gone)
+            stream_reclaimed_total.labels(outcome="dropped").inc(len(gone))
+            log.info(
+                "[RECLAIM] Acknowledged %d pending entries already trimmed from %s",
+                len(gone),
+                self.stream,
+            )
+
+        retry: List[StreamEntry] = []
+        for entry_id, fields in live:
+            deliveries = await self._delivery_count(entry_id)
+            if deliveries > self.max_deliveries:
+                await self._dead_letter(entry_id, fields, deliveries)
+            else:
+                retry.append((entry_id, fields))
+        self.stats["retried"] += len(retry)
+        if retry:
+            stream_reclaimed_total.labels(outcome="retried").inc(len(retry))
+        return retry
+
+    async def _delivery_count(self, entry_id: str) -> int:
+        pending = await maybe_await(
+            self.r.xpending_range(
+                self.stream, self.group, min=entry_id, max=entry_id, count=1
+            )
+        )
+        if not pending:
+            return 0
+        return int(pending[0].get("times_delivered", 0))
+
+    async def _dead_letter(
+        self, entry_id: str, fields: Dict[str, str], deliveries: int
+    ) -> None:
+        record = dict(fields)
+        record[DLQ_SOURCE_ID] = entry_id
+        record[DLQ_DELIVERIES] = str(deliveries)
+        record[DLQ_ERROR] = self._errors.pop(entry_id, "")
+        record[DLQ_AT] = datetime.now(timezone.utc).isoformat()
+
+        # Copy first: a crash in between leaves a duplicate, never a loss
+        await maybe_await(
+            self.r.xadd(
+                self.dead_letter_stream,
+                record,
+                maxlen=DEAD_LETTER_MAXLEN,
+                approximate=True,
+            )
+        )
+        await maybe_await(self.r.xack(self.stream, self.group, entry_id))
+        self.stats["dead_lettered"] += 1
+        stream_reclaimed_total.labels(outcome="dead_lettered").inc()
+        log.warning(
+            "[RECLAIM] Moved %s to %s after %d deliveries: %s",
+            entry_id,
+            self.dead_letter_stream,
+            deliveries,
+            record[DLQ_ERROR] or "no error recorded",
+        )
+
+
+# ---------------------------------------------------------------------------
+# Dead-letter inspection (synchronous client, used by the HTTP API)
+# ---------------------------------------------------------------------------
+
+
+def _dead_letter_dict(entry_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    message_fields = {k: v for k, v in fields.items() if k not in _DLQ_FIELDS}
+    try:
+        payload: Optional[Dict[str, Any]] = decode_fields(message_fields)
+    except Exception:
+        payload = None
+    deliveries = fields.get(DLQ_DELIVERIES)
+    return {
+        "id": entry_id,
+        "source_id": fields.get(DLQ_SOURCE_ID),
+        "deliveries": int(deliveries) if deliveries else None,
+        "error": fields.get(DLQ_ERROR) or None,
+        "dead_lettered_at": fields.get(DLQ_AT),
+        "payload": payload,
+    }
+
+
+def list_dead_letters(
+    r: Any, stream: str, count: int = 50, before: Optional[str] = None
+) -> Dict[str, Any]:
+    """Return the newest dead letters (older than ``before``, if given)."""
+    dlq = dead_letter_stream(stream)
+    upper = f"({before}" if before else "+"
+    entries = r.xrevrange(dlq, upper, "-", count=count)
+    return {
+        "stream": dlq,
+        "total": r.xlen(dlq),
+        "entries": [
+            _dead_letter_dict(entry_id, fields) for entry_id, fields in entries
+        ],
+    }
+
+
+def replay_dead_letter(r: Any, stream: str, entry_id: str) -> Optional[str]:
+    """Re-publish a dead letter to ``stream`` and remove it from the DLQ.
+
+    Returns the new stream entry id, or None if ``entry_id`` does not exist.
+    """
+    dlq = dead_letter_stream(stream)
+    entries = r.xrange(dlq, entry_id, entry_id, count=1)
+    if not entries:
+        return None
+    fields = {k: v for k, v in entries[0][1].items() if k not in _DLQ_FIELDS}
+    # No MAXLEN: trimming is left to the BackpressureMonitor, which counts it
+    new_id = r.xadd(stream, fields)
+    r.xdel(dlq, entry_id)
+    log.info("[RECLAIM] Replayed dead letter %s as %s", entry_id, new_id)
+    return new_id
+
+
+def delete_dead_letter(r: Any, stream: str, entry_id: str) -> bool:
+    """Discard a dead letter; returns False if it did not exist."""
+    return bool(r.xdel(dead_letter_stream(stream), entry_id))
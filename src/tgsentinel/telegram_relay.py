@@ -0,0 +1,188 @@
+"""Telegram call relay between scoring pool processes and the session owner.
+
+Only the main sentinel process holds the Telethon session. Scoring processes
+of the worker pool get a ``TelegramRelayClient`` instead of a TelegramClient;
+it forwards the few client calls the scoring path makes over a Redis list to
+the ``TelegramRelayServer`` running in the main process:
+
+- ``send_message(entity, message)`` - request/response (alert delivery; a
+  failed send is raised in the caller)
+- ``get_messages(entity, ids=...)`` - request/response (reply-to-us checks)
+- ``get_me()`` - request/response (our user id at startup)
+- ``is_ours(chat_id, msg_id)`` - request/response, answered from the session
+  owner's own-message index without calling Telegram
+
+Requests are JSON documents pushed to ``tgsentinel:telegram_relay``; replies
+are pushed to a per-request list that the caller pops with a timeout. The
+server handles up to ``max_concurrency`` requests at once, so one call stuck in
+a flood wait does not hold up the others.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional, Set
+
+from .own_messages import get_own_message_index
+from .redis_operations import AnyRedis, maybe_await
+
+log = logging.getLogger(__name__)
+
+RELAY_QUEUE_KEY = "tgsentinel:telegram_relay"
+_REPLY_KEY_PREFIX = "tgsentinel:telegram_relay:reply:"
+_REPLY_TTL_SECONDS = 60
+
+
+def _as_text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+class TelegramRelayClient:
+    """Stand-in for TelegramClient inside worker pool processes."""
+
+    is_relay = True
+
+    def __init__(self, r: AnyRedis, timeout: float = 10.0):
+        self.r = r
+        self.timeout = timeout
+
+    async def _push(self, request: Dict[str, Any]) -> None:
+        await maybe_await(self.r.rpush(RELAY_QUEUE_KEY, json.dumps(request)))
+
+    async def _call(self, op: str, **args: Any) -> Any:
+        reply_key = f"{_REPLY_KEY_PREFIX}{uuid.uuid4().hex}"
+        await self._push({"op": op, "args": args, "reply": reply_key})
+        item = await maybe_await(
+            self.r.blpop([reply_key], timeout=max(1, int(self.timeout)))
+        )
+        if not item:
+            raise TimeoutError(f"Telegram relay did not answer {op} in {self.timeout}s")
+        reply = json.loads(_as_text(item[1]))
+        if reply.get("error"):
+            raise RuntimeError(f"Telegram relay {op} failed: {reply['error']}")
+        return reply.get("result")
+
+    async def send_message(self, entity: Any, message: str) -> None:
+        """Have the session owner send a message; returns once it was sent."""
+        await self._call("send_message", entity=entity, message=message)
+
+    async def get_messages(self, entity: Any, ids: Any = None) -> Any:
+        result = await self._call("get_messages", entity=entity, ids=ids)
+        return SimpleNamespace(**result) if result else None
+
+    async def get_me(self) -> Any:
+        result = await self._call("get_me")
+        return SimpleNamespace(**result) if result else None
+
+    async def is_ours(self, chat_id: int, msg_id: int) -> Optional[bool]:
+        """Ask the session owner's own-message index; None if it does not know.
+
+        Pool processes fork before ingestion starts, so their own index stays
+        empty; the parent's index answers without a Telegram round-trip.
+        """
+        try:
+            return await self._call("is_ours", chat_id=chat_id, msg_id=msg_id)
+        except (TimeoutError, RuntimeError) as e:
+            log.debug("[TELEGRAM-RELAY] is_ours lookup failed: %s", e)
+            return None
+
+
+class TelegramRelayServer:
+    """Executes relayed Telegram calls with the session owner's client."""
+
+    def __init__(
+        self,
+        client_ref: Callable[[], Any],
+        r: AnyRedis,
+        handshake_gate: Optional[asyncio.Event] = None,
+        max_concurrency: int = 16,
+    ):
+        self.client_ref = client_ref
+        self.r = r
+        self.handshake_gate = handshake_gate
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        """Serve relay requests forever (paused while the gate is cleared)."""
+        log.info("[TELEGRAM-RELAY] Serving Telegram calls for the worker pool")
+        try:
+            await self._serve()
+        finally:
+            for task in list(self._inflight):
+                task.cancel()
+
+    async def _serve(self) -> None:
+        while True:
+            if self.handshake_gate is not None:
+                await self.handshake_gate.wait()
+            try:
+                item = await maybe_await(self.r.blpop([RELAY_QUEUE_KEY], timeout=5))
+            except Exception as e:
+                log.warning("[TELEGRAM-RELAY] Could not read relay queue: %s", e)
+                await asyncio.sleep(1)
+                continue
+            if not item:
+                continue
+            try:
+                request = json.loads(_as_text(item[1]))
+            except ValueError as e:
+                log.warning("[TELEGRAM-RELAY] Dropping malformed request: %s", e)
+                continue
+            # Telethon sleeps through short flood waits inside a call; run
+            # requests side by side so one slow call does not block the rest
+            await self._slots.acquire()
+            task = asyncio.create_task(self._handle_in_slot(request))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _handle_in_slot(self, request: Dict[str, Any]) -> None:
+        try:
+            await self.handle(request)
+        except Exception as e:
+            log.warning(
+                "[TELEGRAM-RELAY] Could not answer %s: %s", request.get("op"), e
+            )
+        finally:
+            self._slots.release()
+
+    async def handle(self, request: Dict[str, Any]) -> None:
+        op = request.get("op")
+        args = request.get("args") or {}
+        reply: Dict[str, Any] = {"result": None}
+        try:
+            reply["result"] = await self._execute(op, args)
+        except Exception as e:
+            log.warning("[TELEGRAM-RELAY] %s failed: %s", op, e)
+            reply = {"error": str(e) or type(e).__name__}
+
+        reply_key = request.get("reply")
+        if reply_key:
+            await maybe_await(self.r.rpush(reply_key, json.dumps(reply)))
+            await maybe_await(self.r.expire(reply_key, _REPLY_TTL_SECONDS))
+
+    async def _execute(self, op: Any, args: Dict[str, Any]) -> Any:
+        if op == "is_ours":
+            return get_own_message_index().is_ours(
+                int(args["chat_id"]), int(args["msg_id"])
+            )
+        client = self.client_ref()
+        if op == "send_message":
+            await client.send_message(args["entity"], args["message"])
+            return None
+        if op == "get_messages":
+            message = await client.get_messages(args["entity"], ids=args.get("ids"))
+            if isinstance(message, list):
+                message = message[0] if message else None
+            if message is None:
+                return None
+            sender_id = getattr(message, "sender_id", None) or getattr(
+                getattr(message, "sender", None), "id", None
+            )
+            return {"id": getattr(message, "id", None), "sender_id": sender_id}
+        if op == "get_me":
+            me = await client.get_me()
+            return {"id": getattr(me, "id", None)} if me is not None else None
+        raise ValueError(f"unknown relay operation {op!r}")
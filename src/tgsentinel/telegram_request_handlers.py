@@ -97,7 +97,9 @@ class BaseRequestHandler:
                     await asyncio.sleep(1)
 
                     # Scan for requests
-                    requests = self.redis_mgr.scan_and_get_requests(request_pattern)
+                    requests = await self.redis_mgr.scan_and_get_requests_async(
+                        request_pattern
+                    )
 
                     if requests:
                         self.log.info(
@@ -4,7 +4,7 @@ Provides consistent timestamp formatting across the entire application.
 All timestamps are stored in UTC in the database using SQLite's CURRENT_TIMESTAMP format.
 """
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 
 def format_db_timestamp(dt: datetime) -> str:
@@ -41,6 +41,21 @@ def now_db_timestamp() -> str:
     return format_db_timestamp(datetime.now(timezone.utc))
 
 
+def db_cutoff(hours: float) -> str:
+    """Get the UTC timestamp ``hours`` ago in database format.
+
+    Compare it against the bare column (``created_at >= :cutoff``). Wrapping the
+    column in datetime() hides it from its index and forces a full table scan.
+
+    Args:
+        hours: How far back the window starts
+
+    Returns:
+        UTC time ``hours`` ago as 'YYYY-MM-DD HH:MM:SS'
+    """
+    return format_db_timestamp(datetime.now(timezone.utc) - timedelta(hours=hours))
+
+
 def parse_db_timestamp(timestamp_str: str) -> datetime:
     """Parse a database timestamp string to datetime.
 
@@ -0,0 +1,192 @@
+"""Per-message latency tracing through the pipeline.
+
+Ingestion stamps every payload with a trace id, the time the message was
+received and the time it was appended to the stream (``stamp_ingest``). The
+worker follows the entry with a ``MessageTrace`` and attributes the time spent
+to these stages:
+
+- ``enrichment``: event received -> appended to the stream (ingestion)
+- ``stream_wait``: appended -> read by the worker
+- ``semantic``: batch embedding and interest scoring
+- ``queue``: waiting for a processing slot (behind the same chat or others)
+- ``resolution``: rule and profile resolution, reply-to lookups
+- ``heuristics``: heuristics and keyword (alert) evaluation
+- ``persistence``: database writes, including the write-behind flush
+- ``dm_send``: alert DMs and Saved Messages
+- ``webhook``: webhook deliveries
+
+Every stage duration is observed in ``tgsentinel_pipeline_stage_seconds``;
+finished traces are kept in a capped Redis list (``TRACE_KEY``) that
+``GET /api/traces/slowest`` reads.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional
+
+from .metrics import pipeline_stage_seconds
+from .redis_operations import AnyRedis, maybe_await
+
+log = logging.getLogger(__name__)
+
+TRACE_KEY = "tgsentinel:traces"
+
+STAGES = (
+    "enrichment",
+    "stream_wait",
+    "semantic",
+    "queue",
+    "resolution",
+    "heuristics",
+    "persistence",
+    "dm_send",
+    "webhook",
+)
+
+# Payload keys written by ingestion (epoch microseconds)
+TRACE_ID = "trace_id"
+RECEIVED_US = "received_us"
+INGESTED_US = "ingested_us"
+
+
+def now_us() -> int:
+    """Wall-clock time in epoch microseconds."""
+    return time.time_ns() // 1000
+
+
+def stamp_ingest(
+    payload: MutableMapping[str, Any], received_us: Optional[int] = None
+) -> None:
+    """Give ``payload`` a trace id and its ingestion timestamps.
+
+    Call right before the XADD; ``received_us`` is when the message reached
+    ingestion (defaults to now, i.e. no enrichment time).
+    """
+    ingested = now_us()
+    received = ingested if received_us is None else min(received_us, ingested)
+    payload[TRACE_ID] = uuid.uuid4().hex[:16]
+    payload[RECEIVED_US] = received
+    payload[INGESTED_US] = ingested
+    pipeline_stage_seconds.labels(stage="enrichment").observe(
+        (ingested - received) / 1e6
+    )
+
+
+class MessageTrace:
+    """Stage timings of one stream entry, from ingestion to acknowledgement.
+
+    ``lap(stage)`` attributes the time since the previous lap (or since the
+    trace was created) to ``stage``; ``stage(name)`` times a block on its own.
+    """
+
+    def __init__(self, payload: Dict[str, Any], lane: str = "", entry_id: str = ""):
+        self.trace_id = str(payload.get(TRACE_ID) or "")
+        self.chat_id = payload.get("chat_id")
+        self.msg_id = payload.get("msg_id")
+        self.lane = lane
+        self.entry_id = entry_id
+        self.stages: Dict[str, float] = {}
+
+        self.read_us = now_us()
+        self._lap = time.perf_counter()
+        received = payload.get(RECEIVED_US)
+        ingested = payload.get(INGESTED_US)
+        self.received_us = received if isinstance(received, int) else None
+        if isinstance(ingested, int):
+            if self.received_us is not None:
+                # Observed by ingestion; only kept for the breakdown
+                self.stages["enrichment"] = max(ingested - self.received_us, 0) / 1e6
+            self.record("stream_wait", max(self.read_us - ingested, 0) / 1e6)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        pipeline_stage_seconds.labels(stage=stage).observe(seconds)
+
+    def lap(self, stage: Optional[str] = None) -> None:
+        """Attribute the time since the previous lap to ``stage`` (None: drop)."""
+        now = time.perf_counter()
+        if stage is not None:
+            self.record(stage, now - self._lap)
+        self._lap = now
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The finished trace (total time from ingestion until now)."""
+        finished = now_us()
+        start = self.received_us if self.received_us is not None else self.read_us
+        return {
+            "trace_id": self.trace_id,
+            "chat_id": self.chat_id,
+            "msg_id": self.msg_id,
+            "lane": self.lane,
+            "entry_id": self.entry_id,
+            "received_at": datetime.fromtimestamp(
+                start / 1e6, tz=timezone.utc
+            ).isoformat(),
+            "total_seconds": round(max(finished - start, 0) / 1e6, 6),
+            "stages": {
+                stage: round(self.stages[stage], 6)
+                for stage in STAGES
+                if stage in self.stages
+            },
+        }
+
+
+class TraceLog:
+    """Capped Redis list of the most recent finished traces."""
+
+    def __init__(self, r: AnyRedis, size: int = 1000):
+        self.r = r
+        self.size = size
+
+    async def record(self, trace: MessageTrace) -> None:
+        if self.size <= 0:
+            return
+        try:
+            await maybe_await(self.r.lpush(TRACE_KEY, json.dumps(trace.to_dict())))
+            await maybe_await(self.r.ltrim(TRACE_KEY, 0, self.size - 1))
+        except Exception as e:
+            log.debug("[TRACE] Could not store trace %s: %s", trace.trace_id, e)
+
+
+def create_trace_log(r: AnyRedis) -> TraceLog:
+    """Build a trace log sized by TRACE_BUFFER_SIZE (0 disables it)."""
+    try:
+        size = int(os.getenv("TRACE_BUFFER_SIZE", "1000"))
+    except ValueError as e:
+        log.warning("[TRACE] Invalid TRACE_BUFFER_SIZE, using 1000: %s", e)
+        size = 1000
+    return TraceLog(r, size)
+
+
+def slowest_traces(
+    r: Any, limit: int = 20, stage: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Slowest of the recent traces, by total time or by one stage's time."""
+    raw = r.lrange(TRACE_KEY, 0, -1) or []
+    traces = []
+    for item in raw:
+        try:
+            traces.append(json.loads(item))
+        except (TypeError, ValueError):
+            continue
+
+    def _key(trace: Dict[str, Any]) -> float:
+        if stage is None:
+            return float(trace.get("total_seconds") or 0.0)
+        return float((trace.get("stages") or {}).get(stage) or 0.0)
+
+    traces.sort(key=_key, reverse=True)
+    return traces[:limit]
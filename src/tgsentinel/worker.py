@@ -1,16 +1,22 @@
 import asyncio
 import base64
+import functools
 import io
 import json
 import logging
+import time
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, cast
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, cast
 
-from redis import Redis
+import numpy as np
+from redis.asyncio import Redis
 from telethon import TelegramClient
 
 # Phase 1: Evaluator-based architecture (replaced inline scoring)
 from .alerts_evaluator import evaluate_alert_profiles
+from .backpressure import lane_monitors
+from .catch_up import get_last_seen_index
 from .config import (
     AppCfg,
     ChannelRule,
@@ -22,16 +28,33 @@ from .config import (
 from .delivery_orchestrator import DeliveryPayload, orchestrate_delivery
 from .heuristics import run_heuristics
 from .interests_evaluator import evaluate_interest_profiles
-from .metrics import inc
+from .message_writer import MessageWriteBuffer
+from .metrics import inc, semantic_inference_duration
 from .notifier import notify_dm, notify_webhook, save_to_telegram
+from .own_messages import get_own_message_index
 from .profile_resolver import ProfileResolver
+from .redis_operations import AnyRedis, maybe_await
 from .semantic import (
+    clear_profile_cache,
+    encode_texts,
+    has_profile_vectors,
     load_profile_embeddings,
+    wait_for_model,
 )
 from .store import mark_for_alerts_feed, mark_for_interest_feed, upsert_message
+from .stream_codec import decode_fields
+from .stream_lanes import BULK_LANE, PRIORITY_LANE, lane_streams
+from .stream_reclaim import PendingReclaimer
+from .tracing import MessageTrace, TraceLog, create_trace_log
 
 log = logging.getLogger(__name__)
 
+# Touched by the UI to request a config reload (and client reconnect)
+RELOAD_MARKER = Path("/app/data/.reload_config")
+# With a worker pool, the session owner removes the marker only once it is
+# this old, after every scoring process had the chance to notice it
+RELOAD_MARKER_GRACE = 30.0
+
 StreamEntry = Tuple[str, Dict[str, str]]
 StreamResponse = List[Tuple[str, List[StreamEntry]]]
 _default_rules_cache: Dict[int, ChannelRule] = {}
@@ -82,6 +105,255 @@ def _get_default_rule(rid: int, name: str) -> ChannelRule:
     return rule
 
 
+def _encode_batch_texts(
+    texts: List[str], batch_size: int
+) -> List[Optional[np.ndarray]]:
+    """Encode the texts of a whole stream read batch with one model call.
+
+    Returns one entry per input text: the normalized embedding, or None when the
+    text is empty, no semantic profile is loaded, or encoding failed. A None
+    entry makes evaluate_interest_profiles fall back to encoding on its own.
+    """
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    if not has_profile_vectors():
+        return vectors
+
+    indices = [i for i, text in enumerate(texts) if text]
+    if not indices:
+        return vectors
+
+    started = time.perf_counter()
+    try:
+        encoded = encode_texts([texts[i] for i in indices], batch_size=batch_size)
+    except Exception as e:
+        log.warning(
+            "[WORKER] Batch encode of %d texts failed, falling back to per-message scoring: %s",
+            len(indices),
+            e,
+        )
+        return vectors
+    if encoded is None:
+        return vectors
+
+    semantic_inference_duration.observe(time.perf_counter() - started)
+    for i, vec in zip(indices, encoded):
+        vectors[i] = vec
+    log.debug(
+        "[WORKER] Batch-encoded %d texts in %.3fs",
+        len(indices),
+        time.perf_counter() - started,
+    )
+    return vectors
+
+
+class _WeightedSlots:
+    """Concurrency slots handed to priority waiters first.
+
+    After ``weight`` consecutive priority grants a waiting bulk task gets the
+    next slot, so a flood of priority work cannot starve the bulk lane.
+    """
+
+    def __init__(self, slots: int, weight: int):
+        self._free = slots
+        self._weight = weight
+        self._streak = 0
+        self._waiters: Dict[bool, Deque[asyncio.Future]] = {
+            True: deque(),
+            False: deque(),
+        }
+
+    async def acquire(self, priority: bool) -> None:
+        self._drop_cancelled()
+        if self._free > 0 and not any(self._waiters.values()):
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # the slot was granted as we were cancelled
+            raise
+
+    def release(self) -> None:
+        future = self._next_waiter()
+        if future is None:
+            self._free += 1
+        else:
+            future.set_result(None)
+
+    def _drop_cancelled(self) -> None:
+        for waiters in self._waiters.values():
+            while waiters and waiters[0].done():
+                waiters.popleft()
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        self._drop_cancelled()
+        priority, bulk = self._waiters[True], self._waiters[False]
+        if priority and (not bulk or self._streak < self._weight):
+            self._streak += 1
+            return priority.popleft()
+        if bulk:
+            self._streak = 0
+            return bulk.popleft()
+        return None
+
+
+class _ChatOrderedPipeline:
+    """Run message tasks concurrently across chats, in order within each chat.
+
+    Each submitted task first waits for the previous task of the same chat, then
+    for a concurrency slot. A slow Telegram RPC or webhook therefore only holds
+    back later messages of its own chat, not the whole stream. Priority tasks
+    are granted slots ahead of bulk ones (see ``_WeightedSlots``).
+    """
+
+    def __init__(self, concurrency: int, max_inflight: int, priority_weight: int = 4):
+        self._slots = _WeightedSlots(concurrency, priority_weight)
+        self._max_inflight = max_inflight
+        self._tails: Dict[Any, asyncio.Task] = {}
+        self._inflight: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def submit(self, key: Any, factory, priority: bool = False) -> asyncio.Task:
+        """Schedule ``factory()`` after every earlier task submitted for ``key``."""
+        task = asyncio.create_task(self._run(self._tails.get(key), factory, priority))
+        self._tails[key] = task
+        self._inflight.add(task)
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return task
+
+    async def _run(
+        self, previous: Optional[asyncio.Task], factory, priority: bool
+    ) -> None:
+        if previous is not None:
+            # Wait for completion only; the previous task's outcome is its own
+            await asyncio.wait({previous})
+        await self._slots.acquire(priority)
+        try:
+            await factory()
+        finally:
+            self._slots.release()
+
+    def _on_done(self, key: Any, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        if not task.cancelled() and task.exception() is not None:
+            log.error("[WORKER] Pipeline task failed: %s", task.exception())
+
+    def has_capacity(self, headroom: int = 0) -> bool:
+        """Whether fewer than max_inflight (+ ``headroom``) tasks are pending."""
+        return len(self._inflight) < self._max_inflight + headroom
+
+    async def wait_for_capacity(
+        self, headroom: int = 0, timeout: Optional[float] = None
+    ) -> None:
+        """Block until fewer than max_inflight (+ ``headroom``) tasks are pending.
+
+        With ``timeout``, give up after that many seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.has_capacity(headroom):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            await asyncio.wait(
+                set(self._inflight),
+                timeout=remaining,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+    async def wait_idle(self, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for every submitted task to finish."""
+        if self._inflight:
+            await asyncio.wait(set(self._inflight), timeout=timeout)
+
+    async def drain(self) -> None:
+        """Wait for every submitted task to finish."""
+        while self._inflight:
+            await asyncio.wait(set(self._inflight))
+
+
+async def _process_and_ack(
+    cfg: AppCfg,
+    client: TelegramClient,
+    engine,
+    rules: Dict[int, ChannelRule],
+    r: AnyRedis,
+    msg_id: str,
+    payload: Dict[str, Any],
+    our_user_id: Optional[int],
+    profile_resolver: Optional[ProfileResolver],
+    message_vector: Optional[np.ndarray],
+    write_buffer: Optional[MessageWriteBuffer] = None,
+    reclaimer: Optional[PendingReclaimer] = None,
+    skip_semantic: bool = False,
+    stream: Optional[str] = None,
+    trace: Optional[MessageTrace] = None,
+    trace_log: Optional[TraceLog] = None,
+) -> None:
+    """Process one stream entry and XACK it once it has been persisted.
+
+    With a write buffer, the XACK waits for the flush holding this entry's rows.
+    Failures are counted and left unacknowledged; the reclaimer retries them
+    and eventually dead-letters entries that keep failing. The finished trace
+    goes to ``trace_log``.
+    """
+    if trace is None:
+        trace = MessageTrace(payload, entry_id=msg_id)
+    trace.lap("queue")
+    try:
+        chat_id = payload.get("chat_id", "unknown")
+        msg_num = payload.get("msg_id", "unknown")
+        log.debug(
+            "[WORKER] Processing message: stream_id=%s, chat_id=%s, msg_id=%s",
+            msg_id,
+            chat_id,
+            msg_num,
+        )
+
+        important = await process_stream_message(
+            cfg,
+            client,
+            engine,
+            rules,
+            payload,
+            our_user_id,
+            profile_resolver,
+            message_vector=message_vector,
+            write_buffer=write_buffer,
+            skip_semantic=skip_semantic,
+            trace=trace,
+        )
+        if write_buffer is not None:
+            await write_buffer.barrier()
+            trace.lap("persistence")
+        await maybe_await(
+            r.xack(stream or cfg.system.redis.stream, cfg.system.redis.group, msg_id)
+        )
+        if reclaimer is not None:
+            reclaimer.forget(msg_id)
+        if trace_log is not None:
+            await trace_log.record(trace)
+        inc("processed_total", important=important)
+        log.debug(
+            "[WORKER] ✓ Message processed: chat_id=%s, msg_id=%s, important=%s",
+            chat_id,
+            msg_num,
+            important,
+        )
+    except Exception as e:
+        inc("errors_total")
+        log.exception("worker_error: %s", e)
+        # do not ack; the reclaimer retries it
+        if reclaimer is not None:
+            reclaimer.record_failure(msg_id, e)
+
+
 def get_primary_digest_schedule(
     digest_config: Optional[ProfileDigestConfig],
 ) -> str:
@@ -129,7 +401,13 @@ async def process_stream_message(
     payload: Dict[str, Any],
     our_user_id: int | None = None,
     profile_resolver: Optional[ProfileResolver] = None,
+    message_vector: Optional[np.ndarray] = None,
+    write_buffer: Optional[MessageWriteBuffer] = None,
+    skip_semantic: bool = False,
+    trace: Optional[MessageTrace] = None,
 ) -> bool:
+    if trace is None:
+        trace = MessageTrace(payload)
     rid = _to_int(payload["chat_id"])
     log.info("[WORKER] process_stream_message: chat_id=%s, checking rules...", rid)
     rule = rules.get(rid)
@@ -191,6 +469,7 @@ async def process_stream_message(
     resolved_profile = None
     if profile_resolver:
         resolved_profile = profile_resolver.resolve_for_channel(rule)
+    trace.lap("resolution")
 
     # Profile-only architecture: skip if no profiles are resolved
     if not resolved_profile or not resolved_profile.matched_profile_ids:
@@ -236,35 +515,50 @@ async def process_stream_message(
 
     # Check if this is a reply to one of our messages
     if payload.get("is_reply") and payload.get("reply_to_msg_id") and our_user_id:
-        try:
-            # Fetch the replied-to message to check if it was sent by us
-            reply_to_msg_id = _to_int(payload.get("reply_to_msg_id"))
-            replied_msg = await client.get_messages(rid, ids=reply_to_msg_id)
-
-            # Handle both single message and list response
-            if isinstance(replied_msg, list):
-                replied_msg = replied_msg[0] if replied_msg else None
-
-            if replied_msg:
-                # Check if the replied-to message was sent by us (using cached our_user_id)
-                replied_sender_id = getattr(replied_msg, "sender_id", None) or getattr(
-                    getattr(replied_msg, "sender", None), "id", None
+        reply_to_msg_id = _to_int(payload.get("reply_to_msg_id"))
+        own_messages = get_own_message_index()
+        # Answered locally from the outgoing-message index when possible
+        known = own_messages.is_ours(rid, reply_to_msg_id)
+        if known is None and getattr(client, "is_relay", False):
+            # Pool processes fork before ingestion fills the index; ask the
+            # session owner's copy before falling back to a Telegram call
+            known = await client.is_ours(rid, reply_to_msg_id)
+            if known:
+                own_messages.add(rid, reply_to_msg_id, live=False)
+        if known is not None:
+            is_reply_to_user = known
+        else:
+            try:
+                # Fetch the replied-to message to check if it was sent by us
+                replied_msg = await client.get_messages(rid, ids=reply_to_msg_id)
+
+                # Handle both single message and list response
+                if isinstance(replied_msg, list):
+                    replied_msg = replied_msg[0] if replied_msg else None
+
+                if replied_msg:
+                    # Check if the replied-to message was sent by us (using cached our_user_id)
+                    replied_sender_id = getattr(
+                        replied_msg, "sender_id", None
+                    ) or getattr(getattr(replied_msg, "sender", None), "id", None)
+
+                    if replied_sender_id == our_user_id:
+                        is_reply_to_user = True
+                        own_messages.add(rid, reply_to_msg_id, live=False)
+
+            except Exception as e:
+                log.warning(
+                    "Failed to fetch replied-to message for chat %s, msg %s: %s. "
+                    "Falling back to heuristic.",
+                    rid,
+                    msg_id,
+                    e,
                 )
-
-                if replied_sender_id == our_user_id:
+                # Fall back to simplified heuristic: in groups/channels, reply + mention often means reply to us
+                if not is_private and payload.get("mentioned"):
                     is_reply_to_user = True
 
-        except Exception as e:
-            log.warning(
-                "Failed to fetch replied-to message for chat %s, msg %s: %s. "
-                "Falling back to heuristic.",
-                rid,
-                msg_id,
-                e,
-            )
-            # Fall back to simplified heuristic: in groups/channels, reply + mention often means reply to us
-            if not is_private and payload.get("mentioned"):
-                is_reply_to_user = True
+    trace.lap("resolution")
 
     # Detect if sender is admin (would need chat member info, simplified for now)
     sender_is_admin = False  # Could be enhanced with chat.get_permissions() check
@@ -306,6 +600,7 @@ async def process_stream_message(
         prioritize_admin=prioritize_admin,
         prioritize_private=prioritize_private,
         detect_polls=detect_polls,
+        keyword_matcher=resolved_profile.keyword_matcher,
     )
 
     # ==== PHASE 1: EVALUATOR-BASED ARCHITECTURE ====
@@ -326,16 +621,23 @@ async def process_stream_message(
         resolved_profile=resolved_profile,
         cfg=cfg,
     )
-
-    # Evaluate interest profiles (semantic-based)
-    interest_result = evaluate_interest_profiles(
-        message_text=message_text_str,
-        chat_title=chat_title,
-        sender_name=sender_name,
-        sender_id=sender_id,
-        resolved_profile=resolved_profile,
-        cfg=cfg,
+    trace.lap("heuristics")
+
+    # Evaluate interest profiles (semantic-based); shed under backpressure
+    interest_result = (
+        None
+        if skip_semantic
+        else evaluate_interest_profiles(
+            message_text=message_text_str,
+            chat_title=chat_title,
+            sender_name=sender_name,
+            sender_id=sender_id,
+            resolved_profile=resolved_profile,
+            cfg=cfg,
+            message_vector=message_vector,
+        )
     )
+    trace.lap("semantic")
 
     # Combine results for storage
     keyword_score = alert_result.keyword_score
@@ -376,9 +678,18 @@ async def process_stream_message(
     if resolved_profile:
         digest_schedule = get_primary_digest_schedule(resolved_profile.digest)
 
+    # Writes go through the loop's write-behind buffer when one is provided
+    if write_buffer is not None:
+        store_upsert = write_buffer.upsert_message
+        store_mark_alerts = write_buffer.mark_for_alerts_feed
+        store_mark_interest = write_buffer.mark_for_interest_feed
+    else:
+        store_upsert = functools.partial(upsert_message, engine)
+        store_mark_alerts = functools.partial(mark_for_alerts_feed, engine)
+        store_mark_interest = functools.partial(mark_for_interest_feed, engine)
+
     # Phase 1: Store with taxonomy parameters
-    upsert_message(
-        engine,
+    store_upsert(
         rid,
         msg_id,
         hr.content_hash,
@@ -395,6 +706,7 @@ async def process_stream_message(
         semantic_scores_json=semantic_scores_json,
         semantic_type=semantic_type,
     )
+    trace.lap("persistence")
 
     # ==== PHASE 1: DELIVERY ORCHESTRATION ====
     # Use delivery_orchestrator to handle all notification logic
@@ -533,26 +845,27 @@ async def process_stream_message(
                     msg_id=None,
                     **kwargs,
                 ):
-                    return await notify_dm(
-                        client,
-                        title,
-                        text,
-                        target=target,
-                        sender_name=sender_name,
-                        score=score,
-                        profile_name=profile_name,
-                        triggers=triggers,
-                        keyword_score=keyword_score,
-                        semantic_score=semantic_score,
-                        timestamp=timestamp,
-                        message_link=message_link,
-                        reactions=reactions,
-                        is_vip=is_vip,
-                        sender_id=sender_id,
-                        profile_id=profile_id,
-                        chat_id=chat_id,
-                        msg_id=msg_id,
-                    )
+                    with trace.stage("dm_send"):
+                        return await notify_dm(
+                            client,
+                            title,
+                            text,
+                            target=target,
+                            sender_name=sender_name,
+                            score=score,
+                            profile_name=profile_name,
+                            triggers=triggers,
+                            keyword_score=keyword_score,
+                            semantic_score=semantic_score,
+                            timestamp=timestamp,
+                            message_link=message_link,
+                            reactions=reactions,
+                            is_vip=is_vip,
+                            sender_id=sender_id,
+                            profile_id=profile_id,
+                            chat_id=chat_id,
+                            msg_id=msg_id,
+                        )
 
                 @staticmethod
                 async def save_to_telegram(
@@ -576,30 +889,34 @@ async def process_stream_message(
                     msg_id=None,
                     **kwargs,
                 ):
-                    return await save_to_telegram(
-                        client,
-                        title,
-                        text,
-                        chat_title=chat_title,
-                        message_link=message_link,
-                        sender_name=sender_name,
-                        score=score,
-                        profile_name=profile_name,
-                        triggers=triggers,
-                        keyword_score=keyword_score,
-                        semantic_score=semantic_score,
-                        timestamp=timestamp,
-                        reactions=reactions,
-                        is_vip=is_vip,
-                        sender_id=sender_id,
-                        profile_id=profile_id,
-                        chat_id=chat_id,
-                        msg_id=msg_id,
-                    )
+                    with trace.stage("dm_send"):
+                        return await save_to_telegram(
+                            client,
+                            title,
+                            text,
+                            chat_title=chat_title,
+                            message_link=message_link,
+                            sender_name=sender_name,
+                            score=score,
+                            profile_name=profile_name,
+                            triggers=triggers,
+                            keyword_score=keyword_score,
+                            semantic_score=semantic_score,
+                            timestamp=timestamp,
+                            reactions=reactions,
+                            is_vip=is_vip,
+                            sender_id=sender_id,
+                            profile_id=profile_id,
+                            chat_id=chat_id,
+                            msg_id=msg_id,
+                        )
 
                 @staticmethod
                 async def notify_webhook(services, payload, db_engine=None):
-                    return await notify_webhook(services, payload, db_engine=db_engine)
+                    with trace.stage("webhook"):
+                        return await notify_webhook(
+                            services, payload, db_engine=db_engine
+                        )
 
             notifier = NotifierAdapter()
             delivery_result = await orchestrate_delivery(
@@ -619,9 +936,11 @@ async def process_stream_message(
                 f"[WORKER] Delivery orchestration failed for chat={rid}, msg={msg_id}: {delivery_exc}",
                 exc_info=True,
             )
+        # dm_send and webhook time themselves
+        trace.lap()
 
         # Mark message for Alerts Feed
-        mark_for_alerts_feed(engine, rid, msg_id)
+        store_mark_alerts(rid, msg_id)
         inc("alerts_total", chat=rid)
 
     # Orchestrate delivery for interest-only messages (not already handled by alerts)
@@ -748,26 +1067,27 @@ async def process_stream_message(
                     msg_id=None,
                     **kwargs,
                 ):
-                    await self.notifier_module.notify_dm(
-                        client=client,
-                        title=title,
-                        text=text,
-                        target=target,
-                        sender_name=sender_name,
-                        score=score,
-                        keyword_score=keyword_score,
-                        semantic_score=semantic_score,
-                        timestamp=timestamp,
-                        message_link=message_link,
-                        reactions=reactions,
-                        is_vip=is_vip,
-                        sender_id=sender_id,
-                        profile_name=profile_name,
-                        profile_id=profile_id,
-                        triggers=triggers,
-                        chat_id=chat_id,
-                        msg_id=msg_id,
-                    )
+                    with trace.stage("dm_send"):
+                        await self.notifier_module.notify_dm(
+                            client=client,
+                            title=title,
+                            text=text,
+                            target=target,
+                            sender_name=sender_name,
+                            score=score,
+                            keyword_score=keyword_score,
+                            semantic_score=semantic_score,
+                            timestamp=timestamp,
+                            message_link=message_link,
+                            reactions=reactions,
+                            is_vip=is_vip,
+                            sender_id=sender_id,
+                            profile_name=profile_name,
+                            profile_id=profile_id,
+                            triggers=triggers,
+                            chat_id=chat_id,
+                            msg_id=msg_id,
+                        )
 
                 async def save_to_telegram(
                     self,
@@ -791,26 +1111,27 @@ async def process_stream_message(
                     msg_id=None,
                     **kwargs,
                 ):
-                    await self.notifier_module.save_to_telegram(
-                        client=client,
-                        title=title,
-                        text=text,
-                        chat_title=chat_title,
-                        message_link=message_link,
-                        sender_name=sender_name,
-                        score=score,
-                        profile_name=profile_name,
-                        triggers=triggers,
-                        keyword_score=keyword_score,
-                        semantic_score=semantic_score,
-                        timestamp=timestamp,
-                        reactions=reactions,
-                        is_vip=is_vip,
-                        sender_id=sender_id,
-                        profile_id=profile_id,
-                        chat_id=chat_id,
-                        msg_id=msg_id,
-                    )
+                    with trace.stage("dm_send"):
+                        await self.notifier_module.save_to_telegram(
+                            client=client,
+                            title=title,
+                            text=text,
+                            chat_title=chat_title,
+                            message_link=message_link,
+                            sender_name=sender_name,
+                            score=score,
+                            profile_name=profile_name,
+                            triggers=triggers,
+                            keyword_score=keyword_score,
+                            semantic_score=semantic_score,
+                            timestamp=timestamp,
+                            reactions=reactions,
+                            is_vip=is_vip,
+                            sender_id=sender_id,
+                            profile_id=profile_id,
+                            chat_id=chat_id,
+                            msg_id=msg_id,
+                        )
 
             # Import the notifier module for interest delivery
             from . import notifier as notifier_module
@@ -836,32 +1157,207 @@ async def process_stream_message(
                     f"chat={rid}, msg={msg_id}: {interest_delivery_exc}",
                     exc_info=True,
                 )
+            trace.lap()
 
     # Handle interest feed marking (independent check to support "both" taxonomy)
     if interest_result and interest_result.should_include_in_feed:
-        mark_for_interest_feed(engine, rid, msg_id)
+        store_mark_interest(rid, msg_id)
         log.info(
             f"[WORKER] Message {msg_id} marked for Interest Feed: "
             f"profiles={interest_result.matched_profile_ids}, schedule={digest_schedule}"
         )
+    trace.lap("persistence")
     return important
 
 
+def marker_mtime(marker: Path) -> float:
+    """Modification time of ``marker``, or 0.0 if it does not exist."""
+    try:
+        return marker.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+async def reconnect_after_reload(client: Any, r: AnyRedis) -> Optional[int]:
+    """Reconnect the session owner's client after a config reload.
+
+    Marks an ingestion restart (messages posted while disconnected are caught
+    up) and refreshes the user info and avatar shown by the UI.
+
+    Returns:
+        Our user id after the reconnect, or None if it could not be determined
+    """
+    our_user_id: Optional[int] = None
+    # Messages posted while disconnected are caught up
+    get_last_seen_index().mark_restart()
+    try:
+        client.disconnect()
+    except Exception:
+        pass
+    try:
+        await client.connect()  # type: ignore[misc]
+        # Ensure authorization; start() will use existing session without interaction
+        try:
+            is_auth = await client.is_user_authorized()  # type: ignore[misc]
+        except Exception:
+            is_auth = False
+        if not is_auth:
+            try:
+                await client.start()  # type: ignore[misc]
+            except Exception as start_err:
+                log.warning("Client start after reload failed: %s", start_err)
+        # Refresh user info + avatar for UI
+        try:
+            me = await client.get_me()  # type: ignore[misc]
+            # Update cached our_user_id after reconnect
+            our_user_id = getattr(me, "id", None)
+            if our_user_id:
+                log.debug("Refreshed our_user_id after reconnect: %s", our_user_id)
+            else:
+                log.warning("Could not determine our_user_id after reconnect")
+            # Download user avatar if available and store in Redis
+            avatar_url = "/static/images/logo.png"
+            try:
+                photos = await client.get_profile_photos("me", limit=1)  # type: ignore[misc]
+                if photos:
+                    # Download avatar to memory instead of disk
+                    avatar_bytes = io.BytesIO()
+                    try:
+                        await client.download_profile_photo(
+                            "me", file=avatar_bytes
+                        )  # type: ignore[misc]
+                        avatar_bytes.seek(0)
+                        avatar_data = avatar_bytes.read()
+                        if not avatar_data:
+                            log.debug("Avatar download returned empty data")
+                        elif our_user_id and r:
+                            avatar_b64 = base64.b64encode(avatar_data).decode("utf-8")
+
+                            # Store in Redis with user_id key
+                            redis_key = f"tgsentinel:user_avatar:{our_user_id}"
+                            await maybe_await(
+                                r.set(redis_key, avatar_b64, ex=3600)
+                            )  # 1 hour TTL
+                            avatar_url = f"/api/avatar/user/{our_user_id}"
+                            log.info(f"Stored user avatar in Redis: {redis_key}")
+                    except Exception as avatar_dl_err:
+                        log.debug("Could not download user avatar: %s", avatar_dl_err)
+            except Exception as avatar_err:
+                log.debug("Could not refresh user avatar: %s", avatar_err)
+            ui = {
+                "username": getattr(me, "username", None)
+                or getattr(me, "first_name", "Unknown"),
+                "first_name": getattr(me, "first_name", ""),
+                "last_name": getattr(me, "last_name", ""),
+                "phone": getattr(me, "phone", ""),
+                "user_id": getattr(me, "id", None),
+                "avatar": avatar_url,
+            }
+            await maybe_await(r.set("tgsentinel:user_info", json.dumps(ui)))
+        except Exception as me_err:
+            log.debug("Could not refresh user info after reload: %s", me_err)
+    except Exception as conn_err:
+        log.error("Client reconnect after reload failed: %s", conn_err)
+    return our_user_id
+
+
+def load_semantic_profiles(cfg: AppCfg) -> None:
+    """Load centroids for the enabled semantic (interest) profiles."""
+    for profile_id, profile in cfg.global_profiles.items():
+        if not profile.enabled:
+            continue
+
+        # Check if this is a semantic profile (has positive_samples)
+        if hasattr(profile, "positive_samples") and profile.positive_samples:
+            threshold = getattr(profile, "threshold", 0.4)
+            negative_samples = getattr(profile, "negative_samples", [])
+
+            log.info(
+                "[WORKER] Loading semantic profile %s (%s) with threshold=%.2f",
+                profile_id,
+                profile.name,
+                threshold,
+            )
+            load_profile_embeddings(
+                profile_id,
+                profile.positive_samples,
+                negative_samples,
+                threshold,
+                getattr(profile, "positive_weight", 1.0),
+                getattr(profile, "negative_weight", 0.15),
+                scoring_mode=getattr(profile, "scoring_mode", "centroid"),
+                knn_k=getattr(profile, "knn_k", 3),
+            )
+
+
 async def process_loop(
     cfg: AppCfg,
     client: TelegramClient,
     engine,
     handshake_gate: Optional[asyncio.Event] = None,
+    redis_client: Optional[AnyRedis] = None,
 ):
     log.info("[WORKER] process_loop started - entering main message processing loop")
-    r = Redis(
-        host=cfg.system.redis.host,
-        port=cfg.system.redis.port,
-        decode_responses=True,
+    r: AnyRedis = (
+        redis_client
+        if redis_client is not None
+        else Redis(
+            host=cfg.system.redis.host,
+            port=cfg.system.redis.port,
+            decode_responses=True,
+        )
     )
     stream = cfg.system.redis.stream
     group = cfg.system.redis.group
     consumer = cfg.system.redis.consumer
+    read_count = cfg.system.worker.read_count
+    read_block_ms = cfg.system.worker.read_block_ms
+    batch_window_ms = cfg.system.worker.batch_window_ms
+    encode_batch_size = cfg.system.worker.encode_batch_size
+    priority_weight = cfg.system.worker.priority_weight
+    max_inflight = cfg.system.worker.max_inflight
+    pipeline = _ChatOrderedPipeline(
+        cfg.system.worker.concurrency,
+        max_inflight,
+        priority_weight=priority_weight,
+    )
+    # Stream of each lane, and the lane of each stream name in XREADGROUP replies
+    streams = lane_streams(stream)
+    lane_of = {name: lane for lane, name in streams.items()}
+    write_buffer = MessageWriteBuffer(
+        engine,
+        max_batch=cfg.system.worker.write_batch_size,
+        flush_interval_ms=cfg.system.worker.write_flush_ms,
+    )
+    trace_log = create_trace_log(r)
+    reclaim_interval = cfg.system.worker.reclaim_interval_ms / 1000.0
+    reclaimers: Dict[str, PendingReclaimer] = (
+        {
+            lane: PendingReclaimer(
+                r,
+                lane_stream,
+                group,
+                consumer,
+                min_idle_ms=cfg.system.worker.reclaim_min_idle_ms,
+                max_deliveries=cfg.system.worker.max_deliveries,
+                count=read_count,
+            )
+            for lane, lane_stream in streams.items()
+        }
+        if reclaim_interval > 0
+        else {}
+    )
+    # Stream ids (per lane) handed to the pipeline and not finished yet
+    inflight_ids: Dict[str, Set[str]] = {lane: set() for lane in streams}
+    backpressure_interval = cfg.system.worker.backpressure_interval_ms / 1000.0
+    # In the worker pool the session owner trims; pool processes only shed
+    monitors = lane_monitors(
+        r,
+        cfg.system.redis,
+        cfg.system.worker,
+        trim=not getattr(client, "is_relay", False),
+    )
+    backpressure = monitors[BULK_LANE]
 
     log.info(
         "[WORKER] Redis config: stream=%s, group=%s, consumer=%s",
@@ -889,73 +1385,58 @@ async def process_loop(
 
     # Verify consumer group exists (should be created in main.py startup)
     # This is a fallback check - the group should already exist from startup
-    try:
-        r.xgroup_create(stream, group, id="$", mkstream=True)
-        log.info(
-            "[WORKER] Created consumer group '%s' for stream '%s' (first worker startup)",
-            group,
-            stream,
-        )
-    except Exception as e:
-        error_msg = str(e)
-        if "BUSYGROUP" in error_msg or "already exists" in error_msg.lower():
-            log.debug(
-                "[WORKER] Consumer group '%s' already exists (expected from main.py initialization)",
-                group,
-            )
-        elif "NOGROUP" in error_msg:
-            log.error(
-                "[WORKER] Consumer group missing and creation failed. "
-                "This indicates Redis stream initialization in main.py failed or was skipped. "
-                "Error: %s",
-                e,
-                exc_info=True,
+    for lane_stream in streams.values():
+        try:
+            await maybe_await(
+                r.xgroup_create(lane_stream, group, id="$", mkstream=True)
             )
-            raise
-        else:
-            log.error(
-                "[WORKER] Unexpected error creating consumer group: %s",
-                e,
-                exc_info=True,
+            log.info(
+                "[WORKER] Created consumer group '%s' for stream '%s' (first worker startup)",
+                group,
+                lane_stream,
             )
-            raise
+        except Exception as e:
+            error_msg = str(e)
+            if "BUSYGROUP" in error_msg or "already exists" in error_msg.lower():
+                log.debug(
+                    "[WORKER] Consumer group '%s' already exists (expected from main.py initialization)",
+                    group,
+                )
+            elif "NOGROUP" in error_msg:
+                log.error(
+                    "[WORKER] Consumer group missing and creation failed. "
+                    "This indicates Redis stream initialization in main.py failed or was skipped. "
+                    "Error: %s",
+                    e,
+                    exc_info=True,
+                )
+                raise
+            else:
+                log.error(
+                    "[WORKER] Unexpected error creating consumer group: %s",
+                    e,
+                    exc_info=True,
+                )
+                raise
 
     log.info("[WORKER] Loading rules for %d channels", len(cfg.channels))
     rules = load_rules(cfg)
 
     # Initialize ProfileResolver with global profiles (two-layer architecture)
     profile_resolver = (
-        ProfileResolver(cfg.global_profiles) if cfg.global_profiles else None
+        ProfileResolver(cfg.global_profiles, cfg.channels)
+        if cfg.global_profiles
+        else None
     )
     if profile_resolver:
         log.info(
             f"ProfileResolver initialized with {len(cfg.global_profiles)} global profiles"
         )
-
-        # Load semantic embeddings for interest profiles (IDs 3000-3999)
-        for profile_id, profile in cfg.global_profiles.items():
-            if not profile.enabled:
-                continue
-
-            # Check if this is a semantic profile (has positive_samples)
-            if hasattr(profile, "positive_samples") and profile.positive_samples:
-                threshold = getattr(profile, "threshold", 0.4)
-                negative_samples = getattr(profile, "negative_samples", [])
-
-                log.info(
-                    "[WORKER] Loading semantic profile %s (%s) with threshold=%.2f",
-                    profile_id,
-                    profile.name,
-                    threshold,
-                )
-                load_profile_embeddings(
-                    profile_id,
-                    profile.positive_samples,
-                    negative_samples,
-                    threshold,
-                    getattr(profile, "positive_weight", 1.0),
-                    getattr(profile, "negative_weight", 0.15),
-                )
+        # Pool processes inherit the centroids loaded before the fork
+        if not has_profile_vectors():
+            if await asyncio.to_thread(wait_for_model):
+                log.info("[WORKER] ✓ Semantic embeddings model loaded and ready")
+            load_semantic_profiles(cfg)
     else:
         log.warning(
             "[WORKER] ProfileResolver not initialized - no global profiles found. "
@@ -974,9 +1455,148 @@ async def process_loop(
     except Exception as e:
         log.warning("Failed to fetch our user ID at startup: %s", e)
 
-    reload_marker = Path("/app/data/.reload_config")
+    async def _dispatch(lane: str, entries: List[StreamEntry]) -> None:
+        """Decode, embed and submit one lane's stream entries to the pipeline."""
+        if not entries:
+            return
+        lane_stream = streams[lane]
+        reclaimer = reclaimers.get(lane)
+        lane_inflight = inflight_ids[lane]
+        priority = lane == PRIORITY_LANE
+
+        # Decode the whole batch first so all texts can be embedded in one call
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        for msg_id, fields in entries:
+            try:
+                batch.append((msg_id, decode_fields(fields)))
+            except Exception as e:
+                inc("errors_total")
+                log.exception("worker_error: could not decode %s: %s", msg_id, e)
+                # do not ack; the reclaimer retries and then dead-letters it
+                if reclaimer is not None:
+                    reclaimer.record_failure(msg_id, e)
+
+        # Under backpressure: drop repeats, score low-priority chats without
+        # the semantic stage (and without embedding them). The priority lane
+        # is never shed.
+        coalesced = set()
+        if not priority:
+            coalesced = {
+                msg_id
+                for msg_id, payload in batch
+                if backpressure.coalesce(payload, rules)
+            }
+        if coalesced:
+            batch = [entry for entry in batch if entry[0] not in coalesced]
+            await maybe_await(r.xack(lane_stream, group, *coalesced))
+        skip = [
+            not priority and backpressure.skip_semantic(payload, rules)
+            for _, payload in batch
+        ]
+
+        traces = [MessageTrace(payload, lane, msg_id) for msg_id, payload in batch]
+
+        texts = [
+            "" if skipped else str(payload.get("text") or "")
+            for (_, payload), skipped in zip(batch, skip)
+        ]
+        vectors = await asyncio.to_thread(_encode_batch_texts, texts, encode_batch_size)
+        for trace in traces:
+            trace.lap("semantic")
+
+        for (msg_id, payload), message_vector, skip_semantic, trace in zip(
+            batch, vectors, skip, traces
+        ):
+            lane_inflight.add(msg_id)
+            task = pipeline.submit(
+                payload.get("chat_id"),
+                functools.partial(
+                    _process_and_ack,
+                    cfg,
+                    client,
+                    engine,
+                    rules,
+                    r,
+                    msg_id,
+                    payload,
+                    our_user_id,
+                    profile_resolver,
+                    message_vector,
+                    write_buffer,
+                    reclaimer,
+                    skip_semantic,
+                    lane_stream,
+                    trace,
+                    trace_log,
+                ),
+                priority=priority,
+            )
+            task.add_done_callback(
+                lambda _t, mid=msg_id, ids=lane_inflight: ids.discard(mid)
+            )
+
+    async def _read(
+        lane_counts: Dict[str, int], block_ms: Optional[int] = None
+    ) -> Dict[str, List[StreamEntry]]:
+        """XREADGROUP up to ``count`` new entries from each given lane."""
+        read: Dict[str, List[StreamEntry]] = {lane: [] for lane in streams}
+        for lane, count in lane_counts.items():
+            if count <= 0:
+                continue
+            resp = cast(
+                StreamResponse,
+                await maybe_await(
+                    r.xreadgroup(
+                        group,
+                        consumer,
+                        streams={streams[lane]: ">"},
+                        count=count,
+                        block=block_ms,
+                    )
+                ),
+            )
+            for name, messages in resp or []:
+                read[lane_of.get(name, BULK_LANE)].extend(messages)
+        return read
+
+    async def _read_lanes() -> Dict[str, List[StreamEntry]]:
+        """Read new entries from both lanes with weighted fair scheduling.
+
+        The priority lane gets ``priority_weight`` shares of each read and the
+        bulk lane one; a share a lane leaves unused goes to the other lane.
+        While the pipeline is full of bulk work only the priority lane is
+        read (up to ``max_inflight`` more entries).
+        """
+        bulk_room = pipeline.has_capacity()
+        if not bulk_room:
+            return await _read({PRIORITY_LANE: read_count})
+
+        weighted = read_count * priority_weight // (priority_weight + 1)
+        priority_share = max(1, min(read_count - 1, weighted))
+        read = await _read({PRIORITY_LANE: priority_share})
+        got_priority = sum(len(entries) for entries in read.values())
+        bulk = await _read({BULK_LANE: read_count - got_priority})
+        got_bulk = sum(len(entries) for entries in bulk.values())
+        spare = read_count - got_priority - got_bulk
+        extra = (
+            await _read({PRIORITY_LANE: spare})
+            if got_priority == priority_share and spare > 0
+            else {}
+        )
+        for part in (bulk, extra):
+            for lane, entries in part.items():
+                read[lane].extend(entries)
+        return read
+
+    reload_marker = RELOAD_MARKER
+    # Pool processes share the marker: each one reloads once per touch and
+    # leaves removing it to the session owner
+    shared_marker = getattr(client, "is_relay", False)
+    reload_seen = marker_mtime(reload_marker) if shared_marker else 0.0
     last_cfg_check = 0
     cfg_check_interval = 5  # Check every 5 seconds
+    last_reclaim = 0.0
+    last_backpressure = 0.0
 
     log.info(
         "[WORKER] Entering infinite message processing loop (stream=%s, group=%s, consumer=%s)",
@@ -998,119 +1618,38 @@ async def process_loop(
         current_time = asyncio.get_event_loop().time()
         if current_time - last_cfg_check > cfg_check_interval:
             last_cfg_check = current_time
-            if reload_marker.exists():
+            touched_at = marker_mtime(reload_marker)
+            if touched_at and touched_at > reload_seen:
+                if shared_marker:
+                    reload_seen = touched_at
+                # Let in-flight messages finish with the old config and client
+                await pipeline.drain()
                 try:
                     log.info("Config reload requested, reloading configuration...")
                     new_cfg = load_config()
-                    cfg = new_cfg
-                    rules = load_rules(cfg)
-                    _default_rules_cache.clear()
-                    # Reinitialize ProfileResolver with new global profiles
-                    profile_resolver = (
-                        ProfileResolver(cfg.global_profiles)
-                        if cfg.global_profiles
+                    # Build rules and resolver (profile index + empty resolution
+                    # cache) before swapping them in together
+                    new_rules = load_rules(new_cfg)
+                    new_resolver = (
+                        ProfileResolver(new_cfg.global_profiles, new_cfg.channels)
+                        if new_cfg.global_profiles
                         else None
                     )
+                    cfg, rules, profile_resolver = new_cfg, new_rules, new_resolver
+                    _default_rules_cache.clear()
+                    # Edited profiles are re-encoded; unchanged ones come from
+                    # the centroid store
+                    clear_profile_cache()
+                    await asyncio.to_thread(load_semantic_profiles, cfg)
                     if profile_resolver:
                         log.info(
                             f"ProfileResolver reinitialized with {len(cfg.global_profiles)} global profiles"
                         )
                     # Reconnect Telegram client to pick up a newly authenticated session
-                    try:
-                        client.disconnect()
-                    except Exception:
-                        pass
-                    try:
-                        await client.connect()  # type: ignore[misc]
-                        # Ensure authorization; start() will use existing session without interaction
-                        try:
-                            is_auth = await client.is_user_authorized()  # type: ignore[misc]
-                        except Exception:
-                            is_auth = False
-                        if not is_auth:
-                            try:
-                                await client.start()  # type: ignore[misc]
-                            except Exception as start_err:
-                                log.warning(
-                                    "Client start after reload failed: %s", start_err
-                                )
-                        # Refresh user info + avatar for UI
-                        try:
-                            me = await client.get_me()  # type: ignore[misc]
-                            # Update cached our_user_id after reconnect
-                            our_user_id = getattr(me, "id", None)
-                            if our_user_id:
-                                log.debug(
-                                    "Refreshed our_user_id after reconnect: %s",
-                                    our_user_id,
-                                )
-                            else:
-                                log.warning(
-                                    "Could not determine our_user_id after reconnect"
-                                )
-                            # Download user avatar if available and store in Redis
-                            avatar_url = "/static/images/logo.png"
-                            try:
-                                photos = await client.get_profile_photos("me", limit=1)  # type: ignore[misc]
-                                if photos:
-                                    # Download avatar to memory instead of disk
-                                    avatar_bytes = io.BytesIO()
-                                    try:
-                                        await client.download_profile_photo(
-                                            "me", file=avatar_bytes
-                                        )  # type: ignore[misc]
-                                        avatar_bytes.seek(0)
-                                        avatar_data = avatar_bytes.read()
-                                        if not avatar_data:
-                                            log.debug(
-                                                "Avatar download returned empty data"
-                                            )
-                                            continue
-
-                                        avatar_b64 = base64.b64encode(
-                                            avatar_data
-                                        ).decode("utf-8")
-
-                                        # Store in Redis with user_id key
-                                        if our_user_id and r:
-                                            redis_key = (
-                                                f"tgsentinel:user_avatar:{our_user_id}"
-                                            )
-                                            r.set(
-                                                redis_key, avatar_b64, ex=3600
-                                            )  # 1 hour TTL
-                                            avatar_url = (
-                                                f"/api/avatar/user/{our_user_id}"
-                                            )
-                                            log.info(
-                                                f"Stored user avatar in Redis: {redis_key}"
-                                            )
-                                    except Exception as avatar_dl_err:
-                                        log.debug(
-                                            "Could not download user avatar: %s",
-                                            avatar_dl_err,
-                                        )
-                            except Exception as avatar_err:
-                                log.debug(
-                                    "Could not refresh user avatar: %s", avatar_err
-                                )
-                            ui = {
-                                "username": getattr(me, "username", None)
-                                or getattr(me, "first_name", "Unknown"),
-                                "first_name": getattr(me, "first_name", ""),
-                                "last_name": getattr(me, "last_name", ""),
-                                "phone": getattr(me, "phone", ""),
-                                "user_id": getattr(me, "id", None),
-                                "avatar": avatar_url,
-                            }
-                            r.set("tgsentinel:user_info", json.dumps(ui))
-                        except Exception as me_err:
-                            log.debug(
-                                "Could not refresh user info after reload: %s", me_err
-                            )
-                    except Exception as conn_err:
-                        log.error("Client reconnect after reload failed: %s", conn_err)
-                    reload_marker.unlink()
+                    # (pool processes only hold a relay; the session owner reconnects)
+                    if not shared_marker:
+                        our_user_id = await reconnect_after_reload(client, r)
+                        reload_marker.unlink()
                     log.info(
                         "Configuration reloaded successfully with %d channels",
                         len(cfg.channels),
@@ -1120,56 +1659,97 @@ async def process_loop(
                 except Exception as reload_exc:
                     log.error("Failed to reload configuration: %s", reload_exc)
                     # Remove marker even on failure to prevent infinite retry
-                    try:
-                        reload_marker.unlink()
-                    except Exception:
-                        pass
+                    if not shared_marker:
+                        try:
+                            reload_marker.unlink()
+                        except Exception:
+                            pass
 
-        resp = cast(
-            StreamResponse,
-            r.xreadgroup(group, consumer, streams={stream: ">"}, count=50, block=5000),
-        )
-        if not resp:
+        # Stop reading while too many messages are unacknowledged; bulk work
+        # alone fills max_inflight, priority entries may use as much again
+        await pipeline.wait_for_capacity(headroom=max_inflight)
+
+        # Retry entries left pending by failures (here or in dead consumers)
+        if reclaimers and current_time - last_reclaim >= reclaim_interval:
+            last_reclaim = current_time
+            for lane, reclaimer in reclaimers.items():
+                try:
+                    reclaimed = await reclaimer.reclaim(skip=inflight_ids[lane])
+                except Exception as e:
+                    log.warning("[WORKER] Pending-entry reclaim failed: %s", e)
+                    reclaimed = []
+                if reclaimed:
+                    log.info(
+                        "[WORKER] Retrying %d reclaimed %s entries",
+                        len(reclaimed),
+                        lane,
+                    )
+                    await _dispatch(lane, reclaimed)
+
+        # Measure consumer lag and adjust load shedding (and trim if needed)
+        if current_time - last_backpressure >= backpressure_interval:
+            last_backpressure = current_time
+            for monitor in monitors.values():
+                try:
+                    await monitor.refresh()
+                except Exception as e:
+                    log.debug("[WORKER] Could not measure stream lag: %s", e)
+
+        read = await _read_lanes()
+        if not any(read.values()):
+            if pipeline.has_capacity():
+                # Both lanes are empty: block on both until something arrives.
+                # Awaiting the read keeps the event loop (and in-flight
+                # messages) running.
+                resp = cast(
+                    StreamResponse,
+                    await maybe_await(
+                        r.xreadgroup(
+                            group,
+                            consumer,
+                            streams={name: ">" for name in streams.values()},
+                            count=read_count,
+                            block=read_block_ms,
+                        )
+                    ),
+                )
+                for name, messages in resp or []:
+                    read[lane_of.get(name, BULK_LANE)].extend(messages)
+            else:
+                # Bulk lane waits for slots; keep polling the priority lane
+                await pipeline.wait_for_capacity(timeout=0.1)
+                continue
+        if not any(read.values()):
             if loop_iteration % 100 == 1:
                 log.debug("[WORKER] No new messages in stream, sleeping briefly...")
-            await asyncio.sleep(0.1)
+            if len(pipeline):
+                # Spend the idle pause letting in-flight messages complete
+                await pipeline.wait_idle(timeout=0.1)
+            else:
+                await asyncio.sleep(0.1)
             continue
 
+        # Optionally keep reading the bulk lane for a short window so bursts
+        # are encoded together instead of in many small batches
+        bulk = read[BULK_LANE]
+        if batch_window_ms > 0 and bulk and len(bulk) < read_count:
+            deadline = time.monotonic() + batch_window_ms / 1000.0
+            while len(bulk) < read_count:
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    break
+                more = await _read({BULK_LANE: read_count - len(bulk)}, remaining_ms)
+                if not any(more.values()):
+                    break
+                for lane, entries in more.items():
+                    read[lane].extend(entries)
+
         log.info(
-            "[WORKER] Received %d messages from stream, processing...",
-            sum(len(msgs) for _, msgs in resp),
+            "[WORKER] Received %d priority and %d bulk messages, processing...",
+            len(read[PRIORITY_LANE]),
+            len(read[BULK_LANE]),
         )
-        for _, messages in resp:
-            for msg_id, fields in messages:
-                try:
-                    payload = json.loads(fields["json"])
-                    chat_id = payload.get("chat_id", "unknown")
-                    msg_num = payload.get("msg_id", "unknown")
-                    log.debug(
-                        "[WORKER] Processing message: stream_id=%s, chat_id=%s, msg_id=%s",
-                        msg_id,
-                        chat_id,
-                        msg_num,
-                    )
-
-                    important = await process_stream_message(
-                        cfg,
-                        client,
-                        engine,
-                        rules,
-                        payload,
-                        our_user_id,
-                        profile_resolver,
-                    )
-                    r.xack(stream, group, msg_id)
-                    inc("processed_total", important=important)
-                    log.debug(
-                        "[WORKER] ✓ Message processed: chat_id=%s, msg_id=%s, important=%s",
-                        chat_id,
-                        msg_num,
-                        important,
-                    )
-                except Exception as e:
-                    inc("errors_total")
-                    log.exception("worker_error: %s", e)
-                    # do not ack; will be retried
+        # Priority entries are submitted first so they take free slots first
+        for lane in (PRIORITY_LANE, BULK_LANE):
+            if read[lane]:
+                await _dispatch(lane, read[lane])
@@ -7,18 +7,22 @@ Coordinates digest generation, metrics logging, and status updates.
 
 import asyncio
 import logging
+import time
 from datetime import datetime
 from typing import Any, Callable, Optional
 
 from telethon import TelegramClient
 
-from .config import AppCfg
+from .backpressure import lane_monitors
+from .catch_up import catch_up_enabled, create_catch_up_engine, get_last_seen_index
+from .config import AppCfg, load_config
 from .digest_scheduler import DigestScheduler
 from .digest_worker import UnifiedDigestWorker
 from .dm_poller import start_dm_poller
 from .metrics import dump
 from .redis_operations import RedisManager
 from .store import cleanup_old_messages, vacuum_database
+from .telegram_relay import TelegramRelayServer
 from .telegram_request_handlers import (
     ParticipantInfoHandler,
     TelegramChatsHandler,
@@ -26,10 +30,20 @@ from .telegram_request_handlers import (
     TelegramTestMessageHandler,
     TelegramUsersHandler,
 )
-from .worker import process_loop
+from .worker import (
+    RELOAD_MARKER,
+    RELOAD_MARKER_GRACE,
+    marker_mtime,
+    process_loop,
+    reconnect_after_reload,
+)
+from .worker_pool import ScoringWorkerPool
 
 log = logging.getLogger(__name__)
 
+# Seconds between checks of the config reload marker (as in process_loop)
+RELOAD_CHECK_INTERVAL = 5.0
+
 
 class WorkerOrchestrator:
     """Orchestrates all background workers and handlers."""
@@ -47,6 +61,7 @@ class WorkerOrchestrator:
         dialogs_handler: TelegramDialogsHandler,
         users_handler: TelegramUsersHandler,
         test_message_handler: Optional[TelegramTestMessageHandler] = None,
+        worker_pool: Optional[ScoringWorkerPool] = None,
     ):
         """
         Initialize worker orchestrator.
@@ -63,6 +78,7 @@ class WorkerOrchestrator:
             dialogs_handler: Handler for dialogs requests
             users_handler: Handler for users requests
             test_message_handler: Handler for test message send requests (optional)
+            worker_pool: Forked scoring processes consuming the stream (optional)
         """
         self.cfg = cfg
         self.client_ref = client_ref
@@ -75,6 +91,7 @@ class WorkerOrchestrator:
         self.dialogs_handler = dialogs_handler
         self.users_handler = users_handler
         self.test_message_handler = test_message_handler
+        self.worker_pool = worker_pool
 
         # Initialize digest scheduler and unified worker
         self.digest_scheduler = DigestScheduler(cfg, redis_manager=redis_manager)
@@ -84,13 +101,19 @@ class WorkerOrchestrator:
 
     async def worker(self) -> None:
         """Main message processing worker."""
+        if self.worker_pool is not None:
+            await self._serve_worker_pool()
         log.info("[WORKER-ORCHESTRATOR] worker() called - getting client reference")
         # Get current client dynamically (handles session imports)
         current_client = self.client_ref()
         log.info("[WORKER-ORCHESTRATOR] Client obtained, starting process_loop")
         try:
             await process_loop(
-                self.cfg, current_client, self.engine, self.handshake_gate
+                self.cfg,
+                current_client,
+                self.engine,
+                self.handshake_gate,
+                redis_client=self.redis_mgr.async_redis,
             )
         except Exception as e:
             log.error(
@@ -104,6 +127,81 @@ class WorkerOrchestrator:
                 "[WORKER-ORCHESTRATOR] process_loop exited (this should never happen in normal operation)"
             )
 
+    async def _serve_worker_pool(self) -> None:
+        """Relay Telegram calls for the scoring processes while any is alive.
+
+        Returns once every scoring process has exited; ``worker()`` then
+        falls back to processing the stream in this process.
+        """
+        pool = self.worker_pool
+        log.info(
+            "[WORKER-ORCHESTRATOR] Stream processed by %d scoring processes",
+            pool.alive,
+        )
+        relay = TelegramRelayServer(
+            self.client_ref, self.redis_mgr.async_redis, self.handshake_gate
+        )
+        # The pool processes only shed load; trimming stays with this process
+        worker_cfg = self.cfg.system.worker
+        monitors = lane_monitors(
+            self.redis_mgr.async_redis, self.cfg.system.redis, worker_cfg
+        )
+        interval = worker_cfg.backpressure_interval_ms / 1000.0
+        side_tasks = [
+            asyncio.create_task(relay.run()),
+            asyncio.create_task(self._watch_reload_marker()),
+        ] + [
+            asyncio.create_task(monitor.run(interval)) for monitor in monitors.values()
+        ]
+        try:
+            await pool.supervise()
+        finally:
+            for task in side_tasks:
+                task.cancel()
+            pool.stop()
+        log.error(
+            "[WORKER-ORCHESTRATOR] Worker pool is gone, processing the stream in-process"
+        )
+        from .semantic import reopen_embedding_cache
+
+        reopen_embedding_cache()
+
+    async def _watch_reload_marker(self) -> None:
+        """Reload the config and reconnect the client when the UI asks to.
+
+        Stands in for ``process_loop``'s reload while the scoring processes
+        consume the stream. They reload their own config from the same
+        marker, so it is removed only ``RELOAD_MARKER_GRACE`` seconds after
+        its last touch.
+        """
+        # A marker left from before startup needs no reload, only removal
+        handled = marker_mtime(RELOAD_MARKER)
+        while True:
+            await asyncio.sleep(RELOAD_CHECK_INTERVAL)
+            touched_at = marker_mtime(RELOAD_MARKER)
+            if not touched_at:
+                continue
+            if touched_at > handled:
+                handled = touched_at
+                log.info("[WORKER-ORCHESTRATOR] Config reload requested")
+                try:
+                    self.cfg = load_config()
+                except Exception as e:
+                    log.error("[WORKER-ORCHESTRATOR] Failed to reload config: %s", e)
+                    continue
+                await reconnect_after_reload(
+                    self.client_ref(), self.redis_mgr.async_redis
+                )
+                log.info(
+                    "[WORKER-ORCHESTRATOR] Configuration reloaded with %d channels",
+                    len(self.cfg.channels),
+                )
+            elif time.time() - touched_at >= RELOAD_MARKER_GRACE:
+                try:
+                    RELOAD_MARKER.unlink()
+                except OSError:
+                    pass
+
     async def _noop_handler(self) -> None:
         """No-op handler placeholder for optional handlers that aren't configured."""
         log.debug(
@@ -236,7 +334,7 @@ class WorkerOrchestrator:
             await start_dm_poller(
                 self.cfg,
                 self.client_ref,
-                self.redis_mgr.redis,  # Fixed: use redis attribute, not client
+                self.redis_mgr.async_redis,
                 self.authorized_check,
                 poll_interval=poll_interval,
             )
@@ -245,6 +343,27 @@ class WorkerOrchestrator:
                 "[DM-POLLER-WORKER] Failed to start DM poller: %s", e, exc_info=True
             )
 
+    async def catch_up_worker(self) -> None:
+        """Fetch messages posted while ingestion was not listening.
+
+        Ingestion marks every (re)start in the last seen index; each mark is
+        caught up once the session is authorized.
+        """
+        if not catch_up_enabled():
+            log.info("[CATCH-UP-WORKER] Catch-up disabled (CATCH_UP_ENABLED=false)")
+            return
+        index = get_last_seen_index()
+        while True:
+            if index.pending and self.authorized_check():
+                try:
+                    engine = create_catch_up_engine(
+                        self.cfg, self.client_ref(), self.redis_mgr.async_redis
+                    )
+                    await engine.run()
+                except Exception as e:
+                    log.error("[CATCH-UP-WORKER] Catch-up failed: %s", e, exc_info=True)
+            await asyncio.sleep(5)
+
     async def run_all_workers(
         self,
         session_persistence_handler_func: Callable[..., Any],
@@ -264,6 +383,7 @@ class WorkerOrchestrator:
             "worker_status_refresher",
             "database_cleanup_worker",
             "dm_poller_worker",  # Periodic DM polling for monitored users
+            "catch_up_worker",  # Messages missed while ingestion was down
             "participant_info_handler",
             "telegram_chats_handler",
             "telegram_dialogs_handler",
@@ -287,6 +407,7 @@ class WorkerOrchestrator:
             self.worker_status_refresher(),
             self.database_cleanup_worker(),
             self.dm_poller_worker(),  # Periodic DM polling
+            self.catch_up_worker(),
             self.participant_handler.run(),
             self.chats_handler.run(),
             self.dialogs_handler.run(),
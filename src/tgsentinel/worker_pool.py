@@ -0,0 +1,194 @@
+"""Pre-fork pool of scoring processes for the message stream.
+
+Scoring (embedding + heuristics + evaluators) is CPU-bound and a single
+``process_loop`` shares one GIL with Telethon. With ``WORKER_PROCESSES`` > 1
+the sentinel loads the embedding model and the profile centroids once, then
+forks that many scoring processes before the main event loop starts, so the
+model weights are shared copy-on-write.
+
+Each child joins the existing consumer group (``cfg.system.redis.group``)
+under its own consumer name (``<consumer>-p<n>``) and runs ``process_loop``
+with a ``TelegramRelayClient``: Telegram calls are executed by the main
+process, which owns the session (see ``telegram_relay``). The main process no
+longer consumes the stream itself while at least one child is alive; entries
+left pending by a child that died are picked up by the other consumers'
+pending-entry reclaim.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import signal
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+from .config import AppCfg, load_config
+from .logging_setup import setup_logging
+
+log = logging.getLogger(__name__)
+
+
+class ScoringWorkerPool:
+    """Forks and tracks the scoring processes (the parent side of the pool)."""
+
+    def __init__(self, cfg: AppCfg, processes: int):
+        self.cfg = cfg
+        self.processes = max(1, int(processes))
+        self.children: Dict[int, int] = {}  # pid -> worker index
+
+    @property
+    def alive(self) -> int:
+        return len(self.children)
+
+    def spawn(self) -> None:
+        """Fork all children. Must run before any event loop or thread starts."""
+        # Keep objects created so far out of the GC's reach so collections in
+        # the children do not touch (and copy) the shared pages
+        gc.collect()
+        gc.freeze()
+        for index in range(self.processes):
+            pid = os.fork()
+            if pid == 0:
+                _run_child(self.cfg, index, self.processes)  # never returns
+            self.children[pid] = index
+            log.info("[WORKER-POOL] Started scoring process %d (pid %d)", index, pid)
+
+    def reap(self) -> List[int]:
+        """Collect children that exited; returns their worker indices."""
+        exited = []
+        for pid in list(self.children):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if done:
+                index = self.children.pop(pid)
+                exited.append(index)
+                log.error(
+                    "[WORKER-POOL] Scoring process %d (pid %d) exited with status %s",
+                    index,
+                    pid,
+                    status,
+                )
+        return exited
+
+    async def supervise(self, interval: float = 5.0) -> None:
+        """Return once every scoring process has exited.
+
+        Children are not forked again from the running (threaded) main
+        process; their pending entries are reclaimed by the survivors.
+        """
+        while self.children:
+            await asyncio.sleep(interval)
+            self.reap()
+        log.error("[WORKER-POOL] All scoring processes have exited")
+
+    def stop(self) -> None:
+        """Terminate all children."""
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+
+def _preload_scoring_state(cfg: AppCfg) -> None:
+    """Load the embedding model and profile centroids in the parent."""
+    from . import semantic
+    from .worker import load_semantic_profiles
+
+    if semantic._model is None and os.getenv("EMBEDDINGS_MODEL"):
+        semantic._try_import_model()
+    if cfg.global_profiles:
+        load_semantic_profiles(cfg)
+    # Every process opens its own SQLite connection after the fork
+    semantic.reopen_embedding_cache(enabled=False)
+
+
+def _run_child(cfg: AppCfg, index: int, processes: int) -> None:
+    """Entry point of a forked scoring process; exits the process."""
+    code = 0
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        from . import semantic
+
+        # Share the cores between the children instead of oversubscribing them
+        try:
+            import torch
+
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // processes))
+        except Exception:
+            pass
+        semantic.reopen_embedding_cache()
+
+        consumer = f"{cfg.system.redis.consumer}-p{index}"
+        cfg.system.redis = replace(cfg.system.redis, consumer=consumer)
+        asyncio.run(_serve_child(cfg, os.getppid()))
+    except BaseException as e:  # noqa: BLE001 - last resort before _exit
+        log.error(
+            "[WORKER-POOL] Scoring process %d failed: %s", index, e, exc_info=True
+        )
+        code = 1
+    finally:
+        os._exit(code)
+
+
+async def _serve_child(cfg: AppCfg, parent_pid: int) -> None:
+    from .redis_operations import create_async_redis
+    from .store import init_db
+    from .telegram_relay import TelegramRelayClient
+    from .worker import process_loop
+
+    engine = init_db(cfg.system.database_uri)
+    r = create_async_redis(
+        cfg.system.redis.host,
+        cfg.system.redis.port,
+        max_connections=cfg.system.redis.max_connections,
+        pool_timeout=cfg.system.redis.pool_timeout,
+    )
+    relay = TelegramRelayClient(r)
+
+    # The relay only answers once the session owner is authorized
+    while True:
+        try:
+            if await relay.get_me() is not None:
+                break
+        except Exception as e:
+            log.debug("[WORKER-POOL] Waiting for the session owner: %s", e)
+        await asyncio.sleep(2)
+
+    async def _watch_parent() -> None:
+        while os.getppid() == parent_pid:
+            await asyncio.sleep(5)
+        raise SystemExit("parent process exited")
+
+    log.info("[WORKER-POOL] Consumer %s processing", cfg.system.redis.consumer)
+    watcher = asyncio.create_task(_watch_parent())
+    loop_task = asyncio.create_task(process_loop(cfg, relay, engine, redis_client=r))
+    done, _ = await asyncio.wait(
+        {watcher, loop_task}, return_when=asyncio.FIRST_COMPLETED
+    )
+    for task in done:
+        task.result()
+
+
+def prefork_worker_pool() -> Optional[ScoringWorkerPool]:
+    """Fork the scoring pool when WORKER_PROCESSES > 1.
+
+    Returns the pool in the parent, or None in single-process mode. Call from
+    the program entry point, before ``asyncio.run``.
+    """
+    setup_logging()
+    cfg = load_config()
+    processes = cfg.system.worker.processes
+    if processes <= 1:
+        return None
+
+    log.info("[WORKER-POOL] Preloading scoring state for %d processes", processes)
+    _preload_scoring_state(cfg)
+    pool = ScoringWorkerPool(cfg, processes)
+    pool.spawn()
+    return pool
@@ -287,6 +287,54 @@ class TestFeedbackPerformance:
             f"✓ Semantic scoring: avg={avg_latency*1000:.1f}ms, max={max_latency*1000:.1f}ms"
         )
 
+    def test_knn_scoring_latency_matches_centroid(self, tmp_path):
+        """
+        Test per-sample (knn) scoring against centroid scoring, 20 profiles.
+
+        Target: < 50ms per message, and within 10% (+1ms) of centroid mode
+        """
+        from tgsentinel.semantic import score_text_for_profiles
+
+        _try_import_model()
+
+        positive_samples = [
+            f"Release notes for service {i} version 2.{i}" for i in range(40)
+        ]
+        negative_samples = [f"Lunch menu for day {i}" for i in range(10)]
+        test_messages = [
+            "New release of the payment service is out",
+            "What is for lunch today?",
+            "Security patch for version 2.3 deployed",
+        ] * 10
+
+        averages = {}
+        for mode in ("centroid", "knn"):
+            clear_profile_cache()
+            for i in range(20):
+                load_profile_embeddings(
+                    profile_id=f"bench_{i}",
+                    positive_samples=positive_samples,
+                    negative_samples=negative_samples,
+                    scoring_mode=mode,
+                )
+            score_text_for_profiles(test_messages[0])  # build stacked matrices
+
+            start = time.perf_counter()
+            for msg in test_messages:
+                score_text_for_profiles(msg)
+            averages[mode] = (time.perf_counter() - start) / len(test_messages)
+        clear_profile_cache()
+
+        assert (
+            averages["knn"] < 0.050
+        ), f"Avg knn scoring latency {averages['knn']*1000:.1f}ms exceeds 50ms"
+        assert averages["knn"] <= averages["centroid"] * 1.1 + 0.001, averages
+
+        print(
+            f"✓ Scoring 20 profiles: centroid={averages['centroid']*1000:.2f}ms, "
+            f"knn={averages['knn']*1000:.2f}ms"
+        )
+
     @pytest.mark.asyncio
     async def test_load_test_1000_feedbacks(self, tmp_path):
         """
@@ -182,6 +182,23 @@ except ModuleNotFoundError:  # pragma: no cover
     sys.modules["yaml"] = yaml
 
 
+@pytest.fixture(autouse=True)
+def _reset_process_singletons(monkeypatch):
+    """Give every test fresh process-wide caches (entities, messages, avatars)."""
+    import tgsentinel.own_messages as own_messages
+
+    monkeypatch.setattr(own_messages, "_index", None)
+    try:
+        import tgsentinel.avatar_fetcher as avatar_fetcher
+        import tgsentinel.catch_up as catch_up
+        import tgsentinel.entity_directory as entity_directory
+    except ModuleNotFoundError:  # pragma: no cover - optional in lightweight envs
+        return
+    monkeypatch.setattr(entity_directory, "_directory", None)
+    monkeypatch.setattr(avatar_fetcher, "_fetcher", None)
+    monkeypatch.setattr(catch_up, "_index", None)
+
+
 @pytest.fixture
 def temp_dir():
     """Create a temporary directory for test files."""
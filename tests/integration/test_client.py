@@ -1,12 +1,13 @@
 """Unit tests for client module."""
 
-import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from tgsentinel.client import _reaction_count, make_client, start_ingestion
+from tgsentinel.catch_up import get_last_seen_index
+from tgsentinel.client import make_client, start_ingestion
 from tgsentinel.config import AlertsCfg, AppCfg, RedisCfg, SystemCfg
+from tgsentinel.stream_codec import _reaction_count, decode_fields
 
 
 @pytest.mark.integration
@@ -161,7 +162,7 @@ class TestStartIngestion:
         def mock_xadd(stream, fields, **kwargs):
             nonlocal handler_called, captured_payload
             handler_called = True
-            captured_payload = json.loads(fields["json"])
+            captured_payload = decode_fields(fields)
             return b"1234567890-0"
 
         mock_redis.xadd = mock_xadd
@@ -251,7 +252,7 @@ class TestStartIngestion:
 
         def mock_xadd(stream, fields, **kwargs):
             nonlocal captured_payload
-            captured_payload = json.loads(fields["json"])
+            captured_payload = decode_fields(fields)
             return b"1234567890-0"
 
         mock_redis.xadd = mock_xadd
@@ -320,7 +321,7 @@ class TestStartIngestion:
 
         def mock_xadd(stream, fields, **kwargs):
             nonlocal captured_payload
-            captured_payload = json.loads(fields["json"])
+            captured_payload = decode_fields(fields)
             return b"1234567890-0"
 
         mock_redis.xadd = mock_xadd
@@ -393,7 +394,7 @@ class TestStartIngestion:
 
         def mock_xadd(stream, fields, **kwargs):
             nonlocal captured_payload
-            captured_payload = json.loads(fields["json"])
+            captured_payload = decode_fields(fields)
             return b"1234567890-0"
 
         mock_redis.xadd = mock_xadd
@@ -484,7 +485,7 @@ class TestStartIngestion:
 
         def mock_xadd(stream, fields, **kwargs):
             nonlocal captured_payload
-            captured_payload = json.loads(fields["json"])
+            captured_payload = decode_fields(fields)
             return b"1234567890-0"
 
         mock_redis.xadd = mock_xadd
@@ -548,3 +549,97 @@ class TestStartIngestion:
 
         # Verify exception was logged
         assert "ingest_error" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_handler_awaits_asyncio_redis_client(self, sample_telegram_event):
+        """Test that the handler works with a redis.asyncio client."""
+        cfg = AppCfg(
+            telegram_session="test.session",
+            api_id=123456,
+            api_hash="test_hash",
+            alerts=AlertsCfg(),
+            channels=[],
+            monitored_users=[],
+            interests=[],
+            system=SystemCfg(
+                redis=RedisCfg(stream="test:stream"),
+                database_uri="sqlite:///:memory:",
+            ),
+            embeddings_model=None,
+            similarity_threshold=0.42,
+        )
+
+        client = AsyncMock()
+        client.add_event_handler = MagicMock(return_value=None)
+        async_redis = AsyncMock()
+        async_redis.get.return_value = None
+        async_redis.exists.return_value = 1
+
+        registered_handlers = []
+
+        def mock_on(event_type):
+            def decorator(func):
+                registered_handlers.append(func)
+                return func
+
+            return decorator
+
+        client.on = mock_on
+
+        start_ingestion(cfg, client, async_redis)
+        await registered_handlers[0](sample_telegram_event)
+
+        async_redis.xadd.assert_awaited_once()
+        stream, fields = async_redis.xadd.await_args.args
+        assert stream == "test:stream"
+        assert decode_fields(fields)["msg_id"] == 12345
+
+    @pytest.mark.asyncio
+    async def test_handler_skips_messages_already_caught_up(
+        self, sample_telegram_event
+    ):
+        """Test that messages already fetched by catch-up are not added again."""
+        cfg = AppCfg(
+            telegram_session="test.session",
+            api_id=123456,
+            api_hash="test_hash",
+            alerts=AlertsCfg(),
+            channels=[],
+            monitored_users=[],
+            interests=[],
+            system=SystemCfg(
+                redis=RedisCfg(stream="test:stream"),
+                database_uri="sqlite:///:memory:",
+            ),
+            embeddings_model=None,
+            similarity_threshold=0.42,
+        )
+
+        client = AsyncMock()
+        client.add_event_handler = MagicMock(return_value=None)
+        async_redis = AsyncMock()
+        async_redis.get.return_value = None
+        async_redis.hgetall.return_value = {}
+
+        registered_handlers = []
+
+        def mock_on(event_type):
+            def decorator(func):
+                registered_handlers.append(func)
+                return func
+
+            return decorator
+
+        client.on = mock_on
+
+        start_ingestion(cfg, client, async_redis)
+        # Catch-up ingested the message before its live update was handled
+        get_last_seen_index().observe(-100123456789, 12345, live=False)
+        await registered_handlers[0](sample_telegram_event)
+
+        async_redis.xadd.assert_not_awaited()
+
+        sample_telegram_event.message.id = 12346
+        await registered_handlers[0](sample_telegram_event)
+
+        async_redis.xadd.assert_awaited_once()
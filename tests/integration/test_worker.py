@@ -318,3 +318,247 @@ async def test_process_loop_records_errors(monkeypatch):
 
     assert harness.acked == []
     assert ("errors_total", {}) in inc_calls
+
+
+@pytest.mark.asyncio
+async def test_process_loop_passes_batch_vectors(monkeypatch):
+    import numpy as np
+
+    payload = {
+        "chat_id": 1,
+        "chat_title": "Loop",
+        "msg_id": 5,
+        "sender_id": 7,
+        "mentioned": False,
+        "text": "Check",
+        "replies": 0,
+        "reactions": 0,
+    }
+    harness = _RedisHarness(payload)
+    monkeypatch.setattr("tgsentinel.worker.Redis", lambda **kwargs: harness)
+    monkeypatch.setattr("tgsentinel.worker.inc", lambda *args, **kwargs: None)
+
+    encode_calls = []
+
+    def fake_encode(texts, batch_size=32):
+        encode_calls.append((list(texts), batch_size))
+        return np.ones((len(texts), 3), dtype=np.float32)
+
+    monkeypatch.setattr("tgsentinel.worker.has_profile_vectors", lambda: True)
+    monkeypatch.setattr("tgsentinel.worker.encode_texts", fake_encode)
+
+    process_mock = AsyncMock(return_value=False)
+    monkeypatch.setattr("tgsentinel.worker.process_stream_message", process_mock)
+
+    async def fake_sleep(_):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr("tgsentinel.worker.asyncio.sleep", fake_sleep)
+
+    cfg = _make_cfg()
+
+    with pytest.raises(asyncio.CancelledError):
+        await worker.process_loop(cfg, AsyncMock(), AsyncMock())
+
+    assert encode_calls == [(["Check"], cfg.system.worker.encode_batch_size)]
+    vec = process_mock.await_args.kwargs["message_vector"]
+    assert vec is not None and vec.shape == (3,)
+    assert harness.acked == [("tgsentinel:messages", "workers", "1-0")]
+
+
+@pytest.mark.asyncio
+async def test_process_loop_acks_after_write_buffer_flush(monkeypatch, tmp_path):
+    from tgsentinel.store import init_db
+
+    payload = {
+        "chat_id": 1,
+        "chat_title": "Loop",
+        "msg_id": 5,
+        "sender_id": 7,
+        "mentioned": False,
+        "text": "Check",
+        "replies": 0,
+        "reactions": 0,
+    }
+    engine = init_db(f"sqlite:///{tmp_path / 'sentinel.db'}")
+    persisted_at_ack = []
+
+    class _CheckingHarness(_RedisHarness):
+        def xack(self, stream, group, msg_id):
+            persisted_at_ack.append(_row_value(engine, 1, 5, "score"))
+            return super().xack(stream, group, msg_id)
+
+    harness = _CheckingHarness(payload)
+    monkeypatch.setattr("tgsentinel.worker.Redis", lambda **kwargs: harness)
+    monkeypatch.setattr("tgsentinel.worker.inc", lambda *args, **kwargs: None)
+
+    async def buffered_process(*args, write_buffer=None, **kwargs):
+        write_buffer.upsert_message(1, 5, "hash", 0.75, chat_title="Loop")
+        return False
+
+    monkeypatch.setattr("tgsentinel.worker.process_stream_message", buffered_process)
+
+    async def fake_sleep(_):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr("tgsentinel.worker.asyncio.sleep", fake_sleep)
+
+    cfg = _make_cfg()
+    cfg.system.worker.write_flush_ms = 20
+
+    with pytest.raises(asyncio.CancelledError):
+        await worker.process_loop(cfg, AsyncMock(), engine)
+
+    assert harness.acked == [("tgsentinel:messages", "workers", "1-0")]
+    assert persisted_at_ack == [0.75]
+    engine.dispose()
+
+
+def test_encode_batch_texts_skips_empty_texts(monkeypatch):
+    import numpy as np
+
+    monkeypatch.setattr("tgsentinel.worker.has_profile_vectors", lambda: True)
+    monkeypatch.setattr(
+        "tgsentinel.worker.encode_texts",
+        lambda texts, batch_size=32: np.ones((len(texts), 2), dtype=np.float32),
+    )
+
+    vectors = worker._encode_batch_texts(["a", "", "b"], batch_size=8)
+
+    assert vectors[1] is None
+    assert vectors[0] is not None and vectors[2] is not None
+
+    monkeypatch.setattr("tgsentinel.worker.has_profile_vectors", lambda: False)
+    assert worker._encode_batch_texts(["a"], batch_size=8) == [None]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_preserves_order_within_chat():
+    pipeline = worker._ChatOrderedPipeline(concurrency=4, max_inflight=10)
+    seen: list[tuple[str, int]] = []
+
+    async def handle(chat: str, n: int, delay: float):
+        await asyncio.sleep(delay)
+        seen.append((chat, n))
+
+    # Earlier messages of chat "a" are slower but must still finish first
+    pipeline.submit("a", lambda: handle("a", 1, 0.03))
+    pipeline.submit("a", lambda: handle("a", 2, 0.0))
+    pipeline.submit("b", lambda: handle("b", 1, 0.0))
+    await pipeline.drain()
+
+    assert [n for chat, n in seen if chat == "a"] == [1, 2]
+    # The fast chat is not held back by the slow one
+    assert seen[0] == ("b", 1)
+    assert len(pipeline) == 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_bounds_concurrency_and_inflight():
+    pipeline = worker._ChatOrderedPipeline(concurrency=2, max_inflight=3)
+    running = 0
+    peak = 0
+    release = asyncio.Event()
+
+    async def handle():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+
+    for chat in range(3):
+        pipeline.submit(chat, handle)
+
+    waiter = asyncio.create_task(pipeline.wait_for_capacity())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    release.set()
+    await asyncio.wait_for(waiter, timeout=1)
+    await pipeline.drain()
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_pipeline_continues_after_failed_task():
+    pipeline = worker._ChatOrderedPipeline(concurrency=1, max_inflight=10)
+    seen = []
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    async def ok():
+        seen.append("ok")
+
+    pipeline.submit(1, boom)
+    pipeline.submit(1, ok)
+    await pipeline.drain()
+
+    assert seen == ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_grants_free_slots_to_priority_tasks_first():
+    pipeline = worker._ChatOrderedPipeline(
+        concurrency=1, max_inflight=10, priority_weight=2
+    )
+    release = asyncio.Event()
+    seen = []
+
+    async def blocker():
+        await release.wait()
+
+    async def handle(name):
+        seen.append(name)
+
+    pipeline.submit("blocker", blocker)
+    for n in range(3):
+        pipeline.submit(f"bulk{n}", lambda n=n: handle(f"bulk{n}"))
+    for n in range(3):
+        pipeline.submit(f"prio{n}", lambda n=n: handle(f"prio{n}"), priority=True)
+    await asyncio.sleep(0.01)
+    release.set()
+    await pipeline.drain()
+
+    # Priority first, but a bulk task gets every third slot
+    assert seen == ["prio0", "prio1", "bulk0", "prio2", "bulk1", "bulk2"]
+
+
+@pytest.mark.asyncio
+async def test_process_loop_acks_priority_lane_on_its_stream(monkeypatch):
+    payload = {
+        "chat_id": 7,
+        "chat_title": "DM",
+        "msg_id": 5,
+        "sender_id": 7,
+        "mentioned": False,
+        "text": "Hi",
+        "replies": 0,
+        "reactions": 0,
+    }
+
+    class _LaneHarness(_RedisHarness):
+        def xreadgroup(self, *args, streams=None, **kwargs):
+            self.read_calls += 1
+            if self.read_calls == 1 and "tgsentinel:messages:priority" in streams:
+                entry = ("1-0", {"json": json.dumps(self.payload)})
+                return [("tgsentinel:messages:priority", [entry])]
+            return []
+
+    harness = _LaneHarness(payload)
+    monkeypatch.setattr("tgsentinel.worker.Redis", lambda **kwargs: harness)
+    monkeypatch.setattr("tgsentinel.worker.inc", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        "tgsentinel.worker.process_stream_message", AsyncMock(return_value=False)
+    )
+
+    async def fake_sleep(_):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr("tgsentinel.worker.asyncio.sleep", fake_sleep)
+
+    with pytest.raises(asyncio.CancelledError):
+        await worker.process_loop(_make_cfg(), AsyncMock(), AsyncMock())
+
+    assert harness.acked == [("tgsentinel:messages:priority", "workers", "1-0")]
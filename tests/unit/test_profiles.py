@@ -28,6 +28,18 @@ def test_profile_definition_defaults():
     assert profile.scoring_weights["security"] == 1.2
 
 
+def test_profile_definition_scoring_mode():
+    """Semantic scoring mode is normalized and validated."""
+    profile = ProfileDefinition(id="3000", scoring_mode=" KNN ", knn_k="5")
+
+    assert (profile.scoring_mode, profile.knn_k) == ("knn", 5)
+    assert ProfileDefinition(id="3001").scoring_mode == "centroid"
+    with pytest.raises(ValueError, match="scoring_mode"):
+        ProfileDefinition(id="3002", scoring_mode="svm")
+    with pytest.raises(ValueError, match="knn_k"):
+        ProfileDefinition(id="3003", knn_k=0)
+
+
 def test_channel_overrides():
     """Test ChannelOverrides dataclass."""
     overrides = ChannelOverrides(
@@ -114,6 +126,31 @@ def test_profile_resolver_merge():
     assert resolved.scoring_weights["release"] == 1.0
 
 
+def test_profile_resolver_compiles_keyword_matcher():
+    """Resolved profiles carry one matcher over all merged keyword lists."""
+    global_profiles = {
+        "security": ProfileDefinition(id="security", security_keywords=["CVE"]),
+        "ops": ProfileDefinition(id="ops", urgency_keywords=["outage"]),
+    }
+
+    resolver = ProfileResolver(global_profiles)
+    channel = ChannelRule(
+        id=-100123,
+        name="Test",
+        vip_senders=[],
+        profiles=["security", "ops"],
+        overrides=ChannelOverrides(keywords_extra=["db"]),
+    )
+
+    resolved = resolver.resolve_for_channel(channel)
+
+    assert resolved.keyword_matcher.match("DB outage after cve-2024-1") == {
+        "security": ["CVE"],
+        "urgency": ["outage"],
+        "keywords": ["db"],
+    }
+
+
 def test_profile_resolver_with_overrides():
     """Test profile resolution with channel overrides."""
     global_profiles = {
@@ -145,6 +182,49 @@ def test_profile_resolver_with_overrides():
     assert resolved.has_overrides
 
 
+def test_profile_resolver_caches_resolution_per_rule():
+    """Resolutions are reused until the entity's rule object changes."""
+    global_profiles = {
+        "all": ProfileDefinition(id="all", keywords=["alpha"]),
+        "bound": ProfileDefinition(id="bound", keywords=["beta"], channels=[-100123]),
+        "other": ProfileDefinition(id="other", keywords=["gamma"], channels=[-100999]),
+        "off": ProfileDefinition(id="off", keywords=["delta"], enabled=False),
+    }
+
+    channel = ChannelRule(id=-100123, name="Test", vip_senders=[])
+    resolver = ProfileResolver(global_profiles, [channel])
+
+    resolved = resolver.resolve_for_channel(channel)
+
+    assert resolved.bound_profiles == ["all", "bound"]
+    assert resolver.resolve_for_channel(channel) is resolved
+    assert resolver.resolve_for_channel_cached(-100123) is resolved
+
+    replaced = ChannelRule(id=-100123, name="Test", vip_senders=[], profiles=["other"])
+    assert resolver.resolve_for_channel(replaced).bound_profiles == [
+        "other",
+        "all",
+        "bound",
+    ]
+    with pytest.raises(KeyError):
+        resolver.resolve_for_channel_cached(-100555)
+
+
+def test_has_applicable_profiles_uses_bindings():
+    """Only enabled profiles bound to the entity (or to everyone) apply."""
+    global_profiles = {
+        "bound": ProfileDefinition(id="bound", channels=[-100123], users=[42]),
+        "off": ProfileDefinition(id="off", enabled=False),
+    }
+
+    resolver = ProfileResolver(global_profiles)
+
+    assert resolver.has_applicable_profiles("channel", -100123)
+    assert resolver.has_applicable_profiles("user", 42)
+    assert not resolver.has_applicable_profiles("channel", 42)
+    assert not resolver.has_applicable_profiles("user", 7)
+
+
 def test_profile_resolver_no_legacy_support():
     """Test that legacy keyword fields are no longer supported (removed in refactor)."""
     global_profiles = {}  # No profiles
@@ -0,0 +1,71 @@
+"""Shared fakes for the tgsentinel unit tests."""
+
+import pytest
+
+from tgsentinel.catch_up import LAST_SEEN_KEY
+from tgsentinel.config import AlertsCfg, AppCfg, RedisCfg, SystemCfg
+from tgsentinel.stream_codec import decode_fields
+
+
+class FloodWaitError(Exception):
+    """Named like Telethon's error, which ``flood_wait_seconds`` recognises."""
+
+    def __init__(self, seconds):
+        super().__init__(f"wait {seconds}s")
+        self.seconds = seconds
+
+
+class StreamRedis:
+    """Async Redis holding the last seen ids and the ingested stream entries."""
+
+    def __init__(self, last_seen=None):
+        self.hashes = {LAST_SEEN_KEY: dict(last_seen or {})}
+        self.streams: dict[str, list] = {}
+
+    async def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    async def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update(mapping)
+
+    async def xadd(self, stream, fields):
+        self.streams.setdefault(stream, []).append(decode_fields(fields))
+
+    def ids(self, stream):
+        return [(p["chat_id"], p["msg_id"]) for p in self.streams.get(stream, [])]
+
+
+def make_app_cfg(**fields) -> AppCfg:
+    """Minimal ``AppCfg`` (stream "s", no chats); keyword arguments override."""
+    defaults = dict(
+        telegram_session="sess",
+        api_id=1,
+        api_hash="hash",
+        alerts=AlertsCfg(),
+        channels=[],
+        monitored_users=[],
+        interests=[],
+        system=SystemCfg(redis=RedisCfg(stream="s"), database_uri="sqlite://"),
+        embeddings_model=None,
+        similarity_threshold=0.42,
+    )
+    defaults.update(fields)
+    return AppCfg(**defaults)
+
+
+@pytest.fixture
+def flood_wait_error():
+    """Exception class that rate budgets treat as a Telegram flood wait."""
+    return FloodWaitError
+
+
+@pytest.fixture
+def stream_redis():
+    """Factory of ``StreamRedis`` clients, optionally with persisted last seen ids."""
+    return StreamRedis
+
+
+@pytest.fixture
+def app_cfg():
+    """Factory of minimal ``AppCfg`` objects (see ``make_app_cfg``)."""
+    return make_app_cfg
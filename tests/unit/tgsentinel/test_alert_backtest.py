@@ -0,0 +1,157 @@
+"""Unit tests for the column-oriented alert backtest."""
+
+import pytest
+from sqlalchemy import text
+
+from tgsentinel.alert_backtest import (
+    AlertBacktest,
+    AlertCandidate,
+    keyword_categories,
+    parse_candidates,
+)
+from tgsentinel.heuristics import compile_keyword_matcher, run_heuristics
+from tgsentinel.store import init_db, upsert_message
+
+MESSAGES = [
+    # (chat_id, msg_id, text, sender_id, flagged)
+    (-100, 1, "URGENT: hotfix release tonight", 1, True),
+    (-100, 2, "please review the PR", 1, False),
+    (5, 3, "Please review and approve", 5, True),  # private chat
+    (-100, 4, "check https://example.com", 42, False),  # VIP sender
+    (-100, 5, "def f(x):\n    return {x}", 1, False),  # code
+    (-100, 6, "urgent vote on the proposal", 9, True),  # excluded sender
+    (-200, 7, "security incident: key leaked", 1, True),
+    (-100, 8, "", 1, False),
+]
+
+PROFILE = {
+    "id": "1001",
+    "name": "Ops",
+    "urgency_keywords": ["urgent"],
+    "critical_keywords": ["incident"],
+    "action_keywords": ["review"],
+    "release_keywords": ["release", "hotfix"],
+    "keywords": ["proposal"],
+    "vip_senders": [42],
+    "excluded_users": [9],
+    "detect_codes": True,
+    "detect_links": True,
+}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = init_db(f"sqlite:///{tmp_path / 'sentinel.db'}")
+    for hours_ago, (chat_id, msg_id, message_text, sender_id, flagged) in enumerate(
+        MESSAGES
+    ):
+        upsert_message(
+            engine,
+            chat_id,
+            msg_id,
+            f"h{msg_id}",
+            0.0,
+            message_text=message_text,
+            sender_id=sender_id,
+        )
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE messages SET flagged_for_alerts_feed = :f, "
+                    "created_at = datetime('now', :age) WHERE msg_id = :m"
+                ),
+                {"f": int(flagged), "age": f"-{hours_ago} hours", "m": msg_id},
+            )
+    yield engine
+    engine.dispose()
+
+
+def _row_by_row(profile, min_score):
+    """Alert decisions of the single-profile backtest, one message at a time."""
+    categories = keyword_categories(profile)
+    alerts = set()
+    for chat_id, msg_id, message_text, sender_id, _ in MESSAGES:
+        if sender_id in profile["excluded_users"]:
+            continue
+        result = run_heuristics(
+            text=message_text,
+            sender_id=sender_id,
+            mentioned=False,
+            reactions=0,
+            replies=0,
+            vip=set(profile["vip_senders"]),
+            keywords=categories["keywords"],
+            react_thr=0,
+            reply_thr=0,
+            is_private=chat_id > 0,
+            detect_codes=profile.get("detect_codes", False),
+            detect_links=profile.get("detect_links", False),
+            keyword_matcher=compile_keyword_matcher(categories),
+        )
+        if result.important and result.pre_score >= min_score:
+            alerts.add(msg_id)
+    return alerts
+
+
+@pytest.mark.unit
+class TestAlertBacktest:
+    def test_sweep_matches_row_by_row_evaluation(self, engine):
+        min_scores = [0.5, 0.8, 1.0, 1.5, 2.0, 2.5, 3.0]
+        report = AlertBacktest(engine, PROFILE, min_scores=min_scores).run()
+
+        stats = report["stats"]
+        assert stats == {
+            "total_messages": 8,
+            "evaluated_messages": 7,
+            "excluded_count": 1,
+            "flagged_messages": 3,
+        }
+        (candidate,) = report["candidates"]
+        flagged = {1, 3, 7}
+        for point in candidate["precision_curve"]:
+            expected = _row_by_row(PROFILE, point["min_score"])
+            assert point["alerts"] == len(expected), point
+            assert point["true_positives"] == len(expected & flagged), point
+            assert point["false_negatives"] == len(flagged - expected), point
+        assert sum(candidate["histogram"]["all"]) == 7
+        assert sum(candidate["histogram"]["flagged"]) == 3
+
+    def test_candidates_share_one_pass(self, engine):
+        candidates = parse_candidates(
+            [
+                {"name": "urgent-only", "urgency_keywords": ["URGENT"]},
+                {"name": "none"},
+                {"security_keywords": ["leaked"], "keywords": ["review"]},
+            ]
+        )
+        report = AlertBacktest(
+            engine, PROFILE, candidates=candidates, min_scores=[0.8, 1.5]
+        ).run()
+
+        by_name = {c["name"]: c["precision_curve"] for c in report["candidates"]}
+        assert list(by_name) == ["urgent-only", "none", "candidate-3"]
+        # msg 1 (urgency 1.5); VIP and code messages score on features alone
+        assert [p["alerts"] for p in by_name["urgent-only"]] == [3, 2]
+        assert [p["alerts"] for p in by_name["none"]] == [0, 0]
+        assert by_name["candidate-3"][1]["true_positives"] == 0
+        assert by_name["candidate-3"][0]["true_positives"] == 2  # msgs 3 and 7
+
+    def test_window_and_channel_filter(self, engine):
+        windowed = AlertBacktest(engine, PROFILE, hours_back=2.5).run()
+        channel = AlertBacktest(engine, PROFILE, channel_filter=-200).run()
+
+        assert windowed["stats"]["total_messages"] == 3
+        assert channel["stats"]["evaluated_messages"] == 1
+
+    def test_keyword_categories_merge_legacy_fields(self):
+        categories = keyword_categories(
+            {
+                "urgency_keywords": ["a"],
+                "critical_keywords": ["b", "a"],
+                "keywords": "x",
+            }
+        )
+
+        assert categories["urgency"] == ["a", "b"]
+        assert categories["keywords"] == ["x"]
+        assert AlertCandidate("c", categories).categories["action"] == []
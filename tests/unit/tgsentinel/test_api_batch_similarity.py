@@ -0,0 +1,80 @@
+"""Unit tests for the batch interest similarity endpoint."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from tgsentinel.config import ProfileDefinition
+
+VECTORS = {
+    "deploy": [1.0, 0.0, 0.0],
+    "release": [0.8, 0.6, 0.0],
+    "lunch": [0.0, 0.0, 1.0],
+    "pizza": [0.0, 0.6, 0.8],
+}
+
+
+@pytest.fixture
+def model(monkeypatch):
+    import numpy as np
+
+    import tgsentinel.semantic as sem
+
+    fake = MagicMock()
+    fake.encode.side_effect = lambda texts, **kwargs: np.array(
+        [VECTORS[t] for t in texts], dtype=np.float32
+    )
+    monkeypatch.setattr(sem, "_model", fake)
+    monkeypatch.setattr(sem, "_embedding_cache", None)
+    sem.clear_profile_cache()
+    with sem._sample_matrices_lock:
+        sem._sample_matrices.clear()
+    yield fake
+    sem.clear_profile_cache()
+
+
+@pytest.fixture
+def client(app_cfg):
+    import tgsentinel.api as api_module
+
+    profiles = {
+        "3000": ProfileDefinition(id="3000", positive_samples=["deploy", "lunch"]),
+        "3001": ProfileDefinition(
+            id="3001",
+            positive_samples=["deploy", "lunch"],
+            scoring_mode="knn",
+            knn_k=1,
+        ),
+    }
+    previous = api_module._config
+    api_module.set_config(app_cfg(global_profiles=profiles))
+    try:
+        yield api_module.create_api_app().test_client()
+    finally:
+        api_module.set_config(previous)
+
+
+@pytest.mark.unit
+def test_knn_profile_is_scored_by_its_nearest_samples(model, client):
+    import tgsentinel.semantic as sem
+
+    texts = ["deploy", "pizza", "release"]
+    response = client.post(
+        "/api/profiles/interest/similarity/batch",
+        json={"texts": texts, "profile_ids": ["3000", "3001"]},
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["profile_ids"] == ["3000", "3001"]
+    sem.load_profile_embeddings("3000", ["deploy", "lunch"], [], 0.5)
+    sem.load_profile_embeddings(
+        "3001", ["deploy", "lunch"], [], 0.5, scoring_mode="knn", knn_k=1
+    )
+    for row, text in zip(body["scores"], texts):
+        assert row == pytest.approx(
+            [sem.score_text_for_profile(text, pid) for pid in ("3000", "3001")],
+            abs=1e-3,
+        )
+    assert body["scores"][0][1] == pytest.approx(1.0)  # exact sample match
+    assert body["scores"][0][0] < 0.86  # diluted by the centroid
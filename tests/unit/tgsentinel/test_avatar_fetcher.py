@@ -0,0 +1,90 @@
+"""Unit tests for the background avatar fetcher."""
+
+import asyncio
+
+import pytest
+
+from tgsentinel.avatar_fetcher import (
+    AVATAR_PHOTO_IDS_KEY,
+    AvatarFetcher,
+    avatar_cache_key,
+)
+
+
+class _Redis:
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    async def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = str(value)
+
+
+class _Client:
+    def __init__(self, fail_first_with=None):
+        self.downloads: list[int] = []
+        self.fail_first_with = fail_first_with
+
+    async def download_profile_photo(self, entity_id, file):
+        if self.fail_first_with is not None:
+            exc, self.fail_first_with = self.fail_first_with, None
+            raise exc
+        self.downloads.append(entity_id)
+        file.write(b"img")
+
+
+@pytest.mark.unit
+class TestAvatarFetcher:
+    @pytest.mark.asyncio
+    async def test_enqueue_returns_url_and_deduplicates(self):
+        client, r = _Client(), _Redis()
+        fetcher = AvatarFetcher(concurrency=2, min_interval=0)
+        fetcher.bind(client, r)
+
+        assert fetcher.enqueue(-1001, 5) == "/api/avatar/chat/1001"
+        fetcher.enqueue(-1001, 5)
+        await fetcher.join()
+        fetcher.enqueue(-1001, 5)  # already fetched in this process
+        await fetcher.join()
+
+        assert client.downloads == [-1001]
+        assert r.values[avatar_cache_key(-1001)]
+        assert r.hashes[AVATAR_PHOTO_IDS_KEY]["-1001"] == "5"
+
+    @pytest.mark.asyncio
+    async def test_unchanged_photo_is_not_downloaded_again(self):
+        client, r = _Client(), _Redis()
+        r.values[avatar_cache_key(42)] = "b64"
+        r.hashes[AVATAR_PHOTO_IDS_KEY] = {"42": "7"}
+        fetcher = AvatarFetcher(min_interval=0)
+        fetcher.bind(client, r)
+
+        fetcher.enqueue(42, 7)
+        await fetcher.join()
+        assert client.downloads == []
+
+        fetcher.enqueue(42, 8)  # photo changed
+        await fetcher.join()
+        assert client.downloads == [42]
+
+    @pytest.mark.asyncio
+    async def test_flood_wait_pauses_and_retries(self, flood_wait_error):
+        client, r = _Client(fail_first_with=flood_wait_error(0)), _Redis()
+        fetcher = AvatarFetcher(min_interval=0)
+        fetcher.bind(client, r)
+
+        fetcher.enqueue(42, 1)
+        await asyncio.wait_for(fetcher.join(), timeout=1)
+
+        assert client.downloads == [42]
+        assert fetcher.stats["flood_waits"] == 1
+        assert fetcher.idle()
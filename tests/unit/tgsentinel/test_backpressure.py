@@ -0,0 +1,191 @@
+"""Unit tests for consumer-lag backpressure and load shedding."""
+
+import logging
+
+import pytest
+
+from tgsentinel.backpressure import BackpressureMonitor, LoadLevel
+from tgsentinel.config import ChannelRule
+from tgsentinel.stream_lanes import is_priority_message
+
+
+class _LagRedis:
+    """Stream of ``length`` entries with ids "<n>-0"; the group has seen ``read``."""
+
+    def __init__(self, length, read, pending=0, lag_known=True):
+        self.first = 1
+        self.last = length
+        self.read = read
+        self.pending = pending
+        self.lag_known = lag_known
+        self.trims = []
+
+    def xlen(self, stream):
+        return self.last - self.first + 1
+
+    def xinfo_groups(self, stream):
+        lag = self.last - self.read if self.lag_known else None
+        return [
+            {
+                "name": "g",
+                "pending": self.pending,
+                "last-delivered-id": f"{self.read}-0",
+                "lag": lag,
+            }
+        ]
+
+    def xpending(self, stream, group):
+        oldest = self.read - self.pending + 1
+        return {"pending": self.pending, "min": f"{oldest}-0"}
+
+    def xrange(self, stream, min, max, count):
+        start = int(min.lstrip("(").split("-")[0]) + 1
+        return [(f"{n}-0", {}) for n in range(start, self.last + 1)][:count]
+
+    def xtrim(self, stream, maxlen=None, approximate=True, minid=None, limit=None):
+        self.trims.append({"maxlen": maxlen, "minid": minid, "limit": limit})
+        before = self.xlen(stream)
+        if minid is not None:
+            removable = max(0, int(minid.split("-")[0]) - self.first)
+            self.first += min(removable, limit) if limit is not None else removable
+        else:
+            self.first = max(self.first, self.last - maxlen + 1)
+        return before - self.xlen(stream)
+
+
+def _monitor(r, **kwargs):
+    kwargs.setdefault("elevated_lag", 10)
+    kwargs.setdefault("high_lag", 50)
+    kwargs.setdefault("maxlen", 100)
+    return BackpressureMonitor(r, "s", "g", **kwargs)
+
+
+@pytest.mark.unit
+class TestLoadLevels:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "lag,level",
+        [(0, LoadLevel.NORMAL), (10, LoadLevel.ELEVATED), (60, LoadLevel.HIGH)],
+    )
+    async def test_level_follows_lag(self, lag, level):
+        r = _LagRedis(length=80, read=80 - lag)
+
+        assert await _monitor(r).refresh() == level
+
+    @pytest.mark.asyncio
+    async def test_level_has_hysteresis(self):
+        r = _LagRedis(length=80, read=20)
+        monitor = _monitor(r)
+        assert await monitor.refresh() == LoadLevel.HIGH
+
+        r.read = 35  # lag 45: below 50 but within 20%
+        assert await monitor.refresh() == LoadLevel.HIGH
+        r.read = 41  # lag 39
+        assert await monitor.refresh() == LoadLevel.ELEVATED
+
+    @pytest.mark.asyncio
+    async def test_unknown_lag_is_counted(self):
+        r = _LagRedis(length=80, read=60, lag_known=False)
+        monitor = _monitor(r)
+
+        await monitor.refresh()
+
+        assert monitor.lag == 20
+
+    @pytest.mark.asyncio
+    async def test_elevated_level_quiets_hot_path_logs(self):
+        logger = logging.getLogger("tgsentinel.worker")
+        previous = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            r = _LagRedis(length=80, read=60)
+            monitor = _monitor(r)
+            await monitor.refresh()
+            assert logger.level == logging.WARNING
+
+            r.read = 80
+            await monitor.refresh()
+            assert logger.level == logging.INFO
+        finally:
+            logger.setLevel(previous)
+
+
+@pytest.mark.unit
+class TestTrimming:
+    @pytest.mark.asyncio
+    async def test_processed_entries_are_trimmed_first(self):
+        r = _LagRedis(length=150, read=140, pending=5)
+        monitor = _monitor(r)
+
+        await monitor.refresh()
+
+        assert r.trims == [{"maxlen": None, "minid": "136-0", "limit": 50}]
+        assert r.xlen("s") == 100  # nothing unprocessed was dropped
+        assert r.first <= 136
+
+    @pytest.mark.asyncio
+    async def test_unprocessed_entries_are_trimmed_last(self):
+        r = _LagRedis(length=300, read=100)
+        monitor = _monitor(r)
+
+        level = await monitor.refresh()
+
+        assert level == LoadLevel.CRITICAL
+        assert [t["maxlen"] for t in r.trims] == [None, 100]
+        assert r.xlen("s") == 100
+
+    @pytest.mark.asyncio
+    async def test_non_trimming_monitor_leaves_stream_alone(self):
+        r = _LagRedis(length=300, read=100)
+
+        await _monitor(r, trim=False).refresh()
+
+        assert r.trims == []
+
+
+@pytest.mark.unit
+class TestShedding:
+    RULES = {-100: ChannelRule(id=-100, vip_senders=[7])}
+
+    def _payload(self, **overrides):
+        payload = {
+            "chat_id": -100,
+            "msg_id": 1,
+            "sender_id": 5,
+            "text": "Breaking: the same announcement everywhere!",
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_priority_messages(self):
+        assert is_priority_message(self._payload(chat_id=42), self.RULES)
+        assert is_priority_message(self._payload(mentioned=True), self.RULES)
+        assert is_priority_message(self._payload(sender_id=7), self.RULES)
+        assert not is_priority_message(self._payload(), self.RULES)
+
+    def test_nothing_is_shed_at_normal_load(self):
+        monitor = _monitor(_LagRedis(length=1, read=1))
+
+        assert not monitor.skip_semantic(self._payload(), self.RULES)
+        assert not monitor.coalesce(self._payload(msg_id=1), self.RULES)
+        assert not monitor.coalesce(self._payload(msg_id=2), self.RULES)
+
+    def test_high_load_sheds_low_priority_only(self):
+        monitor = _monitor(_LagRedis(length=1, read=1))
+        monitor.level = LoadLevel.HIGH
+
+        assert monitor.skip_semantic(self._payload(), self.RULES)
+        assert not monitor.skip_semantic(self._payload(sender_id=7), self.RULES)
+
+    def test_repeats_are_coalesced_under_high_load(self):
+        monitor = _monitor(_LagRedis(length=1, read=1))
+        monitor.level = LoadLevel.HIGH
+        first = self._payload(msg_id=1)
+        repeat = self._payload(
+            msg_id=2, text="BREAKING the same announcement everywhere"
+        )
+
+        assert not monitor.coalesce(first, self.RULES)
+        assert not monitor.coalesce(first, self.RULES)  # a retry, not a repeat
+        assert monitor.coalesce(repeat, self.RULES)
+        assert not monitor.coalesce(self._payload(msg_id=3, text="short"), self.RULES)
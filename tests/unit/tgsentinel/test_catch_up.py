@@ -0,0 +1,180 @@
+"""Unit tests for catching up messages missed while ingestion was down."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tgsentinel.catch_up import LAST_SEEN_KEY, CatchUpEngine, LastSeenIndex
+from tgsentinel.config import ChannelRule, MonitoredUser
+from tgsentinel.rate_budget import RequestBudget
+
+
+class _Client:
+    """Chat histories of ids ``1..latest``; honours min_id/max_id/limit."""
+
+    def __init__(self, latest, fail_first_with=None):
+        self.latest = latest
+        self.calls: list[tuple] = []
+        self.fail_first_with = fail_first_with
+
+    async def get_dialogs(self, limit=None):
+        return [
+            SimpleNamespace(id=chat_id, entity=None, message=SimpleNamespace(id=top))
+            for chat_id, top in self.latest.items()
+        ]
+
+    async def get_messages(self, chat_id, limit, min_id=0, max_id=0, reverse=False):
+        self.calls.append((chat_id, min_id, max_id, limit))
+        if self.fail_first_with is not None:
+            exc, self.fail_first_with = self.fail_first_with, None
+            raise exc
+        assert reverse
+        top = self.latest[chat_id] if not max_id else max_id - 1
+        return [
+            SimpleNamespace(id=n, sender_id=5, message=f"m{n}", out=n == 12)
+            for n in range(min_id + 1, top + 1)
+        ][:limit]
+
+
+@pytest.fixture
+def make_engine(app_cfg):
+    cfg = app_cfg(
+        channels=[ChannelRule(id=-100), ChannelRule(id=-200), ChannelRule(id=-300)],
+        monitored_users=[MonitoredUser(id=7, name="Left to the DM poller")],
+    )
+
+    def _engine(client, r, index, **kwargs):
+        kwargs.setdefault("min_interval", 0)
+        return CatchUpEngine(cfg, client, r, index=index, **kwargs)
+
+    return _engine
+
+
+@pytest.mark.unit
+class TestLastSeenIndex:
+    @pytest.mark.asyncio
+    async def test_persisted_ids_start_the_first_gap(self, stream_redis):
+        r = stream_redis({"-100": "10"})
+        index = LastSeenIndex()
+        index.mark_restart()
+
+        await index.load(r)
+        index.observe(-100, 15)
+        await index.flush(r)
+
+        assert index.pending
+        assert index.take_gaps() == {-100: 10}
+        assert not index.pending
+        assert index.first_live(-100) == 15
+        assert r.hashes[LAST_SEEN_KEY] == {"-100": 15}
+
+    def test_restart_snapshots_ingested_ids(self):
+        index = LastSeenIndex()
+        index.observe(-100, 20)
+        index.mark_restart()
+        index.observe(-100, 25)
+
+        assert index.take_gaps() == {-100: 20}
+        assert index.first_live(-100) == 25
+
+
+@pytest.mark.unit
+class TestCatchUpEngine:
+    @pytest.mark.asyncio
+    async def test_gaps_are_ingested_in_order(self, stream_redis, make_engine):
+        # -100 missed 11..14 (12 is our own), -200 has nothing new,
+        # -300 was never seen, user 7 is the DM poller's
+        r = stream_redis({"-100": "10", "-200": "30", "7": "1"})
+        client = _Client({-100: 14, -200: 30, -300: 50, 7: 9})
+        index = LastSeenIndex()
+        index.mark_restart()
+
+        stats = await make_engine(client, r, index).run()
+
+        assert r.ids("s") == [(-100, 11), (-100, 13), (-100, 14)]
+        assert [call[0] for call in client.calls] == [-100]
+        assert stats["messages"] == 3
+        assert r.hashes[LAST_SEEN_KEY]["-100"] == 14
+
+    @pytest.mark.asyncio
+    async def test_gap_ends_at_first_live_message(self, stream_redis, make_engine):
+        r = stream_redis({"-100": "10"})
+        client = _Client({-100: 14})
+        index = LastSeenIndex()
+        index.mark_restart()
+        await index.load(r)
+        index.observe(-100, 13)  # arrived live during catch-up
+
+        await make_engine(client, r, index).run()
+
+        assert r.ids("s") == [(-100, 11)]
+        assert client.calls[0][2] == 13
+
+    @pytest.mark.asyncio
+    async def test_gap_ends_at_the_dialog_snapshot(self, stream_redis, make_engine):
+        r = stream_redis({"-100": "10"})
+        client = _Client({-100: 14})
+        index = LastSeenIndex()
+        index.mark_restart()
+        list_dialogs = client.get_dialogs
+
+        async def get_dialogs(limit=None):
+            dialogs = await list_dialogs(limit)
+            client.latest[-100] = 15  # posted live while catch-up runs
+            return dialogs
+
+        client.get_dialogs = get_dialogs
+
+        await make_engine(client, r, index).run()
+
+        # 15 is left to the live handler, whose update is still pending
+        assert r.ids("s") == [(-100, 11), (-100, 13), (-100, 14)]
+        assert client.calls[0][2] == 15
+
+    @pytest.mark.asyncio
+    async def test_long_gaps_are_paged_and_capped(self, stream_redis, make_engine):
+        r = stream_redis({"-100": "0"})
+        client = _Client({-100: 350})
+        index = LastSeenIndex()
+        index.mark_restart()
+
+        stats = await make_engine(client, r, index, max_messages=250).run()
+
+        assert [call[1] for call in client.calls] == [0, 100, 200]
+        # Our own message 12 does not count towards the cap
+        assert [call[3] for call in client.calls] == [100, 100, 51]
+        assert len(r.ids("s")) == 250
+        assert stats["truncated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_flood_wait_pauses_and_retries(
+        self, stream_redis, make_engine, flood_wait_error
+    ):
+        r = stream_redis({"-100": "10"})
+        client = _Client({-100: 11}, fail_first_with=flood_wait_error(0))
+        index = LastSeenIndex()
+        index.mark_restart()
+
+        stats = await make_engine(client, r, index).run()
+
+        assert stats["flood_waits"] == 1
+        assert r.ids("s") == [(-100, 11)]
+        assert len(client.calls) == 2
+
+
+@pytest.mark.unit
+class TestRequestBudget:
+    @pytest.mark.asyncio
+    async def test_calls_are_spaced_and_paused(self):
+        budget = RequestBudget(min_interval=0.02)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(3):
+            await budget.acquire()
+        assert loop.time() - started >= 0.04
+
+        budget.pause(0.05)
+        paused_at = loop.time()
+        await budget.acquire()
+        assert loop.time() - paused_at >= 0.045
@@ -0,0 +1,153 @@
+"""Unit tests for polling monitored users' private chats."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tgsentinel.catch_up import LAST_SEEN_KEY, LastSeenIndex
+from tgsentinel.config import MonitoredUser
+from tgsentinel.dm_poller import DMPoller
+
+# Private chats go to the priority lane of stream "s"
+_DM_STREAM = "s:priority"
+
+
+class _Client:
+    """Private chats with message ids ``1..latest``; message 3 is our own."""
+
+    def __init__(self, latest, delay=0.0):
+        self.latest = latest
+        self.delay = delay
+        self.calls: list[tuple] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def get_messages(self, user_id, limit, min_id=0, max_id=0, reverse=False):
+        self.calls.append((user_id, min_id, limit))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        ids = list(range(min_id + 1, max_id or self.latest[user_id] + 1))
+        ids = ids[:limit] if reverse else ids[::-1][:limit]
+        return [
+            SimpleNamespace(
+                id=n,
+                sender_id=user_id,
+                sender=None,
+                message=f"m{n}",
+                out=n == 3,
+                get_sender=_no_sender,
+            )
+            for n in ids
+        ]
+
+
+async def _no_sender():
+    return None
+
+
+@pytest.fixture
+def make_poller(app_cfg):
+    def _poller(client, r, user_ids, **kwargs):
+        cfg = app_cfg(
+            monitored_users=[MonitoredUser(id=u, name=f"User {u}") for u in user_ids]
+        )
+        poller = DMPoller(
+            cfg, lambda: client, r, lambda: True, poll_interval=30, **kwargs
+        )
+        poller._last_seen = LastSeenIndex()
+        return poller
+
+    return _poller
+
+
+@pytest.mark.unit
+class TestDMPoller:
+    @pytest.mark.asyncio
+    async def test_first_poll_only_records_the_latest_id(
+        self, stream_redis, make_poller
+    ):
+        r = stream_redis()
+        client = _Client({7: 5})
+        poller = make_poller(client, r, [7])
+
+        await poller._poll_all_users()
+
+        assert r.ids(_DM_STREAM) == []
+        assert client.calls == [(7, 0, 1)]
+        assert r.hashes[LAST_SEEN_KEY] == {"7": 5}
+
+    @pytest.mark.asyncio
+    async def test_new_messages_are_fetched_from_the_last_seen_id(
+        self, stream_redis, make_poller
+    ):
+        r = stream_redis({"7": "1"})
+        client = _Client({7: 4})
+        poller = make_poller(client, r, [7])
+
+        await poller._poll_all_users()
+
+        # Everything after message 1, oldest first, without our own message 3
+        assert client.calls == [(7, 1, 100)]
+        assert r.ids(_DM_STREAM) == [(7, 2), (7, 4)]
+        assert r.hashes[LAST_SEEN_KEY] == {"7": 4}
+        assert poller._intervals[7] == poller.min_interval
+
+    @pytest.mark.asyncio
+    async def test_quiet_users_back_off_and_live_users_are_skipped(
+        self, stream_redis, make_poller
+    ):
+        r = stream_redis({"7": "4", "8": "1"})
+        client = _Client({7: 4, 8: 1})
+        poller = make_poller(client, r, [7, 8])
+        await poller._last_seen.load(r)
+        poller._last_seen.observe(8, 2)  # arrived through the event handler
+
+        await poller._poll_all_users()
+
+        assert [call[0] for call in client.calls] == [7]
+        assert poller._intervals[7] == 60
+        assert poller._intervals[8] == poller.max_interval
+
+        # Only due users are polled again
+        await poller._poll_all_users()
+        assert len(client.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_live_message_before_the_first_poll_after_a_restart(
+        self, stream_redis, make_poller
+    ):
+        r = stream_redis({"7": "1"})
+        client = _Client({7: 6})
+        poller = make_poller(client, r, [7])
+        await poller._last_seen.load(r)
+        poller._last_seen.mark_restart()
+        poller._last_seen.observe(7, 6)  # arrived through the event handler
+
+        await poller._poll_all_users()
+
+        # Messages 2..5 were posted during the restart: fetched despite the
+        # live message, without our own message 3
+        assert client.calls == [(7, 1, 100)]
+        assert r.ids(_DM_STREAM) == [(7, 2), (7, 4), (7, 5)]
+        assert poller._last_seen.gap(7) is None
+
+        # Filled once; afterwards the user arrives live and is not polled
+        await poller._poll_all_users()
+        poller._next_poll.clear()
+        await poller._poll_all_users()
+        assert len(client.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_users_are_polled_concurrently(self, stream_redis, make_poller):
+        users = list(range(1, 7))
+        r = stream_redis({str(u): "0" for u in users})
+        client = _Client({u: 0 for u in users}, delay=0.01)
+        poller = make_poller(client, r, users, concurrency=3)
+
+        await poller._poll_all_users()
+
+        assert len(client.calls) == 6
+        assert client.max_active == 3
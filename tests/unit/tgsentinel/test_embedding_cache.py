@@ -0,0 +1,117 @@
+"""Unit tests for the embedding cache."""
+
+import numpy as np
+import pytest
+
+from tgsentinel.embedding_cache import EmbeddingCache, cache_from_env
+
+
+def _vec(*values: float) -> np.ndarray:
+    return np.array(values, dtype=np.float32)
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    def test_memory_only_roundtrip(self):
+        cache = EmbeddingCache("m", path=None, memory_items=10)
+        cache.put_many({"h1": _vec(0.6, 0.8)})
+
+        found = cache.get_many(["h1", "h2"])
+
+        assert list(found) == ["h1"]
+        assert np.allclose(found["h1"], [0.6, 0.8])
+        stats = cache.stats()
+        assert stats["disk_enabled"] is False
+        assert (stats["memory_hits"], stats["misses"]) == (1, 1)
+
+    def test_memory_tier_is_lru_bounded(self):
+        cache = EmbeddingCache("m", path=None, memory_items=2)
+        cache.put_many({"a": _vec(1.0), "b": _vec(2.0)})
+        cache.get_many(["a"])  # a becomes most recently used
+        cache.put_many({"c": _vec(3.0)})
+
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "emb.db")
+        cache = EmbeddingCache("m", path=path)
+        cache.put_many({"h1": _vec(0.6, 0.8, 0.0)})
+        cache.close()
+
+        reopened = EmbeddingCache("m", path=path)
+        found = reopened.get_many(["h1"])
+        reopened.close()
+
+        assert found["h1"].dtype == np.float32
+        assert np.allclose(found["h1"], [0.6, 0.8, 0.0], atol=1e-3)
+
+    def test_disk_entries_are_scoped_by_model(self, tmp_path):
+        path = str(tmp_path / "emb.db")
+        cache = EmbeddingCache("model-a", path=path)
+        cache.put_many({"h1": _vec(1.0, 0.0)})
+        cache.close()
+
+        other = EmbeddingCache("model-b", path=path)
+        assert other.get_many(["h1"]) == {}
+        other.close()
+
+    def test_disk_budget_evicts_least_recently_used(self, tmp_path):
+        # 64 float16 values = 128 bytes per vector; budget fits ~8 vectors
+        cache = EmbeddingCache(
+            "m", path=str(tmp_path / "emb.db"), memory_items=0, max_disk_mb=1024 / 2**20
+        )
+        for i in range(20):
+            cache.put_many({f"h{i}": np.full(64, i, dtype=np.float32)})
+
+        assert cache.stats()["disk_mb"] * 2**20 <= 1024
+        assert "h19" in cache.get_many(["h19"])
+        assert cache.get_many(["h0"]) == {}
+        cache.close()
+
+    def test_clear_removes_model_entries(self, tmp_path):
+        cache = EmbeddingCache("m", path=str(tmp_path / "emb.db"))
+        cache.put_many({"h1": _vec(1.0)})
+        cache.clear()
+
+        assert cache.get_many(["h1"]) == {}
+        assert cache.stats()["disk_mb"] == 0
+        cache.close()
+
+    def test_centroids_survive_restart_and_replace_older_sets(self, tmp_path):
+        path = str(tmp_path / "emb.db")
+        cache = EmbeddingCache("m", path=path)
+        cache.put_centroids("p", "k1", _vec(1.0, 0.0), None)
+        cache.put_centroids("p", "k2", _vec(0.0, 1.0), _vec(1.0, 0.0))
+        cache.close()
+
+        reopened = EmbeddingCache("m", path=path)
+        assert reopened.get_centroids("k1") is None
+        positive, negative = reopened.get_centroids("k2")
+        assert np.allclose(positive, [0.0, 1.0])
+        assert np.allclose(negative, [1.0, 0.0])
+        assert EmbeddingCache("other", path=path).get_centroids("k2") is None
+        reopened.close()
+
+    def test_unwritable_path_falls_back_to_memory(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("x")
+
+        cache = EmbeddingCache("m", path=str(blocker / "emb.db"))
+        cache.put_many({"h1": _vec(1.0)})
+
+        assert cache.stats()["disk_enabled"] is False
+        assert "h1" in cache.get_many(["h1"])
+
+
+@pytest.mark.unit
+def test_cache_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "emb.db"))
+    monkeypatch.setenv("EMBEDDING_CACHE_MEMORY_ITEMS", "16")
+    cache = cache_from_env("m")
+    assert cache is not None
+    assert cache.stats()["memory_capacity"] == 16
+    assert cache.stats()["disk_enabled"] is True
+    cache.close()
+
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "false")
+    assert cache_from_env("m") is None
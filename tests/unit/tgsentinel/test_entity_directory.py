@@ -0,0 +1,105 @@
+"""Unit tests for the shared entity directory."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from tgsentinel.entity_directory import (
+    ENTITY_DIRECTORY_KEY,
+    EntityDirectory,
+    EntityInfo,
+    entity_info_from_telethon,
+)
+
+
+class _HashRedis:
+    """Minimal async Redis with the hash/set calls the directory uses."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.values: dict[str, str] = {}
+
+    async def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update(mapping)
+        return len(mapping)
+
+    async def hgetall(self, name):
+        return {k.encode(): v.encode() for k, v in self.hashes.get(name, {}).items()}
+
+    async def set(self, key, value):
+        self.values[key] = value
+        return True
+
+
+@pytest.mark.unit
+class TestEntityInfo:
+    def test_name_precedence(self):
+        user = SimpleNamespace(first_name="Ada", last_name="Lovelace", username="ada")
+        chat = SimpleNamespace(title="Ops", username=None)
+        anonymous = SimpleNamespace(first_name=None, last_name=None, username="ghost")
+
+        assert entity_info_from_telethon(user, 1).name == "Ada Lovelace"
+        assert entity_info_from_telethon(chat, -100).name == "Ops"
+        assert entity_info_from_telethon(anonymous, 2).name == "@ghost"
+
+    def test_photo_id_and_username(self):
+        entity = SimpleNamespace(
+            title="News", username="news", photo=SimpleNamespace(photo_id=77)
+        )
+
+        info = entity_info_from_telethon(entity, -1001)
+
+        assert (info.id, info.username, info.photo_id) == (-1001, "news", 77)
+
+
+@pytest.mark.unit
+class TestEntityDirectory:
+    def test_record_uses_given_marked_id(self):
+        directory = EntityDirectory()
+
+        directory.record(SimpleNamespace(id=5, title="Chan"), -1005)
+
+        assert directory.get(-1005).name == "Chan"
+        assert directory.get(5) is None
+
+    def test_record_dialogs(self):
+        directory = EntityDirectory()
+        dialogs = [
+            SimpleNamespace(id=-1001, entity=SimpleNamespace(title="A")),
+            SimpleNamespace(id=42, entity=SimpleNamespace(first_name="B")),
+            SimpleNamespace(id=None, entity=None),
+        ]
+
+        assert directory.record_dialogs(dialogs) == 2
+        assert len(directory) == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_only_writes_changes(self):
+        directory = EntityDirectory()
+        r = _HashRedis()
+
+        directory.put(EntityInfo(id=-1001, name="A", type="supergroup"))
+        assert await directory.flush(r) == 1
+        directory.put(EntityInfo(id=-1001, name="A", type="supergroup"))
+        assert await directory.flush(r) == 0
+
+        stored = json.loads(r.hashes[ENTITY_DIRECTORY_KEY]["-1001"])
+        assert stored["name"] == "A"
+        assert r.values["tgsentinel:chat_type:-1001"] == "supergroup"
+
+    @pytest.mark.asyncio
+    async def test_load_warms_new_process(self):
+        r = _HashRedis()
+        first = EntityDirectory()
+        first.put(EntityInfo(id=7, name="Old"))
+        await first.flush(r)
+
+        second = EntityDirectory()
+        second.put(EntityInfo(id=7, name="New"))
+        await second.load(r)
+
+        assert second.get(7).name == "New"  # live entries win over stored ones
+        third = EntityDirectory()
+        await third.load(r)
+        assert third.get(7).name == "Old"
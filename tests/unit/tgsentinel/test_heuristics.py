@@ -2,7 +2,12 @@
 
 import pytest
 
-from tgsentinel.heuristics import content_hash, run_heuristics
+from tgsentinel.heuristics import (
+    KeywordMatcher,
+    compile_keyword_matcher,
+    content_hash,
+    run_heuristics,
+)
 
 
 @pytest.mark.unit
@@ -246,3 +251,71 @@ class TestRunHeuristics:
         )
         assert result.important is False
         assert "keywords" not in result.reasons
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """Test the single-pass keyword matcher."""
+
+    def test_matches_every_category_in_configured_order(self):
+        matcher = KeywordMatcher(
+            {
+                "security": ["exploit", "CVE"],
+                "urgency": ["urgent"],
+                "release": ["v2.0"],
+            }
+        )
+
+        hits = matcher.match("URGENT: cve-2024-1 exploit in the wild")
+
+        assert hits == {"security": ["exploit", "CVE"], "urgency": ["urgent"]}
+
+    def test_overlapping_and_prefix_keywords_all_match(self):
+        matcher = KeywordMatcher(
+            {"security": ["cve", "cve-2024", "2024"], "keywords": ["CVE"]}
+        )
+
+        hits = matcher.match("Patch CVE-2024-1234 now")
+
+        assert hits == {"security": ["cve", "cve-2024", "2024"], "keywords": ["CVE"]}
+
+    def test_same_semantics_as_substring_search(self):
+        categories = {
+            "action": ["ab", "b", "abc", "ca"],
+            "risk": ["bca", "A", "zz", ""],
+        }
+        matcher = KeywordMatcher(categories)
+
+        for text in ["", "abc", "xbcay", "CAB", "zz top", "a"]:
+            expected = {}
+            for category, keywords in categories.items():
+                hits = [kw for kw in keywords if kw and kw.lower() in text.lower()]
+                if hits:
+                    expected[category] = hits
+            assert matcher.match(text) == expected, text
+
+    def test_compiled_matchers_are_shared(self):
+        first = compile_keyword_matcher({"security": ["cve"], "urgency": []})
+        second = compile_keyword_matcher({"security": ["cve"]})
+
+        assert first is second
+        assert not compile_keyword_matcher({"security": []})
+
+    def test_run_heuristics_uses_given_matcher(self):
+        matcher = KeywordMatcher({"security": ["breach"]})
+
+        result = run_heuristics(
+            text="Data breach reported",
+            sender_id=1,
+            mentioned=False,
+            reactions=0,
+            replies=0,
+            vip=set(),
+            keywords=[],
+            react_thr=0,
+            reply_thr=0,
+            keyword_matcher=matcher,
+        )
+
+        assert "security" in result.reasons
+        assert result.trigger_annotations == {"security": ["breach"]}
@@ -0,0 +1,154 @@
+"""Unit tests for the streaming interest backtest engine."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+import tgsentinel.semantic as sem
+from tgsentinel.interest_backtest import InterestBacktest
+from tgsentinel.store import init_db, upsert_message
+
+# Text -> embedding; the profile centroid is "match"
+_VECTORS = {
+    "match": [1.0, 0.0, 0.0],  # score 1.0
+    "near": [0.2, 0.98, 0.0],  # score 0.6
+    "other": [0.0, 1.0, 0.0],  # score 0.5
+}
+
+PROFILE = {
+    "id": "3001",
+    "name": "Topic",
+    "positive_samples": ["match"],
+    "threshold": 0.8,
+    "vip_senders": [7],
+    "excluded_users": [9],
+}
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = MagicMock()
+    fake.encode.side_effect = lambda texts, **kwargs: np.array(
+        [_VECTORS[t.split()[0]] for t in texts], dtype=np.float32
+    )
+    monkeypatch.setattr(sem, "_model", fake)
+    monkeypatch.setattr(sem, "_embedding_cache", None)
+    sem.clear_profile_cache()
+    yield fake
+    sem.clear_profile_cache()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = init_db(f"sqlite:///{tmp_path / 'sentinel.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _add(engine, msg_id, message_text, sender_id=1, hours_ago=1):
+    upsert_message(
+        engine,
+        -100,
+        msg_id,
+        f"h{msg_id}",
+        0.0,
+        message_text=message_text,
+        sender_id=sender_id,
+    )
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE messages SET created_at = datetime('now', :age) "
+                "WHERE msg_id = :m"
+            ),
+            {"age": f"-{hours_ago} hours", "m": msg_id},
+        )
+
+
+def _feedback(engine, msg_id, label, profile_id="3001"):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO feedback(chat_id, msg_id, label) VALUES(-100, :m, :l)"),
+            {"m": msg_id, "l": label},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO feedback_profiles(chat_id, msg_id, profile_id) "
+                "VALUES(-100, :m, :p)"
+            ),
+            {"m": msg_id, "p": profile_id},
+        )
+
+
+@pytest.mark.unit
+class TestInterestBacktest:
+    def test_streams_entire_history_with_isolated_vectors(self, model, engine):
+        _add(engine, 1, "match a", hours_ago=1)
+        _add(engine, 2, "other b", hours_ago=2)
+        _add(engine, 3, "near c", sender_id=7, hours_ago=3)  # VIP: 0.6 >= 0.56
+        _add(engine, 4, "match d", sender_id=9, hours_ago=4)  # excluded
+        _add(engine, 5, "", hours_ago=5)
+        _add(engine, 6, "match f", hours_ago=24 * 40)
+        progress = []
+
+        report = InterestBacktest(engine, PROFILE, chunk_size=2).run(
+            progress=progress.append
+        )
+
+        stats = report["stats"]
+        assert (stats["total_messages"], stats["scored_messages"]) == (6, 4)
+        assert stats["matched_messages"] == 3 and stats["vip_matches"] == 1
+        assert (stats["excluded_count"], stats["no_text_count"]) == (1, 1)
+        assert [p["processed"] for p in progress] == [2, 4, 6]
+        assert progress[-1]["total"] == 6
+        # Newest first, with the reasons of the old endpoint
+        samples = report["matches"]
+        assert [s["message_id"] for s in samples] == [1, 2, 3, 4, 5, 6]
+        assert samples[2]["matched"] and "VIP" in samples[2]["reason"]
+        assert samples[3]["reason"] == "Excluded user (ID: 9)"
+        # One encode per chunk, and the live profiles are untouched
+        assert model.encode.call_count == 1 + 3
+        assert not sem.has_profile_vectors()
+
+    def test_window_and_message_cap(self, model, engine):
+        for msg_id, hours_ago in [(1, 1), (2, 2), (3, 30)]:
+            _add(engine, msg_id, "match", hours_ago=hours_ago)
+
+        windowed = InterestBacktest(engine, PROFILE, hours_back=24).run()
+        capped = InterestBacktest(engine, PROFILE, max_messages=1).run()
+
+        assert windowed["stats"]["total_messages"] == 2
+        assert [s["message_id"] for s in capped["matches"]] == [1]
+
+    def test_feedback_labels_give_precision_recall_and_sweep(self, model, engine):
+        _add(engine, 1, "match", hours_ago=1)
+        _add(engine, 2, "match", hours_ago=2)
+        _add(engine, 3, "near", hours_ago=3)
+        _add(engine, 4, "other", hours_ago=4)
+        _feedback(engine, 1, 1)
+        _feedback(engine, 2, 0)
+        _feedback(engine, 3, 1)
+        _feedback(engine, 4, 0, profile_id="other-profile")
+
+        report = InterestBacktest(engine, PROFILE).run()
+
+        evaluation = report["evaluation"]
+        assert evaluation["labeled"] == 3
+        assert (evaluation["precision"], evaluation["recall"]) == (0.5, 0.5)
+        sweep = {row["threshold"]: row for row in report["threshold_sweep"]}
+        assert sweep[0.8]["matched"] == 2
+        assert (sweep[0.55]["matched"], sweep[0.55]["recall"]) == (3, 1.0)
+        assert sweep[0.5]["matched"] == 4
+
+    def test_cancel_stops_after_the_current_chunk(self, model, engine):
+        for msg_id in range(1, 6):
+            _add(engine, msg_id, "match", hours_ago=msg_id)
+
+        report = InterestBacktest(engine, PROFILE, chunk_size=2).run(
+            cancelled=lambda: True
+        )
+
+        assert report["cancelled"] is True
+        assert report["stats"]["total_messages"] == 2
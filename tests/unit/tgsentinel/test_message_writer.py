@@ -0,0 +1,94 @@
+"""Unit tests for the write-behind message buffer."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from tgsentinel.message_writer import MessageWriteBuffer
+from tgsentinel.store import init_db
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """File-backed database; flushes run in a thread, which :memory: cannot share."""
+    engine = init_db(f"sqlite:///{tmp_path / 'sentinel.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT chat_id, msg_id, score, flagged_for_alerts_feed, "
+                "flagged_for_interest_feed FROM messages ORDER BY msg_id"
+            )
+        ).fetchall()
+
+
+@pytest.mark.unit
+class TestMessageWriteBuffer:
+    async def test_barrier_waits_for_timed_flush(self, file_db):
+        buffer = MessageWriteBuffer(file_db, max_batch=100, flush_interval_ms=20)
+
+        buffer.upsert_message(-100, 1, "h1", 1.5, chat_title="Chat")
+        buffer.mark_for_alerts_feed(-100, 1)
+        assert _rows(file_db) == []
+
+        await buffer.barrier()
+
+        assert _rows(file_db) == [(-100, 1, 1.5, 1, 0)]
+        assert buffer.stats() == {"pending": 0, "flushes": 1, "rows_written": 1}
+
+    async def test_size_threshold_flushes_one_transaction(self, file_db):
+        buffer = MessageWriteBuffer(file_db, max_batch=3, flush_interval_ms=60_000)
+
+        for msg_id in (1, 2, 3):
+            buffer.upsert_message(-100, msg_id, f"h{msg_id}", 1.0)
+
+        await buffer.barrier()
+
+        assert [row[1] for row in _rows(file_db)] == [1, 2, 3]
+        assert buffer.flushes == 1
+
+    async def test_flags_follow_upserts_across_batches(self, file_db):
+        buffer = MessageWriteBuffer(file_db, max_batch=1, flush_interval_ms=60_000)
+
+        buffer.upsert_message(-100, 1, "h1", 1.0)
+        buffer.mark_for_interest_feed(-100, 1)
+        await buffer.barrier()
+
+        assert _rows(file_db) == [(-100, 1, 1.0, 0, 1)]
+        assert buffer.flushes == 2
+
+    async def test_flush_commits_without_waiting_for_timer(self, file_db):
+        buffer = MessageWriteBuffer(file_db, max_batch=100, flush_interval_ms=60_000)
+
+        buffer.upsert_message(-100, 1, "h1", 1.0)
+        await asyncio.wait_for(buffer.flush(), timeout=5)
+
+        assert len(_rows(file_db)) == 1
+
+    async def test_barrier_raises_when_flush_fails(self, file_db, monkeypatch):
+        def failing_write(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(
+            "tgsentinel.message_writer.write_message_batch", failing_write
+        )
+        buffer = MessageWriteBuffer(file_db, max_batch=1, flush_interval_ms=0)
+
+        buffer.upsert_message(-100, 1, "h1", 1.0)
+        with pytest.raises(RuntimeError, match="disk full"):
+            await buffer.barrier()
+
+        # The failed batch is not retried; later writes still go through
+        monkeypatch.undo()
+        buffer.upsert_message(-100, 2, "h2", 1.0)
+        await buffer.barrier()
+        assert [row[1] for row in _rows(file_db)] == [2]
+
+    async def test_barrier_without_writes_returns_immediately(self, file_db):
+        buffer = MessageWriteBuffer(file_db)
+        await asyncio.wait_for(buffer.barrier(), timeout=1)
@@ -0,0 +1,48 @@
+"""Unit tests for the outgoing message index."""
+
+import pytest
+
+from tgsentinel.own_messages import OwnMessageIndex
+
+
+@pytest.mark.unit
+class TestOwnMessageIndex:
+    def test_unknown_chat_needs_rpc(self):
+        index = OwnMessageIndex()
+
+        assert index.is_ours(-100, 5) is None
+
+    def test_answers_at_or_above_floor(self):
+        index = OwnMessageIndex()
+        index.observe(-100, 10)
+        index.add(-100, 12)
+
+        assert index.is_ours(-100, 12) is True
+        assert index.is_ours(-100, 11) is False
+        assert index.is_ours(-100, 10) is False
+        assert index.is_ours(-100, 9) is None  # before tracking started
+
+    def test_rpc_learned_ids_do_not_set_floor(self):
+        index = OwnMessageIndex()
+        index.add(-100, 3, live=False)
+
+        assert index.is_ours(-100, 3) is True
+        assert index.is_ours(-100, 50) is None
+
+    def test_eviction_raises_floor_instead_of_false_negative(self):
+        index = OwnMessageIndex(max_items=2)
+        index.add(-100, 1)
+        index.add(-100, 2)
+        index.add(-200, 7)  # evicts (-100, 1)
+
+        assert len(index) == 2
+        assert index.is_ours(-100, 1) is None
+        assert index.is_ours(-100, 2) is True
+        assert index.is_ours(-100, 3) is False
+
+    def test_clear_forgets_floors(self):
+        index = OwnMessageIndex()
+        index.add(-100, 4)
+        index.clear()
+
+        assert index.is_ours(-100, 4) is None
@@ -61,6 +61,8 @@ def test_valid_fields_whitelist_completeness():
         "positive_samples",
         "positive_weight",
         "threshold",
+        "scoring_mode",
+        "knn_k",
         "prioritize_private",
         "reaction_threshold",
         "reply_threshold",
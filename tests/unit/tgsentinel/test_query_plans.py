@@ -0,0 +1,152 @@
+"""EXPLAIN QUERY PLAN regression tests for hot message queries.
+
+Statements are captured from the real feed, analytics, digest and cleanup code
+paths, so a query rewritten with a non-sargable predicate (for example
+``datetime(created_at) >= ...``) or an index dropped from init_db fails here.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from tgsentinel.config import DigestSchedule
+from tgsentinel.digest import build_digest_query
+from tgsentinel.digest_collector import DigestCollector
+from tgsentinel.store import (
+    cleanup_old_messages,
+    init_db,
+    mark_for_alerts_feed,
+    mark_for_interest_feed,
+    upsert_message,
+)
+
+HOT_ENDPOINTS = [
+    "/api/feed/alerts",
+    "/api/feed/interests",
+    "/api/stats",
+    "/api/analytics/keywords",
+    "/api/analytics/channels",
+    "/api/analytics/metrics",
+    "/api/digests",
+]
+
+
+@pytest.fixture
+def seeded_engine(tmp_path):
+    engine = init_db(f"sqlite:///{tmp_path / 'plans.db'}")
+    for msg_id in range(5):
+        upsert_message(
+            engine,
+            -100,
+            msg_id,
+            f"hash{msg_id}",
+            1.0,
+            chat_title="Chat",
+            triggers="cve,exploit",
+            matched_profiles='["security"]',
+            digest_schedule="hourly",
+        )
+        mark_for_alerts_feed(engine, -100, msg_id)
+        mark_for_interest_feed(engine, -100, msg_id)
+    yield engine
+    engine.dispose()
+
+
+def _capture_statements(engine, run):
+    captured = []
+
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        params = parameters[0] if executemany else parameters
+        captured.append((statement, params))
+
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_execute)
+    return captured
+
+
+def _full_scans(engine, statements):
+    """Return {statement: plan} for filtered queries whose plan scans a table."""
+    offenders = {}
+    raw = engine.raw_connection()
+    try:
+        for statement, params in statements:
+            normalized = " ".join(statement.split())
+            if "WHERE" not in normalized.upper():
+                continue  # Unfiltered aggregates (e.g. COUNT(*)) scan by design
+            if " messages" not in normalized and " feedback" not in normalized:
+                continue
+            plan = [
+                row[3]
+                for row in raw.execute(
+                    f"EXPLAIN QUERY PLAN {statement}", params or ()
+                ).fetchall()
+            ]
+            if any(step.startswith("SCAN messages") for step in plan) or any(
+                step.startswith("SCAN feedback") for step in plan
+            ):
+                offenders[normalized[:120]] = plan
+    finally:
+        raw.close()
+    return offenders
+
+
+@pytest.mark.unit
+def test_api_feed_and_analytics_queries_use_indexes(seeded_engine):
+    import tgsentinel.api as api_module
+
+    previous_engine = api_module._engine
+    api_module.set_engine(seeded_engine)
+    try:
+        client = api_module.create_api_app().test_client()
+
+        def run():
+            for url in HOT_ENDPOINTS:
+                assert client.get(url).status_code == 200, url
+
+        statements = _capture_statements(seeded_engine, run)
+    finally:
+        api_module.set_engine(previous_engine)
+
+    assert statements
+    assert _full_scans(seeded_engine, statements) == {}
+
+
+@pytest.mark.unit
+def test_digest_and_cleanup_queries_use_indexes(seeded_engine):
+    def run():
+        collector = DigestCollector(seeded_engine, DigestSchedule.HOURLY, 24)
+        collector.collect_all_for_schedule()
+        collector.collect_for_profiles(["security"])
+        collector.mark_as_processed()
+        cleanup_old_messages(seeded_engine, retention_days=30, max_messages=1000)
+
+    statements = _capture_statements(seeded_engine, run)
+    params = {"since": "2025-01-01 00:00:00", "min_score": 0.0, "limit": 10}
+    for feed_type in ("alerts", "interests"):
+        statements.append((build_digest_query(feed_type), params))
+        statements.append((build_digest_query(feed_type, manual_trigger=True), params))
+
+    assert _full_scans(seeded_engine, statements) == {}
+
+
+@pytest.mark.unit
+def test_init_db_canonicalizes_iso_timestamps(tmp_path):
+    db_uri = f"sqlite:///{tmp_path / 'iso.db'}"
+    engine = init_db(db_uri)
+    with engine.begin() as con:
+        con.exec_driver_sql(
+            "INSERT INTO messages(chat_id, msg_id, content_hash, score, created_at) "
+            "VALUES (-100, 1, 'h', 1.0, '2025-03-01T10:15:30.250000+02:00')"
+        )
+    engine.dispose()
+
+    engine = init_db(db_uri)
+    with engine.connect() as con:
+        created_at = con.exec_driver_sql(
+            "SELECT created_at FROM messages WHERE msg_id = 1"
+        ).scalar()
+    engine.dispose()
+
+    assert created_at == "2025-03-01 08:15:30"
@@ -0,0 +1,95 @@
+"""Unit tests for Redis operation helpers."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.asyncio import Connection
+from redis.asyncio import Redis as AsyncRedis
+
+from tgsentinel.redis_operations import RedisManager, create_async_redis, maybe_await
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_maybe_await_accepts_sync_and_async_results():
+    async def coro():
+        return "async"
+
+    assert await maybe_await("sync") == "sync"
+    assert await maybe_await(coro()) == "async"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scan_and_get_requests_async_uses_single_mget():
+    async_client = MagicMock(spec=AsyncRedis)
+
+    async def scan_iter(match):
+        for key in ("tg:req:1", "tg:req:2", "tg:req:3"):
+            yield key
+
+    async_client.scan_iter = scan_iter
+    async_client.mget = AsyncMock(
+        return_value=[json.dumps({"id": 1}), None, "not-json"]
+    )
+
+    mgr = RedisManager(MagicMock(), async_client=async_client)
+    requests = await mgr.scan_and_get_requests_async("tg:req:*")
+
+    assert requests == [("tg:req:1", {"id": 1})]
+    async_client.mget.assert_awaited_once_with(["tg:req:1", "tg:req:2", "tg:req:3"])
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_scan_and_get_requests_async_falls_back_to_sync_client():
+    sync_client = MagicMock()
+    sync_client.scan_iter.return_value = iter(["tg:req:1"])
+    sync_client.get.return_value = json.dumps({"id": 1})
+
+    mgr = RedisManager(sync_client)
+
+    assert mgr.async_redis is sync_client
+    assert await mgr.scan_and_get_requests_async("tg:req:*") == [
+        ("tg:req:1", {"id": 1})
+    ]
+
+
+class _SlowConnection(Connection):
+    """Connection answering every command after a short delay, without a server."""
+
+    in_use = 0
+    peak = 0
+
+    async def connect(self):
+        pass
+
+    async def can_read_destructive(self):
+        return False
+
+    async def disconnect(self, nowait=False):
+        pass
+
+    async def send_packed_command(self, command, check_health=True):
+        type(self).in_use += 1
+        type(self).peak = max(type(self).peak, type(self).in_use)
+
+    async def read_response(self, *args, **kwargs):
+        await asyncio.sleep(0.01)
+        type(self).in_use -= 1
+        return "PONG"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_async_pool_waits_for_a_free_connection():
+    client = create_async_redis("localhost", 6379, max_connections=2, pool_timeout=5)
+    client.connection_pool.connection_class = _SlowConnection
+
+    results = await asyncio.gather(*(client.ping() for _ in range(10)))
+
+    assert len(results) == 10
+    assert _SlowConnection.peak <= 2
+    await client.aclose()
@@ -20,9 +20,10 @@ class TestTryImportModel:
         assert result is None
 
     @patch("tgsentinel.semantic.SentenceTransformer")
-    def test_try_import_model_success(self, mock_transformer, monkeypatch):
+    def test_try_import_model_success(self, mock_transformer, monkeypatch, tmp_path):
         """Test successful model import."""
         monkeypatch.setenv("EMBEDDINGS_MODEL", "all-MiniLM-L6-v2")
+        monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.db"))
         mock_model = MagicMock()
         mock_transformer.return_value = mock_model
 
@@ -30,11 +31,15 @@ class TestTryImportModel:
         import tgsentinel.semantic as sem
 
         sem._model = None
+        monkeypatch.setattr(sem, "_embedding_cache", None)
 
         result = _try_import_model()
 
         assert result is not None
         mock_transformer.assert_called_once_with("all-MiniLM-L6-v2")
+        assert sem._embedding_cache is not None
+        assert sem._embedding_cache.model_name == "all-MiniLM-L6-v2"
+        sem._embedding_cache.close()
 
     def test_try_import_model_exception(self, monkeypatch, caplog):
         """Test that exceptions are caught and logged."""
@@ -49,3 +54,384 @@ class TestTryImportModel:
 
         assert result is None
         assert "Embeddings disabled" in caplog.text
+
+
+@pytest.mark.unit
+class TestScoreTextForProfiles:
+    """Test vectorized multi-profile scoring."""
+
+    @pytest.fixture(autouse=True)
+    def _profiles(self, monkeypatch):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+
+        mock_model = MagicMock()
+        mock_model.encode.return_value = np.array([[0.6, 0.8, 0.0]])
+        monkeypatch.setattr(sem, "_model", mock_model)
+
+        sem.clear_profile_cache()
+        with sem._profile_vectors_lock:
+            sem._profile_vectors["3000"] = (
+                np.array([1.0, 0.0, 0.0]),
+                np.array([0.0, 1.0, 0.0]),
+                0.5,
+                1.0,
+                0.2,
+            )
+            sem._profile_vectors["3001"] = (
+                np.array([0.0, 1.0, 0.0]),
+                None,
+                0.5,
+                1.2,
+                0.15,
+            )
+            sem._profile_vectors["3002"] = (
+                np.array([0.0, 0.0, 1.0]),
+                np.array([0.6, 0.8, 0.0]),
+                0.5,
+                1.0,
+                0.5,
+            )
+            sem._invalidate_profile_matrices()
+        yield mock_model
+        sem.clear_profile_cache()
+
+    def test_matches_single_profile_scoring(self, _profiles):
+        """Batched scores equal the per-profile scores."""
+        import tgsentinel.semantic as sem
+
+        batched = sem.score_text_for_profiles("hello", ["3000", "3001", "3002"])
+        for pid in ("3000", "3001", "3002"):
+            assert batched[pid] == pytest.approx(
+                sem.score_text_for_profile("hello", pid), abs=1e-6
+            )
+
+    def test_encodes_text_once(self, _profiles):
+        """All profiles are scored from a single model forward pass."""
+        import tgsentinel.semantic as sem
+
+        _profiles.encode.reset_mock()
+        sem.score_text_for_profiles("hello")
+        assert _profiles.encode.call_count == 1
+
+    def test_unknown_profiles_are_omitted(self, _profiles):
+        """Unloaded profile IDs are skipped without encoding."""
+        import tgsentinel.semantic as sem
+
+        _profiles.encode.reset_mock()
+        assert sem.score_text_for_profiles("hello", ["missing"]) == {}
+        assert _profiles.encode.call_count == 0
+        assert set(sem.score_text_for_profiles("hello", ["3001", "x"])) == {"3001"}
+
+    def test_matrices_rebuilt_after_cache_clear(self, _profiles):
+        """Clearing a profile invalidates the stacked matrices."""
+        import tgsentinel.semantic as sem
+
+        assert "3000" in sem.score_text_for_profiles("hello")
+        sem.clear_profile_cache("3000")
+        assert "3000" not in sem.score_text_for_profiles("hello")
+
+
+@pytest.mark.unit
+class TestEmbeddingCacheIntegration:
+    """Test that encoding goes through the embedding cache."""
+
+    @pytest.fixture
+    def cached_model(self, monkeypatch, tmp_path):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+        from tgsentinel.embedding_cache import EmbeddingCache
+
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kwargs: np.array(
+            [[float(len(t)), 1.0, 0.0] for t in texts], dtype=np.float32
+        )
+        cache = EmbeddingCache("test-model", path=str(tmp_path / "emb.db"))
+        monkeypatch.setattr(sem, "_model", model)
+        monkeypatch.setattr(sem, "_embedding_cache", cache)
+        yield model, cache
+        cache.close()
+
+    def test_repeated_texts_skip_the_model(self, cached_model):
+        import tgsentinel.semantic as sem
+
+        model, _ = cached_model
+        first = sem.encode_texts(["alpha", "beta", "alpha"])
+        assert model.encode.call_count == 1
+        assert model.encode.call_args.args[0] == ["alpha", "beta"]
+
+        second = sem.encode_texts(["beta", "alpha"])
+        assert model.encode.call_count == 1
+        assert first is not None and second is not None
+        assert (second[0] == first[1]).all()
+        assert (second[1] == first[0]).all()
+
+    def test_only_misses_are_encoded(self, cached_model):
+        import tgsentinel.semantic as sem
+
+        model, _ = cached_model
+        sem.encode_texts(["alpha"])
+        sem.encode_texts(["alpha", "gamma"])
+        assert model.encode.call_args.args[0] == ["gamma"]
+
+    def test_explicit_model_bypasses_cache(self, cached_model):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+
+        _, cache = cached_model
+        other = MagicMock()
+        other.encode.return_value = np.array([[1.0, 0.0, 0.0]])
+        sem._build_weighted_centroid(["alpha"], [], 0.4, model=other)
+        other.encode.assert_called_once()
+        assert cache.stats()["memory_items"] == 0
+
+
+@pytest.mark.unit
+class TestCentroidStore:
+    """Profile centroids are stored by sample set and survive restarts."""
+
+    @pytest.fixture
+    def store(self, monkeypatch, tmp_path):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+        from tgsentinel.embedding_cache import EmbeddingCache
+
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kwargs: np.array(
+            [[float(len(t)), 1.0, 0.0] for t in texts], dtype=np.float32
+        )
+        path = str(tmp_path / "emb.db")
+        monkeypatch.setattr(sem, "_model", model)
+        monkeypatch.setattr(sem, "_embedding_cache", EmbeddingCache("m", path=path))
+        sem.clear_profile_cache()
+        yield model, path
+        sem._embedding_cache.close()
+        sem.clear_profile_cache()
+
+    def test_restart_loads_centroids_without_encoding(self, store, monkeypatch):
+        import tgsentinel.semantic as sem
+        from tgsentinel.embedding_cache import EmbeddingCache
+
+        model, path = store
+        sem.load_profile_embeddings("3000", ["alpha", "beta"], ["nope"], 0.5)
+        before = sem._profile_vectors["3000"]
+
+        # New process: empty memory tiers, same disk store
+        sem._embedding_cache.close()
+        monkeypatch.setattr(sem, "_embedding_cache", EmbeddingCache("m", path=path))
+        sem.clear_profile_cache()
+        model.encode.reset_mock()
+        sem.load_profile_embeddings("3000", ["alpha", "beta"], ["nope"], 0.7)
+
+        assert model.encode.call_count == 0
+        after = sem._profile_vectors["3000"]
+        assert (after[0] == before[0]).all() and (after[1] == before[1]).all()
+        assert after[2] == 0.7  # thresholds are not part of the key
+
+    def test_edit_encodes_only_changed_samples(self, store):
+        import tgsentinel.semantic as sem
+
+        model, _ = store
+        sem.load_profile_embeddings("3000", ["alpha", "beta"], [], 0.5)
+        model.encode.reset_mock()
+
+        sem.load_profile_embeddings("3000", ["alpha", "beta", "gamma!"], [], 0.5)
+
+        assert model.encode.call_args.args[0] == ["gamma!"]
+        assert sem._profile_vectors["3000"][1] is None
+
+    def test_feedback_weight_changes_the_key(self, store):
+        import tgsentinel.semantic as sem
+
+        keys = {
+            sem._sample_set_key(["a"], [], ["b"], [], weight) for weight in (0.4, 0.5)
+        }
+        assert len(keys) == 2
+
+
+@pytest.mark.unit
+class TestScoreTextMatrix:
+    """Many texts against many unloaded profiles in one call."""
+
+    VECTORS = {
+        "deploy": [1.0, 0.0, 0.0],
+        "release": [0.8, 0.6, 0.0],
+        "lunch": [0.0, 0.0, 1.0],
+        "pizza": [0.0, 0.6, 0.8],
+    }
+
+    @pytest.fixture
+    def model(self, monkeypatch):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+
+        fake = MagicMock()
+        fake.encode.side_effect = lambda texts, **kwargs: np.array(
+            [self.VECTORS[t] for t in texts], dtype=np.float32
+        )
+        monkeypatch.setattr(sem, "_model", fake)
+        monkeypatch.setattr(sem, "_embedding_cache", None)
+        sem.clear_profile_cache()
+        with sem._sample_matrices_lock:
+            sem._sample_matrices.clear()
+        yield fake
+        sem.clear_profile_cache()
+
+    def test_matches_loaded_profile_scoring(self, model):
+        import tgsentinel.semantic as sem
+
+        profiles = [
+            (["deploy", "release"], ["lunch"], 1.0, 0.5),
+            (["lunch", "pizza"], [], 1.2, 0.15),
+        ]
+        texts = ["deploy", "pizza", "release"]
+
+        matrix = sem.score_text_matrix(texts, profiles)
+
+        assert matrix.scores.shape == (3, 2) and matrix.nearest_index is None
+        for column, (pos, neg, pw, nw) in enumerate(profiles):
+            sem.load_profile_embeddings(str(column), pos, neg, 0.5, pw, nw)
+            for row, text in enumerate(texts):
+                assert matrix.scores[row, column] == pytest.approx(
+                    sem.score_text_for_profile(text, str(column)), abs=1e-6
+                )
+        # Scoring alone does not load anything into the live profiles
+        sem.clear_profile_cache()
+        sem.score_text_matrix(texts, profiles)
+        assert not sem.has_profile_vectors()
+
+    def test_nearest_sample_per_pair(self, model):
+        import tgsentinel.semantic as sem
+
+        matrix = sem.score_text_matrix(
+            ["release", "lunch"],
+            [(["deploy", "release"], [], 1.0, 0.15), (["pizza"], [], 1.0, 0.15)],
+            nearest_samples=True,
+        )
+
+        assert matrix.nearest_index.tolist() == [[1, 0], [0, 0]]
+        assert matrix.nearest_similarity[0, 0] == pytest.approx(1.0)
+        assert matrix.nearest_similarity[1, 1] == pytest.approx(0.8)
+
+    def test_sample_matrix_is_encoded_once(self, model):
+        import tgsentinel.semantic as sem
+
+        first = sem.sample_matrix(["deploy", "release"])
+        model.encode.reset_mock()
+
+        assert sem.sample_matrix(["deploy", "release"]) is first
+        assert sem.compute_max_sample_similarity(
+            "pizza", ["deploy", "release"]
+        ) == pytest.approx(0.36)
+        assert model.encode.call_count == 1  # the tested text only
+        assert sem.sample_matrix([]) is None
+
+
+@pytest.mark.unit
+class TestKnnScoring:
+    """Per-sample "knn" scoring mode."""
+
+    VECTORS = {
+        "deploy": [1.0, 0.0, 0.0],
+        "release": [0.8, 0.6, 0.0],
+        "lunch": [0.0, 0.0, 1.0],
+        "pizza": [0.0, 0.6, 0.8],
+        "spam": [0.0, 1.0, 0.0],
+    }
+
+    @pytest.fixture
+    def model(self, monkeypatch):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+
+        fake = MagicMock()
+        fake.encode.side_effect = lambda texts, **kwargs: np.array(
+            [self.VECTORS[t] for t in texts], dtype=np.float32
+        )
+        monkeypatch.setattr(sem, "_model", fake)
+        monkeypatch.setattr(sem, "_embedding_cache", None)
+        sem.clear_profile_cache()
+        yield fake
+        sem.clear_profile_cache()
+
+    def test_multi_topic_profile_keeps_exact_matches(self, model):
+        import tgsentinel.semantic as sem
+
+        sem.load_profile_embeddings("centroid", ["deploy", "lunch"], [], 0.5)
+        sem.load_profile_embeddings(
+            "knn", ["deploy", "lunch"], [], 0.5, scoring_mode="knn", knn_k=1
+        )
+
+        assert sem.score_text_for_profile("deploy", "knn") == pytest.approx(1.0)
+        assert sem.score_text_for_profile("deploy", "centroid") < 0.86
+
+    def test_batched_scores_match_single_profile(self, model):
+        import tgsentinel.semantic as sem
+
+        sem.load_profile_embeddings("c", ["deploy", "pizza"], ["spam"], 0.5, 1.0, 0.5)
+        sem.load_profile_embeddings(
+            "k1", ["deploy", "lunch"], ["spam"], 0.5, 1.2, 0.5, scoring_mode="knn"
+        )
+        sem.load_profile_embeddings(
+            "k2", ["release"], [], 0.5, scoring_mode="knn", knn_k=1
+        )
+        sem.load_profile_embeddings(
+            "k3",
+            ["lunch", "pizza", "deploy", "release"],
+            ["spam", "deploy"],
+            0.5,
+            negative_weight=0.3,
+            scoring_mode="knn",
+            knn_k=2,
+        )
+
+        for text in ("deploy", "pizza", "spam"):
+            batched = sem.score_text_for_profiles(text)
+            subset = sem.score_text_for_profiles(text, ["k3", "c"])
+            for pid in ("c", "k1", "k2", "k3"):
+                single = sem.score_text_for_profile(text, pid)
+                assert batched[pid] == pytest.approx(single, abs=1e-6), (text, pid)
+            assert subset == pytest.approx({k: batched[k] for k in ("k3", "c")})
+
+    def test_vector_scorer_matches_live_profile(self, model):
+        import numpy as np
+
+        import tgsentinel.semantic as sem
+
+        samples = (["deploy", "lunch", "pizza"], ["spam"], 1.0, 0.4, "knn", 2)
+        scorer = sem.profile_vector_scorer(*samples)
+        sem.load_profile_embeddings(
+            "3000", samples[0], samples[1], 0.5, 1.0, 0.4, scoring_mode="knn", knn_k=2
+        )
+
+        texts = ["deploy", "release", "spam"]
+        scores = scorer(np.array([self.VECTORS[t] for t in texts]))
+        for text, score in zip(texts, scores):
+            assert score == pytest.approx(sem.score_text_for_profile(text, "3000"))
+
+    def test_feedback_rows_are_downweighted(self, model):
+        import tgsentinel.semantic as sem
+
+        positive, negative = sem.compute_profile_sample_matrices(
+            ["deploy"], [], ["lunch"], None, 0.4
+        )
+
+        assert positive[:, 2].tolist() == pytest.approx([0.0, 0.4])
+        assert negative is None
+
+    def test_reloading_as_centroid_drops_samples(self, model):
+        import tgsentinel.semantic as sem
+
+        sem.load_profile_embeddings(
+            "3000", ["deploy", "lunch"], [], 0.5, scoring_mode="knn", knn_k=1
+        )
+        sem.load_profile_embeddings("3000", ["deploy", "lunch"], [], 0.5)
+
+        assert sem.score_text_for_profiles("deploy")["3000"] < 0.86
+        assert "3000" not in sem._profile_samples
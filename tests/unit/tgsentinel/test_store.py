@@ -4,10 +4,13 @@ import pytest
 from sqlalchemy import text
 
 from tgsentinel.store import (
+    SQLITE_CACHE_KIB,
     init_db,
     mark_for_alerts_feed,
     mark_for_interest_feed,
+    message_params,
     upsert_message,
+    write_message_batch,
 )
 
 
@@ -366,3 +369,53 @@ class TestIntegration:
             row = result.fetchone()
             assert row[0] == 1
             assert row[1] == 1
+
+
+@pytest.mark.unit
+class TestWriteMessageBatch:
+    """Test batched persistence used by the write-behind buffer."""
+
+    def test_batch_upserts_and_flags(self, in_memory_db):
+        upserts = [
+            message_params(-100, msg_id, f"hash{msg_id}", 1.0, chat_title="Chat")
+            for msg_id in (1, 2, 3)
+        ]
+
+        write_message_batch(in_memory_db, upserts, [(-100, 1)], [(-100, 1), (-100, 3)])
+
+        with in_memory_db.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT msg_id, keyword_score, flagged_for_alerts_feed, "
+                    "flagged_for_interest_feed, semantic_type "
+                    "FROM messages ORDER BY msg_id"
+                )
+            ).fetchall()
+        assert rows == [
+            (1, 1.0, 1, 1, "alert_keyword"),
+            (2, 1.0, 0, 0, None),
+            (3, 1.0, 0, 1, "interest_semantic"),
+        ]
+
+    def test_batch_upsert_updates_existing_row(self, in_memory_db):
+        upsert_message(in_memory_db, -100, 1, "hash1", 1.0)
+
+        write_message_batch(
+            in_memory_db, [message_params(-100, 1, "hash2", 2.5)], [], []
+        )
+
+        with in_memory_db.connect() as conn:
+            row = conn.execute(
+                text("SELECT content_hash, score FROM messages WHERE msg_id = 1")
+            ).fetchone()
+        assert row == ("hash2", 2.5)
+
+
+@pytest.mark.unit
+def test_init_db_enables_wal_for_file_databases(tmp_path):
+    engine = init_db(f"sqlite:///{tmp_path / 'sentinel.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -SQLITE_CACHE_KIB
+    engine.dispose()
@@ -0,0 +1,160 @@
+"""Unit tests for the Redis stream message codec."""
+
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from tgsentinel.stream_codec import (
+    build_message_payload,
+    decode_fields,
+    encode_compact,
+    encode_payload,
+)
+
+
+def _payload(**overrides):
+    payload = {
+        "chat_id": -1001234567890,
+        "chat_title": "Ops",
+        "msg_id": 42,
+        "sender_id": 777,
+        "sender_name": "Ada",
+        "mentioned": True,
+        "text": "deploy finished ✅",
+        "replies": 3,
+        "reactions": 0,
+        "timestamp": "2024-05-01T12:30:00+00:00",
+        "avatar_url": "/api/avatar/user/777",
+        "chat_avatar_url": "/api/avatar/chat/1001234567890",
+        "is_reply": True,
+        "reply_to_msg_id": 40,
+        "has_media": False,
+        "media_type": None,
+        "is_pinned": False,
+        "has_forward": False,
+        "forward_from": None,
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.mark.unit
+class TestStreamCodec:
+    def test_compact_round_trip(self):
+        payload = _payload()
+
+        fields = encode_compact(payload)
+
+        assert fields["v"] == "1"
+        assert fields["x"] == ""  # everything fits the fixed fields
+        assert fields["ts"] == "1714566600000000"
+        assert decode_fields(fields) == payload
+
+    def test_compact_is_smaller_than_json(self):
+        payload = _payload()
+
+        compact = sum(len(k) + len(v) for k, v in encode_compact(payload).items())
+
+        assert compact < len("json") + len(json.dumps(payload)) / 2
+
+    def test_field_layout_is_fixed(self):
+        assert list(encode_compact(_payload())) == list(
+            encode_compact({"chat_id": 1, "text": "x"})
+        )
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [
+            {"timestamp": "2024-05-01T12:30:00.123456+02:00"},
+            {"timestamp": None},
+            {"avatar_url": None, "chat_avatar_url": None},
+            {"avatar_url": "/api/avatar/chat/1001234567890"},  # chat fallback
+            {"avatar_url": "https://cdn.example/a.png"},
+            # Foreign chat avatar, sender falls back to it
+            {
+                "avatar_url": "https://cdn.example/c.png",
+                "chat_avatar_url": "https://cdn.example/c.png",
+            },
+            {"media_type": "MessageMediaPhoto", "has_media": True},
+            {"media_type": ""},
+            {"msg_id": "legacy-string-id"},
+            {"extra_field": {"nested": [1, 2]}},
+        ],
+    )
+    def test_values_outside_the_schema_round_trip(self, overrides):
+        payload = _payload(**overrides)
+
+        assert decode_fields(encode_compact(payload)) == payload
+
+    def test_trace_fields_round_trip(self):
+        payload = _payload(trace_id="4f1c", received_us=1714566600000000)
+        payload["ingested_us"] = 1714566600012345
+
+        fields = encode_compact(payload)
+
+        assert (fields["tr"], fields["ti"], fields["x"]) == (
+            "4f1c",
+            "1714566600012345",
+            "",
+        )
+        assert decode_fields(fields) == payload
+        assert decode_fields(encode_compact(_payload(trace_id=None))) == _payload(
+            trace_id=None
+        )
+
+    def test_missing_keys_stay_missing(self):
+        payload = {"chat_id": 5, "msg_id": 1, "text": "hi"}
+
+        assert decode_fields(encode_compact(payload)) == payload
+
+    def test_legacy_json_entries_are_detected(self):
+        payload = _payload()
+
+        assert decode_fields({"json": json.dumps(payload)}) == payload
+        assert decode_fields({b"json": json.dumps(payload).encode()}) == payload
+        assert decode_fields(encode_payload(payload, codec="json")) == payload
+
+    def test_bytes_fields_decode(self):
+        fields = encode_compact(_payload())
+        raw = {k.encode(): v.encode() for k, v in fields.items()}
+
+        assert decode_fields(raw) == _payload()
+
+    def test_unknown_encoding_rejected(self):
+        with pytest.raises(ValueError):
+            decode_fields({"v": "99"})
+        with pytest.raises(ValueError):
+            decode_fields({"foo": "bar"})
+
+
+@pytest.mark.unit
+class TestBuildMessagePayload:
+    def test_reads_message_attributes(self):
+        message = SimpleNamespace(
+            id=9,
+            sender_id=5,
+            message="hello",
+            date=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            mentioned=False,
+            replies=SimpleNamespace(replies=2),
+            reactions=SimpleNamespace(results=[SimpleNamespace(count=4)]),
+            is_reply=True,
+            reply_to=SimpleNamespace(reply_to_msg_id=8),
+            media=None,
+            pinned=True,
+            forward=None,
+        )
+
+        payload = build_message_payload(
+            message, chat_id=-100, chat_title="Chat", sender_name="Bob"
+        )
+
+        assert payload["msg_id"] == 9
+        assert payload["replies"] == 2
+        assert payload["reactions"] == 4
+        assert payload["reply_to_msg_id"] == 8
+        assert payload["is_pinned"] is True
+        assert payload["timestamp"] == "2024-01-02T03:04:05+00:00"
+        assert decode_fields(encode_compact(payload)) == payload
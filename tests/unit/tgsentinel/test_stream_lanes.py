@@ -0,0 +1,59 @@
+"""Unit tests for the priority and bulk lanes of the message stream."""
+
+import pytest
+
+from tgsentinel.config import ChannelRule, ProfileDefinition
+from tgsentinel.stream_lanes import (
+    BULK_LANE,
+    PRIORITY_LANE,
+    LaneClassifier,
+    lane_streams,
+    newest_first,
+)
+
+
+@pytest.mark.unit
+class TestLaneClassifier:
+    def test_lane_streams(self):
+        assert lane_streams("s") == {PRIORITY_LANE: "s:priority", BULK_LANE: "s"}
+
+    @pytest.mark.parametrize(
+        "payload,lane",
+        [
+            ({"chat_id": 42, "sender_id": 42}, PRIORITY_LANE),
+            ({"chat_id": -100, "sender_id": 5, "mentioned": True}, PRIORITY_LANE),
+            ({"chat_id": -100, "sender_id": 7}, PRIORITY_LANE),
+            ({"chat_id": -200, "sender_id": 7}, BULK_LANE),
+            ({"chat_id": -100, "sender_id": 8}, PRIORITY_LANE),
+            ({"chat_id": -100, "sender_id": 9}, BULK_LANE),
+            ({"chat_id": -100}, BULK_LANE),
+            ({"chat_id": "junk"}, BULK_LANE),
+        ],
+    )
+    def test_lane_for(self, payload, lane, app_cfg):
+        classifier = LaneClassifier(
+            app_cfg(
+                channels=[ChannelRule(id=-100, vip_senders=[7])],
+                global_profiles={
+                    "vip": ProfileDefinition(id="vip", vip_senders=[8]),
+                    "off": ProfileDefinition(id="off", vip_senders=[9], enabled=False),
+                },
+            )
+        )
+
+        assert classifier.lane_for(payload) == lane
+        assert classifier.stream_for(payload) == lane_streams("s")[lane]
+
+
+@pytest.mark.unit
+def test_newest_first_merges_lanes_by_entry_id():
+    priority = [("1700000000005-0", {"n": 5}), ("1700000000001-0", {"n": 1})]
+    bulk = [
+        ("1700000000004-1", {"n": 4}),
+        ("1700000000004-0", {"n": 3}),
+        ("1700000000000-0", {"n": 0}),
+    ]
+
+    merged = newest_first([priority, bulk, None], limit=4)
+
+    assert [fields["n"] for _, fields in merged] == [5, 4, 3, 1]
@@ -0,0 +1,165 @@
+"""Unit tests for pending-entry reclaim and the dead-letter stream."""
+
+import pytest
+
+from tgsentinel.stream_codec import encode_compact
+from tgsentinel.stream_reclaim import (
+    PendingReclaimer,
+    delete_dead_letter,
+    list_dead_letters,
+    replay_dead_letter,
+)
+
+
+class _StreamRedis:
+    """Minimal synchronous Redis with the stream calls used by the reclaimer."""
+
+    def __init__(self):
+        self.streams: dict[str, list] = {}
+        self.pending: dict[str, int] = {}  # entry id -> times delivered
+        self.acked: list[str] = []
+        self.maxlens: list = []
+        self._seq = 0
+
+    def add(self, stream, fields, deliveries=1):
+        entry_id = self.xadd(stream, fields)
+        self.pending[entry_id] = deliveries
+        return entry_id
+
+    def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self.maxlens.append(maxlen)
+        self._seq += 1
+        entry_id = f"{self._seq}-0"
+        self.streams.setdefault(stream, []).append((entry_id, dict(fields)))
+        return entry_id
+
+    def xautoclaim(self, stream, group, consumer, min_idle_time, start_id, count):
+        claimed = []
+        for entry_id in list(self.pending)[:count]:
+            self.pending[entry_id] += 1
+            fields = dict(self.streams.get(stream, [])).get(entry_id)
+            claimed.append((entry_id, fields))
+        return ["0-0", claimed, []]
+
+    def xpending_range(self, stream, group, min, max, count):
+        if min not in self.pending:
+            return []
+        return [{"message_id": min, "times_delivered": self.pending[min]}]
+
+    def xack(self, stream, group, *ids):
+        for entry_id in ids:
+            self.pending.pop(entry_id, None)
+            self.acked.append(entry_id)
+        return len(ids)
+
+    def xrevrange(self, stream, max, min, count):
+        entries = list(reversed(self.streams.get(stream, [])))
+        if max.startswith("("):
+            bound = max[1:]
+            entries = [e for e in entries if e[0] < bound]
+        return entries[:count]
+
+    def xrange(self, stream, min, max, count):
+        return [e for e in self.streams.get(stream, []) if min <= e[0] <= max][:count]
+
+    def xlen(self, stream):
+        return len(self.streams.get(stream, []))
+
+    def xdel(self, stream, *ids):
+        before = len(self.streams.get(stream, []))
+        self.streams[stream] = [
+            e for e in self.streams.get(stream, []) if e[0] not in ids
+        ]
+        return before - len(self.streams[stream])
+
+
+def _reclaimer(r, **kwargs):
+    return PendingReclaimer(r, "s", "g", "c", **kwargs)
+
+
+@pytest.mark.unit
+class TestPendingReclaimer:
+    @pytest.mark.asyncio
+    async def test_idle_entries_are_returned_for_retry(self):
+        r = _StreamRedis()
+        entry_id = r.add("s", encode_compact({"chat_id": 1, "text": "hi"}))
+
+        retry = await _reclaimer(r).reclaim()
+
+        assert [entry for entry, _ in retry] == [entry_id]
+        assert entry_id in r.pending  # still unacked until processed
+
+    @pytest.mark.asyncio
+    async def test_poison_entry_is_dead_lettered(self):
+        r = _StreamRedis()
+        entry_id = r.add("s", encode_compact({"chat_id": 1, "text": "bad"}), 3)
+        reclaimer = _reclaimer(r, max_deliveries=3)
+        reclaimer.record_failure(entry_id, ValueError("boom"))
+
+        assert await reclaimer.reclaim() == []
+
+        assert entry_id in r.acked
+        dead_id, dead = r.streams["s:dlq"][0]
+        assert dead["dlq_source_id"] == entry_id
+        assert dead["dlq_deliveries"] == "4"
+        assert dead["dlq_error"] == "ValueError: boom"
+        assert reclaimer.stats["dead_lettered"] == 1
+
+    @pytest.mark.asyncio
+    async def test_trimmed_entries_are_acked(self):
+        r = _StreamRedis()
+        r.pending["99-0"] = 1  # pending but no longer in the stream
+
+        assert await _reclaimer(r).reclaim() == []
+
+        assert r.acked == ["99-0"]
+
+    @pytest.mark.asyncio
+    async def test_inflight_entries_are_skipped(self):
+        r = _StreamRedis()
+        entry_id = r.add("s", {"json": "{}"}, 10)
+
+        assert await _reclaimer(r, max_deliveries=1).reclaim(skip={entry_id}) == []
+
+        assert "s:dlq" not in r.streams
+
+
+@pytest.mark.unit
+class TestDeadLetterApi:
+    def _dead_letter(self, r):
+        payload = {"chat_id": 5, "msg_id": 7, "text": "x"}
+        fields = encode_compact(payload)
+        fields.update({"dlq_source_id": "1-0", "dlq_deliveries": "6", "dlq_error": "E"})
+        return r.xadd("s:dlq", fields), payload
+
+    def test_list_decodes_payload(self):
+        r = _StreamRedis()
+        dead_id, payload = self._dead_letter(r)
+
+        data = list_dead_letters(r, "s")
+
+        assert data["total"] == 1
+        entry = data["entries"][0]
+        assert entry["id"] == dead_id
+        assert entry["deliveries"] == 6
+        assert entry["payload"] == payload
+
+    def test_replay_strips_metadata(self):
+        r = _StreamRedis()
+        dead_id, payload = self._dead_letter(r)
+
+        new_id = replay_dead_letter(r, "s", dead_id)
+
+        assert new_id is not None
+        replayed = dict(r.streams["s"])[new_id]
+        assert not any(key.startswith("dlq_") for key in replayed)
+        assert r.maxlens[-1] is None  # trimming stays with the backpressure monitor
+        assert r.xlen("s:dlq") == 0
+        assert replay_dead_letter(r, "s", dead_id) is None
+
+    def test_delete(self):
+        r = _StreamRedis()
+        dead_id, _ = self._dead_letter(r)
+
+        assert delete_dead_letter(r, "s", dead_id) is True
+        assert delete_dead_letter(r, "s", dead_id) is False
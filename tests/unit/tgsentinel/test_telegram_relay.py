@@ -0,0 +1,213 @@
+"""Unit tests for the Telegram relay used by worker pool processes."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import tgsentinel.telegram_relay as relay_module
+from tgsentinel.own_messages import OwnMessageIndex
+from tgsentinel.telegram_relay import (
+    RELAY_QUEUE_KEY,
+    TelegramRelayClient,
+    TelegramRelayServer,
+)
+
+
+class _ListRedis:
+    """Async Redis with the list commands used by the relay."""
+
+    def __init__(self):
+        self.lists: dict[str, list] = {}
+        self.ttl: dict[str, int] = {}
+        self._changed = asyncio.Condition()
+
+    async def rpush(self, key, value):
+        async with self._changed:
+            self.lists.setdefault(key, []).append(value)
+            self._changed.notify_all()
+        return len(self.lists[key])
+
+    async def blpop(self, keys, timeout=0):
+        async def _pop():
+            async with self._changed:
+                while True:
+                    for key in keys:
+                        if self.lists.get(key):
+                            return key, self.lists[key].pop(0)
+                    await self._changed.wait()
+
+        try:
+            return await asyncio.wait_for(_pop(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def expire(self, key, seconds):
+        self.ttl[key] = seconds
+        return True
+
+
+class _FakeTelegram:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, entity, message):
+        self.sent.append((entity, message))
+
+    async def get_messages(self, entity, ids=None):
+        if ids == 404:
+            return None
+        return SimpleNamespace(id=ids, sender_id=99)
+
+    async def get_me(self):
+        return SimpleNamespace(id=42, username="me")
+
+
+async def _serve_one(server, r):
+    _, raw = await r.blpop([RELAY_QUEUE_KEY], timeout=5)
+    await server.handle(json.loads(raw))
+
+
+@pytest.mark.unit
+class TestTelegramRelay:
+    @pytest.mark.asyncio
+    async def test_request_response_calls(self):
+        r = _ListRedis()
+        telegram = _FakeTelegram()
+        server = TelegramRelayServer(lambda: telegram, r)
+        client = TelegramRelayClient(r, timeout=5)
+
+        serving = asyncio.create_task(_serve_one(server, r))
+        me = await client.get_me()
+        await serving
+        serving = asyncio.create_task(_serve_one(server, r))
+        message = await client.get_messages(-100, ids=7)
+        await serving
+        serving = asyncio.create_task(_serve_one(server, r))
+        missing = await client.get_messages(-100, ids=404)
+        await serving
+
+        assert me.id == 42
+        assert (message.id, message.sender_id) == (7, 99)
+        assert missing is None
+        assert all(seconds == 60 for seconds in r.ttl.values())
+
+    @pytest.mark.asyncio
+    async def test_send_message_waits_for_the_send(self):
+        r = _ListRedis()
+        telegram = _FakeTelegram()
+        server = TelegramRelayServer(lambda: telegram, r)
+        client = TelegramRelayClient(r, timeout=5)
+
+        serving = asyncio.create_task(_serve_one(server, r))
+        await client.send_message("me", "alert")
+        await serving
+
+        assert telegram.sent == [("me", "alert")]
+
+    @pytest.mark.asyncio
+    async def test_failed_send_is_raised_in_the_caller(self):
+        r = _ListRedis()
+        telegram = _FakeTelegram()
+
+        async def send_message(entity, message):
+            raise ValueError("Could not find the input entity")
+
+        telegram.send_message = send_message
+        server = TelegramRelayServer(lambda: telegram, r)
+        client = TelegramRelayClient(r, timeout=5)
+
+        serving = asyncio.create_task(_serve_one(server, r))
+        with pytest.raises(RuntimeError, match="input entity"):
+            await client.send_message("nobody", "alert")
+        await serving
+
+    @pytest.mark.asyncio
+    async def test_errors_are_raised_in_the_caller(self):
+        r = _ListRedis()
+        server = TelegramRelayServer(lambda: _FakeTelegram(), r)
+        client = TelegramRelayClient(r, timeout=5)
+
+        serving = asyncio.create_task(_serve_one(server, r))
+        with pytest.raises(RuntimeError, match="unknown relay operation"):
+            await client._call("delete_everything")
+        await serving
+
+    @pytest.mark.asyncio
+    async def test_unanswered_call_times_out(self):
+        client = TelegramRelayClient(_ListRedis(), timeout=1)
+
+        with pytest.raises(TimeoutError):
+            await client.get_me()
+
+    @pytest.mark.asyncio
+    async def test_slow_call_does_not_block_other_requests(self):
+        r = _ListRedis()
+        release = asyncio.Event()
+        telegram = _FakeTelegram()
+
+        async def flood_waited(entity, ids=None):
+            await release.wait()  # Telethon sleeping through a flood wait
+            return SimpleNamespace(id=ids, sender_id=99)
+
+        telegram.get_messages = flood_waited
+        server = TelegramRelayServer(lambda: telegram, r, max_concurrency=2)
+        client = TelegramRelayClient(r, timeout=5)
+        serving = asyncio.create_task(server.run())
+
+        slow = asyncio.create_task(client.get_messages(-100, ids=7))
+        me = await client.get_me()
+        release.set()
+        message = await slow
+        serving.cancel()
+
+        assert me.id == 42 and message.id == 7
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        r = _ListRedis()
+        running = []
+        peak = []
+        telegram = _FakeTelegram()
+
+        async def send_message(entity, message):
+            running.append(message)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(message)
+            telegram.sent.append((entity, message))
+
+        telegram.send_message = send_message
+        server = TelegramRelayServer(lambda: telegram, r, max_concurrency=3)
+        serving = asyncio.create_task(server.run())
+
+        client = TelegramRelayClient(r, timeout=5)
+        await asyncio.gather(
+            *(client.send_message("me", f"alert {i}") for i in range(10))
+        )
+        serving.cancel()
+
+        assert len(telegram.sent) == 10
+
+        assert max(peak) == 3
+
+    @pytest.mark.asyncio
+    async def test_is_ours_answered_from_the_owner_index(self, monkeypatch):
+        r = _ListRedis()
+        index = OwnMessageIndex()
+        index.observe(-100, 10)
+        index.add(-100, 12)
+        monkeypatch.setattr(relay_module, "get_own_message_index", lambda: index)
+
+        def no_telegram():
+            raise AssertionError("is_ours must not reach Telegram")
+
+        server = TelegramRelayServer(no_telegram, r)
+        client = TelegramRelayClient(r, timeout=5)
+        serving = asyncio.create_task(server.run())
+
+        answers = [await client.is_ours(-100, msg_id) for msg_id in (12, 11, 3)]
+        serving.cancel()
+
+        assert answers == [True, False, None]
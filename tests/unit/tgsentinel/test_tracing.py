@@ -0,0 +1,105 @@
+"""Unit tests for per-message pipeline tracing."""
+
+import json
+import time
+
+import pytest
+
+from tgsentinel.stream_codec import decode_fields, encode_compact
+from tgsentinel.tracing import (
+    INGESTED_US,
+    RECEIVED_US,
+    TRACE_ID,
+    TRACE_KEY,
+    MessageTrace,
+    TraceLog,
+    now_us,
+    slowest_traces,
+    stamp_ingest,
+)
+
+
+class _Redis:
+    def __init__(self):
+        self.lists: dict[str, list] = {}
+
+    def lpush(self, name, value):
+        self.lists.setdefault(name, []).insert(0, value)
+
+    def ltrim(self, name, start, end):
+        self.lists[name] = self.lists.get(name, [])[start : end + 1]
+
+    def lrange(self, name, start, end):
+        items = self.lists.get(name, [])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+
+@pytest.mark.unit
+class TestTracing:
+    def test_ingestion_stamp_survives_the_codec(self):
+        payload = {"chat_id": -100, "msg_id": 7, "text": "hi"}
+        stamp_ingest(payload, received_us=now_us() - 20_000)
+
+        assert len(payload[TRACE_ID]) == 16
+        assert payload[INGESTED_US] - payload[RECEIVED_US] >= 20_000
+
+        fields = encode_compact(payload)
+        assert fields["tr"] == payload[TRACE_ID]
+        assert set(json.loads(fields["x"])) == {"-"}  # only the absent keys
+        assert decode_fields(fields) == payload
+
+    def test_stages_add_up_from_ingestion(self):
+        ingested = now_us() - 50_000
+        payload = {
+            "chat_id": -100,
+            "msg_id": 7,
+            TRACE_ID: "abc",
+            RECEIVED_US: ingested - 10_000,
+            INGESTED_US: ingested,
+        }
+
+        trace = MessageTrace(payload, lane="bulk", entry_id="1-0")
+        time.sleep(0.01)
+        trace.lap("queue")
+        with trace.stage("dm_send"):
+            time.sleep(0.01)
+        trace.lap()  # the stage timed itself
+        trace.lap("persistence")
+        record = trace.to_dict()
+
+        stages = record["stages"]
+        assert list(stages) == [
+            "enrichment",
+            "stream_wait",
+            "queue",
+            "persistence",
+            "dm_send",
+        ]
+        assert stages["enrichment"] == pytest.approx(0.01)
+        assert stages["stream_wait"] >= 0.05
+        assert stages["queue"] >= 0.01 and stages["dm_send"] >= 0.01
+        assert stages["persistence"] < 0.01
+        assert record["total_seconds"] >= 0.08
+        assert record["trace_id"] == "abc" and record["entry_id"] == "1-0"
+
+    def test_untraced_payloads_start_at_the_read(self):
+        trace = MessageTrace({"chat_id": 1, "msg_id": 2})
+
+        assert trace.stages == {}
+        assert trace.to_dict()["total_seconds"] < 1
+
+    @pytest.mark.asyncio
+    async def test_log_is_capped_and_ranked(self):
+        r = _Redis()
+        log = TraceLog(r, size=3)
+        for n, (age, queue) in enumerate([(9, 9), (5, 0), (3, 1), (2, 2)]):
+            ingested = now_us() - age * 1_000_000
+            payload = {"msg_id": n, RECEIVED_US: ingested, INGESTED_US: ingested}
+            trace = MessageTrace(payload)
+            trace.record("queue", queue)
+            await log.record(trace)
+
+        assert len(r.lists[TRACE_KEY]) == 3
+        # msg 0 (the slowest overall) was pushed out by newer traces
+        assert [t["msg_id"] for t in slowest_traces(r, limit=2)] == [1, 2]
+        assert [t["msg_id"] for t in slowest_traces(r, stage="queue")] == [3, 2, 1]
@@ -0,0 +1,116 @@
+"""Unit tests for the worker orchestrator's worker pool mode."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import tgsentinel.semantic as semantic_module
+import tgsentinel.worker as worker_module
+import tgsentinel.worker_orchestrator as orchestrator_module
+from tgsentinel.catch_up import LastSeenIndex
+from tgsentinel.config import RedisCfg, WorkerCfg
+from tgsentinel.worker_orchestrator import WorkerOrchestrator
+
+
+class _Redis:
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+class _Client:
+    """Session owner's Telegram client; records reconnects."""
+
+    def __init__(self):
+        self.calls = []
+
+    def disconnect(self):
+        self.calls.append("disconnect")
+
+    async def connect(self):
+        self.calls.append("connect")
+
+    async def is_user_authorized(self):
+        return True
+
+    async def get_me(self):
+        return SimpleNamespace(id=42, username="me", first_name="Me")
+
+    async def get_profile_photos(self, entity, limit=1):
+        return []
+
+
+class _Relay:
+    def __init__(self, *args):
+        pass
+
+    async def run(self):
+        await asyncio.Event().wait()
+
+
+class _Pool:
+    """Scoring processes alive until the reload marker is touched and removed."""
+
+    alive = 2
+
+    def __init__(self, marker):
+        self.marker = marker
+        self.stopped = False
+
+    async def supervise(self):
+        while not self.marker.exists():
+            await asyncio.sleep(0.01)
+        while self.marker.exists():
+            await asyncio.sleep(0.01)
+
+    def stop(self):
+        self.stopped = True
+
+
+def _cfg(channels=()):
+    return SimpleNamespace(
+        channels=list(channels),
+        system=SimpleNamespace(redis=RedisCfg(stream="s"), worker=WorkerCfg()),
+    )
+
+
+@pytest.mark.unit
+class TestWorkerPoolMode:
+    @pytest.mark.asyncio
+    async def test_owner_reconnects_and_removes_the_reload_marker(
+        self, tmp_path, monkeypatch
+    ):
+        marker = tmp_path / ".reload_config"
+        index = LastSeenIndex()
+        reloaded = _cfg(channels=[SimpleNamespace(id=1, name="c")])
+        monkeypatch.setattr(orchestrator_module, "RELOAD_MARKER", marker)
+        monkeypatch.setattr(orchestrator_module, "RELOAD_CHECK_INTERVAL", 0.01)
+        monkeypatch.setattr(orchestrator_module, "RELOAD_MARKER_GRACE", 0.05)
+        monkeypatch.setattr(orchestrator_module, "load_config", lambda: reloaded)
+        monkeypatch.setattr(orchestrator_module, "TelegramRelayServer", _Relay)
+        monkeypatch.setattr(orchestrator_module, "lane_monitors", lambda *a: {})
+        monkeypatch.setattr(worker_module, "get_last_seen_index", lambda: index)
+        monkeypatch.setattr(semantic_module, "reopen_embedding_cache", lambda: None)
+
+        client, r, pool = _Client(), _Redis(), _Pool(marker)
+        orchestrator = WorkerOrchestrator.__new__(WorkerOrchestrator)
+        orchestrator.cfg = _cfg()
+        orchestrator.client_ref = lambda: client
+        orchestrator.redis_mgr = SimpleNamespace(async_redis=r)
+        orchestrator.handshake_gate = asyncio.Event()
+        orchestrator.worker_pool = pool
+
+        serving = asyncio.create_task(orchestrator._serve_worker_pool())
+        await asyncio.sleep(0.05)
+        marker.touch()  # UI reload or logout
+        await asyncio.wait_for(serving, timeout=5)
+
+        assert client.calls == ["disconnect", "connect"]
+        assert index.pending  # catch-up runs for the disconnected time
+        assert orchestrator.cfg is reloaded
+        assert "tgsentinel:user_info" in r.values
+        assert not marker.exists()
+        assert pool.stopped
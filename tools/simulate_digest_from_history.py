@@ -26,7 +26,6 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import json
 import logging
 import sys
 from pathlib import Path
@@ -42,6 +41,7 @@ from tgsentinel.config import AppCfg, load_config
 from tgsentinel.digest import send_digest
 from tgsentinel.heuristics import run_heuristics
 from tgsentinel.store import init_db, mark_for_alerts_feed, upsert_message
+from tgsentinel.stream_codec import decode_fields
 
 log = logging.getLogger("simulate_digest")
 
@@ -182,7 +182,7 @@ async def main() -> int:
         if entries:
             for _id, fields in reversed(entries):  # type: ignore[arg-type]
                 try:
-                    payload = json.loads(fields.get("json", "{}"))
+                    payload = decode_fields(fields)
                 except Exception:
                     continue
                 _score_and_store(cfg, payload, engine)
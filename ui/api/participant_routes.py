@@ -62,6 +62,26 @@ def _get_avatar_url(entity_id: int, is_user: bool) -> str | None:
     return None
 
 
+def _get_directory_entry(redis_client, entity_id: int) -> dict | None:
+    """Look up an entity in the sentinel's shared directory (tgsentinel:entities).
+
+    Returns:
+        Dict with id, name, type, username and photo_id, or None if unknown
+    """
+    if not redis_client:
+        return None
+    try:
+        raw = redis_client.hget("tgsentinel:entities", str(entity_id))
+        if raw:
+            if isinstance(raw, bytes):
+                raw = raw.decode()
+            entry = json.loads(str(raw))
+            return entry if isinstance(entry, dict) else None
+    except Exception as e:
+        logger.debug("Entity directory lookup failed: %s", e)
+    return None
+
+
 @participant_bp.get("/api/participant/info")
 def api_participant_info():
     """Get detailed participant information from Telegram."""
@@ -157,6 +177,10 @@ def api_participant_info():
                                     or basic["title"]
                                 )
                                 break
+                    if not basic["title"]:
+                        entry = _get_directory_entry(redis_client, chat_id)
+                        if entry:
+                            basic["title"] = entry.get("name") or None
                     # Try to include avatar_url from cache
                     avatar_url = _get_avatar_url(chat_id, is_user=False)
                     if avatar_url:
@@ -214,8 +238,15 @@ def api_participant_info():
                     break
 
         if not chat_info:
-            # Final fallback if not found in config
-            basic = {"id": chat_id, "title": f"Chat {chat_id}", "type": chat_type}
+            # Final fallback if not found in config: entity directory, then ID
+            entry = _get_directory_entry(redis_client, chat_id) or {}
+            basic = {
+                "id": chat_id,
+                "title": entry.get("name") or f"Chat {chat_id}",
+                "type": chat_type,
+            }
+            if entry.get("username"):
+                basic["username"] = entry["username"]
             # Try to include cached avatar
             avatar_url = _get_avatar_url(chat_id, is_user=False)
             if avatar_url:
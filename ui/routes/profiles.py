@@ -339,25 +339,26 @@ def backtest_interest_profile():
             400,
         )
 
-    # Validate hours_back bounds (prevent resource exhaustion)
-    if hours_back < 0 or hours_back > 168:
+    # Validate hours_back bounds (prevent resource exhaustion); longer windows
+    # go through the Sentinel backtest jobs API, which reports progress
+    if hours_back < 0 or hours_back > 744:
         return (
             jsonify(
                 {
                     "status": "error",
-                    "message": "hours_back must be between 0 and 168 (7 days)",
+                    "message": "hours_back must be between 0 and 744 (31 days)",
                 }
             ),
             400,
         )
 
     # Validate max_messages bounds (prevent SQL injection and excessive queries)
-    if max_messages < 1 or max_messages > 1000:
+    if max_messages < 1 or max_messages > 100000:
         return (
             jsonify(
                 {
                     "status": "error",
-                    "message": "max_messages must be between 1 and 1000",
+                    "message": "max_messages must be between 1 and 100000",
                 }
             ),
             400,
@@ -443,14 +444,15 @@ def backtest_interest_profile():
 
             payload = {
                 "profile_name": profile_name,
+                "profile_id": profile_id,
                 "profile": profile,
                 "hours_back": hours_back,
                 "max_messages": max_messages,
             }
 
             response = requests.post(
-                backtest_url, json=payload, timeout=30
-            )  # 30s timeout for semantic processing
+                backtest_url, json=payload, timeout=120
+            )  # 120s timeout for semantic processing
 
             if not response.ok:
                 error_data = response.json() if response.text else {}
@@ -481,7 +483,7 @@ def backtest_interest_profile():
                 jsonify(
                     {
                         "status": "error",
-                        "message": "Semantic scoring timeout (>30s). Try reducing hours_back or max_messages.",
+                        "message": "Semantic scoring timeout (>120s). Try reducing hours_back or max_messages.",
                     }
                 ),
                 504,
@@ -552,7 +554,7 @@ def list_alert_profiles():
                         FROM messages
                         WHERE (flagged_for_alerts_feed = 1 OR flagged_for_interest_feed = 1)
                           AND triggers LIKE :profile_pattern
-                          AND datetime(created_at) >= datetime('now', '-24 hours')
+                          AND created_at >= datetime('now', '-24 hours')
                         """,
                         profile_pattern=f"%{profile_id}%",
                     )
@@ -1006,6 +1008,8 @@ def upsert_interest_profile():
         profile_data.setdefault("threshold", 0.42)
         profile_data.setdefault("positive_weight", 1.0)
         profile_data.setdefault("negative_weight", 0.15)
+        profile_data.setdefault("scoring_mode", "centroid")
+        profile_data.setdefault("knn_k", 3)
         profile_data.setdefault("vip_senders", [])
         profile_data.setdefault("excluded_users", [])
         profile_data.setdefault("channels", [])
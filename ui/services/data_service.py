@@ -128,9 +128,14 @@ class DataService:
         redis_online = False
 
         if self.redis_client:
+            from tgsentinel.stream_lanes import lane_streams
+
             try:
-                depth_val = self.redis_client.xlen(stream_name)
-                redis_depth = int(depth_val) if depth_val else 0
+                # Depth over every lane of the stream
+                redis_depth = sum(
+                    int(self.redis_client.xlen(name) or 0)
+                    for name in lane_streams(stream_name).values()
+                )
                 redis_online = True
             except Exception as exc:
                 logger.debug("Redis depth unavailable: %s", exc)
@@ -193,19 +198,22 @@ class DataService:
         Returns:
             List of message dictionaries
         """
-        import json
+        from tgsentinel.stream_codec import decode_fields, is_encoded_entry
+        from tgsentinel.stream_lanes import lane_streams, newest_first
 
         entries: List[Dict[str, Any]] = []
         if not self.redis_client:
             return self._fallback_feed(limit)
 
         try:
-            raw_entries = self.redis_client.xrevrange(
-                self._get_stream_name(), count=limit
+            # Newest entries of both lanes, merged by stream id
+            iterable: Iterable[Any] = newest_first(
+                (
+                    self.redis_client.xrevrange(name, count=limit)
+                    for name in lane_streams(self._get_stream_name()).values()
+                ),
+                limit,
             )
-            iterable: Iterable[Any] = raw_entries or []
-            if not isinstance(iterable, list):
-                iterable = list(iterable)
 
             # Build chat_id to channel name mapping
             chat_id_to_name = {}
@@ -217,12 +225,10 @@ class DataService:
             for entry_id, payload in iterable:
                 data = dict(payload)
 
-                # Parse JSON field if present
-                json_str = data.get("json")
-                if json_str:
+                # Decode the message payload (compact or legacy JSON entries)
+                if is_encoded_entry(data):
                     try:
-                        parsed = json.loads(json_str)
-                        data.update(parsed)
+                        data.update(decode_fields(data))
                     except Exception:
                         pass
 
@@ -342,6 +342,8 @@
             document.getElementById("similarity-threshold").value = profile.threshold || 0.42;
             document.getElementById("positive-weight").value = profile.positive_weight || 1.0;
             document.getElementById("negative-weight").value = profile.negative_weight || 0.15;
+            document.getElementById("scoring-mode").value = profile.scoring_mode || "centroid";
+            document.getElementById("knn-k").value = profile.knn_k || 3;
             document.getElementById("profile-enabled").value = profile.enabled !== false ? "true" : "false";
             
             // VIP and excluded users
@@ -423,6 +425,8 @@
             threshold: parseFloat(document.getElementById("similarity-threshold").value) || 0.42,
             positive_weight: parseFloat(document.getElementById("positive-weight")?.value) || 1.0,
             negative_weight: parseFloat(document.getElementById("negative-weight")?.value) || 0.15,
+            scoring_mode: document.getElementById("scoring-mode")?.value || "centroid",
+            knn_k: parseInt(document.getElementById("knn-k")?.value) || 3,
             vip_senders: document.getElementById("interest-vip-senders").value
                 .split(",").map(s => s.trim()).filter(s => s).map(s => parseInt(s)).filter(n => !isNaN(n)),
             excluded_users: document.getElementById("interest-excluded-users").value
@@ -731,6 +735,8 @@
         document.getElementById("similarity-threshold").value = "0.42";
         document.getElementById("positive-weight").value = "1.0";
         document.getElementById("negative-weight").value = "0.15";
+        document.getElementById("scoring-mode").value = "centroid";
+        document.getElementById("knn-k").value = "3";
         document.getElementById("profile-enabled").value = "true";
         document.getElementById("interest-vip-senders").value = "";
         document.getElementById("interest-excluded-users").value = "";